@@ -17,26 +17,28 @@
 3. 提取和处理样式
 4. (可选)使用AI增强分析
 5. 生成Vue项目
+
+各步骤由流水线（pipeline.py）按输入输出依赖调度，互不依赖的步骤并发执行。
 """
 
 import os
 import logging
-import time
-from tqdm import tqdm
 from colorama import Fore
 
-# LangChain相关导入，用于AI增强功能
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
+from pipeline import Pipeline, PipelineError
+from tracing import span
+from component_clustering import cluster_html_analysis
+from performance_audit import audit_performance
+from output_writer import OutputWriter
 
-# 加载环境变量
-load_dotenv()
+# LangChain、OpenAI客户端和提示词相关模块只在启用AI增强分析时才导入（导入langchain需要数秒）
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 组件聚类的相似度阈值
+CLUSTER_THRESHOLD = 0.5
+
 class CloneAgent:
     """
     网页克隆代理类，负责协调各模块完成克隆任务
@@ -45,7 +47,7 @@ class CloneAgent:
     并处理它们之间的数据传递。
     """
     
-    def __init__(self, web_scraper, html_analyzer, style_extractor, document_generator):
+    def __init__(self, web_scraper, html_analyzer, style_extractor, document_generator, max_workers=4, verbose=True):
         """
         初始化克隆代理
         
@@ -54,6 +56,8 @@ class CloneAgent:
             html_analyzer (HtmlAnalyzer): HTML分析器实例
             style_extractor (StyleExtractor): 样式提取器实例
             document_generator (WebsiteDocumentGenerator): 网页文档生成器实例
+            max_workers (int): 并发执行流水线阶段的最大线程数
+            verbose (bool): 是否在终端显示各阶段进度和耗时（批量模式下关闭，由汇总表代替）
         """
         # 保存各个组件
         self.web_scraper = web_scraper
@@ -61,84 +65,155 @@ class CloneAgent:
         self.style_extractor = style_extractor
         self.document_generator = document_generator
         
+        # 流水线并发度和最近一次执行的记录（含各阶段耗时）
+        self.max_workers = max_workers
+        self.verbose = verbose
+        self.last_run = None
+        
+        # 剖析模式（--profile）下的阶段剖析器，见 profiling.py
+        self.profiler = None
+        
+        # 加载环境变量
+        from dotenv import load_dotenv
+        load_dotenv()
+        
+        # 阶段结果缓存：页面内容不变时跳过分析和文档生成
+        self.stage_cache = self._create_stage_cache()
+        
         # 检查并初始化OpenAI功能（如果有API密钥）
         api_key = os.getenv('OPENAI_API_KEY')
         api_url = os.getenv('OPENAI_API_URL')
         if api_key:
-            if api_url:
-                self.llm = OpenAI(temperature=0.3, openai_api_base=api_url)
+            from llm_cache import HttpCompletionClient
+            from prompt_builder import PromptBuilder
+            
+            if os.getenv('LLM_CLIENT', 'langchain').lower() == 'http':
+                # 直接请求OpenAI兼容的 /completions 接口
+                self.llm = HttpCompletionClient(
+                    api_url or 'https://api.openai.com/v1',
+                    api_key=api_key,
+                    model=os.getenv('OPENAI_MODEL') or 'gpt-3.5-turbo-instruct',
+                    temperature=0.3
+                )
+                model_name = self.llm.model
             else:
-                self.llm = OpenAI(temperature=0.3)
+                from langchain.llms import OpenAI
+                if api_url:
+                    self.llm = OpenAI(temperature=0.3, openai_api_base=api_url)
+                else:
+                    self.llm = OpenAI(temperature=0.3)
+                model_name = getattr(self.llm, 'model_name', 'default')
             self.use_llm = True
+            self.llm_executor = self._create_llm_executor(self.llm, model_name)
+            
+            # 提示词中页面内容和组件摘要的token预算
+            self.prompt_builder = PromptBuilder()
+            self.page_content_tokens = int(os.getenv('LLM_PAGE_TOKENS') or 1200)
+            self.component_tokens = int(os.getenv('LLM_COMPONENT_TOKENS') or 1500)
             logger.info("已成功配置OpenAI API，将使用AI辅助分析功能")
         else:
             self.use_llm = False
+            self.llm_executor = None
             logger.warning("未找到OPENAI_API_KEY环境变量，将不使用AI辅助分析")
     
-    def clone_website(self, url, output_dir):
+    def _create_llm_executor(self, llm, model_name):
+        """
+        根据环境变量创建带缓存的LLM并发执行器
+        
+        参数:
+            llm (callable): 接收提示词返回补全文本的LLM
+            model_name (str): 模型名称（参与缓存键）
+        
+        返回:
+            LLMExecutor: LLM执行器
+        """
+        from llm_cache import LLMCache, LLMExecutor, DEFAULT_CACHE_DIR
+        
+        cache = None
+        if os.getenv('LLM_CACHE', '1') != '0':
+            cache = LLMCache(
+                cache_dir=os.getenv('LLM_CACHE_DIR') or DEFAULT_CACHE_DIR,
+                ttl=float(os.getenv('LLM_CACHE_TTL') or 7 * 24 * 3600),
+                max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB') or 100) * 1024 * 1024)
+            )
+        
+        return LLMExecutor(
+            llm,
+            model=model_name,
+            temperature=0.3,
+            cache=cache,
+            concurrency=int(os.getenv('LLM_CONCURRENCY') or 2),
+            rate_limit=float(os.getenv('LLM_RATE_LIMIT') or 0) or None
+        )
+    
+    def _create_stage_cache(self):
+        """
+        根据环境变量创建阶段结果缓存
+        
+        返回:
+            StageCache: 阶段缓存，STAGE_CACHE=0 时为None
+        """
+        if os.getenv('STAGE_CACHE', '1') == '0':
+            return None
+        
+        from stage_cache import StageCache, DEFAULT_STAGE_CACHE_DIR
+        ttl = float(os.getenv('STAGE_CACHE_TTL') or 0) or None
+        return StageCache(
+            cache_dir=os.getenv('STAGE_CACHE_DIR') or DEFAULT_STAGE_CACHE_DIR,
+            ttl=ttl,
+            max_bytes=int(float(os.getenv('STAGE_CACHE_MAX_MB') or 500) * 1024 * 1024)
+        )
+    
+    def clone_website(self, url, output_dir, cached_artifacts=None, on_stage_end=None):
         """
         执行网页克隆的完整流程
         
+        各步骤作为流水线阶段执行：HTML分析与颜色方案/样式提取互不依赖，会并发执行；
+        AI增强分析是可选阶段，失败时不影响文档生成。
+        
         参数:
             url (str): 目标网页URL
             output_dir (str): 输出目录路径
+            cached_artifacts (dict): 之前执行保存的中间结果（输出名称 -> 结果），
+                                     产出已全部提供的阶段不再执行
+            on_stage_end (callable): 每个阶段结束时的额外回调，参数为 Stage 和 StageResult
         
         返回:
             bool: 克隆是否成功
         """
         try:
-            # === 步骤1: 抓取网页内容 ===
-            print(f"{Fore.CYAN}步骤1/5: 抓取网页内容 - {url}{Fore.RESET}")
-            page_data = self.web_scraper.fetch_url(url)
+            pipeline = self._build_pipeline(on_stage_end)
+            # 调用方激活了追踪器（见 tracing.py）时，各阶段的区间嵌套在这个区间之下
+            with span('clone', 'clone', url=url):
+                run = pipeline.run(url=url, **(cached_artifacts or {}))
+            self.last_run = run
             
-            # === 步骤2: 分析HTML结构 ===
-            print(f"{Fore.CYAN}步骤2/5: 分析HTML结构{Fore.RESET}")
-            html_analysis = self.html_analyzer.analyze(page_data['html'])
-            
-            # === 步骤3: 提取和处理样式 ===
-            print(f"{Fore.CYAN}步骤3/5: 提取样式信息{Fore.RESET}")
-            # 提取CSS样式
-            style_analysis = self.style_extractor.extract_styles(
-                page_data['css_files'],
-                page_data['css_content'],
-                page_data['html'],
-                page_data['base_url']
-            )
-            
-            # 提取颜色方案和字体
-            color_analysis = self.style_extractor.extract_color_palette(page_data['css_content'])
-            
-            # === 步骤4: 使用AI增强分析(如果可用) ===
-            if self.use_llm:
-                print(f"{Fore.CYAN}步骤4/5: 使用AI增强分析{Fore.RESET}")
-                try:
-                    self._enhance_analysis_with_llm(html_analysis, style_analysis, page_data)
-                except Exception as e:
-                    logger.error(f"使用AI增强分析时出错: {str(e)}")
-                    print(f"{Fore.YELLOW}警告: AI增强分析失败，将使用基本分析结果继续。{Fore.RESET}")
-            else:
-                print(f"{Fore.YELLOW}跳过步骤4/5: 未配置OpenAI API密钥，无法使用AI增强分析{Fore.RESET}")
-            
-            # === 步骤5: 生成网页文档 ===
-            print(f"{Fore.CYAN}步骤5/5: 生成网页设计文档{Fore.RESET}")
-            success = self.document_generator.generate_document(
-                html_analysis,
-                style_analysis,
-                url
-            )
+            success = bool(run.artifacts.get('document'))
+            if self.verbose:
+                # 显示各阶段耗时
+                self._print_timings(run)
+                
+                # 显示最终结果
+                if success:
+                    print(f"\n{Fore.GREEN}✓ 完成! 已成功分析网页并生成设计文档。{Fore.RESET}")
+                else:
+                    print(f"\n{Fore.RED}✗ 生成网页文档失败。{Fore.RESET}")
+            return success
             
-            # 显示最终结果
-            if success:
-                print(f"\n{Fore.GREEN}✓ 完成! 已成功分析网页并生成设计文档。{Fore.RESET}")
-                return True
-            else:
-                print(f"\n{Fore.RED}✗ 生成网页文档失败。{Fore.RESET}")
-                return False
+        except PipelineError as e:
+            # 必需阶段失败，保留已完成部分的执行记录
+            self.last_run = e.run
+            cause = e.cause if e.cause is not None else e
+            logger.error(f"分析网页时出错: {str(cause)}", exc_info=cause)
+            if self.verbose:
+                print(f"\n{Fore.RED}✗ 分析过程中出现错误: {str(cause)}{Fore.RESET}")
+            return False
             
         except Exception as e:
             # 捕获并记录所有未处理的异常
             logger.exception(f"分析网页时出错: {str(e)}")
-            print(f"\n{Fore.RED}✗ 分析过程中出现错误: {str(e)}{Fore.RESET}")
+            if self.verbose:
+                print(f"\n{Fore.RED}✗ 分析过程中出现错误: {str(e)}{Fore.RESET}")
             return False
         
         finally:
@@ -146,6 +221,211 @@ class CloneAgent:
             if hasattr(self.web_scraper, 'close'):
                 self.web_scraper.close()
     
+    def _build_pipeline(self, on_stage_end=None):
+        """
+        构建克隆流程的流水线
+        
+        阶段依赖关系:
+            fetch -> html -> cluster, palette -> styles -> cascade, audit -> llm(可选), document
+        html/cluster与palette/styles并发执行，audit（性能审计）与cluster/cascade并发执行；cluster之后只保留每簇的代表组件；
+        cascade把生效样式写入组件后才产出html_analysis，
+        因此下游阶段读取时不会与写入同时发生。
+        配置了阶段缓存时，除抓取和AI增强分析（有自己的LLM缓存）外的阶段都会缓存产出。
+        
+        参数:
+            on_stage_end (callable): 每个阶段结束时的额外回调
+        
+        返回:
+            Pipeline: 流水线
+        """
+        def stage_end(stage, result):
+            if on_stage_end:
+                on_stage_end(stage, result)
+            if self.verbose:
+                self._on_stage_end(stage, result)
+        
+        pipeline = Pipeline(
+            max_workers=self.max_workers,
+            on_stage_start=self._on_stage_start if self.verbose else None,
+            on_stage_end=stage_end,
+            cache=self.stage_cache,
+            stage_context=self.profiler.stage if self.profiler else None
+        )
+        
+        # 抓取阶段总是执行，以页面内容的哈希作为下游阶段缓存键的起点；
+        # HTML和CSS内容单独作为输出，只修改CSS时HTML分析和聚类仍然命中缓存。
+        # 其余阶段的 version 在修改实现时递增，config 为影响产出的配置
+        pipeline.add_stage(
+            'fetch', self._fetch,
+            inputs=('url',), outputs=('page_data', 'page_html', 'page_css', 'network'),
+            description='抓取网页内容',
+            fingerprint={'page_data': self._page_fingerprint, 'network': self._network_fingerprint}
+        )
+        pipeline.add_stage(
+            'html', lambda page_html: self.html_analyzer.analyze(page_html),
+            inputs=('page_html',), outputs=('raw_html_analysis',),
+            description='分析HTML结构',
+            cache=True, version=1
+        )
+        pipeline.add_stage(
+            'palette', lambda page_css: self.style_extractor.extract_color_palette(page_css),
+            inputs=('page_css',), outputs=('color_scheme',),
+            description='提取颜色方案',
+            cache=True, version=1
+        )
+        pipeline.add_stage(
+            'styles', self._extract_styles,
+            inputs=('page_data', 'color_scheme'), outputs=('style_analysis',),
+            description='提取样式信息',
+            cache=True, version=3, config={'prune_unused': self.style_extractor.prune_unused}
+        )
+        pipeline.add_stage(
+            'cluster', self._cluster_components,
+            inputs=('raw_html_analysis',), outputs=('clustered_html_analysis',),
+            description='合并近似重复的组件',
+            cache=True, version=1, config={'threshold': CLUSTER_THRESHOLD}
+        )
+        pipeline.add_stage(
+            'cascade', self._compute_component_styles,
+            inputs=('page_html', 'clustered_html_analysis', 'style_analysis'), outputs=('html_analysis',),
+            description='计算组件生效样式',
+            cache=True, version=1
+        )
+        pipeline.add_stage(
+            'audit', self._audit_performance,
+            inputs=('page_data', 'raw_html_analysis', 'style_analysis'), outputs=('performance',),
+            description='审计页面性能',
+            cache=True, version=1, config={'prune_unused': self.style_extractor.prune_unused}
+        )
+        
+        if self.use_llm:
+            pipeline.add_stage(
+                'llm', self._enhance_analysis_with_llm,
+                inputs=('html_analysis', 'style_analysis', 'page_data'), outputs=('llm_analysis',),
+                optional=True, description='使用AI增强分析'
+            )
+        elif self.verbose:
+            print(f"{Fore.YELLOW}跳过AI增强分析: 未配置OpenAI API密钥{Fore.RESET}")
+        
+        # 文档阶段的产出是输出目录中的文件：缓存文件内容，命中时写回当前输出目录。
+        # 网络请求记录的内容键不含计时，页面和资源不变时文档命中缓存（瀑布图为生成文档那次抓取的计时）
+        pipeline.add_stage(
+            'document', self._generate_document,
+            inputs=('html_analysis', 'style_analysis', 'url', 'network', 'performance'), outputs=('document',),
+            description='生成网页设计文档',
+            cache=True, version=5, config={'export_formats': list(self.document_generator.export_formats)},
+            serialize=self._snapshot_document, deserialize=self._restore_document
+        )
+        
+        return pipeline
+    
+    def _fetch(self, url):
+        """流水线阶段：抓取网页，另外单独输出HTML和CSS内容，以及各请求的计时记录"""
+        page_data = self.web_scraper.fetch_url(url)
+        return {
+            'page_data': page_data,
+            'page_html': page_data['html'],
+            'page_css': page_data['css_content'],
+            'network': page_data.get('network', [])
+        }
+    
+    def _extract_styles(self, page_data, color_scheme):
+        """流水线阶段：提取CSS样式（使用palette阶段计算好的颜色方案）"""
+        return self.style_extractor.extract_styles(
+            page_data['css_files'],
+            page_data['css_content'],
+            page_data['html'],
+            page_data['base_url'],
+            color_scheme=color_scheme
+        )
+    
+    def _cluster_components(self, raw_html_analysis):
+        """流水线阶段：合并近似重复的组件，只保留每簇的代表组件"""
+        return cluster_html_analysis(raw_html_analysis, CLUSTER_THRESHOLD)
+    
+    def _compute_component_styles(self, page_html, clustered_html_analysis, style_analysis):
+        """流水线阶段：计算每个代表组件最终生效的样式（层叠后的结果）"""
+        self.style_extractor.compute_component_styles(
+            page_html,
+            clustered_html_analysis['components'],
+            style_analysis['rules']
+        )
+        return clustered_html_analysis
+    
+    def _audit_performance(self, page_data, raw_html_analysis, style_analysis):
+        """流水线阶段：审计页面的资源体积、阻塞渲染的资源、未使用的CSS、DOM规模和图片"""
+        return audit_performance(
+            page_data,
+            raw_html_analysis,
+            style_analysis,
+            unused_css=self.style_extractor.prune_unused
+        )
+    
+    @staticmethod
+    def _page_fingerprint(page_data):
+        """抓取结果的内容键（只在配置了阶段缓存时调用）"""
+        from stage_cache import page_fingerprint
+        return page_fingerprint(page_data)
+    
+    @staticmethod
+    def _network_fingerprint(network):
+        """网络请求记录的内容键（不含每次抓取都不同的计时）"""
+        from stage_cache import network_fingerprint
+        return network_fingerprint(network)
+    
+    def _generate_document(self, html_analysis, style_analysis, url, network, performance):
+        """流水线阶段：生成文档，并记录本次生成的文件供阶段缓存保存"""
+        success = self.document_generator.generate_document(html_analysis, style_analysis, url, network,
+                                                            performance)
+        # 内容未变化的文件不会重写，因此按生成器的写入统计（而不是修改时间）确定本次生成的文件
+        stats = self.document_generator.last_write_stats
+        self._document_files = list(stats['files']) if stats else []
+        if stats and self.verbose:
+            print(f"{Fore.CYAN}文档输出: 写入 {stats['written']} 个文件，跳过 {stats['skipped']} 个未变化的文件，"
+                  f"删除 {stats['deleted']} 个过期文件{Fore.RESET}")
+        return success
+    
+    def _snapshot_document(self, outputs):
+        """文档阶段的缓存内容：本次生成的文件（生成失败时不缓存）"""
+        if not outputs['document']:
+            return None
+        files = {}
+        for name in self._document_files:
+            with open(os.path.join(self.document_generator.output_dir, name), 'rb') as f:
+                files[name] = f.read()
+        return {'document': outputs['document'], 'files': files}
+    
+    def _restore_document(self, stored):
+        """命中文档阶段缓存时，把缓存的文件写入当前输出目录（内容未变化的文件跳过）"""
+        with OutputWriter(self.document_generator.output_dir) as writer:
+            for name, data in stored['files'].items():
+                with span('doc.restore', 'document', file=name) as restore_span:
+                    written = writer.write(name, data)
+                    restore_span.set(bytes=len(data) if written else 0, skipped=not written)
+        return {'document': stored['document']}
+    
+    def _on_stage_start(self, stage):
+        """阶段开始时显示状态"""
+        print(f"{Fore.CYAN}开始: {stage.description}{Fore.RESET}")
+    
+    def _on_stage_end(self, stage, result):
+        """阶段结束时显示状态"""
+        if result.status == 'success':
+            print(f"{Fore.GREEN}完成: {stage.description} ({result.duration:.2f}秒){Fore.RESET}")
+        elif result.status == 'cached':
+            print(f"{Fore.GREEN}完成: {stage.description} (使用缓存，{result.duration:.2f}秒){Fore.RESET}")
+        elif stage.optional:
+            print(f"{Fore.YELLOW}警告: {stage.description}失败，将使用基本分析结果继续。{Fore.RESET}")
+        else:
+            print(f"{Fore.RED}失败: {stage.description}{Fore.RESET}")
+    
+    def _print_timings(self, run):
+        """显示各阶段耗时"""
+        print(f"\n{Fore.CYAN}各阶段耗时:{Fore.RESET}")
+        for name, result in run.results.items():
+            print(f"  {name:<10} {result.status:<10} {result.duration:.2f}秒")
+        print(f"  {'总计':<10} {'':<10} {run.duration:.2f}秒")
+    
     def _enhance_analysis_with_llm(self, html_analysis, style_analysis, page_data):
         """
         使用OpenAI LLM增强分析结果
@@ -157,14 +437,24 @@ class CloneAgent:
             html_analysis (dict): HTML分析结果
             style_analysis (dict): 样式分析结果
             page_data (dict): 页面数据
+            
+        返回:
+            dict: AI分析结果（components、layout），未启用时为None
         """
         if not self.use_llm:
-            return
+            return None
         
         logger.info("使用AI增强分析")
         
-        # 提取页面内容摘要(为了避免超出token限制，只取前5000字符)
-        page_content = page_data['html'][:5000]  # 只取前5000个字符作为摘要
+        from langchain.prompts import PromptTemplate
+        
+        # 提取页面内容摘要（按token预算截断，避免超出模型限制）
+        page_content = self.prompt_builder.truncate(page_data['html'], self.page_content_tokens)
+        
+        # 组件只发送紧凑摘要（不含完整HTML），按大小和独特程度在预算内取舍
+        components_summary = self.prompt_builder.build_component_summary(
+            html_analysis['components'], self.component_tokens
+        )
         
         # === 1. 增强组件分析 ===
         
@@ -200,56 +490,57 @@ class CloneAgent:
             """
         )
         
-        # 显示进度信息
-        print("使用AI分析组件...")
-        components_str = str(html_analysis['components'])
-        
-        try:
-            # 执行LLM链来分析组件
-            component_chain = LLMChain(llm=self.llm, prompt=component_prompt)
-            component_result = component_chain.run(
-                page_content=page_content,
-                components=components_str
-            )
+        # 准备布局分析提示
+        layout_prompt = PromptTemplate(
+            input_variables=["page_content", "layout"],
+            template="""
+            分析以下网页内容和已识别的布局，提供更好的布局分析：
             
-            # 解析结果（实际实现中需要解析JSON并更新html_analysis）
-            # 这里简单记录结果
-            logger.debug(f"AI组件分析结果: {component_result}")
+            网页内容摘要:
+            {page_content}
             
-            # === 2. 增强布局分析 ===
+            已识别的布局:
+            {layout}
             
-            # 准备布局分析提示
-            layout_prompt = PromptTemplate(
-                input_variables=["page_content", "layout"],
-                template="""
-                分析以下网页内容和已识别的布局，提供更好的布局分析：
-                
-                网页内容摘要:
-                {page_content}
-                
-                已识别的布局:
-                {layout}
-                
-                请分析这个布局，给出:
-                1. 布局类型名称（如 landing-page, blog, e-commerce, dashboard 等）
-                2. 布局主要部分及其作用
-                3. 推荐的Vue组件结构
-                
-                以简洁描述回答，不要冗长。
-                """
-            )
+            请分析这个布局，给出:
+            1. 布局类型名称（如 landing-page, blog, e-commerce, dashboard 等）
+            2. 布局主要部分及其作用
+            3. 推荐的Vue组件结构
             
-            # 显示进度信息
-            print("使用AI分析页面布局...")
-            layout_chain = LLMChain(llm=self.llm, prompt=layout_prompt)
-            layout_result = layout_chain.run(
+            以简洁描述回答，不要冗长。
+            """
+        )
+        
+        # 生成全部提示词（新增的分析只需在这里追加一项），由执行器并发请求并缓存结果
+        prompts = {
+            'components': component_prompt.format(
+                page_content=page_content,
+                components=components_summary
+            ),
+            'layout': layout_prompt.format(
                 page_content=page_content,
                 layout=str(html_analysis['layout'])
             )
-            
-            # 记录布局分析结果
-            logger.debug(f"AI布局分析结果: {layout_result}")
-            
-        except Exception as e:
-            logger.error(f"AI增强分析失败: {str(e)}")
-            raise 
\ No newline at end of file
+        }
+        
+        # 显示进度信息
+        if self.verbose:
+            print("使用AI分析组件和页面布局...")
+        results, errors = self.llm_executor.run(prompts)
+        
+        # 所有请求都失败时视为本阶段失败
+        if errors and not results:
+            error = next(iter(errors.values()))
+            logger.error(f"AI增强分析失败: {str(error)}")
+            raise error
+        
+        # 解析结果（实际实现中需要解析JSON并更新html_analysis）
+        # 这里简单记录结果
+        for name, result in results.items():
+            logger.debug(f"AI分析结果 {name}: {result}")
+        
+        cache = self.llm_executor.cache
+        if cache is not None:
+            logger.info(f"LLM缓存命中 {cache.hits} 次，未命中 {cache.misses} 次")
+        
+        return results
@@ -0,0 +1,452 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量克隆模块 (batch.py)
+--------------------
+本模块用一个工作池批量分析多个URL，每个URL生成到单独的输出目录。
+
+主要功能:
+1. 读取URL列表：文本文件（每行一个URL，#开头为注释）、CSV文件（url列）或标准输入
+2. 线程池或进程池并发处理URL
+3. 每个工作线程/进程只创建一次组件（HTTP连接池、HTML分析器、编译好的正则、
+   Selenium浏览器），在它处理的所有URL之间复用
+4. 汇总每个URL的状态和各阶段耗时，打印汇总表并保存为 batch_summary.json
+5. 检查点：每个阶段的状态和产出记录在 batch_manifest.jsonl 中（见 checkpoint.py），
+   续跑（resume）时跳过已完成的URL，未完成的URL只重新执行失败或缺失的阶段
+6. 可选的追踪：每个URL的追踪区间（见 tracing.py）以Chrome追踪事件随结果返回，
+   每个URL在合并后的追踪中显示为一个单独的进程
+7. 可选的工作量计数（见 counters.py）：每个URL的计数保存在结果的 counters 中
+8. 可选的回放（见 har.py）：所有工作线程从同一个HAR归档读取响应，不访问网络
+
+工作原理:
+组件保存在线程局部变量中：线程池中每个线程有自己的一套组件；
+进程池中每个进程只有一个工作线程，相当于每个进程一套。
+线程池结束后统一释放组件；进程池的组件在工作进程退出时释放。
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import contextlib
+import multiprocessing.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from colorama import Fore
+
+from checkpoint import CheckpointManifest, save_artifacts, load_artifacts, remove_artifacts
+from tracing import Tracer
+from counters import WorkCounters
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 输出目录名中允许的字符
+_SLUG_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+# 每个工作线程的组件
+_local = threading.local()
+
+# 创建组件的配置（进程池中由 initializer 设置）
+_worker_config = {}
+
+# 线程池模式下创建的全部组件，结束后统一释放
+_bundles = []
+_bundles_lock = threading.Lock()
+
+
+def read_urls(source):
+    """
+    读取URL列表
+
+    参数:
+        source (str): 文件路径；'-' 表示从标准输入读取。
+                      扩展名为 .csv 或首行含逗号时按CSV读取，使用名为 url 的列（没有则用第一列）
+
+    返回:
+        list: 去重后的URL列表（保持原有顺序）
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8-sig') as f:
+            lines = f.read().splitlines()
+
+    lines = [line for line in lines if line.strip() and not line.lstrip().startswith('#')]
+    if not lines:
+        return []
+
+    if source.lower().endswith('.csv') or ',' in lines[0]:
+        rows = list(csv.reader(lines))
+        header = [cell.strip().lower() for cell in rows[0]]
+        if 'url' in header:
+            column = header.index('url')
+            rows = rows[1:]
+        else:
+            column = 0
+        candidates = [row[column].strip() for row in rows if len(row) > column]
+    else:
+        candidates = [line.strip() for line in lines]
+
+    urls = []
+    seen = set()
+    for url in candidates:
+        if url and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+def output_dir_for(output_root, index, url):
+    """
+    生成URL对应的输出目录
+
+    参数:
+        output_root (str): 批量输出根目录
+        index (int): URL在列表中的序号
+        url (str): URL
+
+    返回:
+        str: 例如 output_root/0003-example.com-docs-intro
+    """
+    parsed = urlparse(url)
+    slug = _SLUG_RE.sub('-', f"{parsed.netloc}{parsed.path}").strip('-.')[:80] or 'page'
+    return os.path.join(output_root, f"{index:04d}-{slug}")
+
+
+class WorkerBundle:
+    """
+    一个工作线程复用的全部组件（批量模式和服务模式共用）
+    """
+
+    def __init__(self, config):
+        """
+        创建组件
+
+        参数:
+            config (dict): use_selenium、temp_root、stage_workers，以及可选的 replay（HarArchive 的参数）
+                           和 export_formats（数据文件的导出格式）
+        """
+        from web_scraper import WebScraper
+        from html_analyzer import HtmlAnalyzer
+        from style_extractor import StyleExtractor
+        from agent import CloneAgent
+        from website_document_generator import WebsiteDocumentGenerator
+
+        self._document_generator_class = WebsiteDocumentGenerator
+        self._export_formats = config.get('export_formats')
+
+        # 每个工作线程使用单独的临时目录，避免下载的文件互相覆盖
+        temp_dir = os.path.join(config['temp_root'], f"worker-{os.getpid()}-{threading.get_ident()}")
+        archive = None
+        if config.get('replay'):
+            from har import HarArchive
+            archive = HarArchive(**config['replay'])
+        self.scraper = WebScraper(use_selenium=config['use_selenium'], temp_dir=temp_dir, keep_alive=True,
+                                  archive=archive)
+        self.agent = CloneAgent(
+            web_scraper=self.scraper,
+            html_analyzer=HtmlAnalyzer(),
+            style_extractor=StyleExtractor(),
+            document_generator=None,
+            max_workers=config['stage_workers'],
+            verbose=False
+        )
+
+    def clone(self, url, output_dir, cached_artifacts=None, on_stage_end=None):
+        """分析一个URL，文档生成到 output_dir"""
+        # 批量模式和服务模式已经按URL并行，文档在当前线程中转换HTML（不再启动进程池）
+        self.agent.document_generator = self._document_generator_class(output_dir=output_dir, html_workers=1,
+                                                                       export_formats=self._export_formats)
+        self.agent.last_run = None
+        return self.agent.clone_website(url, output_dir, cached_artifacts, on_stage_end)
+
+    def shutdown(self):
+        """释放HTTP连接池和浏览器"""
+        self.scraper.shutdown()
+
+
+def _init_process_worker(config):
+    """进程池 initializer：保存组件配置"""
+    _worker_config.update(config)
+
+
+def _get_bundle():
+    """取得当前线程的组件，第一次调用时创建"""
+    bundle = getattr(_local, 'bundle', None)
+    if bundle is None:
+        bundle = WorkerBundle(_worker_config)
+        _local.bundle = bundle
+        if multiprocessing.parent_process() is not None:
+            # 进程池工作进程：进程退出时释放
+            multiprocessing.util.Finalize(bundle, bundle.shutdown, exitpriority=10)
+        else:
+            with _bundles_lock:
+                _bundles.append(bundle)
+    return bundle
+
+
+def _clone_one(index, url, output_dir, manifest, stage_records=None, trace=False, stats=False):
+    """
+    在工作线程/进程中分析一个URL
+
+    参数:
+        index (int): URL序号
+        url (str): URL
+        output_dir (str): 输出目录
+        manifest (CheckpointManifest): 检查点清单
+        stage_records (dict): 续跑时该URL上次各阶段的记录
+        trace (bool): 是否记录追踪区间
+        stats (bool): 是否统计工作量计数
+
+    返回:
+        dict: 可序列化的结果（进程池需要pickle）；记录追踪时 'trace' 为Chrome追踪事件列表
+    """
+    start = time.perf_counter()
+    error = None
+    cached_stages = []
+    tracer = Tracer(name=url) if trace else None
+    counters = WorkCounters() if stats else None
+
+    def on_stage_end(stage, result):
+        # 在下游阶段开始之前保存产出（下游阶段可能原地修改它）
+        entry = {
+            'url': url,
+            'index': index,
+            'stage': stage.name,
+            'status': result.status,
+            'duration': round(result.duration, 3),
+            'output_dir': output_dir
+        }
+        if result.outputs is not None:
+            # 包括命中阶段缓存的阶段
+            try:
+                entry['artifact'], entry['hash'] = save_artifacts(output_dir, stage.name, result.outputs)
+            except Exception as e:
+                logger.warning(f"保存阶段 {stage.name} 的产出失败: {str(e)}")
+        elif result.error is not None:
+            entry['error'] = str(result.error)
+        manifest.record('stage', **entry)
+
+    try:
+        bundle = _get_bundle()
+        cached_artifacts = load_artifacts(stage_records) if stage_records else None
+        with contextlib.ExitStack() as stack:
+            if tracer is not None:
+                stack.enter_context(tracer.activate())
+            if counters is not None:
+                stack.enter_context(counters.activate())
+            success = bundle.clone(url, output_dir, cached_artifacts, on_stage_end)
+        run = bundle.agent.last_run
+        if run is not None:
+            cached_stages = [name for name, result in run.results.items() if result.status == 'cached']
+        # 只记录实际执行过的阶段（检查点中恢复的阶段和必需阶段失败后未执行的阶段不计）
+        timings = {
+            name: round(result.duration, 3)
+            for name, result in run.results.items()
+            if result.started is not None
+        } if run else {}
+        if not success and run is not None:
+            failed = run.failed_stages()
+            if failed:
+                error = f"阶段失败: {', '.join(failed)}"
+    except Exception as e:
+        logger.exception(f"批量分析 {url} 时出错: {str(e)}")
+        success = False
+        timings = {}
+        error = str(e)
+
+    result = {
+        'index': index,
+        'url': url,
+        'status': 'success' if success else 'failed',
+        'output_dir': output_dir,
+        'duration': round(time.perf_counter() - start, 3),
+        'timings': timings,
+        'cached_stages': cached_stages,
+        'error': error
+    }
+    if counters is not None:
+        result['counters'] = counters.snapshot()
+    manifest.record('url', **result)
+    if success:
+        # URL已完成，续跑时会直接跳过，不再需要阶段产出
+        remove_artifacts(output_dir)
+    if tracer is not None:
+        # 追踪事件不写入清单；进程号使用URL序号，合并后每个URL一行
+        result['trace'] = tracer.chrome_events(pid=index + 1)
+    return result
+
+
+def run_batch(urls, output_root, workers=4, pool='thread', use_selenium=False,
+              temp_root=None, keep_temp=False, stage_workers=2, resume=False, on_result=None, trace=False,
+              stats=False, replay=None, export_formats=None):
+    """
+    批量分析URL
+
+    参数:
+        urls (list): URL列表
+        output_root (str): 输出根目录，每个URL生成到其中的单独子目录
+        workers (int): 工作线程/进程数
+        pool (str): 'thread' 或 'process'
+        use_selenium (bool): 是否使用Selenium
+        temp_root (str): 临时文件根目录（默认在系统临时目录中新建）
+        keep_temp (bool): 完成后是否保留临时文件
+        stage_workers (int): 每个URL的流水线阶段并发数
+        resume (bool): 是否从 output_root 中的检查点清单继续上次的批量任务
+        on_result (callable): 每个URL完成时的回调，参数为结果字典
+        trace (bool): 是否记录追踪区间（结果中的 'trace'，可用 tracing.write_chrome_trace 合并保存）
+        stats (bool): 是否统计工作量计数（结果中的 'counters'）
+        replay (dict): 从HAR归档回放时 HarArchive 的参数（path、latency、bandwidth），每个工作线程各自读取
+        export_formats (list): 数据文件的导出格式（见 data_export.py），默认只导出 site_data.yaml
+
+    返回:
+        list: 按URL顺序排列的结果列表
+    """
+    if pool not in ('thread', 'process'):
+        raise ValueError(f"不支持的工作池类型: {pool}")
+
+    os.makedirs(output_root, exist_ok=True)
+
+    # 检查点清单：续跑时读取上次的状态
+    manifest = CheckpointManifest(output_root)
+    previous = manifest.state() if resume else {}
+    manifest.start_run(resume, len(urls))
+
+    if temp_root is None:
+        temp_root = tempfile.mkdtemp(prefix='web-clone-batch-')
+    config = {'use_selenium': use_selenium, 'temp_root': temp_root, 'stage_workers': stage_workers,
+              'replay': replay, 'export_formats': export_formats}
+    workers = max(1, min(workers, len(urls) or 1))
+
+    if pool == 'process':
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker,
+                                       initargs=(config,))
+    else:
+        _worker_config.update(config)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+
+    logger.info(f"批量分析 {len(urls)} 个URL（{pool}池，{workers} 个工作{'进程' if pool == 'process' else '线程'}）")
+
+    results = []
+    try:
+        with executor:
+            futures = []
+            for index, url in enumerate(urls):
+                state = previous.get(url)
+                output_dir = (state and state['output_dir']) or output_dir_for(output_root, index, url)
+                if state and state['status'] == 'success':
+                    # 上次已完成
+                    result = {
+                        'index': index,
+                        'url': url,
+                        'status': 'skipped',
+                        'output_dir': output_dir,
+                        'duration': 0.0,
+                        'timings': {},
+                        'cached_stages': [],
+                        'error': None
+                    }
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+                    continue
+                stage_records = state['stages'] if state else None
+                futures.append(executor.submit(_clone_one, index, url, output_dir, manifest, stage_records, trace, stats))
+
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    finally:
+        # 线程池模式：释放所有工作线程的组件
+        with _bundles_lock:
+            bundles = list(_bundles)
+            _bundles.clear()
+        for bundle in bundles:
+            try:
+                bundle.shutdown()
+            except Exception as e:
+                logger.warning(f"释放工作线程资源失败: {str(e)}")
+
+        if not keep_temp:
+            shutil.rmtree(temp_root, ignore_errors=True)
+        manifest.close()
+
+    results.sort(key=lambda result: result['index'])
+    return results
+
+
+def print_progress(result):
+    """每个URL完成时显示一行进度"""
+    if result['status'] == 'skipped':
+        print(f"{Fore.CYAN}-{Fore.RESET} {result['url']} (上次已完成，跳过)")
+    elif result['status'] == 'success':
+        resumed = f"，复用 {len(result['cached_stages'])} 个阶段" if result['cached_stages'] else ''
+        print(f"{Fore.GREEN}✓{Fore.RESET} {result['url']} ({result['duration']:.2f}秒{resumed})")
+    else:
+        print(f"{Fore.RED}✗{Fore.RESET} {result['url']} ({result['duration']:.2f}秒) {result['error'] or ''}")
+
+
+def print_summary(results, total_duration=None):
+    """
+    打印汇总表：每个URL的状态、总耗时和各阶段耗时
+
+    参数:
+        results (list): run_batch 的结果
+        total_duration (float): 批量任务的总耗时（秒）
+    """
+    stages = []
+    for result in results:
+        for name in result['timings']:
+            if name not in stages:
+                stages.append(name)
+
+    url_width = min(60, max([len('URL')] + [len(result['url']) for result in results]))
+    header = f"{'URL':<{url_width}}  {'状态':<8}{'耗时':>8}" + ''.join(f"{name:>10}" for name in stages)
+    print(f"\n{Fore.CYAN}批量分析汇总:{Fore.RESET}")
+    print(header)
+    print('-' * (url_width + 18 + 10 * len(stages)))
+    for result in results:
+        url = result['url']
+        if len(url) > url_width:
+            url = url[:url_width - 1] + '…'
+        color = {'success': Fore.GREEN, 'skipped': Fore.CYAN}.get(result['status'], Fore.RED)
+        row = f"{url:<{url_width}}  {color}{result['status']:<8}{Fore.RESET}{result['duration']:>8.2f}"
+        row += ''.join(
+            f"{result['timings'][name]:>10.2f}" if name in result['timings'] else f"{'-':>10}"
+            for name in stages
+        )
+        print(row)
+
+    succeeded = sum(1 for result in results if result['status'] == 'success')
+    skipped = sum(1 for result in results if result['status'] == 'skipped')
+    line = f"\n成功 {succeeded}/{len(results)}"
+    if skipped:
+        line += f"，跳过上次已完成的 {skipped} 个"
+    if total_duration is not None:
+        line += f"，总耗时 {total_duration:.2f}秒"
+        if total_duration > 0:
+            line += f"（{len(results) / total_duration:.2f} 个URL/秒）"
+    print(line)
+
+
+def write_summary(results, path):
+    """
+    把结果保存为JSON
+
+    参数:
+        results (list): run_batch 的结果
+        path (str): 文件路径
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
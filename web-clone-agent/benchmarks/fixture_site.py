@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试的本地站点 (benchmarks/fixture_site.py)
+------------------------------------------
+生成不同规模的合成站点，并用本地HTTP服务器提供给克隆流程，基准测试不访问任何外部网站。
+
+包含:
+1. SIZE_TIERS: 合成站点的规模档位（DOM节点数、样式表数量和大小、JS文件数量和大小、图片数量）
+2. generate_site: 按档位生成确定性的站点文件（同一档位每次生成的内容完全相同）
+3. FixtureServer: 在后台线程中运行的HTTP服务器，文件保存在内存中；
+   也可以挂载保存下来的真实页面目录，页面中指向外部主机的资源地址会改写为本地路径
+
+使用示例:
+    server = FixtureServer()
+    server.add_site('small', generate_site('small'))
+    server.add_saved_page('trae', 'temp')
+    with server:
+        print(server.url('small/index.html'))
+"""
+
+import os
+import re
+import random
+import mimetypes
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 合成站点的规模档位
+# nodes: 页面的大致元素数量（不含文本节点）；stylesheets/rules: 外部样式表数量和每个样式表的规则数；
+# scripts/script_kb: 外部JS文件数量和每个文件的大小（KB）；images: 图片数量
+SIZE_TIERS = {
+    'small': {'nodes': 400, 'stylesheets': 2, 'rules': 100, 'scripts': 2, 'script_kb': 20, 'images': 10},
+    'medium': {'nodes': 2000, 'stylesheets': 5, 'rules': 400, 'scripts': 5, 'script_kb': 100, 'images': 50},
+    'large': {'nodes': 8000, 'stylesheets': 10, 'rules': 1200, 'scripts': 10, 'script_kb': 300, 'images': 200},
+}
+
+# 合成页面使用的组件类名（与 HtmlAnalyzer 识别组件时使用的名称一致）
+_COMPONENTS = ['card', 'hero', 'banner', 'feature', 'product', 'article', 'testimonial', 'pricing']
+
+_WORDS = ('快速 稳定 简单 安全 设计 组件 页面 服务 数据 平台 体验 团队 方案 产品 用户 支持 '
+          'fast reliable simple secure design component page service data platform').split()
+
+# 1x1 的透明PNG
+_PIXEL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082'
+)
+
+# 保存的页面中需要改写的资源地址（href/src 指向外部主机的绝对地址）
+_ABSOLUTE_ASSET = re.compile(r'''(\s(?:href|src)=["'])https?://[^"'/]+/(?:[^"']*/)?([^"'/?#]+)[^"']*(["'])''')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _color(rng):
+    return f"#{rng.randrange(0x1000000):06x}"
+
+
+def _generate_html(name, spec, rng):
+    """生成页面HTML：导航、若干区块（每个区块是一组卡片）和页脚"""
+    # 每张卡片5个元素，每个区块12张卡片
+    cards = max(1, spec['nodes'] // 5)
+    per_section = 12
+    images = spec['images']
+
+    parts = ['<!doctype html><html lang="zh-CN"><head><meta charset="utf-8">',
+             f'<title>合成站点 {name}</title>',
+             f'<meta name="description" content="{name} 档位的基准测试页面">',
+             '<meta name="viewport" content="width=device-width, initial-scale=1">']
+    parts.extend(f'<link rel="stylesheet" href="css/style-{i}.css">' for i in range(spec['stylesheets']))
+    parts.append('<style>body { margin: 0; font-family: "Noto Sans SC", sans-serif } '
+                 '.inline-note { color: #555555 }</style>')
+    parts.append('</head><body>')
+
+    parts.append('<header class="header"><nav class="navbar"><a class="logo" href="/">首页</a><ul class="menu">')
+    parts.extend(f'<li class="menu-item"><a href="/section-{i}">{_text(rng, 2)}</a></li>' for i in range(6))
+    parts.append('</ul></nav></header><main class="content">')
+
+    card = 0
+    section = 0
+    while card < cards:
+        component = _COMPONENTS[section % len(_COMPONENTS)]
+        parts.append(f'<section class="section section-{section % 10}" id="section-{section}">'
+                     f'<h2 class="section-title">{_text(rng, 3)}</h2><div class="grid grid-{section % 4}">')
+        for _ in range(min(per_section, cards - card)):
+            image = f'<img src="img/{card % images}.png" alt="{_text(rng, 2)}">' if images else ''
+            parts.append(
+                f'<div class="{component} {component}--{card % 6}">{image}'
+                f'<h3 class="{component}-title">{_text(rng, 3)}</h3>'
+                f'<p class="{component}-text inline-note" style="margin: {card % 5}px">{_text(rng, 16)}</p>'
+                f'<a class="btn btn-{card % 3}" href="/item/{card}">{_text(rng, 1)}</a></div>'
+            )
+            card += 1
+        parts.append('</div></section>')
+        section += 1
+
+    parts.append('</main><footer class="footer"><p class="copyright">版权所有 2024</p>')
+    parts.extend(f'<a class="footer-link" href="/link-{i}">{_text(rng, 1)}</a>' for i in range(5))
+    parts.append('</footer>')
+    parts.extend(f'<script src="js/bundle-{i}.js"></script>' for i in range(spec['scripts']))
+    parts.append('<script>window.fixture = true;</script></body></html>')
+    return ''.join(parts)
+
+
+def _generate_stylesheet(index, spec, rng):
+    """生成样式表：大部分规则命中页面中的类名，少部分未使用，另有媒体查询"""
+    rules = []
+    for i in range(spec['rules']):
+        component = _COMPONENTS[(index + i) % len(_COMPONENTS)]
+        kind = i % 10
+        if kind < 6:
+            selector = f".{component}--{i % 6}" if kind % 2 else f".{component}"
+        elif kind < 8:
+            selector = f".section-{i % 10} .{component}-title, .btn-{i % 3}:hover"
+        else:
+            selector = f".unused-{index}-{i}"
+        rules.append(
+            f"{selector} {{ color: {_color(rng)}; background: {_color(rng)} url(../img/{i % 7}.png) no-repeat; "
+            f"padding: {i % 24}px {i % 16}px; border: 1px solid rgb({i % 256}, {(i * 7) % 256}, {(i * 13) % 256}); "
+            f"font-size: {12 + i % 12}px }}"
+        )
+        if i % 50 == 49:
+            rules.append(f"@media (max-width: {600 + i}px) {{ .{component} {{ padding: {i % 8}px }} "
+                         f".grid-{i % 4} {{ display: block }} }}")
+    rules.append(f".header, .footer {{ background: {_color(rng)}; color: #ffffff }}")
+    return '\n'.join(rules)
+
+
+def _generate_script(index, spec, rng):
+    """生成指定大小的JS文件"""
+    size = spec['script_kb'] * 1024
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = (f"function fixture_{index}_{i}(value) {{ var label = '{_text(rng, 4)}'; "
+                f"return value * {i} + label.length; }}\n")
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return ''.join(lines)
+
+
+def generate_site(name, spec=None, seed=0):
+    """
+    生成合成站点
+
+    参数:
+        name (str): 站点名称（SIZE_TIERS 中的档位名称，或自定义名称）
+        spec (dict): 规模参数，默认使用 SIZE_TIERS[name]
+        seed (int): 随机种子
+
+    返回:
+        dict: 站点内的相对路径 -> 文件内容（bytes）
+    """
+    spec = spec or SIZE_TIERS[name]
+    rng = random.Random(f"{name}:{seed}")
+    files = {'index.html': _generate_html(name, spec, rng).encode('utf-8')}
+    for i in range(spec['stylesheets']):
+        files[f'css/style-{i}.css'] = _generate_stylesheet(i, spec, rng).encode('utf-8')
+    for i in range(spec['scripts']):
+        files[f'js/bundle-{i}.js'] = _generate_script(i, spec, rng).encode('utf-8')
+    for i in range(max(spec['images'], 7)):
+        files[f'img/{i}.png'] = _PIXEL_PNG
+    return files
+
+
+def load_saved_page(directory, prefix):
+    """
+    读取保存的真实页面（目录中的 index.html 及其资源文件）
+
+    页面中指向外部主机的 href/src 改写为 /<prefix>/<文件名>，
+    目录中存在的文件从本地返回，不存在的返回404，基准测试不会访问外部网络。
+
+    参数:
+        directory (str): 页面目录
+        prefix (str): 站点在服务器上的路径前缀
+
+    返回:
+        dict: 站点内的相对路径 -> 文件内容（bytes）
+    """
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                files[name] = f.read()
+
+    html = files['index.html'].decode('utf-8', errors='replace')
+    html = _ABSOLUTE_ASSET.sub(lambda m: f"{m.group(1)}/{prefix}/{m.group(2)}{m.group(3)}", html)
+    files['index.html'] = html.encode('utf-8')
+    return files
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """从内存中返回文件"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].split('#', 1)[0].lstrip('/')
+        body = self.server.files.get(path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type.endswith('javascript'):
+            content_type += '; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    基准测试用的本地HTTP服务器（监听127.0.0.1的随机端口）
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        """
+        初始化服务器
+
+        参数:
+            host (str): 监听地址
+            port (int): 监听端口，0表示随机端口
+        """
+        self.files = {}
+        self.sites = {}
+        self._server = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self._server.daemon_threads = True
+        self._server.files = self.files
+        self._thread = None
+
+    def add_site(self, name, files):
+        """
+        挂载站点，文件位于 /<name>/ 之下
+
+        参数:
+            name (str): 站点名称
+            files (dict): 相对路径 -> 文件内容（bytes）
+        """
+        self.sites[name] = files
+        for path, body in files.items():
+            self.files[f"{name}/{path}"] = body
+
+    def add_saved_page(self, name, directory):
+        """挂载保存的真实页面目录（见 load_saved_page）"""
+        self.add_site(name, load_saved_page(directory, name))
+
+    def url(self, path=''):
+        """服务器上某个路径的完整URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{path.lstrip('/')}"
+
+    def start(self):
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务并关闭监听套接字"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
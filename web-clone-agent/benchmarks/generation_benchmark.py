@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文档和Vue代码生成基准 (benchmarks/generation_benchmark.py)
+----------------------------------------------------
+在包含数百个组件的合成页面上测量 WebsiteDocumentGenerator 和 VueGenerator 的生成耗时，结果保存为JSON，
+便于比较模板渲染方式修改前后的差异。
+
+测试页面由 fixture_site.py 生成（每张卡片是一个组件），分析结果不经过组件聚类，
+所有组件都写入文档，模拟组件很多的页面。
+
+测量内容（每项取 --runs 次的中位数）:
+1. 文档生成总耗时，以及其中渲染Markdown（doc.render）、转换HTML（doc.markdown）、写入文件（doc.write）
+   和导出数据文件（doc.export）的耗时
+2. Vue项目生成总耗时，以及其中生成组件（vue.components）和视图（vue.views）的耗时
+
+使用方法:
+    python benchmarks/generation_benchmark.py                          # 300 和 1000 个组件
+    python benchmarks/generation_benchmark.py --components 500 --runs 5
+    python benchmarks/generation_benchmark.py --json results.json      # 保存结果
+    python benchmarks/generation_benchmark.py --compare baseline.json  # 与之前保存的结果比较
+    python benchmarks/generation_benchmark.py --export-format jsonl    # 导出其他格式的数据文件
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+
+from fixture_site import SIZE_TIERS, generate_site
+from pipeline_benchmark import PROJECT_DIR, DEFAULT_THRESHOLD, _git_revision
+
+sys.path.insert(0, PROJECT_DIR)
+
+# 文档和Vue生成中单独统计的追踪区间
+DOCUMENT_SPANS = ('doc.render', 'doc.markdown', 'doc.write', 'doc.export')
+VUE_SPANS = ('vue.components', 'vue.views')
+
+
+def build_analysis(components):
+    """
+    生成包含指定数量组件的页面，返回HTML分析和样式分析结果
+
+    参数:
+        components (int): 组件（卡片）数量
+
+    返回:
+        tuple: (html_analysis, style_analysis)
+    """
+    from html_analyzer import HtmlAnalyzer
+    from style_extractor import StyleExtractor
+
+    # 每张卡片5个元素
+    spec = dict(SIZE_TIERS['small'], nodes=components * 5)
+    files = generate_site(f"components-{components}", spec)
+    html = files['index.html'].decode('utf-8')
+    css_files = [path for path in files if path.endswith('.css')]
+    css_content = {path: files[path].decode('utf-8') for path in css_files}
+
+    html_analysis = HtmlAnalyzer().analyze(html)
+    style_analysis = StyleExtractor().extract_styles(css_files, css_content, html, 'http://127.0.0.1/')
+    return html_analysis, style_analysis
+
+
+def _timed(runs, func):
+    """执行 runs 次，返回总耗时和各追踪区间耗时的中位数（毫秒）"""
+    from tracing import Tracer
+
+    totals = []
+    spans = {}
+    for _ in range(runs):
+        tracer = Tracer()
+        with tracer.activate():
+            started = time.perf_counter()
+            func()
+            totals.append(time.perf_counter() - started)
+        for name, entry in tracer.summary().items():
+            spans.setdefault(name, []).append(entry['total'])
+    return {
+        'total_ms': round(statistics.median(totals) * 1000, 2),
+        'spans_ms': {name: round(statistics.median(values) * 1000, 2) for name, values in spans.items()},
+    }
+
+
+def measure(components, runs=3, export_formats=None):
+    """
+    测量一个组件数量下的文档和Vue代码生成耗时
+
+    参数:
+        components (int): 组件数量
+        runs (int): 计时执行次数
+        export_formats (list): 数据文件的导出格式（默认只导出 site_data.yaml）
+
+    返回:
+        dict: 测量结果
+    """
+    from website_document_generator import WebsiteDocumentGenerator
+    from vue_generator import VueGenerator
+
+    html_analysis, style_analysis = build_analysis(components)
+    page_meta = {'title': html_analysis.get('title', ''), 'description': html_analysis.get('description', '')}
+
+    with tempfile.TemporaryDirectory(prefix='generation-benchmark-') as work_dir:
+        documents = WebsiteDocumentGenerator(os.path.join(work_dir, 'document'), html_workers=1,
+                                             export_formats=export_formats)
+        vue = VueGenerator(os.path.join(work_dir, 'vue'))
+
+        # 预热：导入markdown、yaml等模块
+        documents.generate_document(html_analysis, style_analysis, 'http://127.0.0.1/')
+        vue.generate_project(html_analysis, style_analysis, page_meta)
+
+        document_timing = _timed(runs, lambda: documents.generate_document(html_analysis, style_analysis,
+                                                                           'http://127.0.0.1/'))
+        vue_timing = _timed(runs, lambda: vue.generate_project(html_analysis, style_analysis, page_meta))
+
+    return {
+        'components': len(html_analysis.get('components', [])),
+        'document': {
+            'total_ms': document_timing['total_ms'],
+            'spans_ms': {name: document_timing['spans_ms'].get(name, 0.0) for name in DOCUMENT_SPANS},
+        },
+        'vue': {
+            'total_ms': vue_timing['total_ms'],
+            'spans_ms': {name: vue_timing['spans_ms'].get(name, 0.0) for name in VUE_SPANS},
+        },
+    }
+
+
+def print_results(results):
+    """显示各组件数量下的生成耗时"""
+    print(f"\n提交 {results['commit'] or '未知'}{'（有未提交的修改）' if results['dirty'] else ''}，"
+          f"每项 {results['runs']} 次取中位数")
+    for size, result in results['sizes'].items():
+        print(f"\n{size} 张卡片（{result['components']} 个组件）:")
+        for part in ('document', 'vue'):
+            timing = result[part]
+            details = '，'.join(f"{name} {value:.1f}" for name, value in timing['spans_ms'].items())
+            print(f"  {part:<9} {timing['total_ms']:10.1f} ms（{details}）")
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与之前保存的结果比较
+
+    返回:
+        list: 耗时增加超过 threshold 的项目，没有回退时为空列表
+    """
+    regressions = []
+    for size, result in results['sizes'].items():
+        old = baseline.get('sizes', {}).get(size)
+        if old is None:
+            continue
+        for part in ('document', 'vue'):
+            current, previous = result[part]['total_ms'], old[part]['total_ms']
+            change = current / previous - 1 if previous else 0
+            print(f"  {size} {part}: {previous:.1f} -> {current:.1f} ms（{change:+.0%}）")
+            if change > threshold:
+                regressions.append(f"{size} {part}: {previous} -> {current} ms（{change:+.0%}）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web Clone Agent 文档和Vue代码生成基准')
+    parser.add_argument('--components', type=str, default='300,1000', help='页面中的卡片数量，逗号分隔')
+    parser.add_argument('--runs', type=int, default=3, help='每项的计时执行次数')
+    parser.add_argument('--export-format', type=str, default='yaml', help='数据文件的导出格式，逗号分隔')
+    parser.add_argument('--json', type=str, default=None, help='把测量结果保存为JSON文件')
+    parser.add_argument('--compare', type=str, default=None, help='与之前保存的JSON结果比较，有回退时返回1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"比较时视为回退的增加比例（默认 {DEFAULT_THRESHOLD}）")
+    args = parser.parse_args()
+
+    export_formats = [name.strip() for name in args.export_format.split(',') if name.strip()]
+    commit, dirty = _git_revision()
+    results = {
+        'benchmark': 'generation',
+        'commit': commit,
+        'dirty': dirty,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'runs': args.runs,
+        'export_formats': export_formats,
+        'sizes': {},
+    }
+    for size in (int(value) for value in args.components.split(',') if value.strip()):
+        print(f"测量 {size} 张卡片 ...", flush=True)
+        results['sizes'][str(size)] = measure(size, args.runs, export_formats)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n与 {baseline.get('commit') or args.compare} 比较:")
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print("出现回退:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("没有回退")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+克隆流程性能基准 (benchmarks/pipeline_benchmark.py)
+-----------------------------------------------
+在本地站点上端到端执行克隆流程，测量每个阶段的延迟、吞吐量和内存峰值，结果保存为JSON，便于在不同提交之间比较。
+
+测试站点（由 fixture_site.py 提供，不访问外部网站）:
+1. 合成站点: small / medium / large 三个规模档位（DOM节点数、样式表、JS文件和图片数量递增）
+2. 保存的真实页面: 仓库 temp/ 目录中的页面快照（trae），以及 --pages 指定目录下的每个子目录
+
+测量方式:
+每个站点在单独的子进程中测量，进程的RSS峰值只反映这个站点。
+1. 预热 --warmup 次后执行 --runs 次，统计总耗时和各阶段耗时的中位数、最小值和最大值
+2. 吞吐量: 每秒页面数，以及每秒处理的输入字节数（HTML、CSS和JS）
+3. 内存: 另外串行执行一次，用 profiling.StageProfiler 记录每个阶段的Python内存分配峰值；
+   同一次执行还记录工作量计数（见 counters.py），计数与机器无关，适合跨提交比较
+
+使用方法:
+    python benchmarks/pipeline_benchmark.py                          # 全部站点
+    python benchmarks/pipeline_benchmark.py --sites small,trae --runs 3
+    python benchmarks/pipeline_benchmark.py --json results.json      # 保存结果
+    python benchmarks/pipeline_benchmark.py --compare baseline.json  # 与之前保存的结果比较
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+from fixture_site import SIZE_TIERS, FixtureServer, generate_site
+
+# 项目根目录（main.py所在目录）
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 仓库中保存的真实页面快照
+SAVED_PAGES = {'trae': os.path.join(PROJECT_DIR, 'temp')}
+
+# 比较结果时，延迟和内存增加超过这个比例视为回退
+DEFAULT_THRESHOLD = 0.25
+
+
+def _summarize(values):
+    """耗时列表（秒）的中位数、最小值和最大值（毫秒）"""
+    return {
+        'median_ms': round(statistics.median(values) * 1000, 2),
+        'min_ms': round(min(values) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2),
+    }
+
+
+def measure_site(url, runs=3, warmup=1, stage_workers=4):
+    """
+    测量一个站点（在子进程中执行）
+
+    参数:
+        url (str): 站点首页URL
+        runs (int): 计时执行次数
+        warmup (int): 预热次数
+        stage_workers (int): 流水线并发度
+
+    返回:
+        dict: 测量结果
+    """
+    # 不调用OpenAI，也不使用阶段缓存，每次执行都完整地走一遍流程
+    os.environ['OPENAI_API_KEY'] = ''
+    os.environ['STAGE_CACHE'] = '0'
+    sys.path.insert(0, PROJECT_DIR)
+
+    from bs4 import BeautifulSoup
+    from web_scraper import WebScraper
+    from html_analyzer import HtmlAnalyzer
+    from style_extractor import StyleExtractor
+    from agent import CloneAgent
+    from website_document_generator import WebsiteDocumentGenerator
+    from profiling import StageProfiler, peak_rss
+    from counters import collect
+
+    with tempfile.TemporaryDirectory(prefix='pipeline-benchmark-') as work_dir:
+        scraper = WebScraper(temp_dir=os.path.join(work_dir, 'temp'), keep_alive=True)
+        agent = CloneAgent(scraper, HtmlAnalyzer(), StyleExtractor(), None, max_workers=stage_workers, verbose=False)
+
+        def clone(index):
+            output_dir = os.path.join(work_dir, f"output-{index}")
+            agent.document_generator = WebsiteDocumentGenerator(output_dir=output_dir)
+            started = time.perf_counter()
+            if not agent.clone_website(url, output_dir):
+                failed = ', '.join(agent.last_run.failed_stages()) if agent.last_run else '未知'
+                raise RuntimeError(f"克隆失败: {url}（失败阶段: {failed}）")
+            elapsed = time.perf_counter() - started
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return agent.last_run, elapsed
+
+        try:
+            for i in range(warmup):
+                clone(f"warmup-{i}")
+
+            totals = []
+            stage_times = {}
+            for i in range(runs):
+                run, elapsed = clone(i)
+                totals.append(elapsed)
+                for name, duration in run.timings().items():
+                    stage_times.setdefault(name, []).append(duration)
+
+            page_data = run.artifacts['page_data']
+            html_bytes = len(page_data['html'].encode('utf-8'))
+            css_bytes = sum(len(css.encode('utf-8')) for css in page_data['css_content'].values())
+            js_bytes = sum(len(js.encode('utf-8')) for js in page_data['js_content'].values())
+            input_bytes = html_bytes + css_bytes + js_bytes
+
+            # 内存和工作量计数：阶段串行执行，每个阶段的分配峰值互不重叠
+            profiler = StageProfiler(os.path.join(work_dir, 'profile'), top=0)
+            agent.profiler = profiler
+            agent.max_workers = 1
+            profiler.start()
+            try:
+                with collect() as work:
+                    clone('memory')
+            finally:
+                profiler.stop()
+                agent.profiler = None
+                agent.max_workers = stage_workers
+        finally:
+            scraper.shutdown()
+
+    return {
+        'url': url,
+        'input': {
+            'html_bytes': html_bytes,
+            'css_bytes': css_bytes,
+            'js_bytes': js_bytes,
+            'dom_nodes': len(BeautifulSoup(page_data['html'], 'html.parser').find_all(True)),
+            'stylesheets': len(page_data['css_files']),
+            'scripts': len(page_data['js_files']),
+            'images': len(page_data['images']),
+        },
+        'latency': {
+            'total': _summarize(totals),
+            'stages': {name: _summarize(values) for name, values in stage_times.items()},
+        },
+        'throughput': {
+            'pages_per_second': round(len(totals) / sum(totals), 3),
+            'input_mb_per_second': round(input_bytes * len(totals) / sum(totals) / 1024 / 1024, 3),
+        },
+        'memory': {
+            'peak_rss_bytes': peak_rss(),
+            'stages': {record['stage']: record['python_peak_bytes'] for record in profiler.stages},
+        },
+        'counters': work.snapshot(),
+    }
+
+
+def _git_revision():
+    """当前提交和工作区是否有未提交的修改"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PROJECT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def _measure_in_subprocess(url, args):
+    """在新的子进程中测量一个站点"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', url,
+               '--runs', str(args.runs), '--warmup', str(args.warmup), '--stage-workers', str(args.stage_workers)]
+    result = subprocess.run(command, cwd=PROJECT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"测量 {url} 失败:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(args):
+    """
+    启动本地站点并逐个测量
+
+    返回:
+        dict: 全部测量结果
+    """
+    server = FixtureServer()
+    sites = {}
+    for name in args.sites:
+        if name in SIZE_TIERS:
+            server.add_site(name, generate_site(name))
+            sites[name] = {'kind': 'synthetic', 'spec': SIZE_TIERS[name]}
+        elif name in SAVED_PAGES:
+            server.add_saved_page(name, SAVED_PAGES[name])
+            sites[name] = {'kind': 'saved'}
+        else:
+            raise ValueError(f"未知站点: {name}")
+
+    commit, dirty = _git_revision()
+    results = {
+        'benchmark': 'pipeline',
+        'commit': commit,
+        'dirty': dirty,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'runs': args.runs,
+        'warmup': args.warmup,
+        'stage_workers': args.stage_workers,
+        'sites': {},
+    }
+
+    with server:
+        for name, site in sites.items():
+            print(f"测量 {name} ...", flush=True)
+            site.update(_measure_in_subprocess(server.url(f"{name}/index.html"), args))
+            results['sites'][name] = site
+    return results
+
+
+def print_results(results):
+    """显示各站点的总耗时、吞吐量、内存峰值和各阶段耗时"""
+    print(f"\n提交 {results['commit'] or '未知'}{'（有未提交的修改）' if results['dirty'] else ''}，"
+          f"每个站点 {results['runs']} 次取中位数")
+    for name, site in results['sites'].items():
+        total = site['latency']['total']
+        print(f"\n{name}: {site['input']['dom_nodes']} 个元素，"
+              f"{(site['input']['html_bytes'] + site['input']['css_bytes'] + site['input']['js_bytes']) / 1024:.0f} KB 输入")
+        print(f"  总耗时 {total['median_ms']:.1f} ms（{total['min_ms']:.1f} - {total['max_ms']:.1f}），"
+              f"{site['throughput']['pages_per_second']:.2f} 页/秒，"
+              f"{site['throughput']['input_mb_per_second']:.2f} MB/秒，"
+              f"RSS峰值 {(site['memory']['peak_rss_bytes'] or 0) / 1024 / 1024:.1f} MB")
+        for stage, latency in site['latency']['stages'].items():
+            peak = site['memory']['stages'].get(stage)
+            peak_text = f"{peak / 1024 / 1024:8.2f} MB" if peak is not None else f"{'-':>11}"
+            print(f"    {stage:<10} {latency['median_ms']:10.1f} ms {peak_text}")
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与之前保存的结果比较
+
+    参数:
+        results (dict): 本次结果
+        baseline (dict): 之前保存的结果
+        threshold (float): 延迟和内存增加超过这个比例视为回退
+
+    返回:
+        list: 回退的说明，没有回退时为空列表
+    """
+    regressions = []
+
+    def check(label, current, previous):
+        if current is None or not previous:
+            return
+        change = current / previous - 1
+        if change > threshold:
+            regressions.append(f"{label}: {previous} -> {current}（+{change:.0%}）")
+
+    for name, site in results['sites'].items():
+        old = baseline.get('sites', {}).get(name)
+        if old is None:
+            continue
+        check(f"{name} 总耗时(ms)", site['latency']['total']['median_ms'], old['latency']['total']['median_ms'])
+        for stage, latency in site['latency']['stages'].items():
+            old_latency = old['latency']['stages'].get(stage)
+            if old_latency:
+                check(f"{name} {stage} 耗时(ms)", latency['median_ms'], old_latency['median_ms'])
+        for stage, peak in site['memory']['stages'].items():
+            check(f"{name} {stage} 内存峰值(字节)", peak, old['memory']['stages'].get(stage))
+        # 工作量计数是确定性的，任何增加都是回退
+        for counter, value in site['counters'].items():
+            previous = old.get('counters', {}).get(counter)
+            if previous is not None and value > previous:
+                regressions.append(f"{name} {counter}: {previous} -> {value}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web Clone Agent 克隆流程性能基准')
+    parser.add_argument('--sites', type=str, default=','.join(list(SIZE_TIERS) + list(SAVED_PAGES)),
+                        help=f"要测量的站点，逗号分隔（可选: {', '.join(list(SIZE_TIERS) + list(SAVED_PAGES))}）")
+    parser.add_argument('--pages', type=str, default=None,
+                        help='保存的真实页面目录，其中每个包含 index.html 的子目录作为一个站点')
+    parser.add_argument('--runs', type=int, default=3, help='每个站点的计时执行次数')
+    parser.add_argument('--warmup', type=int, default=1, help='每个站点的预热次数')
+    parser.add_argument('--stage-workers', type=int, default=4, help='流水线并发度')
+    parser.add_argument('--json', type=str, default=None, help='把测量结果保存为JSON文件')
+    parser.add_argument('--compare', type=str, default=None, help='与之前保存的JSON结果比较，有回退时返回1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"比较时视为回退的增加比例（默认 {DEFAULT_THRESHOLD}）")
+    parser.add_argument('--worker', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # 子进程：测量一个站点，结果以JSON输出到最后一行
+        print(json.dumps(measure_site(args.worker, args.runs, args.warmup, args.stage_workers)))
+        return 0
+
+    if args.pages:
+        for name in sorted(os.listdir(args.pages)):
+            if os.path.isfile(os.path.join(args.pages, name, 'index.html')):
+                SAVED_PAGES[name] = os.path.join(args.pages, name)
+        if '--sites' not in sys.argv:
+            args.sites = ','.join(list(SIZE_TIERS) + list(SAVED_PAGES))
+    args.sites = [name.strip() for name in args.sites.split(',') if name.strip()]
+
+    results = run_benchmark(args)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n与 {baseline.get('commit') or args.compare} 相比出现回退:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\n与 {baseline.get('commit') or args.compare} 相比没有回退")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+启动性能基准 (benchmarks/startup_benchmark.py)
+------------------------------------------
+测量命令行工具的启动开销，并与预算比较，用于发现导入时间的回退。
+
+测量项:
+1. help: 执行 `python main.py --help` 的耗时
+2. static_run_imports: 静态页面运行（不使用Selenium、未配置OpenAI）需要导入的全部模块的耗时
+
+每项都在全新的子进程中执行多次取中位数，并减去空解释器的启动时间。
+同时检查这两条路径上没有加载重型可选依赖（langchain、openai、selenium等）。
+
+使用方法:
+    python benchmarks/startup_benchmark.py                # 测量并与预算比较
+    python benchmarks/startup_benchmark.py --runs 10      # 指定重复次数
+    python benchmarks/startup_benchmark.py --json out.json  # 保存测量结果
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# 项目根目录（main.py所在目录）
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 预算文件
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+# 不应在启动路径上加载的重型可选依赖
+HEAVY_MODULES = ['langchain', 'openai', 'dotenv', 'selenium', 'webdriver_manager', 'markdown', 'yaml',
+                 'tiktoken', 'numpy']
+
+# 静态页面运行时 main.py 需要导入的模块
+STATIC_RUN_IMPORTS = 'import web_scraper, html_analyzer, style_extractor, agent, website_document_generator'
+
+# 在子进程中执行代码后输出已加载的重型模块
+_REPORT_MODULES = (
+    "import sys, json; "
+    f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+)
+
+
+def _run(args, env):
+    """在子进程中执行一次，返回 (耗时秒数, 标准输出)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=PROJECT_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"命令执行失败: {' '.join(args)}")
+    return elapsed, result.stdout
+
+
+def _median_ms(args, env, runs):
+    return statistics.median(_run(args, env)[0] for _ in range(runs)) * 1000
+
+
+def measure(runs=5):
+    """
+    执行全部测量
+
+    参数:
+        runs (int): 每项重复次数
+
+    返回:
+        dict: 测量结果
+    """
+    # 静态页面运行路径：不使用OpenAI
+    env = dict(os.environ)
+    env.pop('OPENAI_API_KEY', None)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    # 预热（生成字节码缓存、填充文件系统缓存）
+    _run(['main.py', '--help'], env)
+    _run(['-c', STATIC_RUN_IMPORTS], env)
+
+    baseline = _median_ms(['-c', 'pass'], env, runs)
+    help_ms = _median_ms(['main.py', '--help'], env, runs) - baseline
+    static_ms = _median_ms(['-c', STATIC_RUN_IMPORTS], env, runs) - baseline
+
+    # 检查重型模块是否被加载
+    help_check = (
+        "import sys; sys.argv = ['main.py', '--help']\n"
+        "import runpy\n"
+        "try:\n"
+        "    runpy.run_path('main.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"{_REPORT_MODULES}"
+    )
+    _, help_out = _run(['-c', help_check], env)
+    _, static_out = _run(['-c', f"{STATIC_RUN_IMPORTS}\n{_REPORT_MODULES}"], env)
+
+    return {
+        'python': sys.version.split()[0],
+        'runs': runs,
+        'interpreter_ms': round(baseline, 1),
+        'help_ms': round(help_ms, 1),
+        'static_run_imports_ms': round(static_ms, 1),
+        'help_heavy_modules': json.loads(help_out.strip().splitlines()[-1]),
+        'static_run_heavy_modules': json.loads(static_out.strip().splitlines()[-1]),
+    }
+
+
+def check_budget(results, budget):
+    """
+    与预算比较
+
+    参数:
+        results (dict): 测量结果
+        budget (dict): 预算
+
+    返回:
+        list: 超出预算的说明，全部符合时为空列表
+    """
+    failures = []
+    for key in ('help_ms', 'static_run_imports_ms'):
+        if key in budget and results[key] > budget[key]:
+            failures.append(f"{key}: {results[key]}ms 超出预算 {budget[key]}ms")
+
+    for key in ('help_heavy_modules', 'static_run_heavy_modules'):
+        if results[key]:
+            failures.append(f"{key}: 加载了重型模块 {', '.join(results[key])}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web Clone Agent 启动性能基准')
+    parser.add_argument('--runs', type=int, default=5, help='每项重复次数')
+    parser.add_argument('--json', type=str, default=None, help='把测量结果保存为JSON文件')
+    parser.add_argument('--budget', type=str, default=BUDGET_FILE, help='预算文件')
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+
+    print(f"Python {results['python']}，每项 {results['runs']} 次取中位数（已扣除解释器启动 {results['interpreter_ms']}ms）")
+    print(f"  main.py --help:        {results['help_ms']:8.1f} ms")
+    print(f"  静态页面运行导入:        {results['static_run_imports_ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    with open(args.budget, 'r', encoding='utf-8') as f:
+        budget = json.load(f)
+
+    failures = check_budget(results, budget)
+    if failures:
+        print("超出预算:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("全部在预算内")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量任务检查点模块 (checkpoint.py)
+------------------------------
+本模块记录批量任务中每个URL、每个阶段的执行情况，使中断的批量任务可以从断点继续。
+
+主要功能:
+1. 只追加的JSONL清单：记录每个阶段的状态、耗时、产出文件路径和内容哈希，
+   以及每个URL的最终状态和输出目录
+2. 阶段产出以pickle文件保存在URL输出目录的 .checkpoint/ 中
+3. 续跑时读取清单：已成功的URL直接跳过，未完成的URL加载已成功阶段的产出，
+   只重新执行失败或缺失的阶段
+
+工作原理:
+每条记录通过一次 os.write 追加到以 O_APPEND 打开的文件，多个线程和进程可以同时写入同一清单；
+进程崩溃时最后一行可能不完整，读取时跳过无法解析的行。
+每次非续跑的批量任务写入一条 run 记录，读取状态时只考虑最后一次非续跑任务之后的记录。
+"""
+
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import logging
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 清单文件名（位于批量输出根目录）
+MANIFEST_FILE = 'batch_manifest.jsonl'
+
+# 阶段产出目录名（位于每个URL的输出目录）
+ARTIFACT_DIR = '.checkpoint'
+
+
+class CheckpointManifest:
+    """
+    只追加的批量任务清单
+    """
+
+    def __init__(self, output_root):
+        """
+        初始化清单
+
+        参数:
+            output_root (str): 批量输出根目录
+        """
+        self.output_root = output_root
+        self.path = os.path.join(output_root, MANIFEST_FILE)
+        self._fd = None
+
+    def _open(self):
+        # 进程池中每个工作进程各自打开（文件描述符不随pickle传递）
+        if self._fd is None:
+            os.makedirs(self.output_root, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        return self._fd
+
+    def record(self, record_type, **fields):
+        """
+        追加一条记录
+
+        参数:
+            record_type (str): run / stage / url
+            **fields: 记录内容
+        """
+        entry = {'type': record_type, 'time': round(time.time(), 3)}
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        os.write(self._open(), line.encode('utf-8'))
+
+    def start_run(self, resume, url_count):
+        """记录一次批量任务的开始"""
+        self.record('run', resume=resume, urls=url_count, pid=os.getpid())
+
+    def read(self):
+        """
+        读取清单中的全部记录
+
+        返回:
+            list: 记录列表（跳过不完整的行）
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"跳过清单中不完整的记录: {line[:80]!r}")
+        return records
+
+    def state(self):
+        """
+        汇总当前批量任务（最后一次非续跑任务及之后的续跑）中每个URL的最新状态
+
+        返回:
+            dict: URL -> {'status': URL状态或None, 'output_dir': 输出目录, 'stages': 阶段名称 -> 最新阶段记录}
+        """
+        records = self.read()
+        start = 0
+        for position, entry in enumerate(records):
+            if entry.get('type') == 'run' and not entry.get('resume'):
+                start = position + 1
+
+        state = {}
+        for entry in records[start:]:
+            url = entry.get('url')
+            if url is None:
+                continue
+            item = state.setdefault(url, {'status': None, 'output_dir': None, 'stages': {}})
+            if entry['type'] == 'stage':
+                item['stages'][entry['stage']] = entry
+                item['output_dir'] = item['output_dir'] or entry.get('output_dir')
+            elif entry['type'] == 'url':
+                item['status'] = entry['status']
+                item['output_dir'] = entry.get('output_dir') or item['output_dir']
+        return state
+
+    def close(self):
+        """关闭文件"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_fd'] = None
+        return state
+
+
+def save_artifacts(output_dir, stage_name, outputs):
+    """
+    保存阶段产出
+
+    参数:
+        output_dir (str): URL输出目录
+        stage_name (str): 阶段名称
+        outputs (dict): 输出名称 -> 结果
+
+    返回:
+        tuple: (文件路径, sha256哈希)
+    """
+    directory = os.path.join(output_dir, ARTIFACT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{stage_name}.pkl")
+
+    data = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def load_artifacts(stage_records):
+    """
+    加载已成功阶段的产出
+
+    文件缺失、哈希不一致或无法反序列化的阶段视为未完成。
+
+    参数:
+        stage_records (dict): 阶段名称 -> 最新阶段记录
+
+    返回:
+        dict: 输出名称 -> 结果，可直接作为流水线的初始中间结果
+    """
+    artifacts = {}
+    for stage_name, entry in stage_records.items():
+        if entry.get('status') not in ('success', 'cached') or not entry.get('artifact'):
+            continue
+        try:
+            with open(entry['artifact'], 'rb') as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != entry.get('hash'):
+                logger.warning(f"阶段 {stage_name} 的产出与清单中的哈希不一致，将重新执行")
+                continue
+            artifacts.update(pickle.loads(data))
+        except Exception as e:
+            logger.warning(f"无法加载阶段 {stage_name} 的产出，将重新执行: {str(e)}")
+    return artifacts
+
+
+def remove_artifacts(output_dir):
+    """删除URL输出目录中的阶段产出（URL完成后不再需要）"""
+    shutil.rmtree(os.path.join(output_dir, ARTIFACT_DIR), ignore_errors=True)
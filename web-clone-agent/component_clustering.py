@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+组件聚类模块 (component_clustering.py)
+-----------------------------------
+本模块把结构和文本几乎相同的组件（如列表中的多张卡片、多个导航项）归为一簇，
+后续只把每簇的代表组件交给LLM和代码生成器。
+
+主要功能:
+1. 提取组件特征：标签序列的k-gram（结构）和文本的词/字符k-gram（内容）
+2. 为每个组件计算MinHash签名，近似两组件特征集合的Jaccard相似度
+3. 通过LSH分带把签名相同的分带放入同一桶，只比较同桶的候选对，整体接近线性时间
+4. 用并查集合并相似度超过阈值的候选对，得到组件簇
+
+工作原理:
+签名长度 = 分带数 × 每带行数，相似度为 s 的两个组件至少有一个分带完全相同的概率是
+1 - (1 - s^r)^b；默认 16 带 × 4 行，约在相似度0.5附近开始大概率成为候选对。
+有numpy时向量化计算签名，否则使用纯Python实现。
+"""
+
+import re
+import zlib
+import random
+import logging
+import importlib.util
+from collections import defaultdict
+
+# numpy用于向量化计算MinHash签名；这里只检查是否安装，创建MinHashLSH时才导入
+USE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 梅森素数 2^61 - 1，用作通用哈希的模数
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# HTML标签和文本的正则表达式
+_TAG_RE = re.compile(r'<\s*(/?)\s*([a-zA-Z][a-zA-Z0-9-]*)')
+_STRIP_TAGS_RE = re.compile(r'<[^>]*>')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def component_shingles(component, structure_k=4, text_k=3):
+    """
+    提取组件的特征集合
+
+    参数:
+        component (dict): 组件信息（需包含html）
+        structure_k (int): 标签序列k-gram的长度
+        text_k (int): 文本k-gram的长度
+
+    返回:
+        set: 32位整数表示的特征哈希集合
+    """
+    html = component.get('html', '')
+
+    # 结构特征：开闭标签序列的k-gram
+    tags = [('/' if closing else '') + name.lower() for closing, name in _TAG_RE.findall(html)]
+    shingles = set()
+    for i in range(max(1, len(tags) - structure_k + 1)):
+        shingles.add('s:' + ' '.join(tags[i:i + structure_k]))
+
+    # 文本特征：词k-gram；没有空格分隔的文本（如中文）使用字符k-gram
+    # 数字统一替换为0，只有编号、价格不同的组件视为相同内容
+    text = _DIGITS_RE.sub('0', _STRIP_TAGS_RE.sub(' ', html).lower())
+    words = _WORD_RE.findall(text)
+    tokens = []
+    for word in words:
+        if len(word) > 12 and not word.isascii():
+            tokens.extend(word)
+        else:
+            tokens.append(word)
+    for i in range(len(tokens) - text_k + 1):
+        shingles.add('t:' + ' '.join(tokens[i:i + text_k]))
+
+    return {zlib.crc32(shingle.encode('utf-8')) for shingle in shingles}
+
+
+class MinHashLSH:
+    """
+    MinHash签名与LSH分带
+    """
+
+    def __init__(self, bands=16, rows=4, seed=1):
+        """
+        初始化
+
+        参数:
+            bands (int): 分带数
+            rows (int): 每个分带的行数
+            seed (int): 随机种子（保证结果可复现）
+        """
+        self.bands = bands
+        self.rows = rows
+        self.num_perm = bands * rows
+
+        rng = random.Random(seed)
+        self._a = [rng.randint(1, _MERSENNE_PRIME - 1) for _ in range(self.num_perm)]
+        self._b = [rng.randint(0, _MERSENNE_PRIME - 1) for _ in range(self.num_perm)]
+
+        self._use_numpy = USE_NUMPY
+        if self._use_numpy:
+            import numpy as np
+            self._np = np
+            # numpy中使用较小的模数避免uint64乘法溢出：a < 2^31，x < 2^32，a*x + b < 2^64
+            self._np_prime = np.uint64((1 << 31) - 1)
+            self._np_a = np.array([a % ((1 << 31) - 1) or 1 for a in self._a], dtype=np.uint64)
+            self._np_b = np.array([b % ((1 << 31) - 1) for b in self._b], dtype=np.uint64)
+
+    def signature(self, shingles):
+        """
+        计算MinHash签名
+
+        参数:
+            shingles (set): 特征哈希集合
+
+        返回:
+            tuple: 长度为 num_perm 的签名
+        """
+        if not shingles:
+            return (_MAX_HASH,) * self.num_perm
+
+        if self._use_numpy:
+            np = self._np
+            values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+            hashed = (np.outer(self._np_a, values) + self._np_b[:, None]) % self._np_prime
+            return tuple(int(v) for v in hashed.min(axis=1))
+
+        values = list(shingles)
+        prime = _MERSENNE_PRIME
+        return tuple(
+            min(((a * x + b) % prime) & _MAX_HASH for x in values)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def band_keys(self, signature):
+        """把签名切分为分带键"""
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(sig1, sig2):
+        """根据签名估计Jaccard相似度"""
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+def cluster_components(components, threshold=0.5, bands=16, rows=4):
+    """
+    对组件进行近似重复聚类
+
+    只有相同类型的组件才会被归为一簇。
+
+    参数:
+        components (list): 组件列表
+        threshold (float): 估计相似度阈值，达到该值的候选对才会合并
+        bands (int): LSH分带数
+        rows (int): 每个分带的行数
+
+    返回:
+        list: 组件簇，每个簇包含 id、type、representative（代表组件下标）、
+              members（成员下标，按文档顺序）和 size
+    """
+    lsh = MinHashLSH(bands, rows)
+    signatures = [lsh.signature(component_shingles(component)) for component in components]
+
+    # 并查集
+    parent = list(range(len(components)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # LSH分桶：同类型、同分带键的组件成为候选对
+    buckets = defaultdict(list)
+    for index, (component, signature) in enumerate(zip(components, signatures)):
+        for key in lsh.band_keys(signature):
+            buckets[(component.get('type', ''), key)].append(index)
+
+    checked = set()
+    candidates = 0
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # 桶内每个成员只与第一个成员和前一个成员比较，保持比较次数与桶大小线性相关
+        for position in range(1, len(members)):
+            other = members[position]
+            for first in {members[0], members[position - 1]}:
+                pair = (first, other)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                candidates += 1
+                if MinHashLSH.similarity(signatures[first], signatures[other]) >= threshold:
+                    root1, root2 = find(first), find(other)
+                    if root1 != root2:
+                        parent[max(root1, root2)] = min(root1, root2)
+
+    groups = defaultdict(list)
+    for index in range(len(components)):
+        groups[find(index)].append(index)
+
+    clusters = []
+    for members in sorted(groups.values(), key=lambda m: m[0]):
+        # 代表组件取HTML最长（内容最完整）的成员
+        representative = max(members, key=lambda i: len(components[i].get('html', '')))
+        clusters.append({
+            'id': len(clusters),
+            'type': components[representative].get('type', ''),
+            'representative': representative,
+            'members': members,
+            'size': len(members)
+        })
+
+    logger.info(f"组件聚类: {len(components)} 个组件 -> {len(clusters)} 个簇（比较 {candidates} 个候选对）")
+    return clusters
+
+
+def cluster_html_analysis(html_analysis, threshold=0.5):
+    """
+    对HTML分析结果中的组件聚类，只保留每簇的代表组件
+
+    返回的结果在 html_analysis 的基础上:
+        components: 只包含代表组件，每个代表组件增加 cluster_id 和 cluster_size
+        all_components: 聚类前的全部组件
+        component_clusters: 簇列表，成员以 all_components 中的下标和 dom_index 表示
+
+    html_analysis 及其中的组件不会被修改（流水线中它是其他阶段共享的中间结果）；
+    代表组件是原组件的浅拷贝，之后写入的生效样式等字段不会出现在原组件中。
+
+    参数:
+        html_analysis (dict): HTML分析结果
+        threshold (float): 相似度阈值
+
+    返回:
+        dict: html_analysis 的浅拷贝，替换了上述字段
+    """
+    components = html_analysis.get('components', [])
+    clusters = cluster_components(components, threshold)
+
+    representatives = []
+    for cluster in clusters:
+        representatives.append(dict(components[cluster['representative']],
+                                    cluster_id=cluster['id'], cluster_size=cluster['size']))
+        cluster['member_dom_indexes'] = [components[i].get('dom_index') for i in cluster['members']]
+
+    return dict(html_analysis, all_components=components, components=representatives,
+                component_clusters=clusters)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+工作量计数器模块 (counters.py)
+---------------------------
+本模块在热点路径上统计确定性的工作量，用于性能回归测试。
+与耗时不同，同一输入的计数在任何机器上都相同，共享的CI主机上也不会抖动。
+
+主要计数:
+    html.calls            HtmlAnalyzer.analyze 调用次数
+    html.nodes_visited    HTML分析遍历的DOM节点数（整树搜索遍历的节点、嵌套深度和结构哈希访问的节点）
+    html.tree_searches    对整个文档发起的 find / find_all 搜索次数
+    css.regex_evaluations StyleExtractor 执行的正则匹配次数
+    bytes.decoded         解码为文本的响应字节数
+    files.written         文档和Vue生成器实际写入的文件数（含输出清单，见 output_writer.py）
+    bytes.written         文档和Vue生成器实际写入的字节数
+    files.skipped         内容与上次生成相同而跳过写入的文件数
+    files.deleted         上次生成而本次没有生成、被删除的过期文件数
+    http.requests         发出的HTTP请求数
+
+工作原理:
+与 tracing.py 相同，当前的计数器集合保存在 contextvars 中，被统计的代码只需调用 count_work()，
+没有激活计数器时 count_work() 立即返回。流水线阶段在调度线程上下文的副本中执行，计数会汇总到同一集合；
+每个线程只写自己的字典，读取时再合并，不需要加锁。
+
+使用示例:
+    with collect() as work:
+        analyzer.analyze(html)
+    assert work['html.tree_searches'] <= 20
+"""
+
+import threading
+import contextvars
+
+# 当前激活的计数器集合
+_active = contextvars.ContextVar('web_clone_counters', default=None)
+
+
+def count_work(name, amount=1):
+    """
+    累加计数（没有激活计数器时不做任何事）
+
+    参数:
+        name (str): 计数名称
+        amount (int): 增量
+    """
+    counters = _active.get()
+    if counters is not None:
+        counters.add(name, amount)
+
+
+def active():
+    """当前激活的计数器集合，没有时返回None（需要在循环中计数时先取出，避免重复查找）"""
+    return _active.get()
+
+
+class WorkCounters:
+    """
+    一组工作量计数
+    """
+
+    def __init__(self):
+        # 线程号 -> {计数名称: 值}
+        self._per_thread = {}
+
+    def add(self, name, amount=1):
+        """累加计数"""
+        local = self._per_thread.get(threading.get_ident())
+        if local is None:
+            local = self._per_thread.setdefault(threading.get_ident(), {})
+        local[name] = local.get(name, 0) + amount
+
+    def snapshot(self):
+        """
+        合并所有线程的计数
+
+        返回:
+            dict: 计数名称 -> 值（按名称排序）
+        """
+        totals = {}
+        for local in list(self._per_thread.values()):
+            for name, value in list(local.items()):
+                totals[name] = totals.get(name, 0) + value
+        return dict(sorted(totals.items()))
+
+    def __getitem__(self, name):
+        return self.snapshot().get(name, 0)
+
+    def activate(self):
+        """
+        在当前上下文中激活计数器
+
+        返回:
+            上下文管理器，退出时恢复之前的计数器
+        """
+        return _Activation(self)
+
+    def __repr__(self):
+        return f"WorkCounters({self.snapshot()!r})"
+
+
+class _Activation:
+    """WorkCounters.activate 返回的上下文管理器"""
+
+    __slots__ = ('counters', '_token')
+
+    def __init__(self, counters):
+        self.counters = counters
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active.set(self.counters)
+        return self.counters
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active.reset(self._token)
+        return False
+
+
+def collect():
+    """
+    创建并激活一组新的计数器
+
+    返回:
+        上下文管理器，进入时返回 WorkCounters
+    """
+    return WorkCounters().activate()
+
+
+def merge(snapshots):
+    """
+    合并多组计数（如批量模式中各URL的计数）
+
+    参数:
+        snapshots (iterable): WorkCounters.snapshot 的结果
+
+    返回:
+        dict: 计数名称 -> 合计
+    """
+    totals = {}
+    for snapshot in snapshots:
+        for name, value in snapshot.items():
+            totals[name] = totals.get(name, 0) + value
+    return dict(sorted(totals.items()))
@@ -0,0 +1,905 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+样式层叠引擎模块 (css_cascade.py)
+------------------------------
+本模块负责把CSS规则与HTML DOM进行匹配，计算每个元素最终生效的样式。
+
+主要功能:
+1. 解析CSS选择器（复合选择器、组合符、属性选择器、伪类）
+2. 计算选择器优先级（specificity）
+3. 按选择器最右侧的ID、类名或标签名对规则分桶
+4. 按优先级和源码顺序解决层叠，得到组件的最终生效样式
+
+工作原理:
+与浏览器的做法一致，规则按最右侧复合选择器中的ID、类名或标签名放入不同的桶中。
+匹配某个元素时，只取出该元素的ID、类名和标签对应的桶中的规则进行完整匹配，
+避免规则数 × 元素数的全量两两匹配，在上万条规则、上万个元素的页面上依然很快。
+"""
+
+import re
+import logging
+from collections import defaultdict
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 标识符（标签名、类名、ID），支持转义字符，例如 .md\:flex
+_IDENT_RE = re.compile(r'-?(?:[_a-zA-Z\u00a0-\uffff]|\\.)(?:[-_a-zA-Z0-9\u00a0-\uffff]|\\.)*')
+
+# 属性选择器，例如 [type="text" i]
+_ATTR_RE = re.compile(
+    r'^\s*([-_a-zA-Z0-9:|]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s\]]+))\s*([iIsS])?)?\s*$'
+)
+
+# 转义字符
+_ESCAPE_RE = re.compile(r'\\([0-9a-fA-F]{1,6}\s?|.)')
+
+# !important 标记
+_IMPORTANT_RE = re.compile(r'\s*!\s*important\s*$', re.I)
+
+# 用户交互相关的动态伪类（静态分析时无法确定其状态）
+DYNAMIC_PSEUDO_CLASSES = {
+    'hover', 'focus', 'active', 'visited', 'focus-within', 'focus-visible',
+    'target', 'checked', 'indeterminate', 'default', 'valid', 'invalid',
+    'in-range', 'out-of-range', 'placeholder-shown', 'autofill', 'user-invalid',
+    'user-valid', 'fullscreen', 'playing', 'paused', 'hover-within'
+}
+
+# 伪元素（旧语法中可以用单冒号书写）
+PSEUDO_ELEMENTS = {
+    'before', 'after', 'first-line', 'first-letter', 'placeholder', 'selection',
+    'marker', 'backdrop', 'file-selector-button', 'cue', 'part', 'slotted'
+}
+
+# 带浏览器前缀但属于伪类的选择器（与 :is() 相同），其余 -webkit-/-moz- 前缀的名称按伪元素处理
+PREFIXED_PSEUDO_CLASSES = {'-webkit-any', '-moz-any'}
+
+
+class SelectorError(ValueError):
+    """无法解析的CSS选择器"""
+
+
+class Compound:
+    """
+    复合选择器，例如 div.card#main[data-x]:first-child
+
+    使用 __slots__ 减少大量规则时的内存占用。
+    """
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs', 'pseudos', 'pseudo_element')
+
+    def __init__(self):
+        self.tag = None             # 标签名（None 或 '*' 表示任意标签）
+        self.id = None              # ID
+        self.classes = []           # 类名列表
+        self.attrs = []             # 属性条件 (name, op, value, ignore_case)
+        self.pseudos = []           # 伪类 (name, argument)
+        self.pseudo_element = None  # 伪元素名称
+
+
+def _unescape(text):
+    """去掉CSS标识符中的转义"""
+    if '\\' not in text:
+        return text
+
+    def replace(match):
+        value = match.group(1)
+        stripped = value.strip()
+        if len(stripped) > 1 or re.match(r'[0-9a-fA-F]', stripped or ' '):
+            try:
+                return chr(int(stripped, 16))
+            except ValueError:
+                return stripped
+        return value
+
+    return _ESCAPE_RE.sub(replace, text)
+
+
+def _find_closing(text, start, open_char, close_char):
+    """
+    查找与 start 位置的开括号匹配的闭括号位置（考虑嵌套和引号）
+
+    返回:
+        int: 闭括号的下标
+    """
+    depth = 0
+    quote = None
+    i = start
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == '\\':
+            i += 1
+        elif c == open_char:
+            depth += 1
+        elif c == close_char:
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise SelectorError(f"括号不匹配: {text}")
+
+
+def split_selector_list(selector_text):
+    """
+    按顶层逗号拆分选择器列表
+
+    参数:
+        selector_text (str): 选择器文本，例如 "h1, .title > a"
+
+    返回:
+        list: 单个选择器字符串列表
+    """
+    selectors = []
+    depth = 0
+    quote = None
+    current = []
+    i = 0
+    while i < len(selector_text):
+        c = selector_text[i]
+        if quote:
+            if c == '\\' and i + 1 < len(selector_text):
+                current.append(c)
+                i += 1
+                c = selector_text[i]
+            elif c == quote:
+                quote = None
+        elif c == '\\' and i + 1 < len(selector_text):
+            current.append(c)
+            i += 1
+            c = selector_text[i]
+        elif c in '"\'':
+            quote = c
+        elif c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            selectors.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(c)
+        i += 1
+
+    last = ''.join(current).strip()
+    if last:
+        selectors.append(last)
+    return [s for s in selectors if s]
+
+
+def parse_selector(selector):
+    """
+    解析单个复杂选择器
+
+    参数:
+        selector (str): 单个选择器，例如 "nav > ul li.active a"
+
+    返回:
+        tuple: (compounds, combinators)
+            compounds 为从左到右的复合选择器列表，
+            combinators[i] 为 compounds[i] 与 compounds[i+1] 之间的组合符(' ', '>', '+', '~')
+    """
+    text = selector.strip()
+    if not text:
+        raise SelectorError("空选择器")
+
+    compounds = []
+    combinators = []
+    current = Compound()
+    has_content = False
+    pending_combinator = None
+    i = 0
+    n = len(text)
+
+    while i < n:
+        c = text[i]
+
+        # 组合符（空白、>、+、~）
+        if c.isspace() or c in '>+~':
+            combinator = ' '
+            while i < n and (text[i].isspace() or text[i] in '>+~'):
+                if text[i] in '>+~':
+                    if combinator != ' ':
+                        raise SelectorError(f"连续的组合符: {selector}")
+                    combinator = text[i]
+                i += 1
+            if i >= n:
+                break
+            if not has_content:
+                # 以组合符开头的相对选择器（例如 "> a"）无法在文档级别匹配
+                raise SelectorError(f"选择器缺少左侧部分: {selector}")
+            pending_combinator = combinator
+            continue
+
+        # 遇到新的复合选择器前，先保存上一个
+        if pending_combinator is not None:
+            compounds.append(current)
+            combinators.append(pending_combinator)
+            current = Compound()
+            has_content = False
+            pending_combinator = None
+
+        if c == '*':
+            current.tag = '*'
+            i += 1
+        elif c == '#':
+            match = _IDENT_RE.match(text, i + 1)
+            if not match:
+                raise SelectorError(f"无效的ID选择器: {selector}")
+            current.id = _unescape(match.group(0))
+            i = match.end()
+        elif c == '.':
+            match = _IDENT_RE.match(text, i + 1)
+            if not match:
+                raise SelectorError(f"无效的类选择器: {selector}")
+            current.classes.append(_unescape(match.group(0)))
+            i = match.end()
+        elif c == '[':
+            end = _find_closing(text, i, '[', ']')
+            attr_match = _ATTR_RE.match(text[i + 1:end])
+            if not attr_match:
+                raise SelectorError(f"无效的属性选择器: {selector}")
+            name, op, v1, v2, v3, flag = attr_match.groups()
+            value = v1 if v1 is not None else (v2 if v2 is not None else v3)
+            if value is not None and v3 is not None:
+                value = _unescape(value)
+            current.attrs.append((name.lower(), op, value, bool(flag and flag.lower() == 'i')))
+            i = end + 1
+        elif c == ':':
+            is_element = text.startswith('::', i)
+            i += 2 if is_element else 1
+            match = _IDENT_RE.match(text, i)
+            if not match:
+                raise SelectorError(f"无效的伪类: {selector}")
+            name = match.group(0).lower()
+            i = match.end()
+            argument = None
+            if i < n and text[i] == '(':
+                end = _find_closing(text, i, '(', ')')
+                argument = text[i + 1:end].strip()
+                i = end + 1
+            if is_element or name in PSEUDO_ELEMENTS or (
+                    name.startswith(('-webkit-', '-moz-')) and name not in PREFIXED_PSEUDO_CLASSES):
+                current.pseudo_element = name
+            else:
+                current.pseudos.append((name, argument))
+        else:
+            match = _IDENT_RE.match(text, i)
+            if not match or has_content:
+                raise SelectorError(f"不支持的选择器语法: {selector}")
+            current.tag = _unescape(match.group(0)).lower()
+            i = match.end()
+
+        has_content = True
+
+    if not has_content:
+        raise SelectorError(f"选择器不完整: {selector}")
+    compounds.append(current)
+    return compounds, combinators
+
+
+def _compound_specificity(compound):
+    """计算复合选择器的优先级 (a, b, c)"""
+    a = 1 if compound.id else 0
+    b = len(compound.classes) + len(compound.attrs)
+    c = 1 if compound.tag and compound.tag != '*' else 0
+    if compound.pseudo_element:
+        c += 1
+
+    for name, argument in compound.pseudos:
+        if name in ('not', 'is', 'matches', 'has', '-webkit-any', '-moz-any'):
+            # 取参数中优先级最高的选择器
+            best = (0, 0, 0)
+            for sub in split_selector_list(argument or ''):
+                try:
+                    best = max(best, calculate_specificity(sub))
+                except SelectorError:
+                    continue
+            a, b, c = a + best[0], b + best[1], c + best[2]
+        elif name == 'where':
+            continue
+        else:
+            b += 1
+
+    return a, b, c
+
+
+def calculate_specificity(selector):
+    """
+    计算选择器的优先级
+
+    参数:
+        selector (str): 单个选择器
+
+    返回:
+        tuple: (ID数量, 类/属性/伪类数量, 标签/伪元素数量)
+    """
+    compounds, _ = parse_selector(selector)
+    a = b = c = 0
+    for compound in compounds:
+        ca, cb, cc = _compound_specificity(compound)
+        a, b, c = a + ca, b + cb, c + cc
+    return a, b, c
+
+
+def _element_children(element):
+    """获取元素的子元素（忽略文本节点）"""
+    return [child for child in element.children if getattr(child, 'name', None)]
+
+
+def _previous_elements(element):
+    """按从近到远的顺序获取前面的兄弟元素"""
+    sibling = element.previous_sibling
+    while sibling is not None:
+        if getattr(sibling, 'name', None):
+            yield sibling
+        sibling = sibling.previous_sibling
+
+
+def _parent_element(element):
+    """获取父元素（到达文档根节点时返回 None）"""
+    parent = element.parent
+    if parent is None or parent.name == '[document]':
+        return None
+    return parent
+
+
+class SelectorMatcher:
+    """
+    选择器匹配器
+
+    在 BeautifulSoup 元素上判断选择器是否匹配。
+    assume_dynamic 为 True 时采用保守策略：动态伪类（如 :hover）、伪元素
+    以及无法识别的伪类都视为可能匹配，用于判断规则是否"可能被使用"；
+    为 False 时这些条件视为不匹配，用于计算元素在默认状态下的样式。
+    """
+
+    def __init__(self, assume_dynamic=False):
+        """
+        初始化选择器匹配器
+
+        参数:
+            assume_dynamic (bool): 是否假设动态状态可能成立
+        """
+        self.assume_dynamic = assume_dynamic
+        # 伪类参数中的子选择器解析缓存
+        self._sub_selector_cache = {}
+
+    def matches(self, element, compounds, combinators):
+        """
+        判断元素是否匹配已解析的选择器
+
+        参数:
+            element (Tag): HTML元素
+            compounds (list): 复合选择器列表
+            combinators (list): 组合符列表
+
+        返回:
+            bool: 是否匹配
+        """
+        return self._match_from(element, compounds, combinators, len(compounds) - 1)
+
+    def _match_from(self, element, compounds, combinators, index):
+        """从右向左匹配第 index 个复合选择器及其左侧部分"""
+        if not self.match_compound(element, compounds[index]):
+            return False
+        if index == 0:
+            return True
+
+        combinator = combinators[index - 1]
+        if combinator == '>':
+            parent = _parent_element(element)
+            return parent is not None and self._match_from(parent, compounds, combinators, index - 1)
+        if combinator == ' ':
+            ancestor = _parent_element(element)
+            while ancestor is not None:
+                if self._match_from(ancestor, compounds, combinators, index - 1):
+                    return True
+                ancestor = _parent_element(ancestor)
+            return False
+        if combinator == '+':
+            for sibling in _previous_elements(element):
+                return self._match_from(sibling, compounds, combinators, index - 1)
+            return False
+        if combinator == '~':
+            for sibling in _previous_elements(element):
+                if self._match_from(sibling, compounds, combinators, index - 1):
+                    return True
+            return False
+        return False
+
+    def match_compound(self, element, compound):
+        """
+        判断元素是否匹配单个复合选择器
+
+        参数:
+            element (Tag): HTML元素
+            compound (Compound): 复合选择器
+
+        返回:
+            bool: 是否匹配
+        """
+        if compound.pseudo_element and not self.assume_dynamic:
+            return False
+
+        if compound.tag and compound.tag != '*' and element.name != compound.tag:
+            return False
+
+        if compound.id is not None and element.get('id') != compound.id:
+            return False
+
+        if compound.classes:
+            element_classes = element.get('class') or []
+            if isinstance(element_classes, str):
+                element_classes = element_classes.split()
+            for class_name in compound.classes:
+                if class_name not in element_classes:
+                    return False
+
+        for attr in compound.attrs:
+            if not self._match_attribute(element, attr):
+                return False
+
+        for name, argument in compound.pseudos:
+            if not self._match_pseudo(element, name, argument):
+                return False
+
+        return True
+
+    def _match_attribute(self, element, attr):
+        """判断属性选择器"""
+        name, op, expected, ignore_case = attr
+        if not element.has_attr(name):
+            return False
+        if op is None:
+            return True
+
+        actual = element.get(name)
+        if isinstance(actual, list):
+            actual = ' '.join(actual)
+        actual = actual or ''
+        expected = expected or ''
+        if ignore_case:
+            actual, expected = actual.lower(), expected.lower()
+
+        if op == '=':
+            return actual == expected
+        if op == '~=':
+            return expected in actual.split()
+        if op == '|=':
+            return actual == expected or actual.startswith(expected + '-')
+        if op == '^=':
+            return bool(expected) and actual.startswith(expected)
+        if op == '$=':
+            return bool(expected) and actual.endswith(expected)
+        if op == '*=':
+            return bool(expected) and expected in actual
+        return False
+
+    def _parse_sub_selectors(self, argument):
+        """解析伪类参数中的选择器列表（带缓存）"""
+        if argument not in self._sub_selector_cache:
+            parsed = []
+            for sub in split_selector_list(argument or ''):
+                try:
+                    parsed.append(parse_selector(sub))
+                except SelectorError:
+                    parsed.append(None)
+            self._sub_selector_cache[argument] = parsed
+        return self._sub_selector_cache[argument]
+
+    def _match_pseudo(self, element, name, argument):
+        """判断伪类"""
+        if name in DYNAMIC_PSEUDO_CLASSES:
+            return self.assume_dynamic
+
+        if name in ('link', 'any-link'):
+            return element.name in ('a', 'area') and element.has_attr('href')
+
+        if name in ('not', 'is', 'matches', 'where', '-webkit-any', '-moz-any'):
+            sub_selectors = self._parse_sub_selectors(argument)
+            if any(sub is None for sub in sub_selectors):
+                return self.assume_dynamic
+            matched = any(self.matches(element, *sub) for sub in sub_selectors)
+            if name == 'not':
+                # 保守模式下，:not(:hover) 之类的条件也可能成立
+                return (not matched) or self.assume_dynamic
+            return matched
+
+        if name == 'root':
+            return _parent_element(element) is None
+        if name == 'empty':
+            return not any(
+                getattr(child, 'name', None) or str(child).strip()
+                for child in element.children
+            )
+
+        parent = element.parent
+        if name in ('first-child', 'last-child', 'only-child',
+                    'first-of-type', 'last-of-type', 'only-of-type'):
+            if parent is None:
+                return False
+            siblings = _element_children(parent)
+            if name.endswith('of-type'):
+                siblings = [s for s in siblings if s.name == element.name]
+            if name.startswith('first'):
+                return bool(siblings) and siblings[0] is element
+            if name.startswith('last'):
+                return bool(siblings) and siblings[-1] is element
+            return len(siblings) == 1
+
+        if name in ('nth-child', 'nth-last-child', 'nth-of-type', 'nth-last-of-type'):
+            step = self._parse_nth(argument)
+            if step is None or parent is None:
+                return self.assume_dynamic
+            siblings = _element_children(parent)
+            if name.endswith('of-type'):
+                siblings = [s for s in siblings if s.name == element.name]
+            if 'last' in name:
+                siblings = list(reversed(siblings))
+            position = next((i for i, s in enumerate(siblings, 1) if s is element), 0)
+            a, b = step
+            if a == 0:
+                return position == b
+            return (position - b) % a == 0 and (position - b) // a >= 0
+
+        # 无法识别的伪类
+        return self.assume_dynamic
+
+    @staticmethod
+    def _parse_nth(argument):
+        """解析 an+b 表达式，返回 (a, b)"""
+        text = (argument or '').replace(' ', '').lower()
+        if text == 'odd':
+            return 2, 1
+        if text == 'even':
+            return 2, 0
+        match = re.match(r'^([+-]?\d*)n([+-]\d+)?$', text)
+        if match:
+            a_text = match.group(1)
+            a = -1 if a_text == '-' else (1 if a_text in ('', '+') else int(a_text))
+            return a, int(match.group(2) or 0)
+        if re.match(r'^[+-]?\d+$', text):
+            return 0, int(text)
+        return None
+
+
+def bucket_key(compound):
+    """
+    获取复合选择器的分桶键（优先使用ID，其次类名，再次标签名）
+
+    参数:
+        compound (Compound): 选择器最右侧的复合选择器
+
+    返回:
+        tuple: (桶类型, 键)，桶类型为 'id'、'class'、'tag' 或 'universal'
+    """
+    if compound.id is not None:
+        return 'id', compound.id
+    if compound.classes:
+        return 'class', compound.classes[0]
+    if compound.tag and compound.tag != '*':
+        return 'tag', compound.tag
+    return 'universal', None
+
+
+def split_important(value):
+    """
+    拆分声明值中的 !important 标记
+
+    返回:
+        tuple: (去掉标记后的值, 是否为 important)
+    """
+    if '!' in value:
+        match = _IMPORTANT_RE.search(value)
+        if match:
+            return value[:match.start()].strip(), True
+    return value, False
+
+
+def parse_inline_style(style_text):
+    """
+    解析元素 style 属性中的声明
+
+    参数:
+        style_text (str): style 属性文本
+
+    返回:
+        dict: 属性 -> 值
+    """
+    declarations = {}
+    for decl in (style_text or '').split(';'):
+        if ':' in decl:
+            prop, value = decl.split(':', 1)
+            declarations[prop.strip().lower()] = value.strip()
+    return declarations
+
+
+class _IndexedSelector:
+    """已分桶的单个选择器"""
+
+    __slots__ = ('selector', 'compounds', 'combinators', 'specificity', 'order', 'rule')
+
+    def __init__(self, selector, compounds, combinators, specificity, order, rule):
+        self.selector = selector
+        self.compounds = compounds
+        self.combinators = combinators
+        self.specificity = specificity
+        self.order = order
+        self.rule = rule
+
+
+class CascadeEngine:
+    """
+    样式层叠引擎
+
+    按最右侧复合选择器对规则分桶，对元素只匹配相关桶中的规则，
+    再按 (是否important, 优先级, 源码顺序) 解决层叠冲突。
+    """
+
+    def __init__(self):
+        """初始化层叠引擎"""
+        self._id_buckets = defaultdict(list)
+        self._class_buckets = defaultdict(list)
+        self._tag_buckets = defaultdict(list)
+        self._universal = []
+        self._matcher = SelectorMatcher(assume_dynamic=False)
+        self._order = 0
+        self.rule_count = 0
+        self.skipped_selectors = 0
+
+    def add_rule(self, rule):
+        """
+        添加一条样式规则
+
+        只索引选择器，规则的声明在元素匹配成功后才被读取（解析）。
+
+        参数:
+            rule (StyleRule): 样式规则（需提供 selector 和 declarations 属性）
+        """
+        selector_text = rule.selector
+        order = self._order
+        self._order += 1
+        self.rule_count += 1
+
+        for selector in split_selector_list(selector_text):
+            try:
+                compounds, combinators = parse_selector(selector)
+                specificity = calculate_specificity(selector)
+            except SelectorError:
+                self.skipped_selectors += 1
+                continue
+
+            # 伪元素规则不会作用在元素本身上
+            if compounds[-1].pseudo_element:
+                continue
+
+            entry = _IndexedSelector(selector, compounds, combinators, specificity, order, rule)
+            kind, key = bucket_key(compounds[-1])
+            if kind == 'id':
+                self._id_buckets[key].append(entry)
+            elif kind == 'class':
+                self._class_buckets[key].append(entry)
+            elif kind == 'tag':
+                self._tag_buckets[key].append(entry)
+            else:
+                self._universal.append(entry)
+
+    def add_rules(self, rules):
+        """
+        批量添加样式规则
+
+        参数:
+            rules (list): 按源码顺序排列的样式规则列表
+        """
+        for rule in rules:
+            self.add_rule(rule)
+
+    def _candidates(self, element):
+        """获取元素可能匹配的候选选择器（只查询相关的桶）"""
+        candidates = []
+        element_id = element.get('id')
+        if element_id and element_id in self._id_buckets:
+            candidates.extend(self._id_buckets[element_id])
+
+        classes = element.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for class_name in set(classes):
+            bucket = self._class_buckets.get(class_name)
+            if bucket:
+                candidates.extend(bucket)
+
+        bucket = self._tag_buckets.get(element.name)
+        if bucket:
+            candidates.extend(bucket)
+
+        candidates.extend(self._universal)
+        return candidates
+
+    def matching_rules(self, element):
+        """
+        获取匹配元素的所有选择器，按优先级和源码顺序排序
+
+        参数:
+            element (Tag): HTML元素
+
+        返回:
+            list: 按层叠顺序（从低到高）排列的匹配项
+        """
+        matched = [
+            entry for entry in self._candidates(element)
+            if self._matcher.matches(element, entry.compounds, entry.combinators)
+        ]
+        matched.sort(key=lambda entry: (entry.specificity, entry.order))
+        return matched
+
+    def compute(self, element):
+        """
+        计算元素最终生效的样式声明
+
+        层叠顺序: 普通规则 < 内联普通样式 < important规则 < 内联important样式
+
+        参数:
+            element (Tag): HTML元素
+
+        返回:
+            dict: 属性 -> 最终生效的值
+        """
+        normal = {}
+        important = {}
+
+        for entry in self.matching_rules(element):
+            for prop, value in entry.rule.declarations.items():
+                value, is_important = split_important(value)
+                if is_important:
+                    important[prop] = value
+                else:
+                    normal[prop] = value
+
+        inline_important = {}
+        for prop, value in parse_inline_style(element.get('style')).items():
+            value, is_important = split_important(value)
+            if is_important:
+                inline_important[prop] = value
+            else:
+                normal[prop] = value
+
+        normal.update(important)
+        normal.update(inline_important)
+        return normal
+
+    def compute_components(self, soup, components):
+        """
+        计算每个已识别组件根元素的最终生效样式
+
+        组件通过 HtmlAnalyzer 记录的 dom_index（元素在文档中的顺序位置）定位，
+        缺少该字段时按 ID 或标签名+类名查找。结果写入组件的 computed_styles 字段。
+
+        参数:
+            soup (BeautifulSoup): 与HTML分析时相同的解析结果
+            components (list): 组件列表
+
+        返回:
+            list: 每个组件的最终生效样式（与 components 顺序一致）
+        """
+        elements = soup.find_all()
+        results = []
+
+        for component in components:
+            element = None
+            dom_index = component.get('dom_index')
+            if dom_index is not None and 0 <= dom_index < len(elements):
+                element = elements[dom_index]
+            elif component.get('id'):
+                element = soup.find(id=component['id'])
+            elif component.get('element'):
+                classes = component.get('classes') or []
+                element = soup.find(component['element'], class_=classes[0]) if classes else soup.find(component['element'])
+
+            computed = self.compute(element) if element is not None else {}
+            component['computed_styles'] = computed
+            results.append(computed)
+
+        logger.info(f"已计算 {len(results)} 个组件的生效样式（规则数: {self.rule_count}）")
+        return results
+
+
+class ElementIndex:
+    """
+    文档元素索引
+
+    按ID、类名和标签名索引页面中的所有元素，用于快速判断某个选择器
+    是否至少匹配一个元素（未使用CSS规则的裁剪）。
+    判断采用保守策略：动态伪类、伪元素、无法识别的伪类以及无法解析的
+    选择器都视为"可能被使用"，宁可多保留也不误删。
+    """
+
+    def __init__(self, soup):
+        """
+        初始化元素索引
+
+        参数:
+            soup (BeautifulSoup): 已解析的HTML
+        """
+        self._by_id = defaultdict(list)
+        self._by_class = defaultdict(list)
+        self._by_tag = defaultdict(list)
+        self._all = soup.find_all()
+        self._matcher = SelectorMatcher(assume_dynamic=True)
+        # 选择器判断结果缓存（框架样式中同一选择器经常重复出现）
+        self._cache = {}
+
+        for element in self._all:
+            element_id = element.get('id')
+            if element_id:
+                self._by_id[element_id].append(element)
+            classes = element.get('class') or []
+            if isinstance(classes, str):
+                classes = classes.split()
+            for class_name in classes:
+                self._by_class[class_name].append(element)
+            self._by_tag[element.name].append(element)
+
+    @property
+    def element_count(self):
+        """文档中的元素数量"""
+        return len(self._all)
+
+    def _candidates(self, compound):
+        """获取可能匹配最右侧复合选择器的元素"""
+        kind, key = bucket_key(compound)
+        if kind == 'id':
+            return self._by_id.get(key, ())
+        if kind == 'class':
+            return self._by_class.get(key, ())
+        if kind == 'tag':
+            return self._by_tag.get(key, ())
+        return self._all
+
+    def selector_matches_any(self, selector):
+        """
+        判断单个选择器是否至少匹配文档中的一个元素
+
+        参数:
+            selector (str): 单个选择器
+
+        返回:
+            bool: 是否可能被使用
+        """
+        try:
+            compounds, combinators = parse_selector(selector)
+        except SelectorError:
+            return True
+
+        for element in self._candidates(compounds[-1]):
+            if self._matcher.matches(element, compounds, combinators):
+                return True
+        return False
+
+    def is_used(self, selector_text):
+        """
+        判断选择器列表中是否有任一选择器匹配文档中的元素
+
+        参数:
+            selector_text (str): 选择器文本（可以是逗号分隔的列表）
+
+        返回:
+            bool: 规则是否可能被使用
+        """
+        if selector_text in self._cache:
+            return self._cache[selector_text]
+
+        selectors = split_selector_list(selector_text)
+        used = not selectors or any(self.selector_matches_any(s) for s in selectors)
+        self._cache[selector_text] = used
+        return used
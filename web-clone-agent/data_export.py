@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+结构化数据导出模块 (data_export.py)
+-------------------------------
+把HTML分析、样式分析、网络请求和性能审计结果导出为机器可读的文件（site_data.yaml 等），
+文档生成器按 export_formats 选择一种或多种格式。
+
+支持的格式:
+    yaml     site_data.yaml     有libyaml时使用C实现的Dumper
+    json     site_data.json     一个JSON对象，结构与YAML相同
+    jsonl    site_data.jsonl    每行一条记录，record 字段为记录类型（site、components、colors ...）
+    msgpack  site_data.msgpack  依次排列的MessagePack对象，记录与jsonl相同（需要安装msgpack）
+
+工作原理:
+数据分为开头的页面信息（URL、标题、meta、布局）、若干按记录流式产生的部分和结尾的性能审计结果。
+各部分依次为 components、colors（全部颜色及其分类）、fonts、rules（每条样式规则的选择器、来源和声明）、
+component_styles、global_styles、stylesheets（每个样式表的大小和未使用规则统计）、
+assets（抓取的每个资源的网络请求记录）和 hosts。
+导出器逐条（YAML按批）序列化记录并产出字节块，不在内存中构建完整的数据树，
+配合 OutputWriter.write_stream 边序列化边写入文件。
+
+使用示例:
+    exporter = get_exporter('jsonl')
+    site = SiteData(html_analysis, style_analysis, url)
+    writer.write_stream(exporter.file_name, exporter.iter_chunks(site))
+"""
+
+import json
+from datetime import datetime
+
+# yaml和msgpack只在导出对应格式时导入
+
+# 导出格式 -> 导出器类（在文件末尾注册）
+EXPORTERS = {}
+
+# 默认的导出格式
+DEFAULT_EXPORT_FORMATS = ('yaml',)
+
+# 每批序列化和产出的记录数（每次调用YAML Dumper有固定开销，逐条序列化很慢；产出的字节块也不宜过小）
+BATCH_SIZE = 256
+
+
+def _batches(records, size=BATCH_SIZE):
+    """把记录迭代器按 size 条分批"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _color_records(colors):
+    """颜色记录：全部颜色及出现次数，带上所属分类和亮度"""
+    if isinstance(colors, list):
+        # 旧格式：[{'color', 'count', ...}]
+        for color in colors:
+            yield {
+                'color': color.get('color', color.get('value')),
+                'count': color.get('count'),
+                'category': color.get('category'),
+                'brightness': color.get('brightness'),
+            }
+        return
+    if not isinstance(colors, dict):
+        return
+
+    categorized = {}
+    for category, entries in colors.items():
+        if category.endswith('_colors') and category != 'all_colors' and isinstance(entries, list):
+            for entry in entries:
+                categorized.setdefault(entry.get('value'), (category[:-len('_colors')], entry.get('brightness')))
+
+    all_colors = colors.get('all_colors')
+    if not isinstance(all_colors, dict):
+        all_colors = {value: None for value in categorized}
+    for value, count in all_colors.items():
+        category, brightness = categorized.get(value, (None, None))
+        yield {'color': value, 'count': count, 'category': category, 'brightness': brightness}
+
+
+def _rule_records(rules):
+    """样式规则记录：选择器、来源文件和声明"""
+    for rule in rules or ():
+        yield {'selector': rule.selector, 'source': rule.source, 'declarations': dict(rule.declarations)}
+
+
+def _component_style_records(component_styles):
+    """组件样式记录：组件类型、选择器和合并后的声明"""
+    for component_type, selectors in (component_styles or {}).items():
+        for selector, declarations in selectors.items():
+            yield {'component_type': component_type, 'selector': selector, 'declarations': dict(declarations)}
+
+
+def _stylesheet_records(style_analysis):
+    """样式表记录：大小、规则数和未使用规则的统计"""
+    css_usage = style_analysis.get('css_usage') or {}
+    for source, stats in (style_analysis.get('file_stats') or {}).items():
+        yield dict({'source': source}, **stats, **css_usage.get(source, {}))
+
+
+class SiteData:
+    """
+    一次导出的数据：页面信息、按记录产生的各部分和性能审计结果
+
+    各部分的记录在导出时才逐条生成，同一个 SiteData 可以依次交给多个导出器。
+    """
+
+    def __init__(self, html_analysis, style_analysis, url, network=None, performance=None, generated_at=None):
+        """
+        初始化导出数据
+
+        参数:
+            html_analysis (dict): HTML分析结果
+            style_analysis (dict): 样式分析结果
+            url (str): 分析的网页URL
+            network (list): 抓取时各请求的计时记录
+            performance (dict): 性能审计结果
+            generated_at (str): 生成时间（ISO格式），默认为当前时间
+        """
+        self.html_analysis = html_analysis
+        self.style_analysis = style_analysis
+        self.network = network or []
+        self.performance = performance
+        self.header = {
+            'url': url,
+            'generated_at': generated_at or datetime.now().isoformat(),
+            'page_title': html_analysis.get('title', '未命名网页'),
+            'meta': html_analysis.get('meta', {}),
+            'layout': html_analysis.get('layout', {}),
+        }
+
+    def sections(self):
+        """
+        按顺序返回各部分
+
+        返回:
+            list: [(部分名称, 记录迭代器)]
+        """
+        html_analysis, style_analysis = self.html_analysis, self.style_analysis
+        hosts = []
+        if self.network:
+            from network_timing import summarize_hosts
+            hosts = summarize_hosts(self.network)
+        return [
+            ('components', ({
+                'type': c.get('type'),
+                'element': c.get('element'),
+                'id': c.get('id', ''),
+                'classes': c.get('classes', []),
+            } for c in html_analysis.get('components', []))),
+            ('colors', _color_records(style_analysis.get('colors'))),
+            ('fonts', ({
+                'font_family': f.get('font_family'),
+                'count': f.get('count')
+            } for f in style_analysis.get('fonts', []))),
+            ('rules', _rule_records(style_analysis.get('rules'))),
+            ('component_styles', _component_style_records(style_analysis.get('component_styles'))),
+            ('global_styles', ({'selector': selector, 'declarations': dict(declarations)}
+                               for selector, declarations in (style_analysis.get('global_styles') or {}).items())),
+            ('stylesheets', _stylesheet_records(style_analysis)),
+            ('assets', iter(self.network)),
+            ('hosts', iter(hosts)),
+        ]
+
+    def trailer(self):
+        """结尾的数据（没有性能审计结果时为空字典）"""
+        return {'performance': self.performance} if self.performance else {}
+
+
+class Exporter:
+    """导出器基类：子类实现 iter_chunks，产出文件内容的字节块"""
+
+    # 格式名称和输出文件名
+    name = None
+    file_name = None
+
+    def iter_chunks(self, site):
+        """
+        逐块序列化导出数据
+
+        参数:
+            site (SiteData): 导出数据
+
+        返回:
+            iterator: 字节块
+        """
+        raise NotImplementedError
+
+
+def _plain_string_dumper(dumper):
+    """
+    把str子类（如BeautifulSoup的属性值类型）输出为普通字符串的Dumper，
+    否则会输出为 !!python/object 标签，safe_load 无法读取
+    """
+    class PlainStringDumper(dumper):
+        pass
+
+    # C实现的Emitter只接受str本身
+    PlainStringDumper.add_multi_representer(str, lambda self, data: self.represent_str(str(data)))
+    return PlainStringDumper
+
+
+class YamlExporter(Exporter):
+    """YAML导出：页面信息和各部分作为顶层键，各部分的记录按批序列化为块格式的列表"""
+
+    name = 'yaml'
+    file_name = 'site_data.yaml'
+
+    def __init__(self):
+        import yaml
+        self._yaml = yaml
+        # 有libyaml时使用C实现的Dumper，输出相同但快得多
+        self._dumper = _plain_string_dumper(getattr(yaml, 'CDumper', yaml.Dumper))
+
+    def _dump(self, data):
+        return self._yaml.dump(data, Dumper=self._dumper, sort_keys=False, default_flow_style=False,
+                               allow_unicode=True).encode('utf-8')
+
+    def iter_chunks(self, site):
+        yield self._dump(site.header)
+        for section, records in site.sections():
+            # 顶层块格式列表的各批输出首尾相接即为完整的列表
+            empty = True
+            for batch in _batches(records):
+                if empty:
+                    yield f"{section}:\n".encode('utf-8')
+                    empty = False
+                yield self._dump(batch)
+            if empty:
+                yield self._dump({section: []})
+        trailer = site.trailer()
+        if trailer:
+            yield self._dump(trailer)
+
+
+class JsonExporter(Exporter):
+    """JSON导出：与YAML结构相同的一个JSON对象，记录逐条序列化"""
+
+    name = 'json'
+    file_name = 'site_data.json'
+
+    def __init__(self):
+        # 复用编码器（json.dumps 带参数时每次都会新建编码器）
+        self._encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+    def iter_chunks(self, site):
+        encode = self._encoder.encode
+        # 页面信息对象去掉结尾的 }，之后依次追加各部分
+        yield encode(site.header)[:-1].encode('utf-8')
+        for section, records in site.sections():
+            yield f",\n{encode(section)}: [".encode('utf-8')
+            separator = '\n'
+            for batch in _batches(records):
+                yield (separator + ',\n'.join(encode(record) for record in batch)).encode('utf-8')
+                separator = ',\n'
+            yield b"\n]"
+        for key, value in site.trailer().items():
+            yield f",\n{encode(key)}: {encode(value)}".encode('utf-8')
+        yield b"}\n"
+
+
+class JsonLinesExporter(Exporter):
+    """JSON Lines导出：第一行为页面信息，之后每行一条记录，record 字段为所属部分"""
+
+    name = 'jsonl'
+    file_name = 'site_data.jsonl'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+    def iter_records(self, site):
+        """依次产生带 record 字段的记录（jsonl和msgpack共用）"""
+        yield dict({'record': 'site'}, **site.header)
+        for section, records in site.sections():
+            for record in records:
+                yield dict({'record': section}, **record)
+        trailer = site.trailer()
+        if trailer:
+            yield dict({'record': 'performance'}, **trailer['performance'])
+
+    def iter_chunks(self, site):
+        encode = self._encoder.encode
+        for batch in _batches(self.iter_records(site)):
+            yield ''.join(encode(record) + '\n' for record in batch).encode('utf-8')
+
+
+class MsgpackExporter(JsonLinesExporter):
+    """MessagePack导出：记录与jsonl相同，依次打包（可用 msgpack.Unpacker 流式读取）"""
+
+    name = 'msgpack'
+    file_name = 'site_data.msgpack'
+
+    def __init__(self):
+        import msgpack
+        self._packer = msgpack.Packer(use_bin_type=True, default=str)
+
+    def iter_chunks(self, site):
+        pack = self._packer.pack
+        for record in self.iter_records(site):
+            yield pack(record)
+
+
+for _exporter in (YamlExporter, JsonExporter, JsonLinesExporter, MsgpackExporter):
+    EXPORTERS[_exporter.name] = _exporter
+
+
+def get_exporter(name):
+    """
+    创建指定格式的导出器
+
+    参数:
+        name (str): 格式名称（见 EXPORTERS）
+
+    返回:
+        Exporter: 导出器
+
+    异常:
+        ValueError: 不支持的格式
+        ImportError: 格式需要的模块（yaml、msgpack）没有安装
+    """
+    exporter_class = EXPORTERS.get(name)
+    if exporter_class is None:
+        raise ValueError(f"不支持的导出格式: {name}（可用: {', '.join(EXPORTERS)}）")
+    return exporter_class()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP录制与回放模块 (har.py)
+------------------------
+把 WebScraper 发出的请求和收到的响应录制为HAR（HTTP Archive 1.2）格式的归档，
+之后可以完全从归档中回放，不访问网络。
+
+用途:
+1. 开发和基准测试时结果可重复，不受网络波动影响
+2. 回放时不设置延迟，抓取几乎不耗时，可以单独剖析分析阶段
+3. 回放时模拟延迟和带宽，离线测试抓取的并发行为
+
+主要类:
+    HarRecorder  录制请求和响应（含请求头、响应头、内容和耗时），保存为HAR文件
+    HarArchive   读取HAR文件，按URL返回 requests.Response（跟随录制下来的重定向）
+
+使用示例:
+    scraper = WebScraper(recorder=HarRecorder('site.har'))     # 录制
+    scraper = WebScraper(archive=HarArchive('site.har'))       # 回放
+"""
+
+import os
+import json
+import time
+import base64
+import logging
+import datetime
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# 重定向最多跟随的次数（与 requests 的默认值相同）
+MAX_REDIRECTS = 30
+
+_REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+
+class ReplayMissError(requests.ConnectionError):
+    """归档中没有请求的URL（继承 ConnectionError，抓取器按网络错误处理）"""
+
+
+def _header_list(headers):
+    return [{'name': name, 'value': value} for name, value in headers.items()]
+
+
+def _http_version(response):
+    version = getattr(response.raw, 'version', None)
+    return {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2.0'}.get(version, 'HTTP/1.1')
+
+
+def _encode_content(data):
+    """响应内容：UTF-8文本直接保存，其他内容用base64（回放时字节完全一致）"""
+    try:
+        return {'text': data.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'text': base64.b64encode(data).decode('ascii'), 'encoding': 'base64'}
+
+
+def _decode_content(content):
+    text = content.get('text', '')
+    if content.get('encoding') == 'base64':
+        return base64.b64decode(text)
+    return text.encode('utf-8')
+
+
+class HarRecorder:
+    """
+    录制HTTP请求和响应
+    """
+
+    def __init__(self, path):
+        """
+        初始化录制器
+
+        参数:
+            path (str): HAR文件路径（save 时写入，已存在时覆盖）
+        """
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def record(self, response, started, timings):
+        """
+        录制一次请求（重定向链中的每一跳各是一条记录）
+
+        参数:
+            response (requests.Response): 最终响应
+            started (float): 请求开始的时间戳（time.time()）
+            timings (list): network_timing.describe 生成的计时记录，与重定向链的每一跳一一对应
+        """
+        hops = list(response.history) + [response]
+        entries = []
+        for hop, timing in zip(hops, timings):
+            entries.append(self._entry(hop, started, timing))
+            started += timing['total_ms'] / 1000
+
+        with self._lock:
+            self.entries.extend(entries)
+
+    @staticmethod
+    def _entry(response, started, timing):
+        request = response.request
+        data = response.content or b''
+        body_size = timing['transfer_bytes'] if timing['transfer_bytes'] is not None else len(data)
+        content = {'size': len(data), 'compression': len(data) - body_size,
+                   'mimeType': response.headers.get('Content-Type', '')}
+        content.update(_encode_content(data))
+        # HAR中 connect 包含TLS握手时间；复用连接时没有的阶段为 -1
+        reused = timing['reused_connection']
+        return {
+            'startedDateTime': datetime.datetime.fromtimestamp(started, datetime.timezone.utc).isoformat(),
+            'time': timing['total_ms'],
+            'request': {
+                'method': request.method,
+                'url': request.url,
+                'httpVersion': _http_version(response),
+                'headers': _header_list(request.headers),
+                'queryString': [{'name': name, 'value': value}
+                                for name, value in parse_qsl(urlsplit(request.url).query)],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': 0,
+            },
+            'response': {
+                'status': response.status_code,
+                'statusText': response.reason or '',
+                'httpVersion': _http_version(response),
+                'headers': _header_list(response.headers),
+                'cookies': [],
+                'content': content,
+                'redirectURL': response.headers.get('Location', '') if response.is_redirect else '',
+                'headersSize': -1,
+                'bodySize': body_size,
+            },
+            'cache': {},
+            'timings': {
+                'blocked': -1,
+                'dns': -1 if reused else timing['dns_ms'],
+                'connect': -1 if reused else round(timing['connect_ms'] + (timing['tls_ms'] or 0), 1),
+                'ssl': -1 if reused or timing['tls_ms'] is None else timing['tls_ms'],
+                'send': 0,
+                'wait': timing['ttfb_ms'],
+                'receive': timing['download_ms'],
+            },
+        }
+
+    def save(self):
+        """
+        把已录制的记录写入HAR文件（先写临时文件再替换，中途失败不会留下不完整的归档）
+
+        返回:
+            str: HAR文件路径
+        """
+        with self._lock:
+            entries = list(self.entries)
+        har = {
+            'log': {
+                'version': '1.2',
+                'creator': {'name': 'web-clone-agent', 'version': '1.0'},
+                'entries': entries,
+            }
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(har, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        logger.info(f"已录制 {len(entries)} 个请求到 {self.path}")
+        return self.path
+
+
+class HarArchive:
+    """
+    从HAR文件回放HTTP响应
+    """
+
+    def __init__(self, path, latency=0.0, bandwidth=None):
+        """
+        读取HAR文件
+
+        参数:
+            path (str): HAR文件路径
+            latency (float): 每个请求模拟的延迟（秒）
+            bandwidth (float): 模拟的带宽（字节/秒），None表示不限制
+        """
+        self.path = path
+        self.latency = latency
+        self.bandwidth = bandwidth
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)['log']['entries']
+
+        # URL -> 记录；同一URL录制了多次时使用最后一次
+        self.entries = {}
+        for entry in entries:
+            if entry['request'].get('method', 'GET') == 'GET':
+                self.entries[entry['request']['url']] = entry
+        logger.info(f"已从 {path} 读取 {len(self.entries)} 个URL的录制结果")
+
+    def __contains__(self, url):
+        return self._lookup(url) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _lookup(self, url):
+        entry = self.entries.get(url)
+        if entry is None:
+            # 录制的是 requests 规范化之后的URL（补全路径、去掉片段等）
+            prepared = requests.models.PreparedRequest()
+            prepared.prepare_url(url.split('#', 1)[0], None)
+            entry = self.entries.get(prepared.url)
+        return entry
+
+    def _simulate(self, size):
+        """模拟网络延迟和下载时间"""
+        delay = self.latency
+        if self.bandwidth:
+            delay += size / self.bandwidth
+        if delay > 0:
+            time.sleep(delay)
+
+    def get(self, url):
+        """
+        回放一个GET请求
+
+        参数:
+            url (str): 请求的URL
+
+        返回:
+            requests.Response: 与录制时相同的状态码、响应头和内容
+
+        异常:
+            ReplayMissError: 归档中没有这个URL
+        """
+        history = []
+        for _ in range(MAX_REDIRECTS + 1):
+            entry = self._lookup(url)
+            if entry is None:
+                raise ReplayMissError(f"回放归档中没有这个URL: {url}")
+            response = self._build_response(url, entry)
+            self._simulate(len(response.content))
+            location = entry['response'].get('redirectURL')
+            if response.status_code not in _REDIRECT_STATUS or not location:
+                response.history = history
+                return response
+            history.append(response)
+            url = requests.compat.urljoin(url, location)
+        raise requests.TooManyRedirects(f"重定向次数超过 {MAX_REDIRECTS}: {url}")
+
+    @staticmethod
+    def _build_response(url, entry):
+        recorded = entry['response']
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('statusText', '')
+        response.url = url
+        response.headers = CaseInsensitiveDict(
+            (header['name'], header['value']) for header in recorded.get('headers', [])
+        )
+        # 录制的是解压后的内容，直接作为响应内容（保留 Content-Encoding 响应头只用于显示）
+        response._content = _decode_content(recorded.get('content', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.transfer_size = recorded.get('bodySize', len(response._content))
+
+        # 还原录制时建立连接的耗时（见 network_timing.py），elapsed 与 requests 一样包含建立连接的时间
+        timings = entry.get('timings', {})
+        response.connection_timings = None
+        if timings.get('dns', -1) >= 0 or timings.get('connect', -1) >= 0:
+            ssl = timings['ssl'] if timings.get('ssl', -1) >= 0 else None
+            response.connection_timings = {
+                'dns': max(timings.get('dns', 0), 0) / 1000,
+                'connect': (max(timings.get('connect', 0), 0) - (ssl or 0)) / 1000,
+                'tls': ssl / 1000 if ssl is not None else None,
+            }
+        setup = sum(value or 0 for value in (response.connection_timings or {}).values())
+        response.elapsed = datetime.timedelta(seconds=setup + max(timings.get('wait', 0) or 0, 0) / 1000)
+        request = requests.Request('GET', url, headers={
+            header['name']: header['value'] for header in entry['request'].get('headers', [])
+        })
+        response.request = request.prepare()
+        return response
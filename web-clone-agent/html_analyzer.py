@@ -20,12 +20,43 @@ HTML分析器模块 (html_analyzer.py)
 
 import re
 import logging
-from bs4 import BeautifulSoup
+import hashlib
+from bs4 import BeautifulSoup, Tag
 from collections import Counter
 
+from tracing import span
+from counters import count_work, active as active_counters
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
+
+class _CountedSoup(BeautifulSoup):
+    """
+    统计整树搜索的文档对象
+    
+    find / find_all 都通过 descendants 遍历节点；只有激活了计数器（见 counters.py）时
+    才包装遍历过程，否则与 BeautifulSoup 完全相同。
+    """
+    
+    @property
+    def descendants(self):
+        counters = active_counters()
+        if counters is None:
+            return Tag.descendants.fget(self)
+        counters.add('html.tree_searches')
+        return self._counted_descendants(counters)
+    
+    def _counted_descendants(self, counters):
+        visited = 0
+        try:
+            for node in Tag.descendants.fget(self):
+                visited += 1
+                yield node
+        finally:
+            counters.add('html.nodes_visited', visited)
+
+
 class HtmlAnalyzer:
     """
     HTML分析器类
@@ -78,15 +109,28 @@ class HtmlAnalyzer:
             logger.info("开始分析HTML内容")
         
         # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-        
-            # 初始化结果字典
+            count_work('html.calls')
+            with span('html.parse', 'html', bytes=len(html_content)):
+                soup = _CountedSoup(html_content, 'html.parser')
+        
+            # 初始化结果字典（每个子步骤单独记录追踪区间）
+            with span('html.meta', 'html'):
+                title = self._extract_title(soup)
+                meta = self._extract_meta(soup)
+            with span('html.structure', 'html'):
+                structure = self._analyze_structure(soup)
+            with span('html.components', 'html') as components_span:
+                components = self._identify_components(soup)
+                components_span.set(items=len(components))
+            with span('html.layout', 'html'):
+                layout = self._analyze_layout(soup)
+            
             result = {
-                'title': self._extract_title(soup),
-                'meta': self._extract_meta(soup),
-                'structure': self._analyze_structure(soup),
-                'components': self._identify_components(soup),
-                'layout': self._analyze_layout(soup)
+                'title': title,
+                'meta': meta,
+                'structure': structure,
+                'components': components,
+                'layout': layout
             }
             
             logger.info("HTML分析完成")
@@ -230,6 +274,7 @@ class HtmlAnalyzer:
         
         # 找到子元素中最大嵌套深度
         max_level = current_level
+        count_work('html.nodes_visited')
         for child in element.children:
             if child.name:  # 只处理标签元素，忽略文本
                 child_level = self._get_max_nesting_level(child, current_level + 1)
@@ -274,45 +319,24 @@ class HtmlAnalyzer:
         logger.info("开始识别页面组件")
         components = []
         
+        # 记录每个元素在文档中的顺序位置，供样式层叠引擎重新定位组件
+        dom_positions = {id(tag): index for index, tag in enumerate(soup.find_all())}
+        
         # 1. 先识别明确的组件（有明确标识的组件）
         for component_type, identifiers in self.component_identifiers.items():
             # 在标签名、ID和类名中查找组件标识符
             for identifier in identifiers:
                 # 检查标签名
                 for tag in soup.find_all(identifier):
-                    components.append({
-                        'type': component_type,
-                        'html': str(tag),
-                        'element': tag.name,
-                        'id': tag.get('id', ''),
-                        'classes': tag.get('class', []),
-                        'text_length': len(tag.get_text()),
-                        'identification_method': 'tag_name'
-                    })
+                    components.append(self._make_component(tag, component_type, 'tag_name', dom_positions))
                 
                 # 检查ID
                 for tag in soup.find_all(id=re.compile(identifier, re.I)):
-                    components.append({
-                        'type': component_type,
-                        'html': str(tag),
-                        'element': tag.name,
-                        'id': tag.get('id', ''),
-                        'classes': tag.get('class', []),
-                        'text_length': len(tag.get_text()),
-                        'identification_method': 'id'
-                    })
+                    components.append(self._make_component(tag, component_type, 'id', dom_positions))
                 
                 # 检查类名
                 for tag in soup.find_all(class_=re.compile(identifier, re.I)):
-                    components.append({
-                        'type': component_type,
-                        'html': str(tag),
-                        'element': tag.name,
-                        'id': tag.get('id', ''),
-                        'classes': tag.get('class', []),
-                        'text_length': len(tag.get_text()),
-                        'identification_method': 'class'
-                    })
+                    components.append(self._make_component(tag, component_type, 'class', dom_positions))
         
         # 2. 根据页面结构识别可能的组件
         # 页眉识别（位于文档顶部）
@@ -329,15 +353,7 @@ class HtmlAnalyzer:
             
             # 将可能的页眉添加到组件列表中
             for element in potential_headers:
-                components.append({
-                    'type': 'header',
-                    'html': str(element),
-                    'element': element.name,
-                    'id': element.get('id', ''),
-                    'classes': element.get('class', []),
-                    'text_length': len(element.get_text()),
-                    'identification_method': 'structure_position'
-                })
+                components.append(self._make_component(element, 'header', 'structure_position', dom_positions))
         
         # 页脚识别（位于文档底部）
         if not any(comp['type'] == 'footer' for comp in components):
@@ -353,15 +369,7 @@ class HtmlAnalyzer:
             
             # 将可能的页脚添加到组件列表中
             for element in potential_footers:
-                components.append({
-                    'type': 'footer',
-                    'html': str(element),
-                    'element': element.name,
-                    'id': element.get('id', ''),
-                    'classes': element.get('class', []),
-                    'text_length': len(element.get_text()),
-                    'identification_method': 'structure_position'
-                })
+                components.append(self._make_component(element, 'footer', 'structure_position', dom_positions))
         
         # 移除重复的组件
         # 通过组件的HTML内容进行去重
@@ -378,6 +386,61 @@ class HtmlAnalyzer:
         logger.info(f"识别出 {len(unique_components)} 个组件")
         return unique_components
     
+    def _make_component(self, tag, component_type, method, dom_positions):
+        """
+        根据HTML元素构建组件信息
+        
+        参数:
+            tag (Tag): 组件根元素
+            component_type (str): 组件类型
+            method (str): 识别方法
+            dom_positions (dict): 元素到文档顺序位置的映射
+            
+        返回:
+            dict: 组件信息
+        """
+        text = tag.get_text()
+        return {
+            'type': component_type,
+            'html': str(tag),
+            'element': tag.name,
+            'id': tag.get('id', ''),
+            'classes': tag.get('class', []),
+            'text_length': len(text),
+            'text_sample': ' '.join(text.split())[:200],
+            'structure_hash': self._structure_hash(tag),
+            'identification_method': method,
+            'dom_index': dom_positions.get(id(tag))
+        }
+    
+    def _structure_hash(self, tag):
+        """
+        计算元素结构的哈希值
+        
+        只考虑标签名和嵌套关系，忽略文本和属性，
+        结构相同的组件（如列表中的多张卡片）得到相同的哈希值。
+        
+        参数:
+            tag (Tag): 组件根元素
+            
+        返回:
+            str: 16位十六进制哈希值
+        """
+        parts = []
+        stack = [tag]
+        visited = 0
+        while stack:
+            node = stack.pop()
+            if node is None:
+                parts.append(')')
+                continue
+            visited += 1
+            parts.append(node.name + '(')
+            stack.append(None)
+            stack.extend(reversed([child for child in node.children if isinstance(child, Tag)]))
+        count_work('html.nodes_visited', visited)
+        return hashlib.sha1(''.join(parts).encode('utf-8')).hexdigest()[:16]
+    
     def _analyze_layout(self, soup):
         """
         分析页面整体布局
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM调用缓存与并发模块 (llm_cache.py)
+---------------------------------
+本模块为AI增强分析提供持久化的提示词缓存和并发执行能力。
+
+主要功能:
+1. 磁盘缓存：以"模型 + 温度 + 规范化提示词"的哈希为键保存补全结果
+2. 缓存过期（TTL）和按总大小淘汰最久未使用的条目
+3. 多个提示词并发执行，可配置并发数和每秒请求数上限
+4. 一个直接调用OpenAI兼容 /completions 接口的简单客户端，
+   测试时可以指向本地的桩服务器
+
+工作原理:
+同一网页重复分析时提示词完全相同，命中缓存后不再请求API；
+提示词模板中的缩进和空行不影响缓存键。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'web-clone-agent', 'llm')
+
+
+def normalize_prompt(prompt):
+    """
+    规范化提示词：去掉每行首尾空白和空行
+
+    参数:
+        prompt (str): 提示词
+
+    返回:
+        str: 规范化后的提示词
+    """
+    return '\n'.join(line.strip() for line in prompt.strip().splitlines() if line.strip())
+
+
+def cache_key(model, temperature, prompt):
+    """
+    计算缓存键
+
+    参数:
+        model (str): 模型名称
+        temperature (float): 温度
+        prompt (str): 提示词
+
+    返回:
+        str: 十六进制哈希值
+    """
+    payload = json.dumps([model, round(float(temperature), 4), normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    提示词 -> 补全结果的磁盘缓存
+
+    每个条目是缓存目录下的一个JSON文件，文件的修改时间作为最近使用时间，
+    总大小超过上限时删除最久未使用的条目。
+    """
+
+    # 条目文件扩展名和日志中的名称（子类可以覆盖）
+    SUFFIX = '.json'
+    LABEL = 'LLM缓存'
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=7 * 24 * 3600, max_bytes=100 * 1024 * 1024):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir (str): 缓存目录
+            ttl (float): 条目有效期（秒），None表示永不过期
+            max_bytes (int): 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}{self.SUFFIX}")
+
+    def get(self, key):
+        """
+        读取缓存条目
+
+        参数:
+            key (str): 缓存键
+
+        返回:
+            str: 补全结果，未命中或已过期时为None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl is not None and time.time() - entry.get('created', 0) > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return entry.get('completion')
+
+    def _touch(self, path):
+        """更新条目的最近使用时间（文件的修改时间）"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def set(self, key, completion, model=None):
+        """
+        写入缓存条目
+
+        参数:
+            key (str): 缓存键
+            completion (str): 补全结果
+            model (str): 模型名称（仅用于记录）
+        """
+        data = json.dumps({'created': time.time(), 'model': model, 'completion': completion}, ensure_ascii=False)
+        self._write(self._path(key), data.encode('utf-8'))
+
+    def _write(self, path, data):
+        """写入条目文件（bytes）并按大小上限淘汰"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 先写临时文件再替换，避免并发读到不完整的条目
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data)
+            self._evict()
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _entries(self):
+        """列出所有缓存条目 (修改时间, 大小, 路径)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(self.SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """总大小超过上限时删除最久未使用的条目（调用方持有锁）"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        self._total_bytes = total
+        logger.info(f"{self.LABEL}超过大小上限，已淘汰 {removed} 个条目")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+class RateLimiter:
+    """
+    简单的速率限制器：相邻两次请求之间至少间隔 1/rate 秒
+    """
+
+    def __init__(self, rate):
+        """
+        初始化速率限制器
+
+        参数:
+            rate (float): 每秒最多请求数，0或None表示不限制
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """等待直到允许发出下一次请求"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class LLMExecutor:
+    """
+    带缓存的LLM并发执行器
+
+    使用示例:
+        executor = LLMExecutor(client, model='gpt-3.5-turbo-instruct', cache=LLMCache())
+        results = executor.run({'components': prompt1, 'layout': prompt2})
+    """
+
+    def __init__(self, complete, model='default', temperature=0.0, cache=None, concurrency=2, rate_limit=None):
+        """
+        初始化执行器
+
+        参数:
+            complete (callable): 补全函数，接收提示词返回补全文本
+            model (str): 模型名称（参与缓存键）
+            temperature (float): 温度（参与缓存键）
+            cache (LLMCache): 缓存，None表示不使用缓存
+            concurrency (int): 最大并发请求数
+            rate_limit (float): 每秒最多请求数，None表示不限制
+        """
+        self.complete = complete
+        self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.concurrency = max(1, int(concurrency))
+        self.rate_limiter = RateLimiter(rate_limit)
+
+    def run_one(self, prompt):
+        """
+        执行单个提示词（优先使用缓存）
+
+        参数:
+            prompt (str): 提示词
+
+        返回:
+            str: 补全结果
+        """
+        key = cache_key(self.model, self.temperature, prompt)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        self.rate_limiter.acquire()
+        completion = self.complete(prompt)
+
+        if self.cache is not None and completion is not None:
+            self.cache.set(key, completion, self.model)
+        return completion
+
+    def run(self, prompts):
+        """
+        并发执行多个提示词
+
+        参数:
+            prompts (dict): 名称 -> 提示词
+
+        返回:
+            tuple: (名称 -> 补全结果, 名称 -> 异常)
+        """
+        results, errors = {}, {}
+        if not prompts:
+            return results, errors
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(prompts)), thread_name_prefix='llm') as pool:
+            futures = {name: pool.submit(self.run_one, prompt) for name, prompt in prompts.items()}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"LLM请求 {name} 失败: {str(e)}")
+                    errors[name] = e
+
+        return results, errors
+
+
+class HttpCompletionClient:
+    """
+    OpenAI兼容 /completions 接口的简单客户端
+    """
+
+    def __init__(self, base_url, api_key=None, model='gpt-3.5-turbo-instruct', temperature=0.3,
+                 max_tokens=1024, timeout=60):
+        """
+        初始化客户端
+
+        参数:
+            base_url (str): 接口地址（如 https://api.openai.com/v1）
+            api_key (str): API密钥
+            model (str): 模型名称
+            temperature (float): 温度
+            max_tokens (int): 最大生成token数
+            timeout (float): 请求超时时间（秒）
+        """
+        self.url = base_url.rstrip('/') + '/completions'
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def __call__(self, prompt):
+        """
+        请求补全
+
+        参数:
+            prompt (str): 提示词
+
+        返回:
+            str: 补全文本
+        """
+        response = self.session.post(self.url, json={
+            'model': self.model,
+            'prompt': prompt,
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['choices'][0]['text']
@@ -7,9 +7,19 @@ Web Clone Agent主程序 - 网页克隆为Vue项目工具
 
 使用方法:
     python main.py --url https://example.com --output my-vue-project
+    python main.py --urls-file urls.txt --output batch-output --workers 8
+    cat urls.txt | python main.py --output batch-output
 
 可选参数:
-    --url: 要克隆的目标网页URL（必需）
+    --url: 要克隆的目标网页URL（未指定时使用 --urls-file 或标准输入批量处理）
+    --urls-file: URL列表文件（每行一个URL或含url列的CSV，'-'表示标准输入）
+    --workers: 批量模式的工作线程/进程数
+    --pool: 批量模式的工作池类型（thread 或 process）
+    --resume: 从输出目录中的检查点清单继续中断的批量任务
+    --serve: 以常驻服务模式运行，监听 host:port 或 unix:/path/to/socket（见 service.py）
+    --trace: 把各阶段及子步骤的追踪区间保存为Chrome追踪格式的JSON文件（见 tracing.py）
+    --profile: 按阶段记录CPU剖析、调用栈采样和内存分配，汇总写入输出目录（见 profiling.py）
+    --stats: 统计并显示确定性的工作量计数（DOM遍历、正则匹配、HTTP请求等，见 counters.py）
     --output: 生成的Vue项目路径（默认: vue-project）
     --use-selenium: 使用Selenium处理JS渲染的动态页面
     --debug: 启用调试模式，输出详细日志
@@ -17,17 +27,15 @@ Web Clone Agent主程序 - 网页克隆为Vue项目工具
 """
 
 import os
+import sys
 import argparse
 import logging
+import contextlib
+import importlib.util
 from colorama import init, Fore
-from dotenv import load_dotenv
 
-# 导入项目自定义模块
-from web_scraper import WebScraper         # 网页抓取模块
-from html_analyzer import HtmlAnalyzer     # HTML分析模块
-from style_extractor import StyleExtractor # 样式提取模块
-from agent import CloneAgent               # 克隆代理核心模块
-from website_document_generator import WebsiteDocumentGenerator  # 网页文档生成器
+# 项目模块（及其依赖的langchain、selenium等）在解析完参数后才导入，
+# 使 --help 和参数错误能够立即返回，见 main()
 
 # 初始化colorama用于彩色终端输出
 init()
@@ -58,8 +66,76 @@ def setup_argparse():
     # 添加命令行参数
     parser.add_argument('--url', 
                       type=str, 
-                      required=True, 
-                      help='目标网页URL（必需）')
+                      help='目标网页URL（未指定时从 --urls-file 或标准输入读取URL批量处理）')
+    
+    parser.add_argument('--urls-file', 
+                      type=str, 
+                      default=None, 
+                      help="批量模式的URL列表文件（每行一个URL或含url列的CSV，'-'表示标准输入）")
+    
+    parser.add_argument('--workers', 
+                      type=int, 
+                      default=4, 
+                      help='批量模式的工作线程/进程数')
+    
+    parser.add_argument('--pool', 
+                      choices=['thread', 'process'], 
+                      default='thread', 
+                      help='批量模式的工作池类型')
+    
+    parser.add_argument('--resume', 
+                      action='store_true', 
+                      help='批量模式：跳过上次已完成的URL，只重新执行失败或缺失的阶段')
+    
+    parser.add_argument('--serve', 
+                      type=str, 
+                      default=None, 
+                      metavar='ADDRESS', 
+                      help='以常驻服务模式运行，监听 host:port 或 unix:/path/to/socket（--workers 为工作线程数）')
+    
+    parser.add_argument('--trace', 
+                      type=str, 
+                      default=None, 
+                      metavar='FILE', 
+                      help='保存Chrome追踪格式的JSON文件（可在 chrome://tracing 或 Perfetto 中查看）')
+    
+    parser.add_argument('--profile', 
+                      action='store_true', 
+                      help='按阶段记录CPU剖析和内存分配（阶段串行执行），汇总写入输出目录的 profile_summary.md')
+    
+    parser.add_argument('--stats', 
+                      action='store_true', 
+                      help='统计并显示工作量计数（遍历的DOM节点数、整树搜索次数、正则匹配次数、HTTP请求数等）')
+    
+    parser.add_argument('--record', 
+                      type=str, 
+                      default=None, 
+                      metavar='FILE', 
+                      help='把抓取时的全部HTTP请求和响应（含请求头、响应头和耗时）录制为HAR文件')
+    
+    parser.add_argument('--replay', 
+                      type=str, 
+                      default=None, 
+                      metavar='FILE', 
+                      help='从 --record 录制的HAR文件回放，不访问网络')
+    
+    parser.add_argument('--replay-latency', 
+                      type=float, 
+                      default=0, 
+                      metavar='MS', 
+                      help='回放时每个请求模拟的延迟（毫秒）')
+    
+    parser.add_argument('--replay-bandwidth', 
+                      type=float, 
+                      default=0, 
+                      metavar='KBPS', 
+                      help='回放时模拟的带宽（KB/秒，0表示不限制）')
+    
+    parser.add_argument('--export-format', 
+                      type=str, 
+                      default='yaml', 
+                      metavar='FORMATS', 
+                      help='机器可读数据文件的导出格式，逗号分隔：yaml、json、jsonl、msgpack（默认：yaml，空字符串表示不导出）')
     
     parser.add_argument('--output', 
                       type=str, 
@@ -78,29 +154,179 @@ def setup_argparse():
                       action='store_true', 
                       help='完成后保留临时文件')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    
+    # 没有 --url 和 --urls-file 时，如果标准输入不是终端则从标准输入读取URL列表
+    if not args.url and not args.urls_file and not args.serve:
+        if sys.stdin.isatty():
+            parser.error('需要指定 --url 或 --urls-file（也可以通过标准输入传入URL列表）')
+        args.urls_file = '-'
+    
+    # 剖析模式统计的是整个进程的内存，只支持单个URL
+    if args.profile and not args.url:
+        parser.error('--profile 只能与 --url 一起使用')
+    
+    # 录制和回放只经过requests会话，Selenium直接由浏览器发出请求
+    if args.record and args.replay:
+        parser.error('--record 和 --replay 不能同时使用')
+    if args.record and not args.url:
+        parser.error('--record 只能与 --url 一起使用')
+    if (args.record or args.replay) and args.use_selenium:
+        parser.error('--record 和 --replay 不支持 --use-selenium')
+    if args.replay and args.serve:
+        parser.error('--replay 不支持服务模式')
+    
+    # 导出格式在生成文档前检查，避免分析完成后才发现格式无效或缺少模块
+    from data_export import EXPORTERS
+    args.export_format = [name.strip() for name in args.export_format.split(',') if name.strip()]
+    for name in args.export_format:
+        if name not in EXPORTERS:
+            parser.error(f"不支持的导出格式: {name}（可用: {', '.join(EXPORTERS)}）")
+    if 'msgpack' in args.export_format and importlib.util.find_spec('msgpack') is None:
+        parser.error('导出msgpack格式需要安装msgpack: pip install msgpack')
+    
+    return args
+
+def print_trace_summary(summary, limit=10):
+    """显示追踪中总耗时最多的区间"""
+    print(f"\n{Fore.CYAN}追踪区间（按总耗时排序）:{Fore.RESET}")
+    print(f"  {'区间':<20}{'次数':>6}{'总耗时':>10}{'最长':>10}{'字节':>12}{'条目':>8}")
+    for name, entry in list(summary.items())[:limit]:
+        print(f"  {name:<20}{entry['count']:>6}{entry['total']:>9.3f}s{entry['max']:>9.3f}s"
+              f"{entry['bytes']:>12}{entry['items']:>8}")
+
+def print_work_counters(snapshot):
+    """显示工作量计数"""
+    print(f"\n{Fore.CYAN}工作量计数:{Fore.RESET}")
+    for name, value in snapshot.items():
+        print(f"  {name:<24}{value:>12}")
+
+def replay_options(args):
+    """
+    回放参数（未指定 --replay 时为None）
+    
+    返回：HarArchive 的参数字典（path、latency秒、bandwidth字节/秒）
+    """
+    if not args.replay:
+        return None
+    return {
+        'path': args.replay,
+        'latency': args.replay_latency / 1000,
+        'bandwidth': args.replay_bandwidth * 1024 or None
+    }
+
+def run_batch_mode(args):
+    """
+    批量模式：用工作池分析多个URL，每个URL生成到 args.output 下的单独目录
+    
+    返回：退出码（全部成功为0）
+    """
+    import time
+    import batch
+    
+    urls = batch.read_urls(args.urls_file)
+    if not urls:
+        print(f"{Fore.RED}没有读取到URL{Fore.RESET}")
+        return 1
+    
+    print(f"{Fore.CYAN}========================================{Fore.RESET}")
+    print(f"{Fore.GREEN}Web Clone Agent - 批量分析{Fore.RESET}")
+    print(f"{Fore.CYAN}========================================{Fore.RESET}")
+    print(f"URL数量: {Fore.YELLOW}{len(urls)}{Fore.RESET}")
+    print(f"输出路径: {Fore.YELLOW}{args.output}{Fore.RESET}")
+    print(f"工作池: {Fore.YELLOW}{args.pool} x {args.workers}{Fore.RESET}")
+    print(f"{Fore.CYAN}========================================{Fore.RESET}\n")
+    
+    start = time.perf_counter()
+    results = batch.run_batch(
+        urls,
+        args.output,
+        workers=args.workers,
+        pool=args.pool,
+        use_selenium=args.use_selenium,
+        keep_temp=args.no_cleanup,
+        resume=args.resume,
+        on_result=batch.print_progress,
+        trace=bool(args.trace),
+        stats=args.stats,
+        replay=replay_options(args),
+        export_formats=args.export_format
+    )
+    batch.print_summary(results, time.perf_counter() - start)
+    
+    if args.stats:
+        from counters import merge
+        print_work_counters(merge(result['counters'] for result in results if 'counters' in result))
+    
+    if args.trace:
+        from tracing import write_chrome_trace
+        events = [event for result in results for event in result.pop('trace', [])]
+        write_chrome_trace(args.trace, events)
+        print(f"追踪已保存到 {Fore.YELLOW}{os.path.abspath(args.trace)}{Fore.RESET}")
+    
+    summary_path = os.path.join(args.output, 'batch_summary.json')
+    batch.write_summary(results, summary_path)
+    print(f"汇总结果已保存到 {Fore.YELLOW}{os.path.abspath(summary_path)}{Fore.RESET}")
+    
+    return 0 if all(result['status'] in ('success', 'skipped') for result in results) else 1
+
+def run_service_mode(args):
+    """
+    服务模式：常驻运行，通过HTTP接口接收克隆任务
+    
+    返回：退出码
+    """
+    import service
+    
+    print(f"{Fore.CYAN}========================================{Fore.RESET}")
+    print(f"{Fore.GREEN}Web Clone Agent - 服务模式{Fore.RESET}")
+    print(f"{Fore.CYAN}========================================{Fore.RESET}")
+    print(f"监听地址: {Fore.YELLOW}{args.serve}{Fore.RESET}")
+    print(f"输出路径: {Fore.YELLOW}{args.output}{Fore.RESET}")
+    print(f"工作线程: {Fore.YELLOW}{args.workers}{Fore.RESET}")
+    print(f"{Fore.CYAN}========================================{Fore.RESET}\n")
+    
+    service.serve(args.serve, output_root=args.output, workers=args.workers, use_selenium=args.use_selenium,
+                  export_formats=args.export_format)
+    return 0
 
 def main():
     """
     主函数 - 程序执行入口
     处理流程：
-    1. 加载环境变量
-    2. 解析命令行参数
+    1. 解析命令行参数
+    2. 加载环境变量
     3. 初始化组件
     4. 创建克隆代理
     5. 执行网页分析与文档生成过程
     """
-    # 1. 加载环境变量（用于OpenAI API等）
+    # 1. 解析命令行参数
+    args = setup_argparse()
+    
+    # 2. 加载环境变量（用于OpenAI API等）
+    from dotenv import load_dotenv
     load_dotenv()
     
-    # 2. 解析命令行参数
-    args = setup_argparse()
+    # 导入项目自定义模块
+    from web_scraper import WebScraper         # 网页抓取模块
+    from html_analyzer import HtmlAnalyzer     # HTML分析模块
+    from style_extractor import StyleExtractor # 样式提取模块
+    from agent import CloneAgent               # 克隆代理核心模块
+    from website_document_generator import WebsiteDocumentGenerator  # 网页文档生成器
     
     # 设置日志级别
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("调试模式已启用")
     
+    # 服务模式
+    if args.serve:
+        return run_service_mode(args)
+    
+    # 批量模式
+    if not args.url:
+        return run_batch_mode(args)
+    
     # 打印欢迎信息和参数
     print(f"{Fore.CYAN}========================================{Fore.RESET}")
     print(f"{Fore.GREEN}Web Clone Agent - 网页分析与设计文档生成{Fore.RESET}")
@@ -116,7 +342,15 @@ def main():
         
         # 3. 初始化各个模块组件
         # 3.1 网页抓取模块 - 负责获取目标网页的HTML、CSS和JS
-        web_scraper = WebScraper(use_selenium=args.use_selenium)
+        #      指定 --record 时录制HTTP请求，指定 --replay 时从录制的归档回放
+        recorder = archive = None
+        if args.record:
+            from har import HarRecorder
+            recorder = HarRecorder(args.record)
+        elif args.replay:
+            from har import HarArchive
+            archive = HarArchive(**replay_options(args))
+        web_scraper = WebScraper(use_selenium=args.use_selenium, recorder=recorder, archive=archive)
         
         # 3.2 HTML分析模块 - 分析网页结构
         html_analyzer = HtmlAnalyzer()
@@ -125,7 +359,7 @@ def main():
         style_extractor = StyleExtractor()
         
         # 3.4 网页文档生成模块 - 生成网页设计文档
-        document_generator = WebsiteDocumentGenerator(output_dir=args.output)
+        document_generator = WebsiteDocumentGenerator(output_dir=args.output, export_formats=args.export_format)
         
         # 4. 创建并运行克隆代理 - 协调各模块完成任务
         agent = CloneAgent(
@@ -135,15 +369,48 @@ def main():
             document_generator=document_generator
         )
         
-        # 5. 执行网页分析和文档生成过程
-        success = agent.clone_website(args.url, args.output)
+        # 剖析模式：阶段串行执行，每个阶段的CPU和内存单独统计
+        profiler = None
+        if args.profile:
+            from profiling import StageProfiler
+            profiler = StageProfiler(args.output)
+            agent.profiler = profiler
+            agent.max_workers = 1
+            profiler.start()
+        
+        # 5. 执行网页分析和文档生成过程（指定 --trace 时记录追踪区间，--stats 时统计工作量）
+        tracer = counters = None
+        with contextlib.ExitStack() as stack:
+            if args.trace:
+                from tracing import Tracer
+                tracer = stack.enter_context(Tracer(name=args.url).activate())
+            if args.stats:
+                from counters import WorkCounters
+                counters = stack.enter_context(WorkCounters().activate())
+            success = agent.clone_website(args.url, args.output)
+        
+        if tracer is not None:
+            tracer.write_chrome_trace(args.trace)
+            print_trace_summary(tracer.summary())
+            print(f"追踪已保存到 {Fore.YELLOW}{os.path.abspath(args.trace)}{Fore.RESET}")
+        if counters is not None:
+            print_work_counters(counters.snapshot())
+        if recorder is not None:
+            print(f"已录制 {len(recorder.entries)} 个请求到 {Fore.YELLOW}{os.path.abspath(args.record)}{Fore.RESET}")
+        
+        if profiler is not None:
+            profiler.stop()
+            summary_path = profiler.write_report()
+            print(f"剖析结果已保存到 {Fore.YELLOW}{os.path.abspath(summary_path)}{Fore.RESET}")
         
         # 显示结果
         if success:
             print(f"\n{Fore.GREEN}✓ 分析成功!{Fore.RESET} 网页设计文档已生成在 {Fore.YELLOW}{os.path.abspath(args.output)}{Fore.RESET}")
             print(f"\n您可以查看以下文件:")
             print(f"{Fore.CYAN}index.html - 文档入口{Fore.RESET}")
-            print(f"{Fore.CYAN}site_data.yaml - 结构化数据{Fore.RESET}")
+            from data_export import EXPORTERS
+            for name in args.export_format:
+                print(f"{Fore.CYAN}{EXPORTERS[name].file_name} - 结构化数据{Fore.RESET}")
         else:
             print(f"\n{Fore.RED}✗ 分析过程中出现错误。请查看日志获取详细信息。{Fore.RESET}")
     
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网络请求计时模块 (network_timing.py)
+--------------------------------
+记录抓取时每个请求的各阶段耗时，用于生成文档中的网络请求瀑布图，也可以看出是哪些资源主机拖慢了抓取。
+
+每个请求记录:
+    DNS解析、TCP连接、TLS握手（复用连接时为空）、首字节时间、下载时间、总耗时，
+    传输字节数（压缩后）和解压后的字节数、状态码、缓存状态（CDN等返回的缓存响应头）
+
+工作原理:
+TimingHTTPAdapter 挂载到 requests 会话上，使用带计时的 urllib3 连接类：
+新建连接时先自行解析域名并计时，再连接解析得到的地址，TLS握手时间是建立连接的剩余时间。
+连接建立的耗时随响应返回（response.connection_timings），复用的连接没有这一项。
+首字节时间是 requests 记录的 response.elapsed 减去建立连接的时间，下载时间是读取响应内容的时间。
+"""
+
+import time
+import socket
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+# 表示缓存状态的响应头，按优先级排列（Cache-Status 是 RFC 9211 的标准响应头）
+CACHE_STATUS_HEADERS = ('Cache-Status', 'CF-Cache-Status', 'X-Cache', 'X-Cache-Status', 'X-Proxy-Cache',
+                        'X-Vercel-Cache', 'Akamai-Cache-Status')
+
+
+class _TimedConnectionMixin:
+    """新建连接时记录DNS解析、TCP连接和TLS握手的耗时"""
+
+    # 最近一次建立连接的耗时（秒）：{'dns', 'connect', 'tls'}，被响应取走后为None
+    connection_timings = None
+    _setup = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # 解析失败时由 urllib3 按原来的方式报告错误
+            return super()._new_conn()
+        resolved = time.perf_counter()
+
+        # 依次连接解析得到的地址（与 urllib3 的行为相同），不再重复解析域名
+        error = None
+        for address in dict.fromkeys(info[4][0] for info in addresses):
+            self._dns_host = address
+            try:
+                sock = super()._new_conn()
+                break
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                error = e
+            finally:
+                self._dns_host = host
+        else:
+            raise error
+
+        self._setup = {'dns': resolved - started, 'connect': time.perf_counter() - resolved}
+        return sock
+
+    def connect(self):
+        self._setup = None
+        started = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - started
+        setup = self._setup or {'dns': 0.0, 'connect': total}
+        tls = max(total - setup['dns'] - setup['connect'], 0.0) if isinstance(self, HTTPSConnection) else None
+        self.connection_timings = {'dns': setup['dns'], 'connect': setup['connect'], 'tls': tls}
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+    """
+    记录建立连接耗时的 requests 传输适配器
+
+    使用示例:
+        session.mount('http://', TimingHTTPAdapter())
+        session.mount('https://', TimingHTTPAdapter())
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # 响应头已读取、内容尚未读取，连接仍然属于这个响应；取走计时后复用这个连接的请求没有建立连接的耗时
+        connection = getattr(response.raw, 'connection', None)
+        response.connection_timings = getattr(connection, 'connection_timings', None)
+        if connection is not None:
+            connection.connection_timings = None
+        return response
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def transfer_size(response):
+    """
+    响应内容在网络上传输的字节数（压缩后）
+
+    返回:
+        int: 字节数，无法获取时为None
+    """
+    size = getattr(response, 'transfer_size', None)
+    if size is not None:
+        return size
+    tell = getattr(response.raw, 'tell', None)
+    try:
+        return tell() if tell else None
+    except Exception:
+        return None
+
+
+def cache_status(headers):
+    """
+    从响应头中读取缓存状态
+
+    返回:
+        str: 缓存状态响应头的值（如 "HIT"），没有时为None
+    """
+    for name in CACHE_STATUS_HEADERS:
+        value = headers.get(name)
+        if value:
+            return value
+    return None
+
+
+def _record(response, start, elapsed, download):
+    setup = getattr(response, 'connection_timings', None)
+    setup_total = sum(value or 0 for value in setup.values()) if setup else 0.0
+    headers = response.headers
+    return {
+        'url': response.url,
+        'host': urlsplit(response.url).netloc,
+        'status': response.status_code,
+        'content_type': headers.get('Content-Type', '').split(';')[0].strip(),
+        'start_ms': _ms(start),
+        'dns_ms': _ms(setup['dns']) if setup else None,
+        'connect_ms': _ms(setup['connect']) if setup else None,
+        'tls_ms': _ms(setup['tls']) if setup else None,
+        'ttfb_ms': _ms(max(elapsed - setup_total, 0.0)),
+        'download_ms': _ms(download),
+        'total_ms': _ms(elapsed + download),
+        'transfer_bytes': transfer_size(response),
+        'bytes': len(response.content or b''),
+        'content_encoding': headers.get('Content-Encoding'),
+        'reused_connection': setup is None,
+        'cache_status': cache_status(headers),
+        'cache_control': headers.get('Cache-Control'),
+        'age': headers.get('Age'),
+    }
+
+
+def describe(response, start, total):
+    """
+    生成一次请求的计时记录（重定向链中的每一跳各一条）
+
+    参数:
+        response (requests.Response): 最终响应（已读取内容）
+        start (float): 请求开始时间相对于页面抓取开始的偏移（秒）
+        total (float): 请求的总耗时（秒，含重定向和下载响应内容）
+
+    返回:
+        list: 计时记录（dict），耗时单位为毫秒
+    """
+    records = []
+    for hop in response.history:
+        elapsed = hop.elapsed.total_seconds()
+        records.append(_record(hop, start, elapsed, 0.0))
+        start += elapsed
+        total -= elapsed
+    elapsed = response.elapsed.total_seconds()
+    records.append(_record(response, start, elapsed, max(total - elapsed, 0.0)))
+    return records
+
+
+def summarize_hosts(records):
+    """
+    按主机汇总请求耗时，用于找出拖慢抓取的资源主机
+
+    参数:
+        records (list): describe 生成的计时记录
+
+    返回:
+        list: 每个主机的汇总（请求数、新建连接数、总耗时、最长耗时、平均首字节时间、传输字节数），按总耗时降序
+    """
+    hosts = {}
+    for record in records:
+        host = hosts.setdefault(record['host'], {
+            'host': record['host'], 'requests': 0, 'connections': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'ttfb_ms': 0.0, 'transfer_bytes': 0, 'bytes': 0,
+        })
+        host['requests'] += 1
+        host['connections'] += 0 if record['reused_connection'] else 1
+        host['total_ms'] += record['total_ms']
+        host['max_ms'] = max(host['max_ms'], record['total_ms'])
+        host['ttfb_ms'] += record['ttfb_ms']
+        host['transfer_bytes'] += record['transfer_bytes'] if record['transfer_bytes'] is not None \
+            else record['bytes']
+        host['bytes'] += record['bytes']
+
+    summary = sorted(hosts.values(), key=lambda host: host['total_ms'], reverse=True)
+    for host in summary:
+        host['total_ms'] = round(host['total_ms'], 1)
+        host['ttfb_ms'] = round(host['ttfb_ms'] / host['requests'], 1)
+    return summary
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量输出写入模块 (output_writer.py)
+-------------------------------
+文档生成器和Vue生成器通过本模块写入输出文件。输出目录中的清单文件（.output-manifest.json）
+记录上次生成的每个文件的内容哈希、大小和修改时间，再次生成时：
+1. 内容没有变化的文件不重写（修改时间不变，不会触发下游的文件监听、重新构建和同步）
+2. 内容变化的文件先写临时文件再替换，不会留下写了一半的文件
+3. 上次生成而本次没有生成的文件被删除（只删除清单中记录的文件，用户自己放入的文件不受影响）
+
+工作原理:
+判断文件是否变化时比较内容的SHA-256，同时要求磁盘上文件的大小和修改时间与清单一致，
+文件在两次生成之间被其他程序修改过时一定会重写。清单缺失或损坏时退化为读取现有文件比较内容。
+写入、跳过和删除的文件数记录为工作量计数（files.written、files.skipped、files.deleted，见 counters.py）。
+
+使用示例:
+    with OutputWriter(output_dir) as writer:
+        writer.write('index.md', content)
+        writer.write_stream('site_data.jsonl', chunks)  # 边生成边写入的字节块
+    print(writer.stats)  # {'written': 2, 'skipped': 0, 'deleted': 0, 'files': ['index.md', 'site_data.jsonl']}
+"""
+
+import os
+import json
+import stat
+import hashlib
+import logging
+import tempfile
+
+from counters import count_work
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 输出目录中的清单文件名（隐藏文件，不会被当作生成的文档）
+MANIFEST_NAME = '.output-manifest.json'
+
+# 清单格式版本，格式变化时旧清单作废
+MANIFEST_VERSION = 1
+
+
+def _current_umask():
+    """进程的umask（只能在设置的同时读出，因此导入时读取一次，避免运行中与其他线程创建文件竞争）"""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+
+def _replace(temp_path, path):
+    """
+    用临时文件替换目标文件
+
+    mkstemp 创建的临时文件权限为0600，替换前改为目标文件原有的权限；
+    目标文件不存在时为 0666 & ~umask（与 open() 新建的文件相同），生成的文档可以正常共享和发布。
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, path)
+
+
+def write_atomic(path, data):
+    """
+    先写同目录下的临时文件再替换目标文件
+
+    参数:
+        path (str): 目标文件路径
+        data (bytes|iterable): 文件内容，或依次写入的字节块
+
+    返回:
+        int: 写入的字节数
+    """
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f".{name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            size = _write_chunks(f, [data] if isinstance(data, bytes) else data)
+        _replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+
+def _write_chunks(f, chunks, digest=None):
+    """依次写入字节块（同时更新哈希），返回写入的字节数"""
+    size = 0
+    for chunk in chunks:
+        f.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        size += len(chunk)
+    return size
+
+
+def _file_digest(path):
+    """分块读取文件计算SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OutputWriter:
+    """
+    按内容哈希跳过未变化文件的输出写入器
+
+    一次生成使用一个实例：依次调用 write() 写入文件，最后调用 finish() 删除过期文件并保存清单；
+    也可以作为上下文管理器使用，正常退出时调用 finish()，出现异常时保存清单但不删除文件。
+    """
+
+    def __init__(self, output_dir, manifest_name=MANIFEST_NAME):
+        """
+        初始化输出写入器并读取上次的清单
+
+        参数:
+            output_dir (str): 输出目录
+            manifest_name (str): 清单文件名（相对于输出目录）
+        """
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, manifest_name)
+        self.stats = {'written': 0, 'skipped': 0, 'deleted': 0, 'files': []}
+
+        # 上次生成的文件：相对路径 -> {'sha256', 'size', 'mtime_ns'}
+        self._previous = self._load_manifest()
+        # 本次生成的文件
+        self._entries = {}
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(delete_stale=exc_type is None)
+        return False
+
+    def _load_manifest(self):
+        """读取清单，不存在、损坏或版本不符时返回空字典"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"输出清单无法读取，所有文件将重新比较: {self.manifest_path} ({str(e)})")
+            return {}
+        if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+            return {}
+        files = manifest.get('files')
+        return files if isinstance(files, dict) else {}
+
+    def _full_path(self, rel_path):
+        """清单中的相对路径（以 / 分隔）转换为输出目录中的路径"""
+        return os.path.join(self.output_dir, *rel_path.split('/'))
+
+    def _unchanged(self, rel_path, size, digest):
+        """磁盘上的文件内容是否已经是 size 字节、哈希为 digest 的内容"""
+        path = self._full_path(rel_path)
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return False
+        if file_stat.st_size != size:
+            return False
+
+        entry = self._previous.get(rel_path)
+        if entry is not None:
+            # 清单记录的大小和修改时间与磁盘一致时，只比较哈希
+            if entry.get('size') == file_stat.st_size and entry.get('mtime_ns') == file_stat.st_mtime_ns:
+                return entry.get('sha256') == digest
+
+        # 没有可信的清单记录：计算现有文件的哈希比较
+        try:
+            return _file_digest(path) == digest
+        except OSError:
+            return False
+
+    def _start(self, rel_path):
+        """登记本次生成的文件，返回规范化的相对路径和完整路径"""
+        rel_path = rel_path.replace(os.sep, '/')
+        if rel_path not in self._entries:
+            self.stats['files'].append(rel_path)
+        path = self._full_path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return rel_path, path
+
+    def _record(self, rel_path, path, digest, size, written):
+        """记录写入或跳过的文件"""
+        if written:
+            self.stats['written'] += 1
+            count_work('files.written')
+            count_work('bytes.written', size)
+        else:
+            self.stats['skipped'] += 1
+            count_work('files.skipped')
+        file_stat = os.stat(path)
+        self._entries[rel_path] = {'sha256': digest, 'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns}
+        return written
+
+    def write(self, rel_path, content):
+        """
+        写入一个输出文件，内容与磁盘上相同时跳过
+
+        参数:
+            rel_path (str): 相对于输出目录的路径（以 / 分隔）
+            content (str|bytes): 文件内容，字符串按UTF-8编码
+
+        返回:
+            bool: 是否实际写入了文件（False表示内容未变化而跳过）
+        """
+        rel_path, path = self._start(rel_path)
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+
+        written = not self._unchanged(rel_path, len(data), digest)
+        if written:
+            write_atomic(path, data)
+        return self._record(rel_path, path, digest, len(data), written)
+
+    def write_stream(self, rel_path, chunks):
+        """
+        边生成边写入一个输出文件（内容不在内存中拼接），内容与磁盘上相同时丢弃临时文件
+
+        参数:
+            rel_path (str): 相对于输出目录的路径（以 / 分隔）
+            chunks (iterable): 依次写入的字节块
+
+        返回:
+            bool: 是否实际替换了文件（False表示内容未变化而跳过）
+        """
+        rel_path, path = self._start(rel_path)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.",
+                                         suffix='.tmp')
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                size = _write_chunks(f, chunks, digest)
+            written = not self._unchanged(rel_path, size, digest.hexdigest())
+            if written:
+                _replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return self._record(rel_path, path, digest.hexdigest(), size, written)
+
+    def finish(self, delete_stale=True):
+        """
+        删除上次生成而本次没有生成的文件，并保存清单
+
+        参数:
+            delete_stale (bool): 是否删除过期文件（生成中途失败时为False，过期文件仍记录在清单中）
+
+        返回:
+            dict: {'written': 写入数, 'skipped': 跳过数, 'deleted': 删除数, 'files': 本次生成的文件}
+        """
+        entries = dict(self._entries)
+        for rel_path, entry in self._previous.items():
+            if rel_path in entries:
+                continue
+            if not delete_stale or not self._inside_output(rel_path):
+                entries[rel_path] = entry
+                continue
+            try:
+                os.remove(self._full_path(rel_path))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"删除过期输出文件失败: {rel_path} ({str(e)})")
+                entries[rel_path] = entry
+                continue
+            self.stats['deleted'] += 1
+            count_work('files.deleted')
+
+        # 所有文件都未变化时清单也不需要重写
+        if entries == self._previous and os.path.exists(self.manifest_path):
+            return self.stats
+
+        data = json.dumps({'version': MANIFEST_VERSION, 'files': entries}, ensure_ascii=False,
+                          indent=1, sort_keys=True).encode('utf-8')
+        write_atomic(self.manifest_path, data)
+        count_work('files.written')
+        count_work('bytes.written', len(data))
+        return self.stats
+
+    def _inside_output(self, rel_path):
+        """清单中的路径是否位于输出目录内（防止损坏的清单删除目录外的文件）"""
+        root = os.path.abspath(self.output_dir)
+        path = os.path.abspath(self._full_path(rel_path))
+        return os.path.commonpath([root, path]) == root and path != root
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目标网页性能审计模块 (performance_audit.py)
+--------------------------------------
+根据抓取结果和分析结果审计目标网页的体积和加载行为，生成文档中的性能审计部分（6_performance.md）。
+用Vue重建页面的团队可以据此知道哪些地方需要优化。
+
+审计项目:
+1. 各类资源的体积（HTML、外部/内联CSS、外部/内联JS；图片只统计数量，抓取时不下载图片）
+2. <head> 中阻塞渲染的样式表和脚本
+3. 未使用的CSS规则比例（来自样式提取时的裁剪统计）
+4. 体积最大的资源
+5. DOM元素数量和嵌套深度
+6. 没有设置宽高（会引起布局偏移）和没有延迟加载的图片
+7. 重复加载的库（同一个库的多个地址、同一地址加载多次，或内容完全相同的文件）
+
+审计只依赖页面内容和分析结果，结果是确定的，可以作为流水线阶段缓存。
+"""
+
+import re
+import hashlib
+import logging
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# WebScraper 保存内联样式和脚本使用的文件名
+INLINE_CSS_FILE = 'inline_styles.css'
+INLINE_JS_FILE = 'inline_scripts.js'
+
+# 超过以下数值时给出优化建议（参考 Lighthouse 的阈值）
+DOM_ELEMENTS_LIMIT = 1400
+DOM_DEPTH_LIMIT = 32
+JS_BYTES_LIMIT = 500 * 1024
+UNUSED_CSS_RATIO_LIMIT = 0.3
+
+_HEAD_END = re.compile(r'</head\s*>|<body[\s>]', re.I)
+_START_TAG = re.compile(r'<[a-zA-Z]')
+_IMG_TAG = re.compile(r'<img\b[^>]*>', re.I)
+_SCRIPT_SRC = re.compile(r'''<script\b[^>]*?\bsrc\s*=\s*["']?([^"'\s>]+)''', re.I)
+_LINK_TAG = re.compile(r'<link\b[^>]*>', re.I)
+_HREF = re.compile(r'''\bhref\s*=\s*["']?([^"'\s>]+)''', re.I)
+_STYLESHEET_REL = re.compile(r'''\brel\s*=\s*["']?[^"'>]*\bstylesheet\b''', re.I)
+_DIMENSION = re.compile(r'''\b(?:width|height)\s*=|style\s*=\s*["'][^"']*\b(?:width|height)\s*:''', re.I)
+_LAZY = re.compile(r'''\bloading\s*=\s*["']?lazy''', re.I)
+_IMG_SRC = re.compile(r'''\bsrc\s*=\s*["']?([^"'\s>]+)''', re.I)
+
+# 从文件名中去掉的后缀：内容哈希、min/slim/prod 等构建标记、版本号
+_NAME_SUFFIXES = re.compile(r'(?:[.-][0-9a-f]{6,}|[.-](?:min|slim|prod|production|umd|esm|bundle)|[.@-]v?\d+(?:\.\d+)*)$',
+                            re.I)
+
+# 非JavaScript的 <script> 类型（数据块不阻塞解析）
+_SCRIPT_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+
+
+def _size(text):
+    return len(text.encode('utf-8', 'surrogatepass')) if text else 0
+
+
+def library_name(url):
+    """
+    从资源地址推断库名（去掉版本号、内容哈希和 .min 等后缀）
+
+    参数:
+        url (str): 脚本或样式表的地址
+
+    返回:
+        str: 库名（小写），无法推断时（如只有数字的分块文件名）为None
+    """
+    name = urlsplit(url).path.rsplit('/', 1)[-1].lower()
+    name = re.sub(r'\.(?:m?js|css)$', '', name)
+    while True:
+        stripped = _NAME_SUFFIXES.sub('', name)
+        if stripped == name:
+            break
+        name = stripped
+    if len(name) < 2 or not re.search(r'[a-z]', name):
+        return None
+    return name
+
+
+def _head_html(html):
+    """页面 <head> 部分的HTML（只解析这一部分，不解析整个页面）"""
+    match = _HEAD_END.search(html)
+    return html[:match.start()] if match else html
+
+
+def _render_blocking(html, base_url):
+    """<head> 中阻塞渲染的样式表和脚本"""
+    soup = BeautifulSoup(_head_html(html), 'html.parser')
+    stylesheets = []
+    for link in soup.find_all('link', href=True):
+        rel = [value.lower() for value in (link.get('rel') or [])]
+        media = (link.get('media') or 'all').strip().lower()
+        if 'stylesheet' in rel and media in ('all', 'screen') and not link.has_attr('disabled'):
+            stylesheets.append(urljoin(base_url, link['href']))
+
+    scripts = []
+    inline_scripts = 0
+    for script in soup.find_all('script'):
+        script_type = (script.get('type') or '').strip().lower()
+        if script_type not in _SCRIPT_TYPES:
+            continue
+        if script.get('src'):
+            # module 脚本默认延迟执行
+            if not (script.has_attr('async') or script.has_attr('defer') or script_type == 'module'):
+                scripts.append(urljoin(base_url, script['src']))
+        elif script_type != 'module' and (script.string or '').strip():
+            inline_scripts += 1
+
+    return {'stylesheets': stylesheets, 'scripts': scripts, 'inline_scripts': inline_scripts}
+
+
+def _audit_images(html, base_url, examples=5):
+    """统计没有宽高和没有延迟加载的图片"""
+    total = 0
+    without_dimensions = []
+    without_lazy = 0
+    for match in _IMG_TAG.finditer(html):
+        tag = match.group(0)
+        total += 1
+        if not _DIMENSION.search(tag):
+            src = _IMG_SRC.search(tag)
+            without_dimensions.append(urljoin(base_url, src.group(1)) if src else tag[:80])
+        if not _LAZY.search(tag):
+            without_lazy += 1
+    return {
+        'total': total,
+        'without_dimensions': len(without_dimensions),
+        'without_lazy_loading': without_lazy,
+        'examples': without_dimensions[:examples],
+    }
+
+
+def _find_duplicates(html, page_data):
+    """重复加载的库：同名库的多个地址、同一地址多次加载、内容相同的不同文件"""
+    base_url = page_data.get('base_url', '')
+    sources = [('js', urljoin(base_url, src)) for src in _SCRIPT_SRC.findall(html)]
+    for tag in _LINK_TAG.findall(html):
+        href = _HREF.search(tag)
+        if href and _STYLESHEET_REL.search(tag):
+            sources.append(('css', urljoin(base_url, href.group(1))))
+
+    groups = {}
+    for kind, url in sources:
+        name = library_name(url)
+        if name:
+            groups.setdefault((kind, name), []).append(url)
+
+    duplicates = []
+    for (kind, name), urls in groups.items():
+        if len(urls) > 1:
+            reason = 'same_url' if len(set(urls)) == 1 else 'same_library'
+            duplicates.append({'library': name, 'type': kind, 'reason': reason, 'sources': urls})
+
+    # 内容完全相同的文件（文件名不同）
+    for kind, contents in (('js', page_data.get('js_content', {})), ('css', page_data.get('css_content', {}))):
+        by_hash = {}
+        for name, text in contents.items():
+            if name in (INLINE_CSS_FILE, INLINE_JS_FILE) or not text:
+                continue
+            by_hash.setdefault(hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest(), []).append(name)
+        for names in by_hash.values():
+            if len(names) > 1:
+                duplicates.append({'library': names[0], 'type': kind, 'reason': 'same_content', 'sources': names})
+    return duplicates
+
+
+def _unused_css(style_analysis):
+    """未使用的CSS规则比例（样式提取时按页面元素裁剪的统计）"""
+    usage = style_analysis.get('css_usage', {})
+    rules_total = sum(entry.get('rules_total', 0) for entry in usage.values())
+    if not rules_total:
+        return None
+    bytes_total = sum(entry.get('original_bytes', 0) for entry in usage.values())
+    bytes_unused = sum(entry.get('removed_bytes', 0) for entry in usage.values())
+    rules_unused = sum(entry.get('rules_removed', 0) for entry in usage.values())
+    return {
+        'rules_total': rules_total,
+        'rules_unused': rules_unused,
+        'bytes_total': bytes_total,
+        'bytes_unused': bytes_unused,
+        'ratio': round(bytes_unused / bytes_total, 3) if bytes_total else 0.0,
+        'files': sorted(
+            ({'file': name, 'bytes': entry.get('original_bytes', 0), 'bytes_unused': entry.get('removed_bytes', 0)}
+             for name, entry in usage.items()),
+            key=lambda entry: entry['bytes_unused'], reverse=True
+        ),
+    }
+
+
+def _recommendations(audit):
+    """根据审计结果生成优化建议"""
+    advice = []
+    blocking = audit['render_blocking']
+    if blocking['scripts']:
+        advice.append(f"`<head>` 中有 {len(blocking['scripts'])} 个同步脚本阻塞渲染：添加 defer/async，"
+                      f"或在Vue项目中由构建工具按需注入")
+    if len(blocking['stylesheets']) > 1:
+        advice.append(f"`<head>` 中有 {len(blocking['stylesheets'])} 个阻塞渲染的样式表：合并样式表，"
+                      f"首屏关键CSS内联，其余异步加载")
+
+    unused = audit['unused_css']
+    if unused and unused['ratio'] > UNUSED_CSS_RATIO_LIMIT:
+        advice.append(f"约 {unused['ratio']:.0%} 的CSS没有被页面使用：重建时改用组件作用域样式（scoped CSS），"
+                      f"只保留用到的规则")
+
+    js_bytes = audit['weight']['by_type']['js']['bytes'] + audit['weight']['by_type']['inline_js']['bytes']
+    if js_bytes > JS_BYTES_LIMIT:
+        advice.append(f"JavaScript共 {js_bytes / 1024:.0f} KB：按路由拆分代码，非首屏组件使用异步组件懒加载")
+
+    dom = audit['dom']
+    if dom['elements'] > DOM_ELEMENTS_LIMIT:
+        advice.append(f"DOM元素有 {dom['elements']} 个（建议少于 {DOM_ELEMENTS_LIMIT}）：长列表使用虚拟滚动，"
+                      f"折叠区域的内容按需渲染")
+    if dom['max_depth'] > DOM_DEPTH_LIMIT:
+        advice.append(f"DOM嵌套深度为 {dom['max_depth']}（建议不超过 {DOM_DEPTH_LIMIT}）：减少无语义的包裹元素")
+
+    images = audit['images']
+    if images['without_dimensions']:
+        advice.append(f"{images['without_dimensions']} 张图片没有设置宽高：设置 width/height 或 aspect-ratio，避免布局偏移")
+    if images['without_lazy_loading'] > 3:
+        advice.append(f"{images['without_lazy_loading']} 张图片没有延迟加载：首屏以外的图片添加 `loading=\"lazy\"`")
+
+    if audit['duplicates']:
+        names = ', '.join(sorted({entry['library'] for entry in audit['duplicates']}))
+        advice.append(f"重复加载的库或文件: {names}：每个库只保留一个版本")
+
+    return advice
+
+
+def audit_performance(page_data, html_analysis, style_analysis, unused_css=True, top=10):
+    """
+    审计目标网页的体积和加载行为
+
+    参数:
+        page_data (dict): WebScraper.fetch_url 的结果
+        html_analysis (dict): HTML分析结果（使用 structure 中的嵌套深度）
+        style_analysis (dict): 样式分析结果（使用 css_usage 中的裁剪统计）
+        unused_css (bool): 样式提取时是否裁剪了未使用的CSS（未裁剪时无法统计未使用的比例）
+        top (int): 列出的最大资源数量
+
+    返回:
+        dict: 审计结果
+    """
+    html = page_data.get('html', '')
+    base_url = page_data.get('base_url', '')
+    css_content = page_data.get('css_content', {})
+    js_content = page_data.get('js_content', {})
+
+    by_type = {
+        'html': {'count': 1, 'bytes': _size(html)},
+        'css': {'count': 0, 'bytes': 0},
+        'inline_css': {'count': 0, 'bytes': 0},
+        'js': {'count': 0, 'bytes': 0},
+        'inline_js': {'count': 0, 'bytes': 0},
+    }
+    assets = [{'name': base_url.rsplit('/', 1)[-1] or base_url, 'type': 'html', 'bytes': by_type['html']['bytes']}]
+    for kind, inline_file, contents in (('css', INLINE_CSS_FILE, css_content), ('js', INLINE_JS_FILE, js_content)):
+        for name, text in contents.items():
+            entry = by_type[f"inline_{kind}" if name == inline_file else kind]
+            entry['count'] += 1
+            entry['bytes'] += _size(text)
+            if name != inline_file:
+                assets.append({'name': name, 'type': kind, 'bytes': _size(text)})
+
+    images = _audit_images(html, base_url)
+    by_type['images'] = {'count': images['total'], 'bytes': None}
+
+    structure = html_analysis.get('structure', {})
+    audit = {
+        'weight': {
+            'total_bytes': sum(entry['bytes'] or 0 for entry in by_type.values()),
+            'by_type': by_type,
+        },
+        'render_blocking': _render_blocking(html, base_url),
+        'unused_css': _unused_css(style_analysis) if unused_css else None,
+        'largest_assets': sorted(assets, key=lambda asset: asset['bytes'], reverse=True)[:top],
+        'dom': {
+            # structure 中的 tag_counts 只统计出现多次的标签，元素数量按开始标签计数
+            'elements': len(_START_TAG.findall(html)),
+            'max_depth': structure.get('nesting_level', 0),
+        },
+        'images': images,
+        'duplicates': _find_duplicates(html, page_data),
+    }
+    audit['recommendations'] = _recommendations(audit)
+    return audit
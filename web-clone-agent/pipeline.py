@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+流水线执行模块 (pipeline.py)
+-------------------------
+本模块提供一个小型的有向无环图（DAG）流水线引擎，用于编排克隆流程中的各个阶段。
+
+主要功能:
+1. 每个阶段声明自己的输入和输出（按名称引用的中间结果）
+2. 输入都已就绪的阶段立即提交到线程池，互不依赖的阶段并发执行
+3. 每个中间结果只计算一次，所有下游阶段共享同一份结果
+4. 可选阶段（如AI增强分析）失败时只记录错误，输出置为None，不阻塞其他阶段
+5. 记录每个阶段的状态和耗时
+6. 可选的阶段结果缓存（见 stage_cache.py）：每个中间结果有一个内容键，
+   阶段的缓存键由阶段名称、版本、配置和全部输入的键组成，
+   输入不变时直接读取缓存的产出，任何输入变化只会使下游阶段的缓存失效
+
+工作原理:
+调度只在调用 run 的线程中进行：提交就绪阶段，等待任意一个阶段完成，
+写入它的输出，再检查哪些阶段变为就绪，直到所有阶段结束。
+每个阶段在调度线程的 contextvars 副本中执行，阶段内部的追踪区间（见 tracing.py）
+嵌套在对应的阶段区间之下。
+"""
+
+import time
+import logging
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from tracing import span
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """流水线定义错误或必需阶段执行失败"""
+
+    def __init__(self, message, stage=None, cause=None, run=None):
+        super().__init__(message)
+        self.stage = stage
+        self.cause = cause
+        # 失败时已完成部分的执行结果
+        self.run = run
+
+
+class Stage:
+    """
+    流水线阶段
+
+    阶段函数以关键字参数接收输入；只有一个输出时直接返回该输出，
+    有多个输出时返回以输出名为键的字典。
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=None, optional=False, description=None,
+                 cache=False, version=1, config=None, fingerprint=None, serialize=None, deserialize=None):
+        """
+        初始化阶段
+
+        参数:
+            name (str): 阶段名称
+            func (callable): 阶段函数
+            inputs (tuple): 输入名称
+            outputs (tuple): 输出名称（默认与阶段名称相同）
+            optional (bool): 是否为可选阶段（失败时不终止流水线）
+            description (str): 阶段说明，用于进度显示
+            cache (bool): 是否缓存阶段产出（流水线配置了缓存时有效）
+            version (int): 阶段实现的版本，修改阶段逻辑时递增，使旧的缓存失效
+            config (dict): 影响阶段产出的配置，参与缓存键
+            fingerprint (dict): 输出名称 -> 计算该输出内容键的函数，用于不缓存的阶段（如抓取），
+                                未指定的输出默认序列化后求哈希
+            serialize (callable): 把产出转换为缓存内容（默认直接缓存产出），返回None时不缓存
+            deserialize (callable): 把缓存内容还原为产出
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs else (name,)
+        self.optional = optional
+        self.description = description or name
+        self.cache = cache
+        self.version = version
+        self.config = config or {}
+        self.fingerprint = fingerprint or {}
+        self.serialize = serialize
+        self.deserialize = deserialize
+
+    def run(self, artifacts):
+        """
+        执行阶段函数
+
+        参数:
+            artifacts (dict): 当前已就绪的中间结果
+
+        返回:
+            dict: 输出名称 -> 结果
+        """
+        result = self.func(**{name: artifacts[name] for name in self.inputs})
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+
+        if not isinstance(result, dict) or set(result) != set(self.outputs):
+            raise PipelineError(f"阶段 {self.name} 应返回包含 {list(self.outputs)} 的字典", self.name)
+        return result
+
+
+class StageResult:
+    """单个阶段的执行记录"""
+
+    __slots__ = ('name', 'status', 'started', 'finished', 'error', 'outputs', 'cache_hit', 'output_keys')
+
+    def __init__(self, name):
+        self.name = name
+        # pending / success / failed / cached（初始结果已提供或命中阶段缓存）/ cancelled
+        self.status = 'pending'
+        self.started = None
+        self.finished = None
+        self.error = None
+        # 成功时的产出（输出名称 -> 结果），供 on_stage_end 回调保存检查点等
+        self.outputs = None
+        # 是否命中阶段缓存，以及各输出的内容键（配置了缓存时）
+        self.cache_hit = False
+        self.output_keys = {}
+
+    @property
+    def duration(self):
+        """阶段耗时（秒），未执行时为0"""
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def __repr__(self):
+        return f"StageResult({self.name!r}, status={self.status!r}, duration={self.duration:.3f})"
+
+
+class PipelineRun:
+    """一次流水线执行的结果"""
+
+    def __init__(self, artifacts, results, started, finished):
+        self.artifacts = artifacts
+        self.results = results
+        self.started = started
+        self.finished = finished
+
+    @property
+    def duration(self):
+        """总耗时（秒）"""
+        return self.finished - self.started
+
+    def timings(self):
+        """
+        获取各阶段耗时
+
+        返回:
+            dict: 阶段名称 -> 耗时（秒），按阶段定义顺序排列
+        """
+        return {name: result.duration for name, result in self.results.items()}
+
+    def failed_stages(self):
+        """返回失败的阶段名称列表"""
+        return [name for name, result in self.results.items() if result.status == 'failed']
+
+
+class Pipeline:
+    """
+    DAG流水线
+
+    使用示例:
+        pipeline = Pipeline(max_workers=4)
+        pipeline.add_stage('fetch', fetch, inputs=('url',), outputs=('page_data',))
+        pipeline.add_stage('html', analyze, inputs=('page_data',), outputs=('html_analysis',))
+        run = pipeline.run(url='https://example.com')
+    """
+
+    def __init__(self, max_workers=4, on_stage_start=None, on_stage_end=None, cache=None, stage_context=None):
+        """
+        初始化流水线
+
+        参数:
+            max_workers (int): 并发执行阶段的最大线程数
+            on_stage_start (callable): 阶段开始时的回调，参数为 Stage
+            on_stage_end (callable): 阶段结束时的回调，参数为 Stage 和 StageResult；
+                                     在调度线程中、下游阶段提交之前调用
+            cache (StageCache): 阶段结果缓存，None表示不缓存
+            stage_context (callable): 参数为 Stage，返回包裹阶段执行的上下文管理器；
+                                      在阶段的工作线程中进入（如 profiling.StageProfiler.stage）
+        """
+        self.max_workers = max_workers
+        self.on_stage_start = on_stage_start
+        self.on_stage_end = on_stage_end
+        self.cache = cache
+        self.stage_context = stage_context
+        self.stages = {}
+        self._producers = {}
+
+    def add_stage(self, name, func, inputs=(), outputs=None, optional=False, description=None, **cache_options):
+        """
+        添加阶段
+
+        参数:
+            name (str): 阶段名称
+            func (callable): 阶段函数
+            inputs (tuple): 输入名称
+            outputs (tuple): 输出名称（默认与阶段名称相同）
+            optional (bool): 是否为可选阶段
+            description (str): 阶段说明
+            **cache_options: 缓存相关选项（cache、version、config、fingerprint、serialize、deserialize），见 Stage
+
+        返回:
+            Stage: 新添加的阶段
+        """
+        if name in self.stages:
+            raise PipelineError(f"阶段名称重复: {name}", name)
+
+        stage = Stage(name, func, inputs, outputs, optional, description, **cache_options)
+        for output in stage.outputs:
+            if output in self._producers:
+                raise PipelineError(f"输出 {output} 已由阶段 {self._producers[output]} 产生", name)
+            self._producers[output] = name
+
+        self.stages[name] = stage
+        return stage
+
+    def _validate(self, initial):
+        """检查每个输入都有来源，且阶段之间没有循环依赖"""
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in initial and name not in self._producers:
+                    raise PipelineError(f"阶段 {stage.name} 的输入 {name} 没有来源", stage.name)
+
+        # 拓扑排序检查循环依赖
+        visiting, done = set(), set()
+
+        def visit(stage_name):
+            if stage_name in done:
+                return
+            if stage_name in visiting:
+                raise PipelineError(f"阶段之间存在循环依赖: {stage_name}", stage_name)
+            visiting.add(stage_name)
+            for name in self.stages[stage_name].inputs:
+                if name not in initial:
+                    visit(self._producers[name])
+            visiting.discard(stage_name)
+            done.add(stage_name)
+
+        for stage_name in self.stages:
+            visit(stage_name)
+
+    def _value_key(self, name, value):
+        """计算中间结果的内容键（产生它的阶段为它提供了 fingerprint 时使用它）"""
+        producer = self.stages.get(self._producers.get(name))
+        if producer is not None and name in producer.fingerprint and value is not None:
+            return producer.fingerprint[name](value)
+        return self.cache.value_key(value)
+
+    def _execute(self, stage, artifacts, result, key=None):
+        """
+        在工作线程中执行阶段并记录耗时
+
+        key 为阶段的缓存键（未配置缓存时为None）；阶段可缓存时先查缓存，
+        未命中则执行阶段并写入缓存，最后计算各输出的内容键。
+        """
+        context = self.stage_context(stage) if self.stage_context else contextlib.nullcontext()
+        result.started = time.perf_counter()
+        try:
+            with span(f"stage.{stage.name}", 'stage') as stage_span, context:
+                outputs = None
+                if key is not None and stage.cache:
+                    outputs = self._load_cached(stage, key)
+                    result.cache_hit = outputs is not None
+                    stage_span.set(cache_hit=result.cache_hit)
+
+                if outputs is None:
+                    outputs = stage.run(artifacts)
+                    if key is not None and stage.cache:
+                        try:
+                            stored = stage.serialize(outputs) if stage.serialize else outputs
+                            if stored is not None:
+                                with span('cache.write', 'cache', stage=stage.name):
+                                    self.cache.set(key, stored)
+                        except Exception as e:
+                            logger.warning(f"写入阶段 {stage.name} 的缓存失败: {str(e)}")
+
+                if key is not None:
+                    if stage.cache:
+                        # 可缓存阶段的输出键由缓存键派生，不需要对产出求哈希
+                        result.output_keys = {name: self.cache.derive_key(key, name) for name in stage.outputs}
+                    else:
+                        result.output_keys = {name: self._value_key(name, outputs[name]) for name in stage.outputs}
+                return outputs
+        finally:
+            result.finished = time.perf_counter()
+
+    def _load_cached(self, stage, key):
+        """读取阶段缓存，未命中或无法还原时返回None"""
+        try:
+            with span('cache.read', 'cache', stage=stage.name) as read_span:
+                stored = self.cache.get(key)
+                read_span.set(hit=stored is not None)
+            if stored is None:
+                return None
+            return stage.deserialize(stored) if stage.deserialize else stored
+        except Exception as e:
+            logger.warning(f"读取阶段 {stage.name} 的缓存失败，重新执行: {str(e)}")
+            return None
+
+    def run(self, **initial):
+        """
+        执行流水线
+
+        已经通过 initial 提供了全部输出的阶段不会执行（状态记为 cached）。
+
+        参数:
+            **initial: 初始中间结果（如 url）
+
+        返回:
+            PipelineRun: 执行结果
+
+        异常:
+            PipelineError: 流水线定义错误，或必需阶段执行失败
+        """
+        self._validate(initial)
+
+        artifacts = dict(initial)
+        results = {name: StageResult(name) for name in self.stages}
+        # 各中间结果的内容键（配置了缓存时）
+        keys = {}
+        if self.cache is not None:
+            keys = {name: self._value_key(name, value) for name, value in artifacts.items()}
+        pending = []
+        for name, stage in self.stages.items():
+            if all(output in artifacts for output in stage.outputs):
+                results[name].status = 'cached'
+            else:
+                pending.append(stage)
+
+        started = time.perf_counter()
+        running = {}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline') as executor:
+            while pending or running:
+                # 提交所有输入已就绪的阶段（必需阶段失败后不再提交新阶段）
+                if failure is None:
+                    ready = [stage for stage in pending if all(name in artifacts for name in stage.inputs)]
+                    for stage in ready:
+                        pending.remove(stage)
+                        if self.on_stage_start:
+                            self.on_stage_start(stage)
+                        # 提交时复制一份输入，工作线程不会看到调度线程之后写入的结果
+                        inputs = {name: artifacts[name] for name in stage.inputs}
+                        key = None
+                        if self.cache is not None:
+                            key = self.cache.stage_key(stage.name, stage.version, stage.config,
+                                                       [keys[name] for name in stage.inputs])
+                        # 每个阶段使用调度线程上下文的独立副本（同一个Context不能同时在两个线程中进入）
+                        context = contextvars.copy_context()
+                        future = executor.submit(context.run, self._execute, stage, inputs, results[stage.name], key)
+                        running[future] = stage
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    result = results[stage.name]
+                    try:
+                        result.outputs = future.result()
+                        artifacts.update(result.outputs)
+                        keys.update(result.output_keys)
+                        result.status = 'cached' if result.cache_hit else 'success'
+                    except Exception as e:
+                        result.status = 'failed'
+                        result.error = e
+                        if stage.optional:
+                            logger.warning(f"可选阶段 {stage.name} 失败，继续执行: {str(e)}")
+                            for output in stage.outputs:
+                                artifacts[output] = None
+                                if self.cache is not None:
+                                    keys[output] = self.cache.value_key(None)
+                        else:
+                            logger.error(f"阶段 {stage.name} 失败: {str(e)}")
+                            if failure is None:
+                                failure = (stage, e)
+
+                    if self.on_stage_end:
+                        self.on_stage_end(stage, result)
+
+        for stage in pending:
+            results[stage.name].status = 'cancelled'
+
+        run = PipelineRun(artifacts, results, started, time.perf_counter())
+        if failure is not None:
+            stage, error = failure
+            raise PipelineError(f"阶段 {stage.name} 失败: {str(error)}", stage.name, error, run) from error
+        return run
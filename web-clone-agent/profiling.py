@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+阶段剖析模块 (profiling.py)
+------------------------
+本模块实现 main.py 的 --profile 模式：按流水线阶段记录CPU和内存的使用情况，
+不需要手工用 cProfile 和 tracemalloc 包装 main.py。
+
+主要功能:
+1. CPU：每个阶段一个 cProfile 剖析结果（.pstats 文件，可用 pstats 或 snakeviz 查看）
+2. 火焰图：定时采样阶段线程的调用栈，输出折叠栈格式（flamegraph.collapsed，
+   每行 "阶段;外层函数;...;内层函数 次数"，可直接交给 flamegraph.pl 或 speedscope）
+3. 内存：阶段开始时清空 tracemalloc 的记录，结束时拍摄快照，得到该阶段分配且仍存活的
+   内存最多的代码位置（不需要比较前后两个完整快照，大堆上也很快），
+   同时记录阶段内Python堆的峰值和进程RSS（阶段结束时的值，以及调用栈采样时顺带读取的阶段内峰值；
+   ru_maxrss 是进程启动以来的峰值，只作为整个进程的RSS峰值写在汇总开头）
+4. 汇总：profile_summary.md（与生成的文档放在一起）和 profile/summary.json
+
+工作原理:
+流水线在阶段的工作线程中进入 StageProfiler.stage 返回的上下文（见 Pipeline 的 stage_context），
+cProfile 只剖析当前线程，采样线程只读取阶段线程的栈帧。
+tracemalloc 统计的是整个进程，剖析模式下阶段应串行执行（main.py 会把阶段并发数设为1），
+否则同时执行的阶段的分配会互相混在一起。
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+import contextlib
+from collections import Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 汇总文件名（位于文档输出目录）
+SUMMARY_FILE = 'profile_summary.md'
+
+# 详细结果目录名（位于文档输出目录）
+PROFILE_DIR = 'profile'
+
+# 统计内存分配时忽略的文件（剖析工具本身）
+_IGNORED_FILES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>',
+                  '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+def current_rss():
+    """
+    当前进程的常驻内存（字节）
+
+    返回:
+        int: 字节数，无法获取时为None
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss():
+    """
+    进程启动以来的常驻内存峰值（字节）
+
+    返回:
+        int: 字节数，无法获取时为None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位是KB，macOS上是字节
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _stack_depth(frame):
+    """从给定栈帧到线程最外层的帧数"""
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class _StackSampler:
+    """定时采样一个线程的调用栈，统计折叠栈出现的次数，同时记录采样期间进程RSS的最大值"""
+
+    def __init__(self, thread_id, interval, root, base_depth=0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root
+        # 忽略的最外层栈帧数
+        self.base_depth = base_depth
+        self.stacks = Counter()
+        # 采样期间的RSS峰值（从开始采样时的值算起，无法获取RSS时为None）
+        self.peak_rss = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._sample_rss()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample_rss()
+
+    def _sample_rss(self):
+        rss = current_rss()
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample_rss()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if self.base_depth:
+                names = names[:-self.base_depth]
+            names.append(self.root)
+            self.stacks[';'.join(reversed(names))] += 1
+
+
+class StageProfiler:
+    """
+    按阶段记录CPU剖析、调用栈采样和内存快照
+
+    使用示例:
+        profiler = StageProfiler(output_dir)
+        agent.profiler = profiler
+        profiler.start()
+        agent.clone_website(url, output_dir)
+        profiler.stop()
+        profiler.write_report()
+    """
+
+    def __init__(self, output_dir, sample_interval=0.005, top=10, trace_frames=1):
+        """
+        初始化剖析器
+
+        参数:
+            output_dir (str): 文档输出目录（汇总写在这里，详细结果写在其中的 profile/ 目录）
+            sample_interval (float): 调用栈采样间隔（秒）
+            top (int): 每个阶段报告的分配位置和函数数量
+            trace_frames (int): tracemalloc 为每次分配保存的栈帧数（按代码行统计只需要1帧）
+        """
+        self.output_dir = output_dir
+        self.profile_dir = os.path.join(output_dir, PROFILE_DIR)
+        self.sample_interval = sample_interval
+        self.top = top
+        self.trace_frames = trace_frames
+        self.stages = []
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._started = None
+        self._finished = None
+
+    def start(self):
+        """开始记录内存分配（在执行流水线之前调用）"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """停止记录内存分配"""
+        self._finished = time.perf_counter()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def stage(self, stage):
+        """
+        剖析一个阶段（在阶段的工作线程中进入）
+
+        参数:
+            stage (Stage): 流水线阶段
+        """
+        name = stage.name
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # 只保留本阶段的分配记录（同时把已分配量和峰值清零）
+            tracemalloc.clear_traces()
+
+        # 采样时去掉阶段执行之外的栈帧（线程池和流水线的调用链）：
+        # 第0帧是本生成器，第1帧是 contextlib 的 __enter__，第2帧是 Pipeline._execute
+        base_depth = _stack_depth(sys._getframe(2))
+        sampler = _StackSampler(threading.get_ident(), self.sample_interval, f"stage.{name}", base_depth)
+        sampler.start()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 同一线程中已有其他剖析器
+            logger.warning(f"阶段 {name} 无法启用cProfile（已有其他剖析器），只记录采样和内存")
+            profile = None
+
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpu_started
+            wall = time.perf_counter() - wall_started
+            if profile is not None:
+                profile.disable()
+            sampler.stop()
+
+            record = {
+                'stage': name,
+                'wall_seconds': round(wall, 4),
+                'cpu_seconds': round(cpu, 4),
+                'samples': sum(sampler.stacks.values()),
+                'rss_bytes': current_rss(),
+                'peak_rss_bytes': sampler.peak_rss,
+                'python_peak_bytes': None,
+                'python_live_bytes': None,
+                'top_allocations': [],
+                'top_functions': [],
+                'pstats_file': None
+            }
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record['python_peak_bytes'] = peak
+                record['python_live_bytes'] = current
+                record['top_allocations'] = self._top_allocations(self._snapshot())
+            if profile is not None:
+                record['pstats_file'] = os.path.join(self.profile_dir, f"{name}.pstats")
+                profile.dump_stats(record['pstats_file'])
+                record['top_functions'] = self._top_functions(profile)
+
+            with self._lock:
+                self.stages.append(record)
+                self.stacks.update(sampler.stacks)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+        )
+
+    def _top_allocations(self, snapshot):
+        """阶段内分配且仍存活的内存最多的代码位置"""
+        allocations = []
+        for statistic in snapshot.statistics('lineno')[:self.top]:
+            frame = statistic.traceback[0]
+            allocations.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_bytes': statistic.size,
+                'count': statistic.count
+            })
+        return allocations
+
+    def _top_functions(self, profile):
+        """阶段内自身耗时最多的函数"""
+        stats = pstats.Stats(profile)
+        rows = []
+        for (filename, line, function), (_, calls, self_time, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{function} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'self_seconds': round(self_time, 4),
+                'cumulative_seconds': round(cumulative, 4)
+            })
+        rows.sort(key=lambda row: row['self_seconds'], reverse=True)
+        return rows[:self.top]
+
+    def write_report(self):
+        """
+        写入火焰图数据、JSON汇总和Markdown汇总
+
+        返回:
+            str: Markdown汇总文件路径
+        """
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with self._lock:
+            stages = list(self.stages)
+            stacks = Counter(self.stacks)
+
+        with open(os.path.join(self.profile_dir, 'flamegraph.collapsed'), 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            'total_seconds': round((self._finished or time.perf_counter()) - (self._started or 0), 4),
+            'peak_rss_bytes': peak_rss(),
+            'sample_interval': self.sample_interval,
+            'stages': stages
+        }
+        with open(os.path.join(self.profile_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        path = os.path.join(self.output_dir, SUMMARY_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self._render_markdown(summary))
+        logger.info(f"剖析结果已写入: {path}")
+        return path
+
+    def _render_markdown(self, summary):
+        lines = ["# 性能剖析汇总\n"]
+        lines.append(f"- **总耗时**: {summary['total_seconds']:.3f} 秒")
+        lines.append(f"- **进程RSS峰值**: {_format_bytes(summary['peak_rss_bytes'])}")
+        lines.append(f"- **详细结果**: `{PROFILE_DIR}/`（每个阶段的 `.pstats`、折叠栈 `flamegraph.collapsed`、`summary.json`）\n")
+
+        lines.append("## 各阶段概览\n")
+        lines.append("| 阶段 | 墙钟时间 | CPU时间 | 采样数 | Python堆峰值 | 阶段结束时仍存活 | RSS | 阶段RSS峰值 |")
+        lines.append("|------|---------|--------|-------|-------------|-------------|-----|-----------|")
+        for record in summary['stages']:
+            lines.append(
+                f"| {record['stage']} | {record['wall_seconds']:.3f}s | {record['cpu_seconds']:.3f}s | "
+                f"{record['samples']} | {_format_bytes(record['python_peak_bytes'])} | "
+                f"{_format_bytes(record['python_live_bytes'])} | {_format_bytes(record['rss_bytes'])} | "
+                f"{_format_bytes(record['peak_rss_bytes'])} |"
+            )
+        lines.append("")
+
+        for record in summary['stages']:
+            lines.append(f"## 阶段 {record['stage']}\n")
+            if record['top_allocations']:
+                lines.append("### 分配最多的代码位置（阶段结束时仍存活）\n")
+                lines.append("| 位置 | 大小 | 次数 |")
+                lines.append("|------|-------|-----|")
+                for allocation in record['top_allocations']:
+                    lines.append(f"| `{allocation['site']}` | {_format_bytes(allocation['size_bytes'])} | "
+                                 f"{allocation['count']} |")
+                lines.append("")
+            if record['top_functions']:
+                lines.append("### 自身耗时最多的函数\n")
+                lines.append("| 函数 | 调用次数 | 自身耗时 | 累计耗时 |")
+                lines.append("|------|---------|---------|---------|")
+                for row in record['top_functions']:
+                    lines.append(f"| `{row['function']}` | {row['calls']} | {row['self_seconds']:.4f}s | "
+                                 f"{row['cumulative_seconds']:.4f}s |")
+                lines.append("")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bytes(value):
+    """字节数格式化为便于阅读的字符串"""
+    if value is None:
+        return '-'
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{sign}{value:.0f} {unit}" if unit == 'B' else f"{sign}{value:.1f} {unit}"
+        value /= 1024
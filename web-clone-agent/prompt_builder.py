@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提示词构建模块 (prompt_builder.py)
+-------------------------------
+本模块负责把HTML分析结果压缩成适合发送给LLM的紧凑摘要，并严格控制token数量。
+
+主要功能:
+1. 本地分词器：优先使用tiktoken，不可用时使用基于正则的近似分词
+2. 组件摘要：类型、元素、ID、前几个类名、文本长度、结构哈希和截断的文本样例，
+   不再包含组件的完整HTML
+3. 结构相同的组件合并为一行并注明数量
+4. 按组件大小和独特程度排序，在token预算内尽量保留最重要的组件
+
+工作原理:
+逐行累加摘要直到达到预算，最后对拼接后的完整文本重新计数，
+保证输出的token数不超过预算。
+"""
+
+import re
+import logging
+
+# 尝试导入tiktoken分词库
+try:
+    import tiktoken
+    USE_TIKTOKEN = True
+except ImportError:
+    USE_TIKTOKEN = False
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 近似分词：每个汉字、每段字母、每1-3位数字、每个标点符号、每段空白各算一个token
+_APPROX_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]|[A-Za-z]+|\d{1,3}|\s+|[^\sA-Za-z\d\u4e00-\u9fff]')
+
+# 已经提示过的近似分词原因（每个原因只提示一次，批量任务中不会重复刷屏）
+_fallback_warned = set()
+
+
+def _warn_fallback(reason):
+    """提示正在使用近似分词：近似计数可能少于模型实际的token数，提示词可能超出预算"""
+    if reason in _fallback_warned:
+        return
+    _fallback_warned.add(reason)
+    logger.warning(f"{reason}，使用正则近似分词（token数可能少于实际值，提示词可能超出预算）")
+
+
+class Tokenizer:
+    """
+    本地分词器
+
+    tiktoken可用且编码文件能加载时使用tiktoken，否则使用正则近似分词。
+    """
+
+    def __init__(self, encoding_name='cl100k_base'):
+        """
+        初始化分词器
+
+        参数:
+            encoding_name (str): tiktoken编码名称
+        """
+        self.encoding = None
+        if not USE_TIKTOKEN:
+            _warn_fallback("未安装tiktoken（pip install tiktoken）")
+            return
+        try:
+            self.encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            _warn_fallback(f"无法加载tiktoken编码 {encoding_name} ({str(e)})")
+
+    @property
+    def name(self):
+        """分词器名称"""
+        return self.encoding.name if self.encoding is not None else 'regex-approx'
+
+    def _tokens(self, text):
+        if self.encoding is not None:
+            return self.encoding.encode(text, disallowed_special=())
+        return _APPROX_TOKEN_RE.findall(text)
+
+    def count(self, text):
+        """
+        计算文本的token数
+
+        参数:
+            text (str): 文本
+
+        返回:
+            int: token数
+        """
+        return len(self._tokens(text))
+
+    def truncate(self, text, max_tokens):
+        """
+        把文本截断到不超过 max_tokens 个token
+
+        参数:
+            text (str): 文本
+            max_tokens (int): 最大token数
+
+        返回:
+            str: 截断后的文本
+        """
+        tokens = self._tokens(text)
+        if len(tokens) <= max_tokens:
+            return text
+        if self.encoding is not None:
+            truncated = self.encoding.decode(tokens[:max_tokens])
+            # 解码后重新编码可能多出token（截断在多字节字符中间时），逐步缩短
+            while self.count(truncated) > max_tokens:
+                truncated = truncated[:-1]
+            return truncated
+        return ''.join(tokens[:max_tokens])
+
+
+class PromptBuilder:
+    """
+    组件摘要提示词构建器
+    """
+
+    def __init__(self, tokenizer=None, max_classes=3, sample_chars=60):
+        """
+        初始化提示词构建器
+
+        参数:
+            tokenizer (Tokenizer): 分词器（默认自动创建）
+            max_classes (int): 每个组件最多列出的类名数量
+            sample_chars (int): 文本样例的最大字符数
+        """
+        self.tokenizer = tokenizer or Tokenizer()
+        self.max_classes = max_classes
+        self.sample_chars = sample_chars
+
+    def summarize_component(self, component):
+        """
+        生成组件的紧凑摘要
+
+        参数:
+            component (dict): HtmlAnalyzer识别的组件
+
+        返回:
+            dict: 组件摘要
+        """
+        sample = component.get('text_sample', '')
+        if len(sample) > self.sample_chars:
+            sample = sample[:self.sample_chars] + '…'
+
+        return {
+            'type': component.get('type', ''),
+            'element': component.get('element', ''),
+            'id': component.get('id', ''),
+            'classes': list(component.get('classes', []))[:self.max_classes],
+            'text_length': component.get('text_length', 0),
+            'hash': component.get('structure_hash', ''),
+            'sample': sample
+        }
+
+    def format_summary(self, summary, count=1):
+        """
+        把组件摘要格式化为一行文本
+
+        参数:
+            summary (dict): 组件摘要
+            count (int): 结构相同的组件数量
+
+        返回:
+            str: 例如 'card <div#intro.card.shadow> text=120 hash=1a2b3c4d x3 "欢迎…"'
+        """
+        selector = summary['element']
+        if summary['id']:
+            selector += f"#{summary['id']}"
+        selector += ''.join(f".{cls}" for cls in summary['classes'])
+
+        line = f"{summary['type']} <{selector}> text={summary['text_length']}"
+        if summary['hash']:
+            line += f" hash={summary['hash'][:8]}"
+        if count > 1:
+            line += f" x{count}"
+        if summary['sample']:
+            line += f' "{summary["sample"]}"'
+        return line
+
+    def prioritize(self, components):
+        """
+        按重要程度排列组件（结构相同的组件合并）
+
+        组件按结构哈希分组，每组以最大的组件为代表（已聚类的组件按 cluster_size 计数）；
+        得分 = 代表组件的HTML长度 / sqrt(组内数量)，越大、越独特的组件越靠前。
+
+        参数:
+            components (list): 组件列表
+
+        返回:
+            list: (代表组件, 组内数量) 按得分从高到低排列
+        """
+        groups = {}
+        for index, component in enumerate(components):
+            key = component.get('structure_hash') or f"#{index}"
+            group = groups.setdefault((component.get('type', ''), key), [])
+            group.append(component)
+
+        ranked = []
+        for group in groups.values():
+            representative = max(group, key=lambda c: len(c.get('html', '')))
+            # 已经聚类的组件按簇的大小计数
+            count = sum(c.get('cluster_size', 1) for c in group)
+            score = len(representative.get('html', '')) / count ** 0.5
+            ranked.append((score, representative, count))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [(representative, count) for _, representative, count in ranked]
+
+    def build_component_summary(self, components, max_tokens):
+        """
+        生成不超过 max_tokens 个token的组件摘要
+
+        参数:
+            components (list): 组件列表
+            max_tokens (int): token预算
+
+        返回:
+            str: 每行一个组件（或一组结构相同的组件）的摘要
+        """
+        ranked = self.prioritize(components)
+        lines = []
+        used = 0
+        for component, count in ranked:
+            line = self.format_summary(self.summarize_component(component), count)
+            cost = self.tokenizer.count(line) + 1  # 换行符
+            if used + cost > max_tokens:
+                continue
+            lines.append(line)
+            used += cost
+
+        omitted = len(ranked) - len(lines)
+        if omitted:
+            note = f"... 另有 {omitted} 组组件因长度限制省略"
+            if used + self.tokenizer.count(note) + 1 <= max_tokens:
+                lines.append(note)
+
+        # 拼接后重新计数，保证不超过预算
+        text = '\n'.join(lines)
+        while lines and self.tokenizer.count(text) > max_tokens:
+            lines.pop()
+            text = '\n'.join(lines)
+
+        kept = len(lines) - (1 if omitted and lines and lines[-1].startswith('...') else 0)
+        logger.info(
+            f"组件摘要: {len(components)} 个组件 -> {len(ranked)} 组，保留 {kept} 组，"
+            f"{self.tokenizer.count(text)}/{max_tokens} tokens（{self.tokenizer.name}）"
+        )
+        return text
+
+    def truncate(self, text, max_tokens):
+        """
+        把任意文本截断到token预算内
+
+        参数:
+            text (str): 文本
+            max_tokens (int): token预算
+
+        返回:
+            str: 截断后的文本
+        """
+        return self.tokenizer.truncate(text, max_tokens)
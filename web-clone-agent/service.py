@@ -0,0 +1,596 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+克隆服务模块 (service.py)
+----------------------
+本模块把 CloneAgent 包装成一个常驻的本地服务，省去每次调用命令行时的
+Python启动、模块导入、浏览器启动和日志初始化开销。
+
+主要功能:
+1. 任务队列：按优先级排队（数值越大越先执行），同优先级先到先执行
+2. 常驻工作线程：每个线程在启动时创建一套组件（见 batch.WorkerBundle），之后的任务都复用
+   初始化失败的工作线程不计入工作线程数；全部失败时 start() 报错，不等待预热时任务直接失败
+3. 单飞（single-flight）：同一URL已在排队或执行时，新的请求合并到已有任务，
+   更高的优先级会提升已有任务的优先级
+4. 进度流：每个任务的事件（排队、开始、各阶段完成、结束）以NDJSON流式返回
+5. HTTP接口，可以监听TCP端口或Unix套接字
+6. 每个任务记录追踪区间（见 tracing.py），可以按任务导出Chrome追踪，
+   全部任务的区间累计为Prometheus格式的指标
+7. 已结束的任务只保留最近的 max_finished_jobs 个，且最多保留 finished_job_ttl 秒，
+   常驻服务的内存不会随请求数增长
+
+HTTP接口:
+    GET  /health               服务状态（排队数、执行数、可用的工作线程数）
+    GET  /jobs                 全部任务
+    POST /jobs                 提交任务，请求体 {"url": ..., "priority": 0}；
+                               加上 ?stream=1 时以NDJSON流式返回进度直到任务结束
+    GET  /jobs/<id>            任务状态和结果
+    GET  /jobs/<id>/events     任务事件的NDJSON流（从第一条事件开始，直到任务结束）
+    GET  /jobs/<id>/trace      已结束任务的Chrome追踪（JSON）
+    GET  /metrics              Prometheus文本格式的指标（各区间的耗时直方图、字节数和条目数，任务计数）
+
+使用方法:
+    python main.py --serve 127.0.0.1:8800 --workers 4 --output service-output
+    curl -N -X POST 'http://127.0.0.1:8800/jobs?stream=1' -d '{"url": "https://example.com"}'
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+import socketserver
+import itertools
+from queue import PriorityQueue
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from batch import WorkerBundle, output_dir_for
+from tracing import Tracer, MetricsRegistry
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 任务结束的状态
+FINISHED_STATUSES = ('success', 'failed')
+
+
+class CloneJob:
+    """
+    一个克隆任务及其事件记录
+    """
+
+    def __init__(self, job_id, url, priority, output_dir):
+        """
+        初始化任务
+
+        参数:
+            job_id (str): 任务ID
+            url (str): 目标URL
+            priority (int): 优先级（越大越先执行）
+            output_dir (str): 文档输出目录
+        """
+        self.id = job_id
+        self.url = url
+        self.priority = priority
+        self.output_dir = output_dir
+        self.status = 'queued'
+        self.error = None
+        self.timings = {}
+        self.coalesced = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.events = []
+        # 任务执行时的追踪（见 tracing.py），任务开始后才有；任务结束、指标累计之后
+        # 只保留导出的Chrome追踪事件（trace_events），追踪器本身释放
+        self.tracer = None
+        self.trace_events = None
+        self._condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    def add_event(self, event, **fields):
+        """记录一条事件并唤醒等待事件的读取方"""
+        entry = {'event': event, 'job': self.id, 'time': round(time.time(), 3)}
+        entry.update(fields)
+        with self._condition:
+            self.events.append(entry)
+            self._condition.notify_all()
+
+    def finish(self, success):
+        """标记任务结束；状态和 finished 事件同时写入，读取方不会漏掉最后一条事件"""
+        self.finished = time.time()
+        with self._condition:
+            self.status = 'success' if success else 'failed'
+            entry = {'event': 'finished', 'job': self.id, 'time': round(self.finished, 3)}
+            entry.update(self.to_dict())
+            self.events.append(entry)
+            self._condition.notify_all()
+
+    def iter_events(self, heartbeat=15.0):
+        """
+        依次产出任务的全部事件，直到任务结束
+
+        参数:
+            heartbeat (float): 没有新事件时，每隔多少秒产出一次None（用于保持连接）
+
+        返回:
+            generator: 事件字典（或None）
+        """
+        position = 0
+        while True:
+            with self._condition:
+                if position >= len(self.events) and not self.done:
+                    self._condition.wait(heartbeat)
+                pending = self.events[position:]
+                finished = self.done
+            position += len(pending)
+
+            if pending:
+                yield from pending
+            elif not finished:
+                yield None
+
+            if finished and position >= len(self.events):
+                return
+
+    def wait(self, timeout=None):
+        """等待任务结束，返回是否已结束"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self.done:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.done
+
+    def to_dict(self):
+        """任务状态（可序列化为JSON）"""
+        return {
+            'id': self.id,
+            'url': self.url,
+            'priority': self.priority,
+            'status': self.status,
+            'output_dir': self.output_dir,
+            'error': self.error,
+            'timings': self.timings,
+            'coalesced': self.coalesced,
+            'created': round(self.created, 3),
+            'started': self.started and round(self.started, 3),
+            'finished': self.finished and round(self.finished, 3),
+            'duration': round(self.finished - self.started, 3) if self.finished and self.started else None
+        }
+
+
+class CloneService:
+    """
+    常驻克隆服务：优先级任务队列 + 预热的工作线程
+    """
+
+    def __init__(self, output_root='service-output', workers=2, use_selenium=False, stage_workers=2,
+                 temp_root=None, export_formats=None, max_finished_jobs=200, finished_job_ttl=3600):
+        """
+        初始化服务（调用 start 后才开始执行任务）
+
+        参数:
+            output_root (str): 输出根目录，每个任务生成到其中的单独子目录
+            workers (int): 工作线程数
+            use_selenium (bool): 是否使用Selenium
+            stage_workers (int): 每个任务的流水线阶段并发数
+            temp_root (str): 临时文件根目录（默认在系统临时目录中新建，stop 时删除）
+            export_formats (list): 数据文件的导出格式（见 data_export.py），默认只导出 site_data.yaml
+            max_finished_jobs (int): 最多保留的已结束任务数（超出时删除最早结束的任务）
+            finished_job_ttl (float): 已结束任务的保留时间（秒），None表示不按时间删除
+        """
+        self.output_root = output_root
+        self.workers = max(1, workers)
+        self.max_finished_jobs = max_finished_jobs
+        self.finished_job_ttl = finished_job_ttl
+        self._own_temp = temp_root is None
+        self._config = {
+            'use_selenium': use_selenium,
+            'temp_root': temp_root or tempfile.mkdtemp(prefix='web-clone-service-'),
+            'stage_workers': stage_workers,
+            'export_formats': export_formats
+        }
+
+        self._queue = PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._inflight = {}
+        self._threads = []
+        self._bundles = []
+        # 工作线程创建组件时的异常
+        self._startup_errors = []
+        self._ready = threading.Barrier(self.workers + 1)
+        self.running_count = 0
+        self.metrics = MetricsRegistry()
+
+        os.makedirs(output_root, exist_ok=True)
+
+    def start(self, wait_ready=True):
+        """
+        启动工作线程；每个线程先创建自己的组件，再开始从队列中取任务
+
+        参数:
+            wait_ready (bool): 是否等待所有工作线程完成预热
+                               （不等待时，如果所有工作线程都初始化失败，排队和之后提交的任务直接失败）
+
+        异常:
+            RuntimeError: 等待预热时所有工作线程都初始化失败（服务已停止）
+        """
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"clone-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if not wait_ready:
+            threading.Thread(target=self._ready.wait, daemon=True).start()
+            logger.info(f"克隆服务已启动，{self.workers} 个工作线程正在预热")
+            return
+
+        self._ready.wait()
+        with self._lock:
+            live, errors = len(self._bundles), list(self._startup_errors)
+        if not live:
+            self.stop()
+            raise RuntimeError(f"克隆服务的工作线程全部初始化失败: {str(errors[0])}") from errors[0]
+        if errors:
+            logger.warning(f"{len(errors)} 个工作线程初始化失败，使用其余 {live} 个工作线程")
+        logger.info(f"克隆服务已启动，{live} 个工作线程")
+
+    def stop(self, timeout=30):
+        """停止工作线程（正在执行的任务会先完成）并释放资源"""
+        for _ in self._threads:
+            # 哨兵的优先级低于任何任务
+            self._queue.put((float('inf'), next(self._sequence), None))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        for bundle in self._bundles:
+            try:
+                bundle.shutdown()
+            except Exception as e:
+                logger.warning(f"释放工作线程资源失败: {str(e)}")
+        self._bundles = []
+
+        if self._own_temp:
+            shutil.rmtree(self._config['temp_root'], ignore_errors=True)
+        logger.info("克隆服务已停止")
+
+    def submit(self, url, priority=0):
+        """
+        提交克隆任务
+
+        同一URL已有排队或执行中的任务时不会新建任务，而是返回已有任务；
+        新请求的优先级更高时提升已有任务的优先级。
+
+        参数:
+            url (str): 目标URL
+            priority (int): 优先级（越大越先执行）
+
+        返回:
+            tuple: (CloneJob, 是否合并到了已有任务)
+        """
+        with self._lock:
+            self._evict_finished()
+            job = self._inflight.get(url)
+            if job is not None:
+                job.coalesced += 1
+                if job.status == 'queued' and priority > job.priority:
+                    # 旧的队列条目在取出时因优先级不符被跳过
+                    job.priority = priority
+                    self._queue.put((-priority, next(self._sequence), job))
+                job.add_event('coalesced', priority=job.priority, requests=job.coalesced + 1)
+                return job, True
+
+            sequence = next(self._sequence)
+            job_id = uuid.uuid4().hex[:12]
+            job = CloneJob(job_id, url, priority, output_dir_for(self.output_root, sequence, url))
+            self._jobs[job_id] = job
+            self._inflight[url] = job
+            job.add_event('queued', url=url, priority=priority)
+            if self._no_workers():
+                self._fail_queued()
+            else:
+                self._queue.put((-priority, sequence, job))
+            return job, False
+
+    def _no_workers(self):
+        """所有工作线程都初始化失败（调用方持有 _lock）"""
+        return len(self._startup_errors) >= self.workers
+
+    def _fail_queued(self):
+        """没有可用的工作线程时，把所有排队的任务标记为失败（调用方持有 _lock）"""
+        error = f"没有可用的工作线程: {str(self._startup_errors[0])}"
+        for url, job in list(self._inflight.items()):
+            if job.status != 'queued':
+                continue
+            del self._inflight[url]
+            job.error = error
+            self.metrics.inc('jobs_total', status='failed')
+            job.finish(False)
+
+    def _evict_finished(self):
+        """删除超过保留时间或超出保留数量的已结束任务（调用方持有 _lock）"""
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished)
+        excess = len(finished) - self.max_finished_jobs
+        deadline = None if self.finished_job_ttl is None else time.time() - self.finished_job_ttl
+        for index, job in enumerate(finished):
+            if index < excess or (deadline is not None and job.finished < deadline):
+                del self._jobs[job.id]
+
+    def get(self, job_id):
+        """按ID获取任务，不存在时返回None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """全部任务（按提交顺序）"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self):
+        """服务状态"""
+        with self._lock:
+            queued = sum(1 for job in self._inflight.values() if job.status == 'queued')
+            return {
+                'status': 'error' if self._no_workers() else 'ok',
+                # 已完成预热的工作线程数（初始化失败的不计）和配置的工作线程数
+                'workers': len(self._bundles),
+                'configured_workers': self.workers,
+                'queued': queued,
+                'running': self.running_count,
+                'jobs': len(self._jobs)
+            }
+
+    def render_metrics(self):
+        """Prometheus文本格式的指标（累计的区间指标、任务计数和当前队列状态）"""
+        stats = self.stats()
+        return self.metrics.render(gauges={
+            'queued_jobs': ('Jobs waiting in the queue.', stats['queued']),
+            'running_jobs': ('Jobs currently running.', stats['running']),
+            'workers': ('Warm worker threads.', stats['workers'])
+        })
+
+    def _worker_loop(self):
+        """工作线程：预热组件后循环执行队列中的任务"""
+        bundle = None
+        try:
+            bundle = WorkerBundle(self._config)
+            with self._lock:
+                self._bundles.append(bundle)
+        except Exception as e:
+            logger.exception(f"工作线程初始化失败: {str(e)}")
+            with self._lock:
+                self._startup_errors.append(e)
+        finally:
+            self._ready.wait()
+        if bundle is None:
+            # 所有工作线程都失败时，排队的任务不会再被执行
+            with self._lock:
+                if self._no_workers():
+                    self._fail_queued()
+            return
+
+        while True:
+            neg_priority, _, job = self._queue.get()
+            if job is None:
+                return
+
+            with self._lock:
+                # 跳过提升优先级后留下的旧条目
+                if job.status != 'queued' or -neg_priority != job.priority:
+                    continue
+                job.status = 'running'
+                self.running_count += 1
+
+            self._run_job(bundle, job)
+
+            with self._lock:
+                self.running_count -= 1
+                if self._inflight.get(job.url) is job:
+                    del self._inflight[job.url]
+                self._evict_finished()
+
+    def _run_job(self, bundle, job):
+        """执行一个任务并记录事件"""
+        job.started = time.time()
+        job.add_event('started', worker=threading.current_thread().name)
+
+        def on_stage_end(stage, result):
+            job.add_event('stage', stage=stage.name, status=result.status, duration=round(result.duration, 3))
+
+        job.tracer = Tracer(name=job.url)
+        try:
+            with job.tracer.activate():
+                success = bundle.clone(job.url, job.output_dir, on_stage_end=on_stage_end)
+            run = bundle.agent.last_run
+            if run is not None:
+                job.timings = {name: round(result.duration, 3)
+                               for name, result in run.results.items() if result.started is not None}
+                if not success and run.failed_stages():
+                    job.error = f"阶段失败: {', '.join(run.failed_stages())}"
+        except Exception as e:
+            logger.exception(f"服务任务 {job.id} 出错: {str(e)}")
+            success = False
+            job.error = str(e)
+
+        # 区间已累计到指标中：只保留导出的追踪事件供 /jobs/<id>/trace 使用，释放追踪器
+        self.metrics.observe(job.tracer)
+        self.metrics.inc('jobs_total', status='success' if success else 'failed')
+        job.trace_events = job.tracer.chrome_events()
+        job.tracer = None
+        job.finish(success)
+
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """克隆服务的HTTP请求处理"""
+
+    # HTTP/1.1 才能使用分块传输流式返回进度
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def service(self):
+        return self.server.clone_service
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text, content_type='text/plain; version=0.0.4; charset=utf-8'):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, job, first=None):
+        """以分块传输的NDJSON返回任务事件，直到任务结束"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+        try:
+            if first is not None:
+                write_chunk(json.dumps(first, ensure_ascii=False).encode('utf-8') + b'\n')
+            for event in job.iter_events():
+                # None 表示暂时没有新事件，发送空行保持连接
+                line = b'\n' if event is None else json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n'
+                write_chunk(line)
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"客户端断开了任务 {job.id} 的进度流")
+
+    def _route(self):
+        """返回 (路径片段列表, 查询参数)"""
+        parsed = urlparse(self.path)
+        return [part for part in parsed.path.split('/') if part], parse_qs(parsed.query)
+
+    def do_GET(self):
+        parts, _ = self._route()
+        if parts == ['health']:
+            self._send_json(200, self.service.stats())
+        elif parts == ['metrics']:
+            self._send_text(200, self.service.render_metrics())
+        elif parts == ['jobs']:
+            self._send_json(200, [job.to_dict() for job in self.service.jobs()])
+        elif len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_json(404, {'error': f"任务不存在: {parts[1]}"})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif parts[2] == 'events':
+                self._stream_events(job)
+            elif parts[2] == 'trace':
+                if not job.done:
+                    self._send_json(409, {'error': f"任务尚未结束: {job.status}"})
+                else:
+                    self._send_json(200, {'traceEvents': job.trace_events or [],
+                                          'displayTimeUnit': 'ms'})
+            else:
+                self._send_json(404, {'error': '未知路径'})
+        else:
+            self._send_json(404, {'error': '未知路径'})
+
+    def do_POST(self):
+        parts, query = self._route()
+        if parts != ['jobs']:
+            self._send_json(404, {'error': '未知路径'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            url = payload['url']
+            priority = int(payload.get('priority', 0))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f"请求体应为 {{\"url\": ..., \"priority\": 0}}: {str(e)}"})
+            return
+
+        job, coalesced = self.service.submit(url, priority)
+        accepted = {'id': job.id, 'status': job.status, 'coalesced': coalesced, 'output_dir': job.output_dir}
+        stream = query.get('stream', ['0'])[0] not in ('0', 'false', '') or payload.get('stream')
+        if stream:
+            self._stream_events(job, first={'event': 'accepted', **accepted})
+        else:
+            self._send_json(202, accepted)
+
+    def log_message(self, format, *args):
+        # Unix套接字没有客户端地址，统一写入日志而不是标准错误
+        logger.debug(f"{self.command} {self.path} - {format % args}")
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """监听Unix套接字的HTTP服务器"""
+
+    daemon_threads = True
+
+
+def create_server(service, address):
+    """
+    创建服务的HTTP服务器
+
+    参数:
+        service (CloneService): 克隆服务
+        address (str): 'host:port'，或 'unix:/path/to/socket'
+
+    返回:
+        socketserver.BaseServer: 尚未开始监听循环的服务器
+    """
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.remove(path)
+        server = _ThreadingUnixHTTPServer(path, _ServiceRequestHandler)
+    else:
+        host, _, port = address.rpartition(':')
+        server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), _ServiceRequestHandler)
+    server.clone_service = service
+    return server
+
+
+def serve(address, output_root='service-output', workers=2, use_selenium=False, export_formats=None):
+    """
+    启动服务并一直运行，直到收到 Ctrl+C
+
+    参数:
+        address (str): 'host:port'，或 'unix:/path/to/socket'
+        output_root (str): 输出根目录
+        workers (int): 工作线程数
+        use_selenium (bool): 是否使用Selenium
+        export_formats (list): 数据文件的导出格式
+    """
+    service = CloneService(output_root, workers=workers, use_selenium=use_selenium, export_formats=export_formats)
+    service.start()
+    server = create_server(service, address)
+    logger.info(f"克隆服务正在监听 {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if address.startswith('unix:') and os.path.exists(address[len('unix:'):]):
+            os.remove(address[len('unix:'):])
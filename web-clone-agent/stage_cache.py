@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+阶段结果缓存模块 (stage_cache.py)
+------------------------------
+本模块为流水线（pipeline.py）提供按内容寻址的阶段结果缓存。
+
+主要功能:
+1. 内容键：抓取到的页面以HTML、CSS和JS内容的哈希为键，与URL和抓取时间无关；
+   网络请求记录只取请求了哪些资源和响应的大小、类型，与每次抓取都不同的计时无关
+2. 阶段缓存键 = 哈希(阶段名称, 阶段版本, 阶段配置, 全部输入的键)，
+   可缓存阶段的输出键再由缓存键派生，形成一条哈希链
+3. 产出以 pickle + zlib 压缩后保存在磁盘上，过期和按大小淘汰与LLM缓存相同
+
+工作原理:
+页面内容不变时，所有下游阶段的缓存键都不变，直接读取缓存的产出；
+某个输入变化时，只有依赖它的阶段（及其下游）的键发生变化。
+网络请求本身不经过本缓存，抓取阶段总是执行（HTTP层的缓存与之独立）。
+"""
+
+import os
+import json
+import time
+import zlib
+import pickle
+import hashlib
+import logging
+
+from llm_cache import LLMCache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录
+DEFAULT_STAGE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'web-clone-agent', 'stages')
+
+# 缓存格式版本，参与所有缓存键
+CACHE_FORMAT = 1
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def page_fingerprint(page_data):
+    """
+    计算抓取结果的内容键
+
+    只包含后续阶段使用的内容（基础URL、HTML、CSS和JS的文件名和内容）。
+
+    参数:
+        page_data (dict): WebScraper.fetch_url 的结果
+
+    返回:
+        str: 十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    digest.update(page_data.get('base_url', '').encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(page_data.get('html', '').encode('utf-8', 'surrogatepass'))
+    for files, contents in (('css_files', 'css_content'), ('js_files', 'js_content')):
+        for name in page_data.get(files, []):
+            digest.update(b'\0' + name.encode('utf-8') + b'\0')
+            digest.update(page_data.get(contents, {}).get(name, '').encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+# 网络请求记录中参与内容键的字段（计时、Age、连接复用和CDN命中状态每次抓取都可能不同，不参与）
+NETWORK_KEY_FIELDS = ('url', 'status', 'content_type', 'bytes', 'transfer_bytes', 'content_encoding',
+                      'cache_control')
+
+
+def network_fingerprint(records):
+    """
+    计算网络请求记录的内容键
+
+    页面和资源都没有变化时键不变，文档阶段可以命中缓存
+    （缓存的文档中的瀑布图是生成它的那次抓取的计时）。
+
+    参数:
+        records (list): 各请求的计时记录（见 network_timing.py）
+
+    返回:
+        str: 十六进制哈希值
+    """
+    stable = [[record.get(field) for field in NETWORK_KEY_FIELDS] for record in records]
+    return _sha256(json.dumps(stable, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class StageCache(LLMCache):
+    """
+    阶段产出的磁盘缓存
+
+    每个条目是缓存目录下的一个 .pkl.z 文件（zlib压缩的pickle）。
+    """
+
+    SUFFIX = '.pkl.z'
+    LABEL = '阶段缓存'
+
+    def __init__(self, cache_dir=DEFAULT_STAGE_CACHE_DIR, ttl=None, max_bytes=500 * 1024 * 1024,
+                 compress_level=6):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir (str): 缓存目录
+            ttl (float): 条目有效期（秒），None表示永不过期
+            max_bytes (int): 缓存总大小上限（字节）
+            compress_level (int): zlib压缩级别
+        """
+        super().__init__(cache_dir, ttl, max_bytes)
+        self.compress_level = compress_level
+
+    def stage_key(self, stage_name, version, config, input_keys):
+        """
+        计算阶段的缓存键
+
+        参数:
+            stage_name (str): 阶段名称
+            version (int): 阶段版本
+            config (dict): 阶段配置
+            input_keys (list): 各输入的内容键（按输入顺序）
+
+        返回:
+            str: 十六进制哈希值
+        """
+        payload = json.dumps([CACHE_FORMAT, stage_name, version, config, input_keys],
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return _sha256(payload.encode('utf-8'))
+
+    def derive_key(self, stage_key, output_name):
+        """由阶段缓存键派生输出的内容键"""
+        return _sha256(f"{stage_key}:{output_name}".encode('utf-8'))
+
+    def value_key(self, value):
+        """
+        计算任意中间结果的内容键
+
+        字符串直接求哈希，其他对象序列化后求哈希。
+
+        参数:
+            value: 中间结果
+
+        返回:
+            str: 十六进制哈希值
+        """
+        if value is None:
+            return 'none'
+        if isinstance(value, str):
+            return _sha256(b's:' + value.encode('utf-8', 'surrogatepass'))
+        return _sha256(b'p:' + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get(self, key):
+        """
+        读取缓存的产出
+
+        参数:
+            key (str): 阶段缓存键
+
+        返回:
+            产出，未命中、已过期或无法读取时为None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"阶段缓存条目已损坏，删除: {path}: {str(e)}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl is not None and time.time() - entry.get('created', 0) > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return entry.get('value')
+
+    def set(self, key, value):
+        """
+        写入产出
+
+        参数:
+            key (str): 阶段缓存键
+            value: 产出（必须可以pickle）
+        """
+        data = pickle.dumps({'created': time.time(), 'value': value}, protocol=pickle.HIGHEST_PROTOCOL)
+        self._write(self._path(key), zlib.compress(data, self.compress_level))
@@ -14,7 +14,7 @@
 5. 生成Vue组件可用的样式文件
 
 工作原理:
-使用tinycss2、cssutils等工具解析CSS，分析样式规则，
+先为样式表建立选择器索引，只在需要时才使用tinycss2、cssutils等工具解析声明块，
 提取关键的样式信息，用于后续Vue组件的样式生成。
 """
 
@@ -22,24 +22,55 @@ import os
 import re
 import logging
 import colorsys
+import functools
 from urllib.parse import urljoin
 from collections import Counter, defaultdict
+from bs4 import BeautifulSoup
 
-# 尝试导入CSS解析库，使用能够成功导入的一个
-try:
-    import tinycss2
-    USE_TINYCSS2 = True
-except ImportError:
-    USE_TINYCSS2 = False
-    try:
-        import cssutils
-        USE_CSSUTILS = True
-    except ImportError:
-        USE_CSSUTILS = False
+from css_cascade import CascadeEngine, ElementIndex
+from stylesheet import StyleSheet
+from style_store import StyleRuleStore
+from tracing import span
+from counters import count_work
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+class ExtractionContext:
+    """
+    单次样式提取的上下文
+    
+    保存一次 extract_styles 调用的全部中间状态和结果，
+    StyleExtractor 实例本身只保存只读的配置和预编译的正则表达式，
+    因此同一个实例可以在线程池或异步服务中被多个任务同时使用。
+    """
+    
+    def __init__(self, base_url, element_index=None):
+        """
+        初始化提取上下文
+        
+        参数:
+            base_url (str): 基础URL
+            element_index (ElementIndex): 页面元素索引（不裁剪时为None）
+        """
+        self.base_url = base_url
+        self.element_index = element_index
+        
+        # 带索引的规则存储，component_styles和global_styles是它的映射视图
+        self.store = StyleRuleStore()
+        
+        # 本次提取的结果
+        self.styles = {
+            'colors': {},
+            'fonts': [],
+            'component_styles': self.store.component_styles,
+            'global_styles': self.store.global_styles,
+            'rules': self.store.rules,
+            'rule_store': self.store,
+            'file_stats': {},
+            'css_usage': {}
+        }
+
 class StyleExtractor:
     """
     样式提取器类
@@ -48,12 +79,18 @@ class StyleExtractor:
     分析配色方案、字体和常用组件样式。
     """
     
-    def __init__(self):
+    def __init__(self, prune_unused=True):
         """
         初始化样式提取器
         
         设置默认值和常用样式识别规则。
+        
+        参数:
+            prune_unused (bool): 是否在分类前裁剪页面中未使用的CSS规则
         """
+        # 是否裁剪未使用的CSS规则
+        self.prune_unused = prune_unused
+        
         # 常用组件的CSS选择器模式
         self.component_patterns = {
             'button': [r'\.btn', r'\.button', r'button', r'\.cta'],
@@ -64,6 +101,12 @@ class StyleExtractor:
             'header': [r'header', r'\.header', r'\.top', r'\.banner'],
         }
         
+        # 预编译的组件选择器模式（按组件顺序）
+        self._compiled_component_patterns = [
+            (component, [re.compile(pattern) for pattern in patterns])
+            for component, patterns in self.component_patterns.items()
+        ]
+        
         # 颜色识别的正则表达式
         self.color_regex = {
             'hex': re.compile(r'#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})'),
@@ -76,39 +119,45 @@ class StyleExtractor:
         # 字体识别的正则表达式
         self.font_regex = re.compile(r'font-family\s*:\s*([^;}]+)')
         
-        # 存储提取的样式
-        self.extracted_styles = {
-            'colors': {},
-            'fonts': [],
-            'component_styles': {},
-            'global_styles': {}
+        # 内联样式和url()的正则表达式
+        self.style_attr_regex = re.compile(r'<([a-z0-9]+)[^>]*?style\s*=\s*["\']([^"\']+)["\'][^>]*?>', re.I)
+        self.url_regex = re.compile(r'url\(["\']?([^)]+?)["\']?\)')
+        
+        # 颜色值解析的正则表达式
+        self.color_value_regex = {
+            'hex': re.compile(r'^#?([0-9a-f]{3}|[0-9a-f]{6})$', re.I),
+            'rgb': re.compile(r'rgb\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)'),
+            'rgba': re.compile(r'rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*[0-9.]+\s*\)')
         }
     
-    def extract_styles(self, css_files, css_content, html_content, base_url):
+    def extract_styles(self, css_files, css_content, html_content, base_url, color_scheme=None):
         """
         提取和处理CSS样式
         
         这是主要的公共方法，协调整个样式提取和分析过程。
+        每次调用都使用独立的 ExtractionContext，可以被多个线程同时调用。
         
         参数:
             css_files (list): CSS文件名列表
             css_content (dict): CSS内容字典
             html_content (str): HTML内容
             base_url (str): 基础URL
+            color_scheme (dict): 已经计算好的颜色方案（为None时在这里计算）
             
         返回:
             dict: 包含提取样式的字典
         """
         logger.info("开始提取和分析CSS样式")
         
-        # 重置提取的样式
-        self.extracted_styles = {
-            'colors': {},
-            'fonts': [],
-            'component_styles': {},
-            'global_styles': {},
-            'file_stats': {}
-        }
+        # 为当前页面建立元素索引，用于裁剪未使用的规则
+        element_index = None
+        if self.prune_unused and html_content:
+            with span('css.index_dom', 'css', bytes=len(html_content)):
+                element_index = ElementIndex(BeautifulSoup(html_content, 'html.parser'))
+        
+        # 创建本次提取的上下文
+        context = ExtractionContext(base_url, element_index)
+        styles = context.styles
         
         # 处理所有CSS文件
         total_css = ""
@@ -118,174 +167,173 @@ class StyleExtractor:
                 css_text = css_content[css_file]
                 total_css += css_text
                 
-                # 处理相对URL（如背景图片）
-                css_text = self._fix_relative_urls(css_text, base_url)
+                # 初始化CSS使用情况统计
+                styles['css_usage'][css_file] = {
+                    'original_bytes': len(css_text.encode('utf-8')),
+                    'removed_bytes': 0,
+                    'rules_total': 0,
+                    'rules_removed': 0,
+                    'at_rule_bytes': 0
+                }
                 
-                # 提取和分析样式
-                self._extract_styles_from_css(css_text, css_file)
+                # 提取和分析样式（相对URL在解析声明时修复）
+                with span('css.parse', 'css', file=css_file) as parse_span:
+                    sheet = self._extract_styles_from_css(context, css_text, css_file)
+                    rule_count = len(sheet.rules) if sheet else 0
+                    parse_span.set(bytes=styles['css_usage'][css_file]['original_bytes'], items=rule_count,
+                                   removed=styles['css_usage'][css_file]['rules_removed'])
+                
+                # 报告裁剪节省的字节数。@media等@规则不参与分析和裁剪，其字节（at_rule_bytes）计入保留的字节
+                usage = styles['css_usage'][css_file]
+                usage['at_rule_bytes'] = sheet.at_rule_bytes if sheet else 0
+                usage['kept_bytes'] = usage['original_bytes'] - usage['removed_bytes']
+                if context.element_index is not None:
+                    logger.info(
+                        f"裁剪未使用的CSS {css_file}: 移除 {usage['rules_removed']}/{usage['rules_total']} 条规则，"
+                        f"节省 {usage['removed_bytes']} 字节（未分析的@规则 {usage['at_rule_bytes']} 字节原样保留）"
+                    )
                 
                 # 收集文件统计信息
-                self.extracted_styles['file_stats'][css_file] = {
+                styles['file_stats'][css_file] = {
                     'size': len(css_text),
-                    'rules': len(re.findall(r'[^}]+{[^}]+}', css_text)),
-                    'selectors': len(re.findall(r'[^{]+{', css_text))
+                    'rules': rule_count,
+                    'selectors': sum(rule.selector.count(',') + 1 for rule in sheet.rules) if sheet else 0
                 }
         
-        # 提取颜色方案
-        color_scheme = self.extract_color_palette(css_content)
-        self.extracted_styles['colors'] = color_scheme
+        # 提取颜色方案（流水线中由独立阶段计算后传入，避免重复计算）
+        if color_scheme is None:
+            color_scheme = self.extract_color_palette(css_content)
+        styles['colors'] = color_scheme
         
         # 提取并合并内联样式
-        inline_styles = self._extract_inline_styles(html_content)
-        for selector, properties in inline_styles.items():
-            if selector in self.extracted_styles['global_styles']:
-                self.extracted_styles['global_styles'][selector].update(properties)
-            else:
-                self.extracted_styles['global_styles'][selector] = properties
+        with span('css.inline', 'css') as inline_span:
+            inline_styles = self._extract_inline_styles(html_content)
+            for selector, properties in inline_styles.items():
+                context.store.add_overrides(selector, properties)
+            inline_span.set(items=len(inline_styles))
         
         logger.info("CSS样式分析完成")
-        return self.extracted_styles
+        return styles
     
-    def _extract_styles_from_css(self, css_text, source_file):
+    def _extract_styles_from_css(self, context, css_text, source_file):
         """
         从CSS文本中提取样式规则
         
-        使用可用的CSS解析库分析CSS文本，提取样式规则。
+        第一阶段只建立样式表索引（选择器和声明块位置），
+        声明块在分类、层叠计算或文档输出真正读取时才会被解析。
         
         参数:
+            context (ExtractionContext): 本次提取的上下文
             css_text (str): CSS文本内容
             source_file (str): 源CSS文件名（用于日志）
+            
+        返回:
+            StyleSheet: 已索引的样式表
         """
+        # 修复相对URL只对被解析的声明值进行
+        # （使用partial而不是闭包，样式表可以被pickle序列化，供批量任务保存检查点）
+        fix_urls = functools.partial(self._fix_value_urls, base_url=context.base_url)
+        
         try:
-            if USE_TINYCSS2:
-                # 使用tinycss2解析
-                self._extract_with_tinycss2(css_text, source_file)
-            elif USE_CSSUTILS:
-                # 使用cssutils解析
-                self._extract_with_cssutils(css_text, source_file)
-            else:
-                # 使用正则表达式进行基本解析
-                self._extract_with_regex(css_text, source_file)
-                
+            sheet = StyleSheet(css_text, source_file, value_filter=fix_urls)
         except Exception as e:
             logger.error(f"解析CSS文件 {source_file} 时出错: {str(e)}")
-    
-    def _extract_with_tinycss2(self, css_text, source_file):
-        """
-        使用tinycss2库解析CSS
+            return None
         
-        参数:
-            css_text (str): CSS文本内容
-            source_file (str): 源文件名
-        """
-        # 解析CSS
-        rules = tinycss2.parse_stylesheet(css_text)
-        
-        for rule in rules:
-            # 只处理样式规则，忽略注释和@规则
-            if rule.type == 'qualified-rule':
-                try:
-                    # 获取选择器文本
-                    selector_text = ''.join(token.serialize() for token in rule.prelude).strip()
-                    
-                    # 获取声明块
-                    declarations = {}
-                    for decl in tinycss2.parse_declaration_list(rule.content):
-                        if decl.type == 'declaration':
-                            name = decl.name
-                            value = ''.join(token.serialize() for token in decl.value).strip()
-                            declarations[name] = value
-                    
-                    # 分类样式规则
-                    self._categorize_style_rule(selector_text, declarations, source_file)
-                    
-                except Exception as e:
-                    logger.warning(f"处理tinycss2规则时出错: {str(e)}")
+        for rule in sheet.rules:
+            try:
+                # 跳过页面中未使用的规则
+                if not self._is_rule_used(context, rule.selector, source_file, lambda: rule.rule_text):
+                    continue
+                
+                # 分类样式规则
+                self._categorize_style_rule(context, rule)
+                
+            except Exception as e:
+                logger.warning(f"处理CSS规则时出错: {str(e)}")
+        
+        return sheet
     
-    def _extract_with_cssutils(self, css_text, source_file):
+    def _is_rule_used(self, context, selector_text, source_file, get_rule_text):
         """
-        使用cssutils库解析CSS
+        判断规则是否至少匹配页面中的一个元素，并记录裁剪统计
+        
+        动态伪类（如:hover）和伪元素按其所依附的元素判断，无法解析的选择器视为已使用；
+        只检查顶层样式规则：@media等@规则在建立样式表索引时整体跳过，不参与样式分析，
+        也不经过此检查，它们的字节在裁剪统计中计为保留（css_usage 的 at_rule_bytes）。
         
         参数:
-            css_text (str): CSS文本内容
-            source_file (str): 源文件名
+            context (ExtractionContext): 本次提取的上下文
+            selector_text (str): 选择器文本
+            source_file (str): 源CSS文件名
+            get_rule_text (callable): 返回规则完整文本的函数（只在规则被裁剪时调用）
+            
+        返回:
+            bool: 规则是否可能被使用
         """
-        # 解析CSS
-        sheet = cssutils.parseString(css_text)
-        
-        for rule in sheet:
-            # 只处理样式规则
-            if rule.type == rule.STYLE_RULE:
-                try:
-                    # 获取选择器和样式
-                    selector_text = rule.selectorText
-                    declarations = {prop.name: prop.value for prop in rule.style}
-                    
-                    # 分类样式规则
-                    self._categorize_style_rule(selector_text, declarations, source_file)
-                    
-                except Exception as e:
-                    logger.warning(f"处理cssutils规则时出错: {str(e)}")
+        usage = context.styles['css_usage'].get(source_file)
+        if usage is not None:
+            usage['rules_total'] += 1
+        
+        if context.element_index is None or context.element_index.is_used(selector_text):
+            return True
+        
+        if usage is not None:
+            usage['rules_removed'] += 1
+            usage['removed_bytes'] += len(get_rule_text().encode('utf-8'))
+        return False
     
-    def _extract_with_regex(self, css_text, source_file):
+    def _categorize_style_rule(self, context, rule):
         """
-        使用正则表达式解析CSS（当没有专门的CSS解析库时）
+        对样式规则进行分类
+        
+        根据选择器将样式规则分为组件样式和全局样式。
+        分类只依赖选择器，声明块保持未解析状态，直到被读取。
         
         参数:
-            css_text (str): CSS文本内容
-            source_file (str): 源文件名
+            context (ExtractionContext): 本次提取的上下文
+            rule (StyleRule): 已索引的样式规则
         """
-        # 使用正则表达式匹配CSS规则
-        rule_pattern = re.compile(r'([^{]+){([^}]+)}')
+        selector = rule.selector
         
-        for match in rule_pattern.finditer(css_text):
-            try:
-                # 获取选择器和样式声明
-                selector_text = match.group(1).strip()
-                declarations_text = match.group(2).strip()
-                
-                # 解析样式声明
-                declarations = {}
-                for decl in declarations_text.split(';'):
-                    if ':' in decl:
-                        prop, value = decl.split(':', 1)
-                        declarations[prop.strip()] = value.strip()
-                
-                # 分类样式规则
-                self._categorize_style_rule(selector_text, declarations, source_file)
-                
-            except Exception as e:
-                logger.warning(f"使用正则表达式解析CSS规则时出错: {str(e)}")
+        # 为组件样式分类（统计正则匹配次数，见 counters.py）
+        evaluations = 0
+        for component, patterns in self._compiled_component_patterns:
+            for pattern in patterns:
+                evaluations += 1
+                if pattern.search(selector):
+                    # 一旦归类为组件样式就返回
+                    count_work('css.regex_evaluations', evaluations)
+                    context.store.add_rule(rule, component)
+                    return
+        
+        # 不匹配任何组件模式，视为全局样式（规则按源码顺序存储，供样式层叠计算使用）
+        count_work('css.regex_evaluations', evaluations)
+        context.store.add_rule(rule)
     
-    def _categorize_style_rule(self, selector, declarations, source_file):
+    def compute_component_styles(self, html_content, components, rules):
         """
-        对样式规则进行分类
+        计算每个组件最终生效的样式
         
-        根据选择器将样式规则分为组件样式和全局样式。
+        使用样式层叠引擎把规则与DOM匹配，按优先级和源码顺序解决冲突，
+        结果写入每个组件的 computed_styles 字段。
         
         参数:
-            selector (str): CSS选择器
-            declarations (dict): CSS属性和值
-            source_file (str): 源CSS文件
+            html_content (str): HTML内容
+            components (list): HtmlAnalyzer识别出的组件列表
+            rules (list): 按源码顺序排列的StyleRule列表（extract_styles 结果中的 rules）
+            
+        返回:
+            list: 每个组件的最终生效样式
         """
-        # 为组件样式分类
-        for component, patterns in self.component_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, selector):
-                    if component not in self.extracted_styles['component_styles']:
-                        self.extracted_styles['component_styles'][component] = {}
-                    
-                    if selector not in self.extracted_styles['component_styles'][component]:
-                        self.extracted_styles['component_styles'][component][selector] = {}
-                    
-                    self.extracted_styles['component_styles'][component][selector].update(declarations)
-                    return  # 一旦归类为组件样式就返回
-        
-        # 不匹配任何组件模式，视为全局样式
-        if selector not in self.extracted_styles['global_styles']:
-            self.extracted_styles['global_styles'][selector] = {}
-        
-        self.extracted_styles['global_styles'][selector].update(declarations)
+        with span('css.cascade', 'css', rules=len(rules)) as cascade_span:
+            engine = CascadeEngine()
+            engine.add_rules(rules)
+            
+            soup = BeautifulSoup(html_content, 'html.parser')
+            computed = engine.compute_components(soup, components)
+            cascade_span.set(items=len(components))
+            return computed
     
     def _extract_inline_styles(self, html_content):
         """
@@ -300,9 +348,8 @@ class StyleExtractor:
         inline_styles = {}
         
         # 匹配带有style属性的标签
-        style_pattern = re.compile(r'<([a-z0-9]+)[^>]*?style\s*=\s*["\']([^"\']+)["\'][^>]*?>', re.I)
-        
-        for match in style_pattern.finditer(html_content):
+        count_work('css.regex_evaluations')
+        for match in self.style_attr_regex.finditer(html_content):
             tag = match.group(1)
             style_text = match.group(2)
             
@@ -341,17 +388,20 @@ class StyleExtractor:
         # 提取所有颜色值
         all_colors = []
         
-        # 提取十六进制颜色
-        hex_colors = self.color_regex['hex'].findall(all_css)
-        all_colors.extend(['#' + color for color in hex_colors])
-        
-        # 提取RGB颜色
-        rgb_colors = self.color_regex['rgb'].findall(all_css)
-        all_colors.extend([f"rgb({r},{g},{b})" for r, g, b in rgb_colors])
-        
-        # 提取RGBA颜色
-        rgba_colors = self.color_regex['rgba'].findall(all_css)
-        all_colors.extend([f"rgba({r},{g},{b},{a})" for r, g, b, a in rgba_colors])
+        with span('css.palette_scan', 'css', bytes=len(all_css)) as scan_span:
+            # 提取十六进制颜色
+            hex_colors = self.color_regex['hex'].findall(all_css)
+            all_colors.extend(['#' + color for color in hex_colors])
+            
+            # 提取RGB颜色
+            rgb_colors = self.color_regex['rgb'].findall(all_css)
+            all_colors.extend([f"rgb({r},{g},{b})" for r, g, b in rgb_colors])
+            
+            # 提取RGBA颜色
+            rgba_colors = self.color_regex['rgba'].findall(all_css)
+            all_colors.extend([f"rgba({r},{g},{b},{a})" for r, g, b, a in rgba_colors])
+            scan_span.set(items=len(all_colors))
+            count_work('css.regex_evaluations', 3)
         
         # 统计颜色出现频率
         color_counter = Counter(all_colors)
@@ -362,6 +412,7 @@ class StyleExtractor:
         
         # 提取字体
         fonts = self.font_regex.findall(all_css)
+        count_work('css.regex_evaluations')
         font_counter = Counter([font.strip().split(',')[0].strip('"\'') for font in fonts])
         
         # 构建颜色方案
@@ -399,6 +450,12 @@ class StyleExtractor:
         logger.info(f"提取到 {len(color_counter)} 种颜色，{len(font_counter)} 种字体")
         return color_scheme
     
+    def _fix_value_urls(self, value, base_url):
+        """修复单个声明值中的相对URL（样式表的 value_filter）"""
+        if 'url(' in value:
+            return self._fix_relative_urls(value, base_url)
+        return value
+    
     def _fix_relative_urls(self, css_text, base_url):
         """
         修复CSS中的相对URL
@@ -412,9 +469,6 @@ class StyleExtractor:
         返回:
             str: 修复后的CSS文本
         """
-        # 匹配url()函数
-        url_pattern = re.compile(r'url\(["\']?([^)]+?)["\']?\)')
-        
         # 查找并替换所有相对URL
         def replace_url(match):
             url = match.group(1)
@@ -428,7 +482,8 @@ class StyleExtractor:
             return f'url({absolute_url})'
         
         # 替换CSS中的所有URL
-        fixed_css = url_pattern.sub(replace_url, css_text)
+        fixed_css = self.url_regex.sub(replace_url, css_text)
+        count_work('css.regex_evaluations')
         return fixed_css
     
     def _group_similar_colors(self, colors):
@@ -472,7 +527,8 @@ class StyleExtractor:
             tuple: RGB值(r,g,b)或None
         """
         # 解析十六进制颜色
-        hex_match = re.match(r'^#?([0-9a-f]{3}|[0-9a-f]{6})$', color, re.I)
+        count_work('css.regex_evaluations')
+        hex_match = self.color_value_regex['hex'].match(color)
         if hex_match:
             hex_color = hex_match.group(1)
             if len(hex_color) == 3:
@@ -486,7 +542,8 @@ class StyleExtractor:
             return (r, g, b)
         
         # 解析RGB颜色
-        rgb_match = re.match(r'rgb\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)', color)
+        count_work('css.regex_evaluations')
+        rgb_match = self.color_value_regex['rgb'].match(color)
         if rgb_match:
             r = int(rgb_match.group(1))
             g = int(rgb_match.group(2))
@@ -494,7 +551,8 @@ class StyleExtractor:
             return (r, g, b)
         
         # 解析RGBA颜色
-        rgba_match = re.match(r'rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*[0-9.]+\s*\)', color)
+        count_work('css.regex_evaluations')
+        rgba_match = self.color_value_regex['rgba'].match(color)
         if rgba_match:
             r = int(rgba_match.group(1))
             g = int(rgba_match.group(2))
@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+样式规则存储模块 (style_store.py)
+------------------------------
+本模块提供紧凑的、带索引的样式规则存储，替代"选择器 -> 属性 -> 值"的嵌套字典。
+
+主要功能:
+1. 以列式结构保存规则（规则对象、选择器编号、来源编号、分类编号）
+2. 对选择器、来源文件、属性名和值进行字符串驻留，避免重复字符串占用内存
+3. 建立倒排索引：按选择器标记、按属性名、按属性值（包括颜色）查找规则，并统计各属性的规则数
+4. 提供与原嵌套字典兼容的只读映射视图（component_styles、global_styles）
+
+工作原理:
+选择器标记索引在添加规则时建立，只依赖选择器文本；
+属性和值的索引只包括声明已被解析的规则（分类、层叠计算等读取过声明的规则），
+查询时为上次查询之后新解析的规则补充索引，查询本身不会解析任何规则的声明。
+"""
+
+import re
+import sys
+import logging
+import threading
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
+
+from stylesheet import DeclarationBlock
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 选择器中的ID、类名和标签名标记
+_SELECTOR_TOKEN_RE = re.compile(r'[#.]?-?[_a-zA-Z][-_a-zA-Z0-9]*')
+
+# 声明值中的颜色
+_COLOR_TOKEN_RE = re.compile(r'#[0-9a-fA-F]{3,8}\b|(?:rgba?|hsla?)\([^)]*\)')
+
+# 全局样式的分类编号
+GLOBAL_CATEGORY = -1
+
+
+def normalize_value(value):
+    """
+    规范化声明值（小写、去掉多余空白），用于值索引
+
+    参数:
+        value (str): 声明值
+
+    返回:
+        str: 规范化后的值
+    """
+    return ' '.join(value.lower().split())
+
+
+def normalize_color(color):
+    """
+    规范化颜色值，使调色板中的颜色和声明中的颜色可以互相查找
+
+    参数:
+        color (str): 颜色值，例如 "#FFF"、"rgb(0, 0, 0)"
+
+    返回:
+        str: 规范化后的颜色，例如 "#fff"、"rgb(0,0,0)"
+    """
+    return re.sub(r'\s+', '', color.lower())
+
+
+def colors_in_value(value):
+    """
+    提取声明值中的颜色
+
+    参数:
+        value (str): 声明值，例如 "1px solid #CCC"
+
+    返回:
+        set: 规范化后的颜色
+    """
+    return {normalize_color(color) for color in _COLOR_TOKEN_RE.findall(value)}
+
+
+def _id_array():
+    """规则编号数组（模块级函数，使倒排索引可以被pickle序列化）"""
+    return array('I')
+
+
+class StyleRuleStore:
+    """
+    样式规则存储
+
+    规则按添加顺序编号，各列使用 array 保存编号，
+    倒排索引的值同样是规则编号数组。
+    """
+
+    def __init__(self):
+        """初始化规则存储"""
+        # 规则列（按规则编号对齐）
+        self._rules = []
+        self._selector_ids = array('I')
+        self._source_ids = array('I')
+        self._category_ids = array('i')
+
+        # 驻留的字符串表
+        self._strings = []
+        self._string_ids = {}
+
+        # 分类（组件类型）表
+        self._categories = []
+        self._category_index = {}
+
+        # 选择器标记 -> 规则编号
+        self._by_selector_token = defaultdict(_id_array)
+        # (分类编号, 选择器编号) -> 规则编号，供映射视图使用
+        self._by_category_selector = defaultdict(_id_array)
+        # 分类编号 -> 该分类下按首次出现顺序排列的选择器编号
+        self._category_selectors = defaultdict(list)
+        # (分类编号, 选择器) -> 显式声明（如HTML内联样式）
+        self._overrides = {}
+
+        # 按属性和值的倒排索引（只包括声明已被解析的规则，查询时补充）
+        self._by_property = defaultdict(_id_array)
+        self._by_value = defaultdict(_id_array)
+        # 规则编号 -> 是否已建立属性和值的索引
+        self._indexed = bytearray()
+        # 规则所属的样式表，以及上次补充索引时的（规则数, 这些样式表中已解析的规则数）
+        self._sheets = []
+        self._indexed_state = (0, 0)
+        self._index_lock = threading.Lock()
+
+        # 兼容原结构的映射视图（分类编号 -> CategoryView）
+        self._views = {}
+        self.component_styles = ComponentStylesView(self)
+        self.global_styles = self._view(GLOBAL_CATEGORY)
+
+    def __getstate__(self):
+        """序列化时不包含锁"""
+        state = dict(self.__dict__)
+        del state['_index_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index_lock = threading.Lock()
+
+    def _intern(self, text):
+        """驻留字符串，返回其编号"""
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(sys.intern(text))
+            self._string_ids[text] = string_id
+        return string_id
+
+    def _category_id(self, category):
+        """获取分类编号（None 表示全局样式）"""
+        if category is None:
+            return GLOBAL_CATEGORY
+        category_id = self._category_index.get(category)
+        if category_id is None:
+            category_id = len(self._categories)
+            self._categories.append(category)
+            self._category_index[category] = category_id
+        return category_id
+
+    def _view(self, category_id):
+        """获取某分类的映射视图"""
+        view = self._views.get(category_id)
+        if view is None:
+            view = self._views[category_id] = CategoryView(self, category_id)
+        return view
+
+    def add_rule(self, rule, category=None):
+        """
+        添加一条规则
+
+        参数:
+            rule (StyleRule): 样式规则
+            category (str): 组件分类（None 表示全局样式）
+
+        返回:
+            int: 规则编号
+        """
+        rule_id = len(self._rules)
+        selector_id = self._intern(rule.selector)
+        category_id = self._category_id(category)
+
+        self._rules.append(rule)
+        if not any(sheet is rule.sheet for sheet in reversed(self._sheets)):
+            self._sheets.append(rule.sheet)
+        self._selector_ids.append(selector_id)
+        self._source_ids.append(self._intern(rule.source))
+        self._category_ids.append(category_id)
+
+        key = (category_id, selector_id)
+        if key not in self._by_category_selector:
+            self._category_selectors[category_id].append(selector_id)
+        self._by_category_selector[key].append(rule_id)
+
+        view = self._views.get(category_id)
+        if view is not None:
+            view._blocks.pop(rule.selector, None)
+
+        for token in set(_SELECTOR_TOKEN_RE.findall(rule.selector)):
+            self._by_selector_token[sys.intern(token)].append(rule_id)
+
+        return rule_id
+
+    def add_overrides(self, selector, declarations, category=None):
+        """
+        为选择器添加显式声明（优先级高于规则中的声明）
+
+        参数:
+            selector (str): 选择器
+            declarations (dict): 属性和值
+            category (str): 组件分类（None 表示全局样式）
+        """
+        category_id = self._category_id(category)
+        selector_id = self._intern(selector)
+        key = (category_id, selector_id)
+        if key not in self._by_category_selector and key not in self._overrides:
+            self._category_selectors[category_id].append(selector_id)
+        self._overrides.setdefault(key, {}).update(declarations)
+
+        # 已缓存的声明映射需要重新生成
+        view = self._views.get(category_id)
+        if view is not None:
+            view._blocks.pop(selector, None)
+
+    @property
+    def rules(self):
+        """按源码顺序排列的全部规则"""
+        return self._rules
+
+    def __len__(self):
+        return len(self._rules)
+
+    def rule_info(self, rule_id):
+        """
+        获取规则的基本信息
+
+        参数:
+            rule_id (int): 规则编号
+
+        返回:
+            dict: 包含 selector、source、category、declarations
+        """
+        category_id = self._category_ids[rule_id]
+        return {
+            'selector': self._strings[self._selector_ids[rule_id]],
+            'source': self._strings[self._source_ids[rule_id]],
+            'category': None if category_id == GLOBAL_CATEGORY else self._categories[category_id],
+            'declarations': self._rules[rule_id].declarations
+        }
+
+    def _category_rules(self, category_id, selector_id):
+        """获取某分类下某选择器的规则对象"""
+        return [self._rules[i] for i in self._by_category_selector.get((category_id, selector_id), ())]
+
+    def _ensure_declaration_index(self):
+        """为声明已被解析、尚未建立索引的规则补充属性和值的倒排索引（不解析其他规则的声明）"""
+        # 规则数和样式表中已解析的规则数都没有变化时，上次之后没有需要补充索引的规则
+        state = (len(self._rules), sum(sheet.materialized_count for sheet in self._sheets))
+        if state == self._indexed_state:
+            return
+
+        with self._index_lock:
+            self._indexed.extend(bytes(len(self._rules) - len(self._indexed)))
+            for rule_id, rule in enumerate(self._rules):
+                if self._indexed[rule_id] or not rule.is_materialized:
+                    continue
+                seen_values = set()
+                for prop, value in rule.declarations.items():
+                    self._by_property[sys.intern(prop.lower())].append(rule_id)
+
+                    normalized = normalize_value(value)
+                    keys = {normalized}
+                    keys.update(colors_in_value(value))
+                    for key in keys - seen_values:
+                        self._by_value[sys.intern(key)].append(rule_id)
+                    seen_values |= keys
+                self._indexed[rule_id] = 1
+
+            self._indexed_state = state
+
+    def rules_with_selector_token(self, token):
+        """
+        按选择器标记查找规则
+
+        参数:
+            token (str): 选择器标记，例如 ".card"、"#main"、"button"
+
+        返回:
+            list: 规则编号列表
+        """
+        return list(self._by_selector_token.get(token, ()))
+
+    def rules_with_property(self, prop):
+        """
+        查找设置了某个属性的规则（只包括声明已被解析的规则，下同）
+
+        参数:
+            prop (str): 属性名，例如 "color"
+
+        返回:
+            list: 规则编号列表
+        """
+        self._ensure_declaration_index()
+        return sorted(self._by_property.get(prop.lower(), ()))
+
+    def rules_with_value(self, value):
+        """
+        查找声明值等于某个值（或包含某个颜色）的规则
+
+        参数:
+            value (str): 声明值或颜色
+
+        返回:
+            list: 规则编号列表
+        """
+        self._ensure_declaration_index()
+        rule_ids = self._by_value.get(normalize_value(value))
+        if rule_ids is None:
+            rule_ids = self._by_value.get(normalize_color(value), ())
+        return sorted(rule_ids)
+
+    def rules_with_color(self, color):
+        """
+        查找使用某种颜色的规则
+
+        参数:
+            color (str): 颜色值
+
+        返回:
+            list: 规则编号列表
+        """
+        self._ensure_declaration_index()
+        return sorted(self._by_value.get(normalize_color(color), ()))
+
+    def properties_using_color(self, color):
+        """
+        统计某种颜色被用于哪些属性
+
+        参数:
+            color (str): 颜色值
+
+        返回:
+            dict: 属性名 -> 使用次数
+        """
+        target = normalize_color(color)
+        usage = defaultdict(int)
+        for rule_id in self.rules_with_color(color):
+            for prop, value in self._rules[rule_id].declarations.items():
+                if target in colors_in_value(value):
+                    usage[prop] += 1
+        return dict(usage)
+
+    def property_counts(self):
+        """
+        统计每个属性被多少条（声明已被解析的）规则设置
+
+        返回:
+            dict: 属性名 -> 规则数量（按数量从多到少排列）
+        """
+        self._ensure_declaration_index()
+        counts = {prop: len(rule_ids) for prop, rule_ids in self._by_property.items()}
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+
+class CategoryView(Mapping):
+    """
+    某一分类下"选择器 -> 声明"的只读映射视图
+
+    每个选择器对应一个延迟合并的 DeclarationBlock，第一次访问后缓存。
+    """
+
+    def __init__(self, store, category_id):
+        self._store = store
+        self._category_id = category_id
+        self._blocks = {}
+
+    def _selectors(self):
+        store = self._store
+        return [store._strings[i] for i in store._category_selectors.get(self._category_id, ())]
+
+    def __getitem__(self, selector):
+        block = self._blocks.get(selector)
+        if block is not None:
+            return block
+
+        store = self._store
+        selector_id = store._string_ids.get(selector)
+        key = (self._category_id, selector_id)
+        if selector_id is None or (key not in store._by_category_selector and key not in store._overrides):
+            raise KeyError(selector)
+
+        block = DeclarationBlock(store._category_rules(self._category_id, selector_id),
+                                 store._overrides.get(key))
+        self._blocks[selector] = block
+        return block
+
+    def __iter__(self):
+        return iter(self._selectors())
+
+    def __len__(self):
+        return len(self._store._category_selectors.get(self._category_id, ()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class ComponentStylesView(Mapping):
+    """"组件类型 -> 选择器 -> 声明"的只读映射视图"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, category):
+        category_id = self._store._category_index.get(category)
+        if category_id is None:
+            raise KeyError(category)
+        return self._store._view(category_id)
+
+    def __iter__(self):
+        return iter(list(self._store._categories))
+
+    def __len__(self):
+        return len(self._store._categories)
+
+    def __repr__(self):
+        return repr({category: dict(view.items()) for category, view in self.items()})
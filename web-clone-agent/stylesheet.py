@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+样式表索引模块 (stylesheet.py)
+---------------------------
+本模块提供两阶段的样式表模型，避免解析最终用不到的声明块。
+
+主要功能:
+1. 第一阶段：快速扫描CSS文本，只记录每条规则的选择器和声明块的位置范围
+2. 第二阶段：只有在使用方（分类、层叠计算、文档输出）真正读取声明时才解析声明块
+3. 解析结果会被缓存，同一规则只解析一次
+4. 提供按规则合并声明的延迟映射（DeclarationBlock）
+
+工作原理:
+大型框架样式表中绝大部分规则会被裁剪或覆盖，声明块从不需要被解析。
+扫描阶段只识别花括号、字符串和注释的边界，不做分词；
+声明块的解析优先使用tinycss2，其次cssutils，最后退化为简单的分号拆分。
+"""
+
+import re
+import sys
+import logging
+from collections.abc import MutableMapping
+
+# 尝试导入CSS解析库，使用能够成功导入的一个
+try:
+    import tinycss2
+    USE_TINYCSS2 = True
+except ImportError:
+    USE_TINYCSS2 = False
+    try:
+        import cssutils
+        USE_CSSUTILS = True
+    except ImportError:
+        USE_CSSUTILS = False
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 扫描时需要关注的字符：花括号、分号、引号、转义和注释开头
+_SPECIAL_RE = re.compile(r'[{};"\'\\]|/\*')
+
+# 注释
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+
+
+def _skip_string(text, i):
+    """跳过从 i 开始的字符串，返回字符串结束后的位置"""
+    quote = text[i]
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote or c == '\n':
+            return i + 1
+        i += 1
+    return n
+
+
+def _skip_comment(text, i):
+    """跳过从 i 开始的注释，返回注释结束后的位置"""
+    end = text.find('*/', i + 2)
+    return len(text) if end == -1 else end + 2
+
+
+def _find_block_end(text, i):
+    """
+    查找与 i 位置的 '{' 匹配的 '}'
+
+    返回:
+        int: 匹配的 '}' 的下标（没有找到时返回文本长度）
+    """
+    depth = 0
+    n = len(text)
+    while i < n:
+        match = _SPECIAL_RE.search(text, i)
+        if not match:
+            return n
+        i = match.start()
+        token = match.group(0)
+        if token == '{':
+            depth += 1
+            i += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+            i += 1
+        elif token in '"\'':
+            i = _skip_string(text, i)
+        elif token == '\\':
+            i += 2
+        elif token == '/*':
+            i = _skip_comment(text, i)
+        else:
+            i += 1
+    return n
+
+
+def parse_declarations(body_text):
+    """
+    解析声明块文本
+
+    参数:
+        body_text (str): 花括号内的声明文本
+
+    返回:
+        dict: 属性 -> 值（important 声明保留 "!important" 后缀）
+    """
+    declarations = {}
+
+    if USE_TINYCSS2:
+        for decl in tinycss2.parse_declaration_list(body_text, skip_comments=True, skip_whitespace=True):
+            if decl.type == 'declaration':
+                value = ''.join(token.serialize() for token in decl.value).strip()
+                if decl.important:
+                    value += ' !important'
+                declarations[decl.name] = value
+    elif USE_CSSUTILS:
+        style = cssutils.parseStyle(body_text)
+        for prop in style:
+            value = prop.value
+            if prop.priority:
+                value += ' !important'
+            declarations[prop.name] = value
+    else:
+        for decl in _COMMENT_RE.sub('', body_text).split(';'):
+            if ':' in decl:
+                prop, value = decl.split(':', 1)
+                declarations[prop.strip().lower()] = value.strip()
+
+    return declarations
+
+
+class StyleRule:
+    """
+    样式规则
+
+    只保存选择器和声明块在样式表文本中的位置，
+    第一次访问 declarations 时才解析声明并缓存结果。
+    """
+
+    __slots__ = ('selector', 'sheet', 'start', 'body_start', 'body_end', '_declarations')
+
+    def __init__(self, selector, sheet, start, body_start, body_end):
+        """
+        初始化样式规则
+
+        参数:
+            selector (str): 选择器文本
+            sheet (StyleSheet): 所属样式表
+            start (int): 规则在样式表中的起始位置
+            body_start (int): 声明块起始位置（'{' 之后）
+            body_end (int): 声明块结束位置（'}' 所在位置）
+        """
+        self.selector = selector
+        self.sheet = sheet
+        self.start = start
+        self.body_start = body_start
+        self.body_end = body_end
+        self._declarations = None
+
+    @property
+    def source(self):
+        """规则来源的CSS文件名"""
+        return self.sheet.source_file
+
+    @property
+    def body_text(self):
+        """声明块原始文本"""
+        return self.sheet.css_text[self.body_start:self.body_end]
+
+    @property
+    def rule_text(self):
+        """规则完整原始文本（包括选择器和花括号）"""
+        return self.sheet.css_text[self.start:self.body_end + 1]
+
+    @property
+    def is_materialized(self):
+        """声明是否已经被解析"""
+        return self._declarations is not None
+
+    @property
+    def declarations(self):
+        """解析后的声明（延迟解析并缓存）"""
+        if self._declarations is None:
+            declarations = parse_declarations(self.body_text)
+            value_filter = self.sheet.value_filter
+            if value_filter is not None:
+                declarations = {prop: value_filter(value) for prop, value in declarations.items()}
+            # 属性名和常见值（如 "0"、"none"）在大量规则中重复出现，驻留后只保存一份
+            self._declarations = {sys.intern(prop): sys.intern(value) for prop, value in declarations.items()}
+            self.sheet.materialized_count += 1
+        return self._declarations
+
+    def __repr__(self):
+        return f"StyleRule({self.selector!r}, source={self.source!r})"
+
+
+class StyleSheet:
+    """
+    已索引的样式表
+
+    构造时只扫描一遍文本，记录顶层样式规则的选择器和声明块范围。
+    @规则（@media、@font-face、@keyframes等）整体跳过，不产生规则，只统计它们的字节数（at_rule_bytes）。
+    """
+
+    def __init__(self, css_text, source_file='', value_filter=None):
+        """
+        初始化并索引样式表
+
+        参数:
+            css_text (str): CSS文本内容
+            source_file (str): 源文件名
+            value_filter (callable): 解析声明时对每个值进行的处理（如修复相对URL）；
+                                     需要序列化样式表时应使用可pickle的对象
+        """
+        self.css_text = css_text
+        self.source_file = source_file
+        self.value_filter = value_filter
+        self.materialized_count = 0
+        # 被跳过的@规则的UTF-8字节数
+        self.at_rule_bytes = 0
+        self.rules = self._index()
+
+    def _index(self):
+        """扫描样式表文本，返回规则列表"""
+        text = self.css_text
+        rules = []
+        n = len(text)
+        i = 0
+
+        while i < n:
+            # 跳过空白、注释和HTML注释标记
+            c = text[i]
+            if c.isspace():
+                i += 1
+                continue
+            if text.startswith('/*', i):
+                i = _skip_comment(text, i)
+                continue
+            if text.startswith('<!--', i):
+                i += 4
+                continue
+            if text.startswith('-->', i):
+                i += 3
+                continue
+
+            start = i
+            is_at_rule = c == '@'
+
+            # 查找规则头部的结束位置（'{' 或 ';'）
+            while i < n:
+                match = _SPECIAL_RE.search(text, i)
+                if not match:
+                    i = n
+                    break
+                i = match.start()
+                token = match.group(0)
+                if token in '"\'':
+                    i = _skip_string(text, i)
+                elif token == '\\':
+                    i += 2
+                elif token == '/*':
+                    i = _skip_comment(text, i)
+                else:
+                    break
+
+            if i >= n:
+                break
+
+            token = text[i]
+            if token == ';' or token == '}':
+                # @import等语句形式的@规则，或多余的分号/花括号
+                if is_at_rule:
+                    self.at_rule_bytes += len(text[start:i + 1].encode('utf-8'))
+                i += 1
+                continue
+
+            # token == '{'
+            end = _find_block_end(text, i)
+            if is_at_rule:
+                self.at_rule_bytes += len(text[start:end + 1].encode('utf-8'))
+            else:
+                selector = text[start:i]
+                if '/*' in selector:
+                    selector = _COMMENT_RE.sub('', selector)
+                selector = selector.strip()
+                if selector:
+                    rules.append(StyleRule(selector, self, start, i + 1, end))
+            i = end + 1
+
+        return rules
+
+
+class DeclarationBlock(MutableMapping):
+    """
+    延迟合并的声明映射
+
+    同一选择器可能出现在多条规则中，这里只记录规则引用，
+    第一次读取时才按顺序合并各规则的声明；显式写入的值覆盖规则中的值。
+    """
+
+    __slots__ = ('_rules', '_overrides', '_merged')
+
+    def __init__(self, rules=None, overrides=None):
+        """
+        初始化声明映射
+
+        参数:
+            rules (list): 按顺序合并的StyleRule列表
+            overrides (dict): 显式设置的声明（优先级最高）
+        """
+        self._rules = list(rules or [])
+        self._overrides = dict(overrides or {})
+        self._merged = None
+
+    def add_rule(self, rule):
+        """追加一条规则（后追加的规则覆盖先前的同名属性）"""
+        self._rules.append(rule)
+        self._merged = None
+
+    def _materialize(self):
+        """合并所有规则的声明"""
+        if self._merged is None:
+            merged = {}
+            for rule in self._rules:
+                merged.update(rule.declarations)
+            merged.update(self._overrides)
+            self._merged = merged
+        return self._merged
+
+    def __getitem__(self, key):
+        return self._materialize()[key]
+
+    def __setitem__(self, key, value):
+        self._overrides[key] = value
+        if self._merged is not None:
+            self._merged[key] = value
+
+    def __delitem__(self, key):
+        merged = self._materialize()
+        del merged[key]
+        self._overrides.pop(key, None)
+        # 删除后不再依赖规则，直接以合并结果作为显式值
+        self._rules = []
+        self._overrides = dict(merged)
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __len__(self):
+        return len(self._materialize())
+
+    def __repr__(self):
+        return repr(self._materialize())
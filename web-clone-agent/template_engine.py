@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+模板引擎模块 (template_engine.py)
+------------------------------
+本模块为文档生成器和Vue项目生成器提供预编译的文本模板，模板文件在 templates/ 目录中。
+
+主要功能:
+1. 类似Jinja2的模板语法：{{ 表达式 }}、{% if %}/{% elif %}/{% else %}/{% endif %}、
+   {% for 变量 in 表达式 %}/{% endfor %}、{% set 变量 = 表达式 %}、{% include "模板名" %}、{# 注释 #}，
+   以及原样输出的 {% raw %}...{% endraw %}（用于Vue模板中的 {{ }}）
+2. 模板编译为Python函数，每个模板文件在进程内只编译一次（按路径和修改时间缓存）
+3. 渲染时把输出片段收集在列表中，最后拼接为一个字符串
+4. 按目录顺序查找模板，自定义模板目录中的同名模板覆盖内置模板
+
+工作原理:
+表达式就是Python表达式，其中的变量依次在渲染参数、环境的全局函数和Python内置函数中查找，
+都找不到时是未定义变量（可以用于条件判断，输出时报错）。
+与Jinja2的 trim_blocks 和 lstrip_blocks 选项相同，语句标签和注释前的行首空白、之后的第一个换行会被去掉，
+只包含标签的行不会出现在输出中；标签写成 {%- 或 -%} 时去掉标签前或后的所有空白（包括换行）。
+"""
+
+import os
+import re
+import ast
+import builtins
+import logging
+import threading
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 内置模板目录
+BUILTIN_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# 模板标签：原样输出的块、表达式、语句和注释
+_TAG = re.compile(r'({%-?\s*raw\s*-?%}.*?{%-?\s*endraw\s*-?%}|{{.*?}}|{%.*?%}|{#.*?#})', re.DOTALL)
+_RAW = re.compile(r'{%-?\s*raw\s*-?%}(.*?){%-?\s*endraw\s*-?%}$', re.DOTALL)
+_FOR = re.compile(r'for\s+(.+?)\s+in\s+(.+)$', re.DOTALL)
+_SET = re.compile(r'set\s+(.+?)\s*=(?!=)\s*(.+)$', re.DOTALL)
+
+# 编译好的模板文件：路径 -> (修改时间, 渲染函数)，所有环境共用
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+class TemplateError(Exception):
+    """模板不存在、有语法错误，或者渲染时输出了未定义的变量"""
+
+
+class Undefined:
+    """未定义的变量：在条件判断中为假，遍历时为空，输出、取属性或调用时报错"""
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name):
+        self._name = name
+
+    def __bool__(self):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def _fail(self, *args, **kwargs):
+        raise TemplateError(f"未定义的变量: {self._name}")
+
+    __str__ = __getattr__ = __getitem__ = __call__ = _fail
+
+
+class _Compiler:
+    """把模板源码编译为Python渲染函数的源码"""
+
+    def __init__(self, source, name):
+        self.source = source
+        self.name = name
+        self.lines = ['def _render(_ctx, _lookup, _include, _str):', '    _parts = []', '    _w = _parts.append']
+        self.depth = 1
+        self.blocks = []
+        self.loaded = set()
+        self.bound = set()
+        self.text = []
+
+    def error(self, line, message):
+        return TemplateError(f"{self.name}:{line}: {message}")
+
+    def tokens(self):
+        """
+        切分模板源码并处理标签前后的空白
+
+        返回:
+            list: (类型, 内容, 行号) 列表，类型为 'text'、'expr' 或 'stmt'（注释不产生记号，raw块是 'text'）
+        """
+        pieces = _TAG.split(self.source)
+        tokens = []
+        line = 1
+        strip_next = None
+        for index, piece in enumerate(pieces):
+            if index % 2 == 0:
+                text = piece
+                if strip_next == 'all':
+                    text = text.lstrip()
+                elif strip_next == 'newline' and text.startswith('\n'):
+                    text = text[1:]
+                tokens.append(['text', text, line])
+                line += piece.count('\n')
+                continue
+
+            raw = _RAW.match(piece)
+            kind = piece[1]
+            inner = piece[2:-2]
+            strip_before = inner.startswith('-')
+            strip_after = inner.endswith('-')
+            inner = inner[1 if strip_before else 0:len(inner) - 1 if strip_after else None]
+            previous = tokens[-1]
+            raw_before = pieces[index - 1]
+
+            if strip_before:
+                previous[1] = previous[1].rstrip()
+            elif kind != '{':
+                # 标签在行首时去掉行首空白
+                head, newline, tail = raw_before.rpartition('\n')
+                if not tail.strip() and (newline or index == 1):
+                    previous[1] = previous[1][:len(previous[1]) - len(tail)]
+
+            if strip_after:
+                strip_next = 'all'
+            else:
+                strip_next = None if kind == '{' else 'newline'
+
+            if raw:
+                # raw块的开始标签和结束标签与语句标签一样处理空白
+                content = raw.group(1)
+                content = content[1:] if content.startswith('\n') else content
+                head, newline, tail = content.rpartition('\n')
+                tokens.append(['text', content[:len(content) - len(tail)] if newline and not tail.strip() else content, line])
+            elif kind == '{':
+                tokens.append(['expr', inner.strip(), line])
+            elif kind == '%':
+                tokens.append(['stmt', inner.strip(), line])
+            line += piece.count('\n')
+        return tokens
+
+    def emit(self, code):
+        self.lines.append('    ' * self.depth + code)
+
+    def flush_text(self):
+        text = ''.join(self.text)
+        if text:
+            self.emit(f"_w({text!r})")
+        self.text = []
+
+    def parse_expression(self, expression, line, mode='eval'):
+        """检查表达式语法并记录其中用到的变量"""
+        try:
+            tree = ast.parse(f"({expression})" if mode == 'eval' else expression, mode=mode)
+        except SyntaxError as e:
+            raise self.error(line, f"语法错误: {expression}: {e.msg}")
+        loaded, stored = set(), set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                (loaded if isinstance(node.ctx, ast.Load) else stored).add(node.id)
+            elif isinstance(node, ast.arg):
+                stored.add(node.arg)
+        for name in loaded | stored:
+            if name.startswith('_'):
+                raise self.error(line, f"变量名不能以下划线开头: {name}")
+        self.loaded |= loaded - stored
+        return tree
+
+    def bind(self, target, line):
+        """记录 for 和 set 语句赋值的变量"""
+        tree = self.parse_expression(f"{target} = None", line, mode='exec')
+        self.bound |= {node.id for node in ast.walk(tree.body[0].targets[0]) if isinstance(node, ast.Name)}
+
+    def open_block(self, kind, header, line):
+        self.emit(header)
+        self.blocks.append((kind, line, len(self.lines)))
+        self.depth += 1
+
+    def close_block(self, kinds, tag, line):
+        if not self.blocks or self.blocks[-1][0] not in kinds:
+            raise self.error(line, f"多余的 {{% {tag} %}}")
+        kind, _, start = self.blocks.pop()
+        if len(self.lines) == start:
+            self.emit('pass')
+        self.depth -= 1
+        return kind, start
+
+    def statement(self, statement, line):
+        keyword = statement.split(None, 1)[0] if statement else ''
+        rest = statement[len(keyword):].strip()
+
+        if keyword == 'if':
+            self.parse_expression(rest, line)
+            self.open_block('if', f"if ({rest}):", line)
+        elif keyword in ('elif', 'else'):
+            if keyword == 'elif':
+                self.parse_expression(rest, line)
+            self.close_block(('if',), keyword, line)
+            self.open_block('if', f"elif ({rest}):" if keyword == 'elif' else 'else:', line)
+        elif keyword == 'for':
+            match = _FOR.match(statement)
+            if not match:
+                raise self.error(line, f"无法解析的for语句: {statement}")
+            target, iterable = match.groups()
+            self.bind(target, line)
+            self.parse_expression(iterable, line)
+            self.open_block('for', f"for {target} in ({iterable}):", line)
+        elif keyword == 'set':
+            match = _SET.match(statement)
+            if not match:
+                raise self.error(line, f"无法解析的set语句: {statement}")
+            target, value = match.groups()
+            self.bind(target, line)
+            self.parse_expression(value, line)
+            self.emit(f"{target} = ({value})")
+        elif keyword == 'include':
+            self.parse_expression(rest, line)
+            self.emit(f"_w(_include(({rest}), _ctx, locals()))")
+        elif keyword in ('endif', 'endfor'):
+            self.close_block((keyword[3:],), keyword, line)
+        else:
+            raise self.error(line, f"未知的语句: {statement}")
+
+    def compile(self):
+        """
+        编译模板
+
+        返回:
+            str: 渲染函数的Python源码
+        """
+        for kind, content, line in self.tokens():
+            if kind == 'text':
+                self.text.append(content)
+                continue
+            self.flush_text()
+            if kind == 'expr':
+                self.parse_expression(content, line)
+                self.emit(f"_w(_str(({content})))")
+            else:
+                self.statement(content, line)
+        self.flush_text()
+
+        if self.blocks:
+            kind, line, _ = self.blocks[-1]
+            raise self.error(line, f"缺少 {{% end{kind} %}}")
+        self.emit('return _parts')
+
+        # 在函数开头查找模板中用到、但没有被 for 或 set 赋值的变量
+        lookups = [f"    {name} = _lookup(_ctx, {name!r})" for name in sorted(self.loaded - self.bound)]
+        return '\n'.join(self.lines[:3] + lookups + self.lines[3:]) + '\n'
+
+
+def compile_template(source, name='<string>'):
+    """
+    把模板源码编译为渲染函数
+
+    参数:
+        source (str): 模板源码
+        name (str): 模板名称（用于错误信息）
+
+    返回:
+        function: 渲染函数 (context, lookup, include, str) -> 输出片段列表
+    """
+    code = _Compiler(source, name).compile()
+    namespace = {}
+    exec(compile(code, f"<template {name}>", 'exec'), namespace)
+    return namespace['_render']
+
+
+class Template:
+    """编译好的模板，绑定到查找变量和被包含模板的环境"""
+
+    def __init__(self, function, name, environment):
+        self._function = function
+        self.name = name
+        self.environment = environment
+
+    def render(self, context=None, **kwargs):
+        """
+        渲染模板
+
+        参数:
+            context (dict): 模板变量
+            **kwargs: 其他模板变量
+
+        返回:
+            str: 渲染结果
+        """
+        if kwargs:
+            context = dict(context or {}, **kwargs)
+        return ''.join(self._function(context or {}, self.environment._lookup, self.environment._include, str))
+
+
+class TemplateEnvironment:
+    """
+    模板环境
+
+    按目录顺序查找模板文件（自定义模板目录优先，然后是内置模板目录），并提供模板中可以使用的全局函数。
+    """
+
+    def __init__(self, template_dir=None, globals=None):
+        """
+        初始化模板环境
+
+        参数:
+            template_dir (str): 自定义模板目录，其中的同名模板覆盖内置模板，None表示只使用内置模板
+            globals (dict): 模板中可以使用的全局变量和函数
+        """
+        self.search_path = [path for path in (template_dir, BUILTIN_TEMPLATE_DIR) if path]
+        self.globals = dict(globals or {})
+
+    def _find(self, name):
+        """查找模板文件，返回第一个存在的路径"""
+        parts = name.replace('\\', '/').split('/')
+        if '..' in parts or os.path.isabs(name):
+            raise TemplateError(f"无效的模板名称: {name}")
+        for directory in self.search_path:
+            path = os.path.join(directory, *parts)
+            if os.path.isfile(path):
+                return path
+        raise TemplateError(f"找不到模板: {name}（查找目录: {', '.join(self.search_path)}）")
+
+    def get_template(self, name):
+        """
+        获取编译好的模板（模板文件修改后重新编译）
+
+        参数:
+            name (str): 模板名称，即相对于模板目录的路径，例如 'document/index.md'
+
+        返回:
+            Template: 模板
+        """
+        path = self._find(name)
+        mtime = os.stat(path).st_mtime_ns
+        with _compiled_lock:
+            cached = _compiled.get(path)
+        if cached is None or cached[0] != mtime:
+            logger.debug(f"编译模板: {path}")
+            with open(path, 'r', encoding='utf-8') as f:
+                function = compile_template(f.read(), name)
+            cached = (mtime, function)
+            with _compiled_lock:
+                _compiled[path] = cached
+        return Template(cached[1], name, self)
+
+    def from_string(self, source, name='<string>'):
+        """编译模板源码（不缓存）"""
+        return Template(compile_template(source, name), name, self)
+
+    def render(self, name, context=None, **kwargs):
+        """
+        渲染模板文件
+
+        参数:
+            name (str): 模板名称
+            context (dict): 模板变量
+            **kwargs: 其他模板变量
+
+        返回:
+            str: 渲染结果
+        """
+        return self.get_template(name).render(context, **kwargs)
+
+    def _lookup(self, context, name):
+        """依次在渲染参数、全局变量和Python内置函数中查找变量"""
+        if name in context:
+            return context[name]
+        if name in self.globals:
+            return self.globals[name]
+        if hasattr(builtins, name):
+            return getattr(builtins, name)
+        return Undefined(name)
+
+    def _include(self, name, context, local_vars):
+        """渲染被包含的模板，传入当前模板的全部变量"""
+        variables = dict(context)
+        variables.update((key, value) for key, value in local_vars.items() if not key.startswith('_'))
+        return ''.join(self.get_template(name)._function(variables, self._lookup, self._include, str))
@@ -0,0 +1,16 @@
+import { createStore } from 'vuex'
+
+export default createStore({
+  state: {
+    // 全局状态
+  },
+  mutations: {
+    // 修改状态的方法
+  },
+  actions: {
+    // 异步操作
+  },
+  modules: {
+    // 模块
+  }
+})
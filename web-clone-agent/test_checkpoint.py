@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from fixture_site import FixtureServer
+from agent import CloneAgent
+from batch import run_batch
+from checkpoint import ARTIFACT_DIR, CheckpointManifest
+
+
+def _page(title):
+    return (
+        f'<html><head><title>{title}</title><link rel="stylesheet" href="style.css"></head><body>'
+        '<nav class="navbar"><a href="/">首页</a></nav>'
+        f'<div class="card"><h2>{title}</h2><p>卡片的介绍文字，长度足够被识别为组件。</p></div>'
+        '</body></html>'
+    ).encode('utf-8')
+
+
+def test_resume_skips_finished_urls_and_reloads_checkpointed_stages():
+    """中途失败的批量任务续跑：已完成的URL跳过，已成功阶段的产出从检查点加载，损坏的产出重新计算，完成后删除检查点"""
+    saved = {name: os.environ.get(name) for name in ('STAGE_CACHE', 'OPENAI_API_KEY')}
+    server = FixtureServer()
+    for name in ('good', 'flaky'):
+        server.add_site(name, {'index.html': _page(name), 'style.css': b'.card { color: #336699; }'})
+    urls = [server.url('good/index.html'), server.url('flaky/index.html')]
+
+    # 第一次执行时 flaky 页面在计算组件生效样式时失败
+    original = CloneAgent._compute_component_styles
+
+    def failing(self, page_html, clustered_html_analysis, style_analysis):
+        if '<title>flaky</title>' in page_html:
+            raise RuntimeError('模拟的阶段失败')
+        return original(self, page_html, clustered_html_analysis, style_analysis)
+
+    with tempfile.TemporaryDirectory() as output_root, server:
+        # 不使用阶段缓存，续跑时跳过的阶段只能来自检查点
+        os.environ.update(STAGE_CACHE='0', OPENAI_API_KEY='')
+        try:
+            CloneAgent._compute_component_styles = failing
+            try:
+                first = run_batch(urls, output_root, workers=2, stage_workers=2)
+            finally:
+                CloneAgent._compute_component_styles = original
+            assert [result['status'] for result in first] == ['success', 'failed']
+            assert 'cascade' in first[1]['error']
+
+            good_dir, flaky_dir = first[0]['output_dir'], first[1]['output_dir']
+            assert not os.path.exists(os.path.join(good_dir, ARTIFACT_DIR))
+            state = CheckpointManifest(output_root).state()
+            stages = state[urls[1]]['stages']
+            assert stages['cascade']['status'] == 'failed'
+            assert all(stages[name]['status'] == 'success' and os.path.exists(stages[name]['artifact'])
+                       for name in ('fetch', 'html', 'palette', 'styles', 'cluster', 'audit'))
+
+            # 与清单中的哈希不一致的产出不会被加载
+            with open(stages['styles']['artifact'], 'ab') as f:
+                f.write(b'corrupted')
+            good_mtime = os.stat(os.path.join(good_dir, 'index.md')).st_mtime_ns
+
+            second = run_batch(urls, output_root, workers=2, stage_workers=2, resume=True)
+            assert [result['status'] for result in second] == ['skipped', 'success']
+            assert os.stat(os.path.join(good_dir, 'index.md')).st_mtime_ns == good_mtime
+
+            resumed = second[1]
+            assert resumed['output_dir'] == flaky_dir
+            assert set(resumed['cached_stages']) == {'fetch', 'html', 'palette', 'cluster', 'audit'}
+            assert set(resumed['timings']) == {'styles', 'cascade', 'document'}
+            assert os.path.exists(os.path.join(flaky_dir, 'index.md'))
+            assert not os.path.exists(os.path.join(flaky_dir, ARTIFACT_DIR))
+            assert CheckpointManifest(output_root).state()[urls[1]]['status'] == 'success'
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+if __name__ == '__main__':
+    test_resume_skips_finished_urls_and_reloads_checkpointed_stages()
+    print('测试成功！')
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+
+from html_analyzer import HtmlAnalyzer
+from component_clustering import cluster_html_analysis
+
+
+def test_clustering_does_not_modify_shared_analysis():
+    """聚类返回新的分析结果，原结果（流水线中其他阶段共享的中间结果）和其中的组件保持不变"""
+    cards = ''.join(
+        f'<div class="card"><h2>卡片{i}</h2><p>第{i}张卡片的介绍文字，长度足够被识别为组件。</p></div>'
+        for i in range(6)
+    )
+    html = (f'<html><body><nav class="navbar"><a href="/">首页</a></nav><main>{cards}</main>'
+            '<footer class="footer">版权所有</footer></body></html>')
+    raw = HtmlAnalyzer().analyze(html)
+    before = copy.deepcopy(raw)
+
+    clustered = cluster_html_analysis(raw)
+    assert raw == before
+    assert clustered['all_components'] == raw['components']
+    assert len(clustered['components']) < len(raw['components'])
+    assert sum(c['cluster_size'] for c in clustered['components']) == len(raw['components'])
+
+    # 之后写入代表组件的字段（如生效样式）不会出现在原组件中
+    for component in clustered['components']:
+        component['computed_styles'] = {'color': 'red'}
+    assert raw == before
+
+
+if __name__ == '__main__':
+    test_clustering_does_not_modify_shared_analysis()
+    print('测试成功！')
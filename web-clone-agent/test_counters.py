@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+from counters import collect, count_work, merge
+from html_analyzer import HtmlAnalyzer
+from style_extractor import StyleExtractor
+from website_document_generator import WebsiteDocumentGenerator
+
+
+def _make_page(cards):
+    """生成包含指定数量卡片的测试页面"""
+    items = ''.join(
+        f'<div class="card"><h2>卡片{i}</h2><p>第{i}张卡片的介绍文字，长度足够被识别为组件。</p></div>'
+        for i in range(cards)
+    )
+    html = (
+        '<html><head><title>测试站点</title><meta name="description" content="计数测试"></head><body>'
+        '<nav class="navbar"><a href="/">首页</a><a href="/about">关于</a></nav>'
+        f'<main class="content">{items}</main>'
+        '<footer class="footer">版权所有 2024</footer>'
+        '</body></html>'
+    )
+    css = (
+        '.navbar { background: #336699; color: #ffffff }\n'
+        '.card { padding: 16px; border: 1px solid #dddddd; background: url(img/bg.png) }\n'
+        '.footer { color: rgb(102, 102, 102); font-family: "Noto Sans", sans-serif }\n'
+        '.unused-rule { color: red }'
+    )
+    return html, css
+
+
+def test_html_analysis_work_is_deterministic_and_bounded():
+    """同一页面的计数在多次运行间完全一致；整树搜索次数与页面大小无关"""
+    analyzer = HtmlAnalyzer()
+    small, _ = _make_page(4)
+    large, _ = _make_page(40)
+
+    runs = []
+    for html in (small, small, large):
+        with collect() as work:
+            analyzer.analyze(html)
+        runs.append(work.snapshot())
+
+    assert runs[0] == runs[1]
+    assert runs[0]['html.calls'] == 1
+    # 组件识别只对整棵树发起固定数量的搜索
+    assert runs[0]['html.tree_searches'] == runs[2]['html.tree_searches'] <= 200
+    assert runs[0]['html.nodes_visited'] < runs[2]['html.nodes_visited']
+
+    # 没有激活计数器时不做任何统计
+    with collect() as idle:
+        pass
+    analyzer.analyze(small)
+    assert idle.snapshot() == {}
+
+
+def test_style_and_document_counters():
+    """正则匹配次数确定；写入文件数与输出目录中的文件一致"""
+    html, css = _make_page(4)
+    extractor = StyleExtractor()
+    analyzer = HtmlAnalyzer()
+
+    snapshots = []
+    for _ in range(2):
+        with collect() as work:
+            styles = extractor.extract_styles(['main.css'], {'main.css': css}, html, 'https://example.com/')
+        snapshots.append(work.snapshot())
+    assert snapshots[0] == snapshots[1]
+    assert snapshots[0]['css.regex_evaluations'] > 0
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = WebsiteDocumentGenerator(output_dir)
+        with collect() as work:
+            generator.generate_document(analyzer.analyze(html), styles, 'https://example.com/')
+        written = [name for _, _, files in os.walk(output_dir) for name in files]
+        assert work['files.written'] == len(written)
+        assert work['bytes.written'] == sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(output_dir) for name in files
+        )
+
+    with collect() as extra:
+        count_work('http.requests', 2)
+    assert merge([snapshots[0], extra.snapshot()])['http.requests'] == 2
+
+
+if __name__ == '__main__':
+    test_html_analysis_work_is_deterministic_and_bounded()
+    test_style_and_document_counters()
+    print('测试成功！')
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+from bs4 import BeautifulSoup
+
+from css_cascade import CascadeEngine, bucket_key, calculate_specificity, parse_selector
+from stylesheet import StyleSheet
+
+
+def make_engine(css):
+    engine = CascadeEngine()
+    engine.add_rules(StyleSheet(css, 'test.css').rules)
+    return engine
+
+
+def test_specificity():
+    """优先级计算，:not/:is 取参数中最高的优先级，:where 不计"""
+    assert calculate_specificity('#nav .item a') == (1, 1, 1)
+    assert calculate_specificity('input[type="text"]:hover') == (0, 2, 1)
+    assert calculate_specificity('p::before') == (0, 0, 2)
+    assert calculate_specificity('a:not(#x)') == (1, 0, 1)
+    assert calculate_specificity('li:not(.a, #b)') == (1, 0, 1)
+    assert calculate_specificity(':is(.a, #b) span') == (1, 0, 1)
+    assert calculate_specificity(':where(#x .y) p') == (0, 0, 1)
+    assert calculate_specificity(':-webkit-any(a, b) span') == (0, 0, 2)
+    assert calculate_specificity(':-moz-any(.a, #b) span') == (1, 0, 1)
+
+
+def test_important_inline_and_source_order():
+    """层叠顺序：普通规则按优先级和源码顺序 < 内联样式 < important规则 < 内联important样式"""
+    engine = make_engine("""
+        p { color: red !important; margin: 1px; border: none; }
+        #x { color: blue; margin: 2px; border: 1px solid; }
+        .a { padding: 1px; }
+        .a { padding: 2px; }
+    """)
+    soup = BeautifulSoup(
+        '<p id="x" class="a" style="margin: 3px; color: green">一</p>'
+        '<p class="a" style="color: black !important">二</p>', 'html.parser')
+    first, second = soup.find_all('p')
+
+    assert engine.compute(first) == {'color': 'red', 'margin': '3px', 'border': '1px solid', 'padding': '2px'}
+    assert engine.compute(second) == {'color': 'black', 'margin': '1px', 'border': 'none', 'padding': '2px'}
+
+
+def test_combinators():
+    """后代、子元素、相邻兄弟和通用兄弟组合符"""
+    engine = make_engine("""
+        div p { color: red; }
+        div > p { margin: 0; }
+        h1 + p { padding: 0; }
+        h1 ~ ul { width: 10px; }
+        h1 + ul { height: 10px; }
+    """)
+    soup = BeautifulSoup(
+        '<div><h1>标题</h1><p id="child">一</p><section><p id="nested">二</p></section><ul></ul></div>',
+        'html.parser')
+
+    assert engine.compute(soup.find(id='child')) == {'color': 'red', 'margin': '0', 'padding': '0'}
+    assert engine.compute(soup.find(id='nested')) == {'color': 'red'}
+    assert engine.compute(soup.find('ul')) == {'width': '10px'}
+
+
+def test_prefixed_any_pseudo_class():
+    """:-webkit-any() 和 :-moz-any() 与 :is() 相同，是伪类而不是伪元素，规则参与层叠计算"""
+    compounds, _ = parse_selector(':-webkit-any(a, b) span')
+    assert compounds[0].pseudo_element is None
+    assert compounds[0].pseudos == [('-webkit-any', 'a, b')]
+
+    engine = make_engine(':-webkit-any(a, b) span { color: red; } :-moz-any(em) span { margin: 0; }')
+    soup = BeautifulSoup('<a><span id="in-a">一</span></a><i><span id="in-i">二</span></i>'
+                         '<em><span id="in-em">三</span></em>', 'html.parser')
+    assert engine.compute(soup.find(id='in-a')) == {'color': 'red'}
+    assert engine.compute(soup.find(id='in-i')) == {}
+    assert engine.compute(soup.find(id='in-em')) == {'margin': '0'}
+
+
+def test_bucket_selection():
+    """按最右侧复合选择器分桶：ID优先，其次第一个类名，再次标签名，否则放入通配桶"""
+    def key(selector):
+        compounds, _ = parse_selector(selector)
+        return bucket_key(compounds[-1])
+
+    assert key('div.card#main') == ('id', 'main')
+    assert key('#main div.card.shadow') == ('class', 'card')
+    assert key('.list > li:first-child') == ('tag', 'li')
+    assert key('*') == ('universal', None)
+    assert key('ul [data-role="tab"]') == ('universal', None)
+
+    # 元素只会匹配到相关桶中的规则，通配规则对所有元素生效
+    engine = make_engine('#main { a: 1 } .card { b: 2 } li { c: 3 } [data-role] { d: 4 } .other { e: 5 }')
+    soup = BeautifulSoup('<li id="main" class="card" data-role="tab"></li>', 'html.parser')
+    assert engine.compute(soup.li) == {'a': '1', 'b': '2', 'c': '3', 'd': '4'}
+
+
+def test_compute_components():
+    """组件按 dom_index、ID 或标签名+类名定位，生效样式写入 computed_styles"""
+    engine = make_engine("""
+        header { height: 60px; }
+        .card { padding: 8px; }
+        .card.featured { border: 2px solid gold; }
+        #footer { color: gray; }
+    """)
+    soup = BeautifulSoup(
+        '<html><body><header>头部</header><div class="card featured">卡片</div>'
+        '<footer id="footer">底部</footer></body></html>', 'html.parser')
+    components = [
+        {'type': 'header', 'element': 'header', 'dom_index': 2},
+        {'type': 'card', 'element': 'div', 'classes': ['card', 'featured']},
+        {'type': 'footer', 'element': 'footer', 'id': 'footer'},
+        {'type': 'missing', 'element': 'aside'},
+    ]
+
+    results = engine.compute_components(soup, components)
+    assert results == [
+        {'height': '60px'},
+        {'padding': '8px', 'border': '2px solid gold'},
+        {'color': 'gray'},
+        {},
+    ]
+    assert [c['computed_styles'] for c in components] == results
+
+
+def test_large_page_is_not_rules_times_elements():
+    """一万条规则、一万个元素的页面，分桶后每个元素只匹配少量候选规则"""
+    count = 10000
+    css = '\n'.join(f'.c{i} {{ width: {i}px; }}' for i in range(count)) + '\ndiv { margin: 0; }'
+    html = '<body>' + ''.join(f'<div class="c{i}"></div>' for i in range(count)) + '</body>'
+    engine = make_engine(css)
+    elements = BeautifulSoup(html, 'html.parser').find_all('div')
+
+    started = time.perf_counter()
+    results = [engine.compute(element) for element in elements]
+    elapsed = time.perf_counter() - started
+
+    assert engine.rule_count == count + 1
+    assert results[1234] == {'width': '1234px', 'margin': '0'}
+    assert all(len(result) == 2 for result in results)
+    # 全量两两匹配需要一亿次选择器匹配；按桶匹配在普通机器上不到一秒
+    assert elapsed < 10, f"耗时 {elapsed:.2f}s"
+
+
+if __name__ == '__main__':
+    test_specificity()
+    test_important_inline_and_source_order()
+    test_combinators()
+    test_prefixed_any_pseudo_class()
+    test_bucket_selection()
+    test_compute_components()
+    test_large_page_is_not_rules_times_elements()
+    print('测试成功！')
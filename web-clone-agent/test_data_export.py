@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import tempfile
+
+import yaml
+
+from style_extractor import StyleExtractor
+from website_document_generator import WebsiteDocumentGenerator
+
+CSS = """
+.header { color: #336699; background: #ffffff; }
+.card { color: #ff0000; border: 1px solid #cccccc; }
+p { margin: 4px; }
+"""
+
+HTML = '<html><body><header class="header">标题</header><div class="card"><p>内容</p></div></body></html>'
+
+
+def test_exports_contain_full_style_data_in_every_format():
+    """YAML和JSON的内容相同，jsonl每行一条记录；颜色分类和样式规则都被导出"""
+    style_analysis = StyleExtractor().extract_styles(['main.css'], {'main.css': CSS}, HTML, 'https://example.com/')
+    html_analysis = {'title': '测试', 'components': [{'type': 'card', 'element': 'div', 'classes': ['card']}]}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = WebsiteDocumentGenerator(output_dir, html_workers=1, export_formats=['yaml', 'json', 'jsonl'])
+        assert generator.generate_document(html_analysis, style_analysis, 'https://example.com/')
+
+        with open(os.path.join(output_dir, 'site_data.yaml'), encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        with open(os.path.join(output_dir, 'site_data.json'), encoding='utf-8') as f:
+            assert json.load(f) == data
+        with open(os.path.join(output_dir, 'site_data.jsonl'), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+
+        assert data['components'] == [{'type': 'card', 'element': 'div', 'id': '', 'classes': ['card']}]
+        assert [color['color'] for color in data['colors']] == list(style_analysis['colors']['all_colors'])
+        assert any(color['category'] for color in data['colors'])
+        assert {'selector': '.card', 'source': 'main.css',
+                'declarations': {'color': '#ff0000', 'border': '1px solid #cccccc'}} in data['rules']
+        assert records[0]['record'] == 'site' and records[0]['url'] == 'https://example.com/'
+        assert sum(record['record'] == 'rules' for record in records) == len(data['rules'])
+
+        # 切换导出格式后，上次导出的文件作为过期文件删除
+        generator.export_formats = ('jsonl',)
+        assert generator.generate_document(html_analysis, style_analysis, 'https://example.com/')
+        assert not os.path.exists(os.path.join(output_dir, 'site_data.yaml'))
+        assert os.path.exists(os.path.join(output_dir, 'site_data.jsonl'))
+
+
+if __name__ == '__main__':
+    test_exports_contain_full_style_data_in_every_format()
+    print('测试成功！')
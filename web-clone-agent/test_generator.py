@@ -1,7 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from website_document_generator import WebsiteDocumentGenerator
+import os
+import sys
+import tempfile
+import multiprocessing
+
+import markdown
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+import website_document_generator
+from fixture_site import FixtureServer, generate_site
+from batch import run_batch
+from agent import CloneAgent
+from web_scraper import WebScraper
+from html_analyzer import HtmlAnalyzer
+from style_extractor import StyleExtractor
+from website_document_generator import (WebsiteDocumentGenerator, MARKDOWN_CHUNK_BYTES, PARALLEL_HTML_BYTES,
+                                        _split_markdown)
 
 def test_generator():
     try:
@@ -24,5 +41,138 @@ def test_generator():
         import traceback
         traceback.print_exc()
 
+def test_documents_rendered_in_memory_and_written_once():
+    """分片转换的HTML与整篇转换相同（代码块中的 # 行、紧跟表格的标题行不切分）；输出目录中只有最终文件"""
+    sections = ''.join(
+        f"### 组件 {i}\n\n- **类名**: `card`\n\n#### 样式\n\n```css\n# 不是标题 {i}\n.card {{ color: red }}\n```\n\n"
+        f"| 属性 | 值 |\n|------|----|\n| color | red |\n"
+        for i in range(400)
+    )
+    text = f"# 组件文档\n\n{sections}"
+    chunks = _split_markdown(text, MARKDOWN_CHUNK_BYTES)
+    assert len(chunks) > 1 and ''.join(chunks) == text
+    converted = '\n'.join(filter(None, (markdown.markdown(chunk, extensions=['tables', 'fenced_code'])
+                                         for chunk in chunks)))
+    assert converted == markdown.markdown(text, extensions=['tables', 'fenced_code'])
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        gen = WebsiteDocumentGenerator(output_dir)
+        assert gen.generate_document({'title': '测试'}, {'colors': [], 'fonts': []}, 'https://example.com')
+        names = sorted(os.listdir(output_dir))
+        assert names == sorted(['1_metadata.md', '2_structure.md', '3_components.md', '4_styles.md',
+                                '5_implementation.md', 'index.md', 'site_data.yaml', '.output-manifest.json'] +
+                               [f"{name}.html" for name in ('1_metadata', '2_structure', '3_components',
+                                                            '4_styles', '5_implementation', 'index')])
+
+
+def _read_html(output_dir):
+    return {name: open(os.path.join(output_dir, name), encoding='utf-8').read()
+            for name in os.listdir(output_dir) if name.endswith('.html')}
+
+
+def test_large_documents_share_one_spawn_pool():
+    """超过阈值的文档使用进程内共享的进程池（spawn方式启动）并行转换，结果与在当前线程中转换相同"""
+    components = [
+        {'type': 'card', 'element': 'div', 'classes': ['card', f'card-{i}'],
+         'html': f'<div class="card card-{i}"><h2>卡片{i}</h2><p>' + '介绍文字' * 20 + '</p></div>'}
+        for i in range(1000)
+    ]
+    html_analysis = {'title': '大文档', 'components': components}
+    style_analysis = {'colors': [], 'fonts': []}
+
+    with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as parallel_dir:
+        sequential = WebsiteDocumentGenerator(sequential_dir, html_workers=1)
+        assert sequential.generate_document(html_analysis, style_analysis, 'https://example.com')
+        sizes = sum(len(open(os.path.join(sequential_dir, name), encoding='utf-8').read())
+                    for name in os.listdir(sequential_dir) if name.endswith('.md'))
+        assert sizes >= PARALLEL_HTML_BYTES
+
+        parallel = WebsiteDocumentGenerator(parallel_dir, html_workers=2)
+        assert parallel.generate_document(html_analysis, style_analysis, 'https://example.com')
+        pool = website_document_generator._html_pool
+        assert pool is not None and website_document_generator._get_html_pool(8) is pool
+        assert pool._mp_context is multiprocessing.get_context('spawn')
+        # index.html 中有生成时间，比较其余文档
+        parallel_html, sequential_html = _read_html(parallel_dir), _read_html(sequential_dir)
+        assert parallel_html.pop('index.html') and sequential_html.pop('index.html')
+        assert parallel_html == sequential_html
+
+
+def test_batch_converts_html_without_process_pool():
+    """批量模式已经按URL并行，超过阈值的文档也在工作线程中转换，不启动进程池"""
+    saved = {name: os.environ.get(name) for name in ('STAGE_CACHE', 'OPENAI_API_KEY')}
+    server = FixtureServer()
+    for name in ('a', 'b'):
+        server.add_site(name, {'index.html': f'<html><head><title>{name}</title></head><body>'
+                                             f'<div class="card"><p>卡片 {name}，长度足够被识别为组件。</p></div>'
+                                             f'</body></html>'.encode('utf-8')})
+    pool_requests = []
+    original_pool, original_threshold = website_document_generator._get_html_pool, PARALLEL_HTML_BYTES
+
+    def spy(workers):
+        pool_requests.append(workers)
+        return original_pool(workers)
+
+    with tempfile.TemporaryDirectory() as output_root, server:
+        os.environ.update(STAGE_CACHE='0', OPENAI_API_KEY='')
+        # 降低阈值，小页面的文档也超过阈值
+        website_document_generator._get_html_pool = spy
+        website_document_generator.PARALLEL_HTML_BYTES = 1
+        try:
+            results = run_batch([server.url('a/index.html'), server.url('b/index.html')], output_root, workers=2)
+        finally:
+            website_document_generator._get_html_pool = original_pool
+            website_document_generator.PARALLEL_HTML_BYTES = original_threshold
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        assert [result['status'] for result in results] == ['success', 'success']
+        assert pool_requests == []
+        for result in results:
+            assert 'index.html' in _read_html(result['output_dir'])
+
+
+def test_document_run_leaves_unmatched_rules_unparsed():
+    """从抓取到生成文档（不导出数据文件）只解析层叠计算用到的规则；样式文档的颜色用途和常用属性来自组件生效样式"""
+    saved = {name: os.environ.get(name) for name in ('STAGE_CACHE', 'OPENAI_API_KEY')}
+    server = FixtureServer()
+    server.add_site('small', generate_site('small'))
+
+    with tempfile.TemporaryDirectory() as work_dir, server:
+        scraper = WebScraper(temp_dir=os.path.join(work_dir, 'temp'), keep_alive=True)
+        os.environ.update(STAGE_CACHE='0', OPENAI_API_KEY='')
+        try:
+            output_dir = os.path.join(work_dir, 'doc')
+            generator = WebsiteDocumentGenerator(output_dir=output_dir, html_workers=1, export_formats=())
+            agent = CloneAgent(scraper, HtmlAnalyzer(), StyleExtractor(), generator, max_workers=2, verbose=False)
+            assert agent.clone_website(server.url('small/index.html'), output_dir)
+
+            rules = agent.last_run.artifacts['style_analysis']['rules']
+            sheets = list({id(rule.sheet): rule.sheet for rule in rules}.values())
+            assert sheets
+            for sheet in sheets:
+                assert sheet.materialized_count < len(sheet.rules)
+            assert sum(sheet.materialized_count for sheet in sheets) == sum(rule.is_materialized for rule in rules)
+            assert not any(name.startswith('site_data') for name in os.listdir(output_dir))
+
+            with open(os.path.join(output_dir, '4_styles.md'), encoding='utf-8') as f:
+                styles_doc = f.read()
+            assert '## 常用样式属性' in styles_doc
+        finally:
+            scraper.shutdown()
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
 if __name__ == '__main__':
-    test_generator() 
\ No newline at end of file
+    test_generator()
+    test_documents_rendered_in_memory_and_written_once()
+    test_large_documents_share_one_spawn_pool()
+    test_batch_converts_html_without_process_pool()
+    test_document_run_leaves_unmatched_rules_unparsed()
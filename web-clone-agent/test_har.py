@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from har import HarRecorder, HarArchive, ReplayMissError
+from web_scraper import WebScraper
+
+PAGE_HTML = """<html><head><title>录制测试</title><link rel="stylesheet" href="style.css"></head>
+<body><div class="card">卡片</div><img src="logo.png"><script src="app.js"></script></body></html>"""
+
+PAGE_CSS = '.card { color: #336699 }'
+
+PAGE_JS = 'console.log("录制");'
+
+
+class _RedirectingHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/old':
+            self.send_response(301)
+            self.send_header('Location', '/index.html')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_site(directory):
+    for name, content in (('index.html', PAGE_HTML), ('style.css', PAGE_CSS), ('app.js', PAGE_JS)):
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_RedirectingHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _fetch(url, **options):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scraper = WebScraper(temp_dir=temp_dir, **options)
+        try:
+            return scraper.fetch_url(url)
+        finally:
+            scraper.shutdown()
+
+
+def test_record_then_replay_offline():
+    """录制的页面在服务器关闭后可以完整回放，包括重定向；不在归档中的URL按网络错误处理"""
+    with tempfile.TemporaryDirectory() as site_dir, tempfile.TemporaryDirectory() as har_dir:
+        site = _start_site(site_dir)
+        url = f"http://127.0.0.1:{site.server_address[1]}/old"
+        har_path = os.path.join(har_dir, 'site.har')
+        try:
+            recorded = _fetch(url, recorder=HarRecorder(har_path))
+        finally:
+            site.shutdown()
+            site.server_close()
+
+        archive = HarArchive(har_path)
+        # 重定向、页面、CSS和JS各一条记录
+        assert len(archive) == 4
+        replayed = _fetch(url, archive=archive)
+        for key in ('html', 'css_files', 'js_files', 'css_content', 'js_content', 'images'):
+            assert replayed[key] == recorded[key]
+        assert replayed['css_content']['style.css'] == PAGE_CSS
+
+        # 每个请求（含重定向）都有计时记录；回放时还原录制的状态码和传输字节数
+        assert [record['status'] for record in recorded['network']] == [301, 200, 200, 200]
+        assert not recorded['network'][0]['reused_connection'] and recorded['network'][0]['dns_ms'] is not None
+        assert [(r['status'], r['transfer_bytes']) for r in replayed['network']] == \
+            [(r['status'], r['transfer_bytes']) for r in recorded['network']]
+
+        try:
+            archive.get(url.replace('/old', '/missing'))
+            assert False, '归档中没有的URL应抛出 ReplayMissError'
+        except ReplayMissError:
+            pass
+
+        # 模拟延迟：重定向、页面、CSS、JS 共4次请求
+        slow = HarArchive(har_path, latency=0.05)
+        started = time.perf_counter()
+        _fetch(url, archive=slow)
+        assert time.perf_counter() - started >= 0.2
+
+
+if __name__ == '__main__':
+    test_record_then_replay_offline()
+    print('测试成功！')
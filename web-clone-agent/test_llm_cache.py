@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from llm_cache import LLMCache, LLMExecutor, HttpCompletionClient, cache_key
+
+# 桩服务器每次补全的模拟延迟（秒）
+STUB_DELAY = 0.3
+
+
+class _StubCompletionHandler(BaseHTTPRequestHandler):
+    """模拟OpenAI兼容的 /completions 接口：延迟一段时间后回显提示词的长度"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.request_count += 1
+        time.sleep(STUB_DELAY)
+
+        data = json.dumps({'choices': [{'text': f"{body['model']}:{len(body['prompt'])}"}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub_server():
+    """在后台线程中启动桩服务器"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubCompletionHandler)
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _timed_run(executor, prompts):
+    start = time.perf_counter()
+    results, errors = executor.run(prompts)
+    return results, errors, time.perf_counter() - start
+
+
+def test_cached_and_uncached_latency():
+    """未缓存时两个提示词并发请求；再次执行时全部命中缓存，不再请求服务器"""
+    server = _start_stub_server()
+    try:
+        client = HttpCompletionClient(f"http://127.0.0.1:{server.server_port}/v1", model='stub-model')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            executor = LLMExecutor(client, model='stub-model', temperature=0.3,
+                                   cache=LLMCache(cache_dir), concurrency=2)
+            prompts = {
+                'components': '\n    分析组件:\n    [button, navbar]\n',
+                'layout': '\n    分析布局:\n    landing-page\n'
+            }
+
+            results, errors, uncached = _timed_run(executor, prompts)
+            assert not errors
+            assert server.request_count == 2
+            # 并发执行，总耗时小于两次串行请求
+            assert uncached < 2 * STUB_DELAY
+
+            # 缩进不同但内容相同的提示词命中同一缓存条目
+            reindented = {name: prompt.replace('    ', '        ') for name, prompt in prompts.items()}
+            cached_results, errors, cached = _timed_run(executor, reindented)
+            assert not errors
+            assert cached_results == results
+            assert server.request_count == 2
+            assert cached < STUB_DELAY
+
+            print(f"未缓存: {uncached * 1000:.1f}ms, 缓存: {cached * 1000:.1f}ms")
+    finally:
+        server.shutdown()
+
+
+def test_cache_ttl_and_size_eviction():
+    """过期条目视为未命中；总大小超过上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = LLMCache(cache_dir, ttl=0.05)
+        key = cache_key('m', 0.3, 'prompt')
+        cache.set(key, 'completion')
+        assert cache.get(key) == 'completion'
+        time.sleep(0.1)
+        assert cache.get(key) is None
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = LLMCache(cache_dir, ttl=None, max_bytes=1000)
+        keys = [cache_key('m', 0.3, f'prompt {i}') for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.set(key, 'x' * 200)
+            # 保证修改时间递增
+            os.utime(cache._path(key), (i, i))
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[-1]) == 'x' * 200
+
+
+if __name__ == '__main__':
+    test_cached_and_uncached_latency()
+    test_cache_ttl_and_size_eviction()
+    print('测试成功！')
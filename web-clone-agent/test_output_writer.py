@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+import tempfile
+
+from counters import collect
+from output_writer import OutputWriter
+from website_document_generator import WebsiteDocumentGenerator
+
+
+def test_unchanged_files_are_skipped_and_stale_files_deleted():
+    """第二次生成只重写变化的文件，删除过期文件，不动用户自己放入的文件"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        with OutputWriter(output_dir) as writer:
+            writer.write('a.md', 'A')
+            writer.write('b.md', 'B')
+            writer.write('src/c.vue', 'C')
+        assert (writer.stats['written'], writer.stats['skipped'], writer.stats['deleted']) == (3, 0, 0)
+
+        with open(os.path.join(output_dir, 'notes.txt'), 'w') as f:
+            f.write('用户文件')
+        mtime = os.stat(os.path.join(output_dir, 'a.md')).st_mtime_ns
+
+        with collect() as work:
+            with OutputWriter(output_dir) as writer:
+                writer.write('a.md', 'A')
+                writer.write('b.md', 'B2')
+        assert (writer.stats['written'], writer.stats['skipped'], writer.stats['deleted']) == (1, 1, 1)
+        assert work['files.skipped'] == 1 and work['files.deleted'] == 1
+        assert os.stat(os.path.join(output_dir, 'a.md')).st_mtime_ns == mtime
+        assert not os.path.exists(os.path.join(output_dir, 'src', 'c.vue'))
+        assert os.path.exists(os.path.join(output_dir, 'notes.txt'))
+
+        # 在两次生成之间被修改过的文件一定重写
+        with open(os.path.join(output_dir, 'a.md'), 'w') as f:
+            f.write('X')
+        with OutputWriter(output_dir) as writer:
+            writer.write('a.md', 'A')
+            writer.write('b.md', 'B2')
+        assert (writer.stats['written'], writer.stats['skipped']) == (1, 1)
+        with open(os.path.join(output_dir, 'a.md')) as f:
+            assert f.read() == 'A'
+
+
+def test_written_files_get_normal_permissions():
+    """写入和流式写入的文件权限与 open() 新建的文件相同（不是临时文件的0600），已有文件保留原权限"""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    with tempfile.TemporaryDirectory() as output_dir:
+        with OutputWriter(output_dir) as writer:
+            writer.write('a.md', 'A')
+            writer.write_stream('site_data.jsonl', [b'{}\n'])
+        for name in ('a.md', 'site_data.jsonl', '.output-manifest.json'):
+            assert stat.S_IMODE(os.stat(os.path.join(output_dir, name)).st_mode) == 0o666 & ~umask
+
+        os.chmod(os.path.join(output_dir, 'a.md'), 0o640)
+        with OutputWriter(output_dir) as writer:
+            writer.write('a.md', 'A2')
+            writer.write_stream('site_data.jsonl', [b'{}\n'])
+        assert stat.S_IMODE(os.stat(os.path.join(output_dir, 'a.md')).st_mode) == 0o640
+
+
+def test_repeated_document_generation_skips_unchanged_files():
+    """同一分析结果再次生成文档时，只有带生成时间的文件被重写"""
+    html_analysis = {'title': '测试', 'components': [{'type': 'card', 'name': 'Card'}]}
+    style_analysis = {'colors': [], 'fonts': []}
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = WebsiteDocumentGenerator(output_dir, html_workers=1)
+        assert generator.generate_document(html_analysis, style_analysis, 'https://example.com')
+        first = generator.last_write_stats
+        assert first['skipped'] == 0 and first['written'] == len(first['files'])
+
+        assert generator.generate_document(html_analysis, style_analysis, 'https://example.com')
+        second = generator.last_write_stats
+        assert sorted(second['files']) == sorted(first['files'])
+        assert second['skipped'] >= len(second['files']) - 3
+
+
+if __name__ == '__main__':
+    test_unchanged_files_are_skipped_and_stale_files_deleted()
+    test_written_files_get_normal_permissions()
+    test_repeated_document_generation_skips_unchanged_files()
+    print('测试成功！')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+from html_analyzer import HtmlAnalyzer
+from performance_audit import audit_performance, library_name
+from style_extractor import StyleExtractor
+from website_document_generator import WebsiteDocumentGenerator
+
+PAGE_HTML = """<html><head><title>审计测试</title>
+<link rel="stylesheet" href="css/main.css">
+<link rel="stylesheet" href="css/print.css" media="print">
+<script src="https://cdn.example.com/jquery-3.6.0.min.js"></script>
+<script src="js/app.3f2a9c1d.js" defer></script>
+<script>window.config = {};</script>
+<script type="application/ld+json">{"@type": "WebSite"}</script>
+</head><body>
+<div class="card"><img src="a.png" width="100" height="80"><p>卡片</p></div>
+<div class="card"><img src="b.png" loading="lazy"><p>卡片</p></div>
+<script src="/static/jquery.js"></script>
+</body></html>"""
+
+
+def _page_data():
+    css = {'main.css': '.card { padding: 8px }\n.unused-rule { color: red }', 'print.css': '.card { color: black }'}
+    js = {'jquery-3.6.0.min.js': 'var jq = 1;', 'app.3f2a9c1d.js': 'var app = 2;', 'jquery.js': 'var jq = 1;'}
+    return {
+        'base_url': 'http://example.com/',
+        'html': PAGE_HTML,
+        'css_files': list(css), 'css_content': css,
+        'js_files': list(js), 'js_content': js,
+    }
+
+
+def test_audit_finds_blocking_resources_images_and_duplicates():
+    """<head> 中的同步资源、未设置宽高的图片、同一个库的多个版本都能被发现，并写入性能审计文档"""
+    assert library_name('https://cdn.example.com/npm/vue@3.4.0/dist/vue.global.prod.js') == 'vue.global'
+    assert library_name('/static/js/1578.js') is None
+
+    page_data = _page_data()
+    html_analysis = HtmlAnalyzer().analyze(page_data['html'])
+    style_analysis = StyleExtractor().extract_styles(page_data['css_files'], page_data['css_content'],
+                                                     page_data['html'], page_data['base_url'])
+    audit = audit_performance(page_data, html_analysis, style_analysis)
+
+    # print 样式表、带 defer 的脚本和JSON数据块不阻塞渲染
+    blocking = audit['render_blocking']
+    assert blocking['stylesheets'] == ['http://example.com/css/main.css']
+    assert blocking['scripts'] == ['https://cdn.example.com/jquery-3.6.0.min.js']
+    assert blocking['inline_scripts'] == 1
+
+    assert audit['images'] == {'total': 2, 'without_dimensions': 1, 'without_lazy_loading': 1,
+                               'examples': ['http://example.com/b.png']}
+    assert audit['unused_css']['rules_unused'] >= 1 and 0 < audit['unused_css']['ratio'] < 1
+    assert audit['weight']['by_type']['js'] == {'count': 3, 'bytes': 34}
+    assert audit['dom']['elements'] > 0
+
+    # 同一个库的两个地址，以及内容完全相同的两个文件
+    reasons = {(entry['library'], entry['reason']) for entry in audit['duplicates']}
+    assert ('jquery', 'same_library') in reasons
+    assert ('jquery-3.6.0.min.js', 'same_content') in reasons
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        generator = WebsiteDocumentGenerator(output_dir=temp_dir)
+        assert generator.generate_document(html_analysis, style_analysis, page_data['base_url'],
+                                           performance=audit)
+        with open(os.path.join(temp_dir, '6_performance.md'), encoding='utf-8') as f:
+            document = f.read()
+        assert 'jquery-3.6.0.min.js' in document and '未设置宽高' in document
+        with open(os.path.join(temp_dir, 'index.md'), encoding='utf-8') as f:
+            assert '6_performance.md' in f.read()
+
+
+if __name__ == '__main__':
+    test_audit_finds_blocking_resources_images_and_duplicates()
+    print('测试成功！')
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+from pipeline import Pipeline, PipelineError
+
+
+def test_stages_run_in_dependency_order():
+    """菱形依赖：下游阶段在全部输入就绪后才执行，每个中间结果只计算一次"""
+    calls = []
+    lock = threading.Lock()
+
+    def record(name, value):
+        with lock:
+            calls.append(name)
+        return value
+
+    pipeline = Pipeline(max_workers=4)
+    pipeline.add_stage('fetch', lambda url: record('fetch', url.upper()), inputs=('url',), outputs=('page',))
+    pipeline.add_stage('split', lambda page: record('split', {'head': page[:4], 'body': page[4:]}),
+                       inputs=('page',), outputs=('head', 'body'))
+    pipeline.add_stage('html', lambda body: record('html', len(body)), inputs=('body',))
+    pipeline.add_stage('style', lambda head, page: record('style', head + page), inputs=('head', 'page'))
+    pipeline.add_stage('report', lambda html, style: record('report', f"{style}:{html}"), inputs=('html', 'style'))
+
+    run = pipeline.run(url='abcdefg')
+    assert run.artifacts['report'] == 'ABCDABCDEFG:3'
+    assert sorted(calls) == sorted(pipeline.stages)
+    assert calls[:2] == ['fetch', 'split'] and calls[-1] == 'report'
+    assert all(result.status == 'success' for result in run.results.values())
+
+    # 已通过初始结果提供全部输出的阶段不执行
+    calls.clear()
+    run = pipeline.run(url='abcdefg', page='XYZW1234')
+    assert 'fetch' not in calls and run.results['fetch'].status == 'cached'
+    assert run.artifacts['report'] == 'XYZWXYZW1234:4'
+
+
+def test_definition_errors():
+    """输入没有来源或存在循环依赖时在执行前报错"""
+    pipeline = Pipeline()
+    pipeline.add_stage('a', lambda missing: missing, inputs=('missing',))
+    try:
+        pipeline.run()
+        assert False, '应当报错'
+    except PipelineError as e:
+        assert e.stage == 'a'
+
+    pipeline = Pipeline()
+    pipeline.add_stage('a', lambda b: b, inputs=('b',))
+    pipeline.add_stage('b', lambda a: a, inputs=('a',))
+    try:
+        pipeline.run()
+        assert False, '应当报错'
+    except PipelineError as e:
+        assert '循环依赖' in str(e)
+
+
+def test_independent_stages_run_concurrently():
+    """互不依赖的阶段同时执行：两个阶段互相等待对方开始，串行执行时会超时"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other(page):
+        barrier.wait()
+        return threading.current_thread().name
+
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add_stage('fetch', lambda url: url, inputs=('url',), outputs=('page',))
+    pipeline.add_stage('html', wait_for_other, inputs=('page',))
+    pipeline.add_stage('style', wait_for_other, inputs=('page',))
+
+    run = pipeline.run(url='https://example.com')
+    assert run.artifacts['html'] != run.artifacts['style']
+    assert run.results['html'].started < run.results['style'].finished
+    assert run.results['style'].started < run.results['html'].finished
+
+
+def test_failure_propagates_to_downstream_stages():
+    """必需阶段失败时下游阶段不再执行；可选阶段失败时输出为None，下游照常执行"""
+    def fail(page):
+        raise RuntimeError('解析失败')
+
+    downstream = []
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add_stage('fetch', lambda url: url, inputs=('url',), outputs=('page',))
+    pipeline.add_stage('html', fail, inputs=('page',))
+    pipeline.add_stage('style', lambda page: 'style', inputs=('page',))
+    pipeline.add_stage('report', lambda html, style: downstream.append('report'), inputs=('html', 'style'))
+
+    try:
+        pipeline.run(url='https://example.com')
+        assert False, '应当报错'
+    except PipelineError as e:
+        assert e.stage == 'html' and isinstance(e.cause, RuntimeError)
+        statuses = {name: result.status for name, result in e.run.results.items()}
+        assert statuses == {'fetch': 'success', 'html': 'failed', 'style': 'success', 'report': 'cancelled'}
+        assert e.run.failed_stages() == ['html']
+    assert downstream == []
+
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add_stage('fetch', lambda url: url, inputs=('url',), outputs=('page',))
+    pipeline.add_stage('ai', fail, inputs=('page',), optional=True)
+    pipeline.add_stage('report', lambda page, ai: (page, ai), inputs=('page', 'ai'))
+    run = pipeline.run(url='https://example.com')
+    assert run.artifacts['report'] == ('https://example.com', None)
+    assert run.results['ai'].status == 'failed' and isinstance(run.results['ai'].error, RuntimeError)
+    assert run.results['report'].status == 'success'
+
+
+def test_stage_hooks_and_timings():
+    """回调在调度线程中按顺序调用，阶段结束回调先于下游阶段开始；耗时按阶段记录"""
+    events = []
+
+    def on_start(stage):
+        events.append(('start', stage.name, threading.current_thread().name))
+
+    def on_end(stage, result):
+        events.append(('end', stage.name, result.status, dict(result.outputs or {})))
+
+    pipeline = Pipeline(max_workers=2, on_stage_start=on_start, on_stage_end=on_end)
+    pipeline.add_stage('fetch', lambda url: time.sleep(0.05) or url, inputs=('url',), outputs=('page',))
+    pipeline.add_stage('html', lambda page: len(page), inputs=('page',))
+
+    run = pipeline.run(url='abc')
+    main_thread = threading.current_thread().name
+    assert events == [
+        ('start', 'fetch', main_thread),
+        ('end', 'fetch', 'success', {'page': 'abc'}),
+        ('start', 'html', main_thread),
+        ('end', 'html', 'success', {'html': 3}),
+    ]
+
+    timings = run.timings()
+    assert list(timings) == ['fetch', 'html']
+    assert timings['fetch'] >= 0.05
+    assert run.results['html'].started >= run.results['fetch'].finished
+    assert run.duration >= sum(timings.values())
+
+
+if __name__ == '__main__':
+    test_stages_run_in_dependency_order()
+    test_definition_errors()
+    test_independent_stages_run_concurrently()
+    test_failure_propagates_to_downstream_stages()
+    test_stage_hooks_and_timings()
+    print('测试成功！')
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from prompt_builder import PromptBuilder, Tokenizer
+
+
+def make_components():
+    """一个大的头图、一个导航、40个结构相同的卡片和30个各不相同的小组件"""
+    components = [
+        {'type': 'hero', 'element': 'section', 'id': 'hero', 'classes': ['hero', 'banner'],
+         'html': '<section>' + 'x' * 5000 + '</section>', 'structure_hash': 'aaaa1111',
+         'text_length': 300, 'text_sample': '欢迎来到我们的网站，这里有最新的产品和服务介绍'},
+        {'type': 'navigation', 'element': 'nav', 'classes': ['main-nav'],
+         'html': '<nav>' + 'x' * 2000 + '</nav>', 'structure_hash': 'bbbb2222',
+         'text_length': 40, 'text_sample': '首页 产品 关于我们 联系方式'},
+    ]
+    for i in range(40):
+        components.append({'type': 'card', 'element': 'div', 'classes': ['card', f'card-{i}'],
+                           'html': '<div>' + 'x' * 1200 + '</div>', 'structure_hash': 'cccc3333',
+                           'text_length': 50, 'text_sample': f'卡片标题 {i}'})
+    for i in range(30):
+        components.append({'type': 'widget', 'element': 'span', 'classes': [f'widget-{i}', 'small', 'muted'],
+                           'html': '<span>' + 'x' * (100 + i) + '</span>', 'structure_hash': f'dddd{i:04d}',
+                           'text_length': 20, 'text_sample': f'小部件说明文字 number {i} with some english words'})
+    return components
+
+
+def check_summary(tokenizer, max_tokens):
+    builder = PromptBuilder(tokenizer=tokenizer)
+    summary = builder.build_component_summary(make_components(), max_tokens)
+    lines = summary.split('\n')
+
+    assert tokenizer.count(summary) <= max_tokens
+    # 最大、最独特的组件在最前面；结构相同的卡片合并为一行并注明数量，排在独特的大组件之后
+    assert lines[0].startswith('hero <section#hero.hero.banner>')
+    assert lines[1].startswith('navigation <nav.main-nav>')
+    assert lines[2].startswith('card <div.card.card-0>') and ' x40 ' in lines[2]
+    assert sum(line.startswith('card ') for line in lines) == 1
+    # 预算不足以容纳全部小组件
+    assert sum(line.startswith('widget ') for line in lines) < 30
+    return lines
+
+
+def test_summary_fits_budget_under_real_encoder():
+    """使用tiktoken实际计数时，摘要不超过预算且保留最重要的组件"""
+    tokenizer = Tokenizer()
+    if tokenizer.encoding is None:
+        pytest.skip('tiktoken或其编码文件不可用')
+    for max_tokens in (120, 200, 400):
+        check_summary(tokenizer, max_tokens)
+
+
+def test_summary_fits_budget_with_approximate_tokenizer():
+    """近似分词时同样不超过预算，且预算越大保留的组件越多"""
+    tokenizer = Tokenizer()
+    tokenizer.encoding = None
+    small = check_summary(tokenizer, 120)
+    large = check_summary(tokenizer, 400)
+    assert len(large) > len(small)
+    assert large[:len(small) - 1] == small[:-1]
+
+
+if __name__ == '__main__':
+    test_summary_fits_budget_under_real_encoder()
+    test_summary_fits_budget_with_approximate_tokenizer()
+    print('测试成功！')
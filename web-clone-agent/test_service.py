@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import socket
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import requests
+
+# 测试不调用OpenAI，也不读写用户目录中的阶段缓存
+os.environ['OPENAI_API_KEY'] = ''
+os.environ['STAGE_CACHE'] = '0'
+
+import service as service_module
+from service import CloneService, create_server
+
+PAGE_HTML = """<html><head><title>测试站点</title><link rel="stylesheet" href="style.css"></head>
+<body>
+<nav class="navbar"><a href="/">首页</a><a href="/about">关于</a></nav>
+<main class="content">
+  <div class="card"><h2>卡片一</h2><p>第一张卡片的介绍文字，长度足够被识别为组件。</p></div>
+  <div class="card"><h2>卡片二</h2><p>第二张卡片的介绍文字，长度足够被识别为组件。</p></div>
+</main>
+<footer class="footer">版权所有 2024</footer>
+</body></html>"""
+
+PAGE_CSS = """.navbar { background: #336699; color: #ffffff }
+.card { padding: 16px; border: 1px solid #dddddd }
+.footer { color: #666666 }"""
+
+
+# 目标页面的模拟延迟（秒），保证第二个请求到达时第一个任务仍在执行
+PAGE_DELAY = 0.3
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/index.html'):
+            time.sleep(PAGE_DELAY)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _start_static_site(directory):
+    """在后台线程中启动静态文件服务器，作为克隆目标"""
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(PAGE_HTML)
+    with open(os.path.join(directory, 'style.css'), 'w', encoding='utf-8') as f:
+        f.write(PAGE_CSS)
+    handler = partial(_QuietHandler, directory=directory)
+    return _start(ThreadingHTTPServer(('127.0.0.1', 0), handler))
+
+
+def test_streaming_progress_and_single_flight():
+    """同一URL的并发请求合并为一个任务；进度以NDJSON流式返回直到任务结束"""
+    with tempfile.TemporaryDirectory() as site_dir, tempfile.TemporaryDirectory() as output_root:
+        site = _start_static_site(site_dir)
+        service = CloneService(output_root, workers=2)
+        service.start()
+        server = _start(create_server(service, '127.0.0.1:0'))
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        url = f"http://127.0.0.1:{site.server_address[1]}/index.html"
+        try:
+            first = requests.post(f"{base}/jobs", json={'url': url}).json()
+            second = requests.post(f"{base}/jobs", json={'url': url, 'priority': 3}).json()
+            assert not first['coalesced']
+            assert second['coalesced'] and second['id'] == first['id']
+
+            with requests.get(f"{base}/jobs/{first['id']}/events", stream=True, timeout=60) as response:
+                events = [json.loads(line) for line in response.iter_lines() if line]
+
+            names = [event['event'] for event in events]
+            assert names[0] == 'queued' and names[-1] == 'finished'
+            assert 'coalesced' in names
+            stages = {event['stage'] for event in events if event['event'] == 'stage'}
+            assert {'fetch', 'html', 'styles', 'document'} <= stages
+            assert events[-1]['status'] == 'success'
+            assert os.path.exists(os.path.join(events[-1]['output_dir'], 'index.md'))
+
+            # 任务结束后同一URL再次提交会新建任务，可以直接以流的形式等待结果
+            with requests.post(f"{base}/jobs?stream=1", json={'url': url}, stream=True, timeout=60) as response:
+                streamed = [json.loads(line) for line in response.iter_lines() if line]
+            assert streamed[0]['event'] == 'accepted' and streamed[0]['id'] != first['id']
+            assert streamed[-1]['event'] == 'finished' and streamed[-1]['status'] == 'success'
+
+            assert requests.get(f"{base}/health").json()['jobs'] == 2
+
+            # 每个任务的追踪包含阶段和子步骤的区间，指标累计了全部任务
+            trace = requests.get(f"{base}/jobs/{first['id']}/trace").json()
+            spans = {event['name']: event for event in trace['traceEvents'] if event['ph'] == 'X'}
+            assert {'clone', 'stage.fetch', 'http.get', 'css.parse', 'html.components', 'doc.write'} <= set(spans)
+            assert spans['css.parse']['args']['bytes'] == len(PAGE_CSS.encode('utf-8'))
+
+            metrics = requests.get(f"{base}/metrics").text
+            assert 'webclone_span_duration_seconds_count{span="stage.fetch",category="stage"} 2' in metrics
+            assert 'webclone_jobs_total{status="success"} 2' in metrics
+            assert 'webclone_queued_jobs 0' in metrics
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.stop()
+            site.shutdown()
+
+
+def test_priority_order_and_unix_socket():
+    """优先级高的任务先执行，合并请求可以提升排队任务的优先级；服务也可以监听Unix套接字"""
+    with tempfile.TemporaryDirectory() as site_dir, tempfile.TemporaryDirectory() as output_root:
+        site = _start_static_site(site_dir)
+        page = f"http://127.0.0.1:{site.server_address[1]}/index.html"
+        service = CloneService(output_root, workers=1)
+        try:
+            # 启动工作线程之前提交，保证三个任务同时在队列中
+            low, _ = service.submit(f"{page}?low", priority=0)
+            high, _ = service.submit(f"{page}?high", priority=5)
+            bumped, coalesced = service.submit(f"{page}?low", priority=10)
+            assert coalesced and bumped is low and low.priority == 10
+            normal, _ = service.submit(f"{page}?normal", priority=1)
+
+            service.start()
+            for job in (low, high, normal):
+                assert job.wait(60)
+                assert job.status == 'success'
+            assert low.started < high.started < normal.started
+
+            socket_path = os.path.join(output_root, 'service.sock')
+            server = _start(create_server(service, f"unix:{socket_path}"))
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(socket_path)
+                    client.sendall(b'GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+                    response = b''
+                    while chunk := client.recv(4096):
+                        response += chunk
+                head, _, body = response.partition(b'\r\n\r\n')
+                assert head.startswith(b'HTTP/1.1 200')
+                assert json.loads(body)['jobs'] == 3
+            finally:
+                server.shutdown()
+                server.server_close()
+        finally:
+            service.stop()
+            site.shutdown()
+
+
+def test_finished_jobs_are_evicted():
+    """已结束的任务只保留最近的 max_finished_jobs 个，保留的任务只有导出的追踪事件，不再持有追踪器"""
+    with tempfile.TemporaryDirectory() as site_dir, tempfile.TemporaryDirectory() as output_root:
+        site = _start_static_site(site_dir)
+        page = f"http://127.0.0.1:{site.server_address[1]}/index.html"
+        service = CloneService(output_root, workers=1, max_finished_jobs=2)
+        try:
+            service.start()
+            jobs = []
+            for index in range(3):
+                job, _ = service.submit(f"{page}?{index}")
+                assert job.wait(60) and job.status == 'success'
+                jobs.append(job)
+
+            deadline = time.monotonic() + 10
+            while service.get(jobs[0].id) is not None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert service.get(jobs[0].id) is None
+            assert [job.id for job in service.jobs()] == [jobs[1].id, jobs[2].id]
+            assert service.stats()['jobs'] == 2
+            for job in jobs:
+                assert job.tracer is None
+                assert any(event['name'] == 'clone' for event in job.trace_events)
+
+            # 超过保留时间的任务在下次提交时删除
+            service.finished_job_ttl = 0
+            job, _ = service.submit(f"{page}?last")
+            assert [queued.id for queued in service.jobs()] == [job.id]
+            assert job.wait(60)
+        finally:
+            service.stop()
+            site.shutdown()
+
+
+def test_worker_startup_failure():
+    """工作线程全部初始化失败时 start() 报错；不等待预热时排队和之后提交的任务直接失败；统计只计入可用的工作线程"""
+    original = service_module.WorkerBundle
+    created = []
+
+    def failing_bundle(config):
+        created.append(config)
+        if len(created) > 1 or config.get('fail_all'):
+            raise RuntimeError('模拟的初始化失败')
+        return original(config)
+
+    service_module.WorkerBundle = lambda config: failing_bundle(dict(config, fail_all=True))
+    try:
+        with tempfile.TemporaryDirectory() as output_root:
+            service = CloneService(output_root, workers=2)
+            try:
+                service.start()
+                assert False, '应当报错'
+            except RuntimeError as e:
+                assert '模拟的初始化失败' in str(e)
+
+        with tempfile.TemporaryDirectory() as output_root:
+            service = CloneService(output_root, workers=2)
+            try:
+                queued, _ = service.submit('http://127.0.0.1:1/queued')
+                service.start(wait_ready=False)
+                assert queued.wait(10) and queued.status == 'failed'
+                assert '没有可用的工作线程' in queued.error
+                late, _ = service.submit('http://127.0.0.1:1/late')
+                assert late.done and late.status == 'failed'
+                stats = service.stats()
+                assert stats['status'] == 'error' and stats['workers'] == 0 and stats['queued'] == 0
+                assert 'webclone_workers 0' in service.render_metrics()
+            finally:
+                service.stop()
+
+        # 部分工作线程失败时使用其余的工作线程
+        created.clear()
+        service_module.WorkerBundle = failing_bundle
+        with tempfile.TemporaryDirectory() as output_root:
+            service = CloneService(output_root, workers=2)
+            try:
+                service.start()
+                stats = service.stats()
+                assert stats['status'] == 'ok' and stats['workers'] == 1 and stats['configured_workers'] == 2
+            finally:
+                service.stop()
+    finally:
+        service_module.WorkerBundle = original
+
+
+if __name__ == '__main__':
+    test_streaming_progress_and_single_flight()
+    test_priority_order_and_unix_socket()
+    test_finished_jobs_are_evicted()
+    test_worker_startup_failure()
+    print('测试成功！')
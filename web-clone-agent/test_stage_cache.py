@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from fixture_site import FixtureServer
+from agent import CloneAgent
+from web_scraper import WebScraper
+from html_analyzer import HtmlAnalyzer
+from style_extractor import StyleExtractor
+from website_document_generator import WebsiteDocumentGenerator
+
+HTML = (
+    '<html><head><title>缓存测试</title><link rel="stylesheet" href="style.css"></head><body>'
+    '<nav class="navbar"><a href="/">首页</a><a href="/about">关于</a></nav>'
+    '<div class="card"><h2>卡片</h2><p>卡片的介绍文字，长度足够被识别为组件。</p></div>'
+    '<footer class="footer">版权所有 2024</footer>'
+    '</body></html>'
+).encode('utf-8')
+
+
+def test_unchanged_page_hits_cache_and_css_change_invalidates_downstream():
+    """同一页面第二次克隆时所有可缓存阶段命中缓存；只修改CSS时HTML分析和聚类仍然命中"""
+    saved = {name: os.environ.get(name) for name in ('STAGE_CACHE', 'STAGE_CACHE_DIR', 'OPENAI_API_KEY')}
+    server = FixtureServer()
+    server.add_site('site', {'index.html': HTML, 'style.css': b'.card { color: #ff0000; padding: 8px; }'})
+
+    with tempfile.TemporaryDirectory() as work_dir, server:
+        scraper = WebScraper(temp_dir=os.path.join(work_dir, 'temp'), keep_alive=True)
+        os.environ.update(STAGE_CACHE='1', STAGE_CACHE_DIR=os.path.join(work_dir, 'cache'), OPENAI_API_KEY='')
+        try:
+            agent = CloneAgent(scraper, HtmlAnalyzer(), StyleExtractor(), None, max_workers=2, verbose=False)
+
+            def clone(name):
+                output_dir = os.path.join(work_dir, name)
+                agent.document_generator = WebsiteDocumentGenerator(output_dir=output_dir, html_workers=1)
+                assert agent.clone_website(server.url('site/index.html'), output_dir)
+                return {stage: result.cache_hit for stage, result in agent.last_run.results.items()}, output_dir
+
+            first, first_dir = clone('first')
+            assert not any(first.values())
+            assert agent.stage_cache.hits == 0
+
+            # 页面不变：抓取阶段总是执行，其余阶段（包括文档）全部命中，文档文件写入新的输出目录
+            second, second_dir = clone('second')
+            assert second == dict.fromkeys(first, True) | {'fetch': False}
+            assert agent.stage_cache.hits == sum(second.values())
+            assert sorted(os.listdir(second_dir)) == sorted(os.listdir(first_dir))
+
+            # 只修改CSS：依赖CSS的阶段及其下游重新执行
+            server.files['site/style.css'] = b'.card { color: #0000ff; padding: 8px; }'
+            third, _ = clone('third')
+            assert third == {'fetch': False, 'html': True, 'palette': False, 'styles': False, 'cluster': True,
+                             'cascade': False, 'audit': False, 'document': False}
+        finally:
+            scraper.shutdown()
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+if __name__ == '__main__':
+    test_unchanged_page_hits_cache_and_css_change_invalidates_downstream()
+    print('测试成功！')
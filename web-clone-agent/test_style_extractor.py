@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+from style_extractor import StyleExtractor
+
+
+def _make_page(index):
+    """生成一个测试页面（每个页面的类名、颜色和规则数量都不同）"""
+    html = (
+        f'<html><body>'
+        f'<nav class="navbar nav-{index}"><a href="/a">首页</a></nav>'
+        f'<div class="card card-{index}" style="margin: {index}px">卡片内容 {index}</div>'
+        f'<footer class="footer">版权信息 {index}</footer>'
+        f'</body></html>'
+    )
+    rules = [
+        f'.card-{index} {{ color: #{index % 10}{index % 10}{index % 10}; padding: {index}px }}',
+        f'.nav-{index} a {{ background: url(img/{index}.png) }}',
+        '.footer { border-top: 1px solid rgb(10, 20, 30) }',
+        '.unused-rule { color: red }',
+    ]
+    rules.extend(f'.generated-{index}-{i} {{ width: {i}px }}' for i in range(index % 7))
+    css_content = {
+        'main.css': '\n'.join(rules),
+        'inline_styles.css': f'body {{ font-family: "Font {index}", sans-serif }}'
+    }
+    return list(css_content), css_content, html, f'https://example.com/page/{index}/'
+
+
+def _normalize(result):
+    """把提取结果转换为普通数据结构，便于比较"""
+    return {
+        'colors': result['colors'],
+        'component_styles': {
+            component: {selector: dict(block) for selector, block in selectors.items()}
+            for component, selectors in result['component_styles'].items()
+        },
+        'global_styles': {selector: dict(block) for selector, block in result['global_styles'].items()},
+        'rules': [(rule.selector, rule.source, dict(rule.declarations)) for rule in result['rules']],
+        'file_stats': result['file_stats'],
+        'css_usage': result['css_usage'],
+    }
+
+
+def test_shared_extractor_concurrent_matches_sequential():
+    """同一个StyleExtractor实例在线程池中并发使用时，结果应与顺序执行完全一致"""
+    extractor = StyleExtractor()
+    pages = [_make_page(i) for i in range(64)]
+
+    sequential = [_normalize(extractor.extract_styles(*page)) for page in pages]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        concurrent = list(executor.map(lambda page: _normalize(extractor.extract_styles(*page)), pages))
+
+    assert concurrent == sequential
+    # 每个页面的结果只包含自己的规则
+    for index, result in enumerate(concurrent):
+        assert f'.card-{index}' in result['component_styles']['card']
+        assert result['css_usage']['main.css']['rules_removed'] >= 1
+
+
+def test_css_usage_counts_at_rules_as_kept():
+    """@规则不参与裁剪，其字节单独统计并计入保留的字节"""
+    media = '@media (max-width: 600px) { .unused-in-media { color: red } }'
+    css = '@import url("base.css");\n.card { color: blue }\n.unused { color: red }\n' + media
+    html = '<html><body><div class="card">卡片</div></body></html>'
+    result = StyleExtractor().extract_styles(['main.css'], {'main.css': css}, html, 'https://example.com/')
+
+    usage = result['css_usage']['main.css']
+    assert usage['at_rule_bytes'] == len('@import url("base.css");') + len(media)
+    assert (usage['rules_total'], usage['rules_removed']) == (2, 1)
+    assert usage['removed_bytes'] == len('.unused { color: red }')
+    assert usage['kept_bytes'] == usage['original_bytes'] - usage['removed_bytes']
+
+
+def test_rule_index_only_covers_parsed_rules():
+    """按属性和颜色的查询、属性统计只包括声明已被解析的规则，查询本身不解析规则；之后解析的规则在下次查询时补充"""
+    css = '.card { color: #336699; padding: 4px }\n.footer { color: #336699 }\np { margin: 0 }'
+    html = '<html><body><div class="card">卡片</div><footer class="footer">底部</footer><p>文字</p></body></html>'
+    result = StyleExtractor().extract_styles(['main.css'], {'main.css': css}, html, 'https://example.com/')
+    store = result['rule_store']
+    card, footer, paragraph = store.rules
+
+    assert store.property_counts() == {}
+    assert not any(rule.is_materialized for rule in store.rules)
+
+    footer.declarations
+    assert store.property_counts() == {'color': 1}
+    assert store.rules_with_color('#336699') == [1]
+
+    # 之后解析的规则补充到索引中，查询结果按源码顺序排列
+    card.declarations
+    assert store.property_counts() == {'color': 2, 'padding': 1}
+    assert store.rules_with_color('#336699') == [0, 1]
+    assert store.properties_using_color('#336699') == {'color': 2}
+    assert store.rules_with_property('margin') == [] and not paragraph.is_materialized
+
+
+if __name__ == '__main__':
+    test_shared_extractor_concurrent_matches_sequential()
+    test_css_usage_counts_at_rules_as_kept()
+    test_rule_index_only_covers_parsed_rules()
+    print('测试成功！')
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+from template_engine import TemplateEnvironment, TemplateError
+from vue_generator import VueGenerator
+
+TEMPLATE = """# {{ title }}
+
+{% for i, item in enumerate(items, 1) %}
+  {% if item['count'] > 1 %}
+{{ i }}. {{ item['name'] }} x{{ item['count'] }}
+  {% else %}
+{{ i }}. {{ item['name'] }}
+  {% endif %}
+{% endfor %}
+{# 注释不出现在输出中 #}
+<h1>{% raw %}{{ title }}{% endraw %}</h1>
+{{ ', '.join(names) -}}
+  !"""
+
+
+def test_template_syntax_and_whitespace():
+    """只包含语句标签的行不出现在输出中；raw块原样输出；未定义的变量在输出时报错"""
+    env = TemplateEnvironment()
+    template = env.from_string(TEMPLATE)
+    output = template.render(title='清单', items=[{'name': 'a', 'count': 2}, {'name': 'b', 'count': 1}],
+                             names=['x', 'y'])
+    assert output == "# 清单\n\n1. a x2\n2. b\n<h1>{{ title }}</h1>\nx, y!"
+
+    assert env.from_string("{% if missing %}有{% else %}无{% endif %}").render() == '无'
+    for source in ("{{ missing }}", "{% if x %}未结束", "{% endfor %}", "{{ _private }}"):
+        try:
+            env.from_string(source).render()
+        except TemplateError:
+            continue
+        raise AssertionError(f"应该报错: {source}")
+
+
+def test_template_dir_overrides_builtin_templates():
+    """自定义模板目录中的同名模板覆盖内置模板，其余模板仍使用内置版本"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, 'templates', 'vue'))
+        with open(os.path.join(temp_dir, 'templates', 'vue', 'README.md'), 'w', encoding='utf-8') as f:
+            f.write("# {{ '自定义' }}\n")
+
+        output_dir = os.path.join(temp_dir, 'project')
+        generator = VueGenerator(output_dir, template_dir=os.path.join(temp_dir, 'templates'))
+        analysis = {'components': [{'type': 'card', 'html': '<div class="card">一</div>'},
+                                   {'type': 'card', 'html': '<div class="card">二</div>'}]}
+        assert generator.generate_project(analysis, {}, {'title': '测试'})
+
+        with open(os.path.join(output_dir, 'README.md'), encoding='utf-8') as f:
+            assert f.read() == "# 自定义\n"
+        with open(os.path.join(output_dir, 'src', 'components', 'Card.vue'), encoding='utf-8') as f:
+            card = f.read()
+        # 同一类型的组件写入同一个文件，内容是最后一个组件
+        assert '二' in card and '一' not in card and "name: 'Card'" in card
+        with open(os.path.join(output_dir, 'src', 'views', 'HomeView.vue'), encoding='utf-8') as f:
+            assert '<h1>{{ title }}</h1>' in f.read()
+
+
+if __name__ == '__main__':
+    test_template_syntax_and_whitespace()
+    test_template_dir_overrides_builtin_templates()
+    print('测试成功！')
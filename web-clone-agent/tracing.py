@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+追踪与指标模块 (tracing.py)
+------------------------
+本模块为克隆流程提供结构化的计时信息：嵌套的追踪区间（span）和聚合指标。
+
+主要功能:
+1. 追踪区间：每个流水线阶段及其子步骤（每个资源的下载、每个CSS文件的解析、
+   每个文档的写入）记录开始时间、耗时、所在线程，以及字节数、条目数等属性
+2. 导出为Chrome追踪格式（JSON），可以在 chrome://tracing 或 Perfetto 中查看
+3. 指标注册表：按区间名称聚合耗时直方图、字节数和条目数，
+   以Prometheus文本格式导出（服务模式的 GET /metrics）
+
+工作原理:
+当前的追踪器和父区间保存在 contextvars 中，被追踪的代码只需调用模块级的 span()，
+不需要传递追踪器参数；没有激活追踪器时 span() 返回一个空操作对象，开销可以忽略。
+线程池不会自动传递 contextvars，提交任务时需要用 contextvars.copy_context().run 包装
+（流水线已经这样做）。
+
+使用示例:
+    tracer = Tracer()
+    with tracer.activate():
+        with span('css.parse', 'css', file='main.css') as s:
+            sheet = parse(css_text)
+            s.set(bytes=len(css_text), items=len(sheet.rules))
+    tracer.write_chrome_trace('trace.json')
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import contextvars
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 当前激活的 (追踪器, 父区间)
+_active = contextvars.ContextVar('web_clone_trace', default=None)
+
+# 计入指标计数器的区间属性
+COUNTED_ATTRS = ('bytes', 'items')
+
+# 耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 指标名前缀
+METRIC_PREFIX = 'webclone'
+
+
+class Span:
+    """
+    一个追踪区间（上下文管理器）
+
+    属性中的 bytes 和 items 会被指标注册表累加。
+    """
+
+    __slots__ = ('tracer', 'name', 'category', 'parent', 'attrs', 'start', 'end', 'thread_id', '_token')
+
+    def __init__(self, tracer, name, category, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.parent = parent
+        self.attrs = attrs
+        self.start = None
+        self.end = None
+        self.thread_id = None
+        self._token = None
+
+    def set(self, **attrs):
+        """设置区间属性"""
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, name, amount=1):
+        """累加数值属性（如 bytes、items）"""
+        self.attrs[name] = self.attrs.get(name, 0) + amount
+        return self
+
+    @property
+    def duration(self):
+        """耗时（秒），未结束时为0"""
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self._token = _active.set((self.tracer, self))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.perf_counter()
+        _active.reset(self._token)
+        self._token = None
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def __repr__(self):
+        return f"Span({self.name!r}, duration={self.duration:.4f})"
+
+
+class _NullSpan:
+    """没有激活追踪器时使用的空操作区间"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        return self
+
+    def add(self, name, amount=1):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category='step', **attrs):
+    """
+    在当前追踪器中创建区间
+
+    参数:
+        name (str): 区间名称（如 'stage.fetch'、'http.get'），指标按名称聚合，
+                    不要把URL、文件名等放进名称，应作为属性
+        category (str): 类别（stage / network / html / css / document 等）
+        **attrs: 区间属性
+
+    返回:
+        Span: 区间上下文管理器；没有激活追踪器时返回空操作对象
+    """
+    active = _active.get()
+    if active is None:
+        return _NULL_SPAN
+    tracer, parent = active
+    return Span(tracer, name, category, parent, attrs)
+
+
+def current_tracer():
+    """当前激活的追踪器，没有时返回None"""
+    active = _active.get()
+    return active[0] if active is not None else None
+
+
+class _Activation:
+    """Tracer.activate 返回的上下文管理器"""
+
+    __slots__ = ('tracer', '_token')
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active.set((self.tracer, None))
+        return self.tracer
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active.reset(self._token)
+        return False
+
+
+class Tracer:
+    """
+    收集一次执行（一个URL的克隆）中的全部区间
+
+    区间可以在多个线程中同时结束，记录时加锁。
+    """
+
+    def __init__(self, name='web-clone-agent'):
+        """
+        初始化追踪器
+
+        参数:
+            name (str): 追踪名称（Chrome追踪中显示为进程名）
+        """
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+        # 墙上时间与 perf_counter 的对应关系，使不同进程的追踪可以合并到同一时间轴
+        self._epoch = time.time()
+        self._origin = time.perf_counter()
+        self._thread_names = {}
+
+    def activate(self):
+        """
+        在当前上下文中激活追踪器
+
+        返回:
+            上下文管理器，退出时恢复之前的追踪器
+        """
+        return _Activation(self)
+
+    def _finish(self, finished):
+        with self._lock:
+            self.spans.append(finished)
+            if finished.thread_id not in self._thread_names:
+                self._thread_names[finished.thread_id] = threading.current_thread().name
+
+    def _timestamp_us(self, value):
+        return (self._epoch + (value - self._origin)) * 1e6
+
+    def chrome_events(self, pid=None):
+        """
+        导出为Chrome追踪事件
+
+        参数:
+            pid (int): 进程号（合并多个追踪时区分不同的URL，默认为当前进程号）
+
+        返回:
+            list: 追踪事件（完整事件 ph=X 和进程/线程名元数据事件 ph=M）
+        """
+        pid = os.getpid() if pid is None else pid
+        with self._lock:
+            spans = list(self.spans)
+            thread_names = dict(self._thread_names)
+
+        # 线程号映射为从1开始的小整数，便于查看
+        tids = {}
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': self.name}}]
+        for thread_id, thread_name in thread_names.items():
+            tids[thread_id] = len(tids) + 1
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tids[thread_id],
+                           'args': {'name': thread_name}})
+
+        for item in sorted(spans, key=lambda s: s.start):
+            events.append({
+                'name': item.name,
+                'cat': item.category,
+                'ph': 'X',
+                'ts': round(self._timestamp_us(item.start), 1),
+                'dur': round(item.duration * 1e6, 1),
+                'pid': pid,
+                'tid': tids.get(item.thread_id, 0),
+                'args': _json_safe(item.attrs)
+            })
+        return events
+
+    def write_chrome_trace(self, path):
+        """
+        把追踪写入Chrome追踪格式的JSON文件
+
+        参数:
+            path (str): 文件路径
+        """
+        write_chrome_trace(path, self.chrome_events())
+
+    def summary(self):
+        """
+        按区间名称汇总
+
+        返回:
+            dict: 名称 -> {'count', 'total', 'max', 'bytes', 'items'}，按总耗时降序排列
+        """
+        with self._lock:
+            spans = list(self.spans)
+        totals = {}
+        for item in spans:
+            entry = totals.setdefault(item.name, {'count': 0, 'total': 0.0, 'max': 0.0, 'bytes': 0, 'items': 0})
+            entry['count'] += 1
+            entry['total'] += item.duration
+            entry['max'] = max(entry['max'], item.duration)
+            for attr in COUNTED_ATTRS:
+                value = item.attrs.get(attr)
+                if isinstance(value, (int, float)):
+                    entry[attr] += value
+        return dict(sorted(totals.items(), key=lambda pair: pair[1]['total'], reverse=True))
+
+
+def _json_safe(attrs):
+    """区间属性转换为可以写入JSON的值"""
+    safe = {}
+    for key, value in attrs.items():
+        if value is None or isinstance(value, (bool, int, float, str)):
+            safe[key] = value
+        else:
+            safe[key] = str(value)
+    return safe
+
+
+def write_chrome_trace(path, events):
+    """
+    把追踪事件写入JSON文件（可以是多个追踪器合并后的事件）
+
+    参数:
+        path (str): 文件路径
+        events (list): Chrome追踪事件
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    logger.info(f"追踪已写入: {path}（{len(events)} 个事件）")
+
+
+class MetricsRegistry:
+    """
+    按区间名称聚合的指标（服务模式中跨任务累计）
+
+    区间名称是有限集合，作为指标标签不会造成标签基数膨胀。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        初始化注册表
+
+        参数:
+            buckets (tuple): 耗时直方图的桶上界（秒）
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # (名称, 类别) -> {'counts': 每个桶的计数, 'sum', 'count', 'bytes', 'items'}
+        self._spans = {}
+        # (指标名, 标签元组) -> 值
+        self._counters = {}
+
+    def observe(self, tracer):
+        """
+        累加一个追踪器中的全部区间
+
+        参数:
+            tracer (Tracer): 已结束的追踪
+        """
+        with tracer._lock:
+            spans = list(tracer.spans)
+        with self._lock:
+            for item in spans:
+                entry = self._spans.get((item.name, item.category))
+                if entry is None:
+                    entry = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0, 'bytes': 0, 'items': 0}
+                    self._spans[(item.name, item.category)] = entry
+                duration = item.duration
+                entry['counts'][bisect.bisect_left(self.buckets, duration)] += 1
+                entry['sum'] += duration
+                entry['count'] += 1
+                for attr in COUNTED_ATTRS:
+                    value = item.attrs.get(attr)
+                    if isinstance(value, (int, float)):
+                        entry[attr] += value
+
+    def inc(self, name, amount=1, **labels):
+        """
+        累加计数器
+
+        参数:
+            name (str): 指标名（不含前缀）
+            amount (float): 增量
+            **labels: 标签
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self, gauges=None):
+        """
+        以Prometheus文本格式导出
+
+        参数:
+            gauges (dict): 额外的瞬时值，指标名（不含前缀） -> (说明, 值)
+
+        返回:
+            str: 文本格式的指标
+        """
+        lines = []
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        if spans:
+            name = f"{METRIC_PREFIX}_span_duration_seconds"
+            lines.append(f"# HELP {name} Duration of traced spans.")
+            lines.append(f"# TYPE {name} histogram")
+            for (span_name, category), entry in spans:
+                labels = f'span="{_escape(span_name)}",category="{_escape(category)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry['counts']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+                lines.append(f"{name}_sum{{{labels}}} {entry['sum']:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {entry['count']}")
+
+            for attr, help_text in (('bytes', 'Bytes processed by traced spans.'),
+                                    ('items', 'Items processed by traced spans.')):
+                name = f"{METRIC_PREFIX}_span_{attr}_total"
+                rows = [(key, entry[attr]) for key, entry in spans if entry[attr]]
+                if not rows:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (span_name, category), value in rows:
+                    lines.append(f'{name}{{span="{_escape(span_name)}",category="{_escape(category)}"}} {value}')
+
+        declared = set()
+        for (counter_name, labels), value in counters:
+            name = f"{METRIC_PREFIX}_{counter_name}"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        for gauge_name, (help_text, value) in (gauges or {}).items():
+            name = f"{METRIC_PREFIX}_{gauge_name}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    """转义Prometheus标签值"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
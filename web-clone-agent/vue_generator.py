@@ -16,6 +16,8 @@ Vue项目生成器模块 (vue_generator.py)
 工作原理:
 模块分析HTML和CSS的结构信息，将其转换为Vue项目的各个部分，生成可运行的Vue应用。
 生成的项目符合Vue最佳实践，包含响应式设计和组件化结构。
+项目文件由 templates/vue/ 中预编译的模板渲染（见 template_engine.py），每个文件渲染完成后一次写入；
+内容与上次生成相同的文件不重写，上次生成而本次没有生成的文件被删除（见 output_writer.py）。
 """
 
 import os
@@ -26,6 +28,10 @@ import logging
 import jsbeautifier
 from tqdm import tqdm
 
+from tracing import span
+from output_writer import OutputWriter
+from template_engine import TemplateEnvironment
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -37,15 +43,19 @@ class VueGenerator:
     包括组件、视图、路由、状态管理和样式。
     """
     
-    def __init__(self, output_dir="vue-project"):
+    def __init__(self, output_dir="vue-project", template_dir=None):
         """
         初始化Vue项目生成器
         
         参数:
             output_dir (str): 生成的Vue项目输出目录
+            template_dir (str): 自定义模板目录，其中的 vue/ 下的同名模板覆盖内置模板
         """
         self.output_dir = output_dir
         
+        # 项目文件模板
+        self.templates = TemplateEnvironment(template_dir)
+        
         # JS代码格式化选项，用于生成美观的代码
         self.js_options = jsbeautifier.default_options()
         self.js_options.indent_size = 2
@@ -65,6 +75,10 @@ class VueGenerator:
             "sass": "^1.59.3",
             "vite": "^4.2.0"
         }
+        
+        # generate_project 执行期间的输出写入器，以及最近一次生成的写入统计（见 OutputWriter.stats）
+        self._writer = None
+        self.last_write_stats = None
     
     def generate_project(self, html_analysis, style_analysis, page_meta):
         """
@@ -82,27 +96,36 @@ class VueGenerator:
         """
         logger.info(f"开始生成Vue项目到目录: {self.output_dir}")
         
+        self.last_write_stats = None
+        self._writer = OutputWriter(self.output_dir)
         try:
             # 第1步: 创建项目目录结构
-            self._create_project_structure()
+            with span('vue.structure', 'document'):
+                self._create_project_structure()
             
             # 第2步: 生成组件
-            self._generate_components(html_analysis, style_analysis)
+            with span('vue.components', 'document', items=len(html_analysis.get('components', []))):
+                self._generate_components(html_analysis, style_analysis)
             
             # 第3步: 生成视图页面
-            self._generate_views(html_analysis, style_analysis, page_meta)
+            with span('vue.views', 'document'):
+                self._generate_views(html_analysis, style_analysis, page_meta)
             
             # 第4步: 配置路由
-            self._generate_router()
+            with span('vue.router', 'document'):
+                self._generate_router()
             
             # 第5步: 配置状态管理
-            self._generate_store()
+            with span('vue.store', 'document'):
+                self._generate_store()
             
             # 第6步: 生成主要文件(main.js, App.vue等)
-            self._generate_main_files(page_meta)
+            with span('vue.main_files', 'document'):
+                self._generate_main_files(page_meta)
             
             # 第7步: 生成项目配置文件(package.json, vite.config.js等)
-            self._generate_config_files()
+            with span('vue.config_files', 'document'):
+                self._generate_config_files()
             
             # 第8步: 复制样式文件(如果存在)
             if os.path.exists(os.path.join("output", "styles")):
@@ -112,12 +135,44 @@ class VueGenerator:
                     dirs_exist_ok=True
                 )
             
+            # 删除上次生成而本次没有生成的文件
+            self.last_write_stats = self._writer.finish()
+            logger.info(f"写入 {self.last_write_stats['written']} 个文件，"
+                        f"跳过 {self.last_write_stats['skipped']} 个未变化的文件，"
+                        f"删除 {self.last_write_stats['deleted']} 个过期文件")
+            
             logger.info("✅ Vue项目生成成功!")
             return True
         
         except Exception as e:
             logger.error(f"❌ 生成Vue项目时出错: {str(e)}")
+            # 保存已写入文件的清单，过期文件留到下次成功生成时删除
+            self._writer.finish(delete_stale=False)
             return False
+        
+        finally:
+            self._writer = None
+    
+    def _write_output(self, path, content):
+        """
+        写入项目文件（内容与上次生成相同时跳过，见 output_writer.py）
+        
+        参数:
+            path (str): 文件路径（位于输出目录中）
+            content (str): 文件内容
+        """
+        self._writer.write(os.path.relpath(path, self.output_dir), content)
+    
+    def _render_output(self, path, template, **context):
+        """
+        用 vue/ 下的模板渲染项目文件并写入
+        
+        参数:
+            path (str): 文件路径
+            template (str): 模板文件名
+            **context: 模板变量
+        """
+        self._write_output(path, self.templates.render(f"vue/{template}", context))
     
     def _create_project_structure(self):
         """
@@ -199,22 +254,28 @@ class VueGenerator:
             )
         
         # 生成识别出的其他组件
+        # 同一类型的组件写入同一个文件，只渲染该类型的最后一个组件（与依次覆盖写入的结果相同）
+        content_components = {}
         for component in html_analysis.get('components', []):
             # 只生成特定类型的组件
             if 'type' in component:
                 component_name = component['type'].capitalize()
                 if component_name.lower() in ['card', 'navigation', 'form', 'table', 'button', 'modal']:
-                    # 获取组件HTML内容 (优先使用html字段，否则使用sample字段)
-                    html_content = component.get('html', component.get('sample', ''))
-                    
-                    self._create_component(
-                        component_name,
-                        html_content,
-                        style_analysis,
-                        component_name.lower()
-                    )
+                    content_components[component_name] = component
+        
+        for component_name, component in content_components.items():
+            # 获取组件HTML内容 (优先使用html字段，否则使用sample字段)
+            html_content = component.get('html', component.get('sample', ''))
+            
+            self._create_component(
+                component_name,
+                html_content,
+                style_analysis,
+                component_name.lower(),
+                component.get('computed_styles')
+            )
     
-    def _create_component(self, name, html_content, style_analysis, component_type):
+    def _create_component(self, name, html_content, style_analysis, component_type, computed_styles=None):
         """
         创建单个Vue组件文件
         
@@ -225,6 +286,7 @@ class VueGenerator:
             html_content (str): 组件的HTML内容
             style_analysis (dict): 样式分析结果
             component_type (str): 组件类型(layout, card, navigation等)
+            computed_styles (dict): 样式层叠引擎计算出的组件根元素生效样式
         """
         # 格式化组件名称为PascalCase (Vue组件命名规范)
         formatted_name = ''.join(word.capitalize() for word in re.split(r'[-_\s]', name))
@@ -237,93 +299,10 @@ class VueGenerator:
             # 如果没有HTML内容，创建一个简单的占位符
             html_content = f'<div><!-- {formatted_name} 组件 --></div>'
         
-        # 创建Vue组件文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            # 1. 组件模板部分 (template)
-            f.write('<template>\n')
-            f.write(f'  <div class="v-{component_type.lower()}">\n')
-            
-            # 清理HTML并进行缩进
-            cleaned_html = self._clean_html_for_vue(html_content)
-            indented_html = '\n'.join(f'    {line}' for line in cleaned_html.split('\n'))
-            f.write(indented_html)
-            
-            f.write('\n  </div>\n')
-            f.write('</template>\n\n')
-            
-            # 2. 组件脚本部分 (script)
-            f.write('<script>\nexport default {\n')
-            f.write(f'  name: \'{formatted_name}\',\n')
-            f.write('  props: {\n')
-            
-            # 根据组件类型添加适当的props
-            if component_type.lower() == 'card':
-                f.write('    title: {\n      type: String,\n      default: \'\'\n    },\n')
-                f.write('    content: {\n      type: String,\n      default: \'\'\n    },\n')
-                f.write('    image: {\n      type: String,\n      default: \'\'\n    }\n')
-            elif component_type.lower() == 'navigation':
-                f.write('    items: {\n      type: Array,\n      default: () => []\n    }\n')
-            elif component_type.lower() == 'table':
-                f.write('    headers: {\n      type: Array,\n      default: () => []\n    },\n')
-                f.write('    items: {\n      type: Array,\n      default: () => []\n    }\n')
-            elif component_type.lower() == 'form':
-                f.write('    formData: {\n      type: Object,\n      default: () => ({})\n    },\n')
-                f.write('    submitUrl: {\n      type: String,\n      default: \'\'\n    }\n')
-            elif component_type.lower() == 'button':
-                f.write('    text: {\n      type: String,\n      default: \'按钮\'\n    },\n')
-                f.write('    type: {\n      type: String,\n      default: \'primary\'\n    }\n')
-            else:
-                f.write('    // 自定义props\n')
-            
-            f.write('  },\n')
-            
-            # 组件数据
-            f.write('  data() {\n    return {\n      // 组件数据\n    }\n  },\n')
-            
-            # 组件方法
-            f.write('  methods: {\n')
-            # 为特定组件添加方法
-            if component_type.lower() == 'form':
-                f.write('    submitForm() {\n')
-                f.write('      // 表单提交逻辑\n')
-                f.write('      this.$emit(\'submit\', this.formData);\n')
-                f.write('    },\n')
-                f.write('    resetForm() {\n')
-                f.write('      // 重置表单逻辑\n')
-                f.write('    }\n')
-            elif component_type.lower() == 'navigation':
-                f.write('    navigate(item) {\n')
-                f.write('      // 导航逻辑\n')
-                f.write('    }\n')
-            else:
-                f.write('    // 组件方法\n')
-            f.write('  }\n')
-            f.write('}\n</script>\n\n')
-            
-            # 3. 组件样式部分 (style)
-            f.write('<style lang="scss" scoped>\n')
-            # 导入相关样式
-            f.write(f'@import "@/assets/styles/{component_type.lower()}.scss";\n')
-            
-            # 添加特定组件样式
-            f.write('\n// 组件特定样式\n')
-            f.write(f'.v-{component_type.lower()} {{\n')
-            
-            # 检查是否有此组件的样式
-            if component_type.lower() in style_analysis.get('component_styles', {}):
-                # 提取部分样式规则
-                styles = style_analysis['component_styles'][component_type.lower()]
-                if styles:
-                    # 简化输出样式
-                    for i, (selector, rules) in enumerate(styles.items()):
-                        if i < 3:  # 限制输出规则数量
-                            for prop, value in rules.items():
-                                f.write(f'  {prop}: {value};\n')
-            else:
-                f.write('  // 自定义样式\n')
-            
-            f.write('}}\n')
-            f.write('</style>\n')
+        # 渲染Vue组件文件（模板、脚本和样式三部分）
+        self._render_output(file_path, 'component.vue', name=formatted_name, component_type=component_type.lower(),
+                            template_html=self._clean_html_for_vue(html_content), style_analysis=style_analysis,
+                            computed_styles=computed_styles)
         
         logger.info(f"已创建组件: {formatted_name}")
             
@@ -467,187 +446,34 @@ class VueGenerator:
         """
         file_path = os.path.join(self.output_dir, 'src', 'views', 'HomeView.vue')
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            # 1. 模板部分
-            f.write('<template>\n')
-            f.write('  <div class="home">\n')
-            
-            # 添加Header组件(如果存在)
-            if 'layout' in html_analysis and html_analysis['layout'].get('header'):
-                f.write('    <Header />\n')
-            
-            # 创建主内容区域的布局
-            has_sidebar = 'layout' in html_analysis and html_analysis['layout'].get('sidebar')
-            
-            # 根据是否有侧边栏决定布局
-            if has_sidebar:
-                # 带侧边栏的两栏布局
-                sidebar_position = html_analysis['layout']['sidebar'].get('position', 'left')
-                
-                f.write('    <div class="main-container">\n')
-                
-                if sidebar_position == 'left':
-                    f.write('      <Sidebar class="sidebar" />\n')
-                    f.write('      <main class="content">\n')
-                    self._add_content_sections(f, html_analysis)
-                    f.write('      </main>\n')
-                else:
-                    f.write('      <main class="content">\n')
-                    self._add_content_sections(f, html_analysis)
-                    f.write('      </main>\n')
-                    f.write('      <Sidebar class="sidebar" />\n')
-                
-                f.write('    </div>\n')
-            else:
-                # 单栏布局
-                f.write('    <main class="content">\n')
-                self._add_content_sections(f, html_analysis)
-                f.write('    </main>\n')
-            
-            # 添加Footer组件(如果存在)
-            if 'layout' in html_analysis and html_analysis['layout'].get('footer'):
-                f.write('    <Footer />\n')
-            
-            f.write('  </div>\n')
-            f.write('</template>\n\n')
-            
-            # 2. 脚本部分
-            f.write('<script>\n')
-            
-            # 导入组件
-            f.write('// 导入布局组件\n')
-            imports = []
-            
-            if 'layout' in html_analysis and html_analysis['layout'].get('header'):
-                imports.append('import Header from "../components/Header.vue";')
-            
-            if 'layout' in html_analysis and html_analysis['layout'].get('footer'):
-                imports.append('import Footer from "../components/Footer.vue";')
-            
-            if has_sidebar:
-                imports.append('import Sidebar from "../components/Sidebar.vue";')
-            
-            # 导入内容组件
-            f.write('// 导入内容组件\n')
-            content_components = []
-            
-            for component in html_analysis.get('components', []):
-                if 'type' in component and component['type'].lower() in ['card', 'form', 'table']:
-                    component_name = component['type'].capitalize()
-                    import_stmt = f'import {component_name} from "../components/{component_name}.vue";'
-                    if import_stmt not in imports and import_stmt not in content_components:
-                        content_components.append(import_stmt)
-            
-            # 写入所有导入语句
-            for imp in imports + content_components:
-                f.write(imp + '\n')
-            
-            # 组件定义
-            f.write('\nexport default {\n')
-            f.write('  name: "HomeView",\n')
-            
-            # 注册组件
-            f.write('  components: {\n')
-            components = []
-            
-            if 'layout' in html_analysis and html_analysis['layout'].get('header'):
-                components.append('    Header')
-            
-            if 'layout' in html_analysis and html_analysis['layout'].get('footer'):
-                components.append('    Footer')
-            
-            if has_sidebar:
-                components.append('    Sidebar')
-            
-            # 添加内容组件
-            for component in html_analysis.get('components', []):
-                if 'type' in component and component['type'].lower() in ['card', 'form', 'table']:
-                    component_name = component['type'].capitalize()
-                    if component_name not in [c.strip() for c in components]:
-                        components.append(f'    {component_name}')
-            
-            f.write(',\n'.join(components))
-            f.write('\n  },\n')
-            
-            # 添加数据
-            f.write('  data() {\n')
-            f.write('    return {\n')
-            f.write(f'      title: "{page_meta.get("title", "首页")}",\n')
-            
-            # 根据分析结果添加适当的数据
-            if any(c.get('type') == 'card' for c in html_analysis.get('components', [])):
-                f.write('      cards: [\n')
-                f.write('        { id: 1, title: "卡片1", content: "卡片内容1", image: "" },\n')
-                f.write('        { id: 2, title: "卡片2", content: "卡片内容2", image: "" },\n')
-                f.write('      ],\n')
-            
-            if any(c.get('type') == 'table' for c in html_analysis.get('components', [])):
-                f.write('      tableData: {\n')
-                f.write('        headers: ["列1", "列2", "列3"],\n')
-                f.write('        rows: [\n')
-                f.write('          ["数据1-1", "数据1-2", "数据1-3"],\n')
-                f.write('          ["数据2-1", "数据2-2", "数据2-3"]\n')
-                f.write('        ]\n')
-                f.write('      },\n')
-            
-            f.write('    };\n')
-            f.write('  },\n')
-            
-            # 添加方法
-            f.write('  methods: {\n')
-            f.write('    // 页面方法\n')
-            f.write('  }\n')
-            f.write('};\n')
-            f.write('</script>\n\n')
-            
-            # 3. 样式部分
-            f.write('<style lang="scss">\n')
-            f.write('/* 首页样式 */\n')
-            f.write('.home {\n')
-            f.write('  display: flex;\n')
-            f.write('  flex-direction: column;\n')
-            f.write('  min-height: 100vh;\n')
-            f.write('}\n\n')
-            
-            # 主容器样式
-            f.write('.main-container {\n')
-            f.write('  display: flex;\n')
-            f.write('  flex: 1;\n')
-            
-            # 根据侧边栏位置设置方向
-            if has_sidebar:
-                sidebar_position = html_analysis['layout']['sidebar'].get('position', 'left')
-                if sidebar_position == 'right':
-                    f.write('  flex-direction: row;\n')
-                else:
-                    f.write('  flex-direction: row;\n')
-            
-            f.write('}\n\n')
-            
-            # 侧边栏样式
-            if has_sidebar:
-                f.write('.sidebar {\n')
-                f.write('  width: 250px;\n')
-                f.write('  padding: 20px;\n')
-                f.write('  background-color: #f5f5f5;\n')
-                f.write('}\n\n')
-            
-            # 内容区域样式
-            f.write('.content {\n')
-            f.write('  flex: 1;\n')
-            f.write('  padding: 20px;\n')
-            f.write('}\n\n')
-            
-            # 卡片容器样式
-            if any(c.get('type') == 'card' for c in html_analysis.get('components', [])):
-                f.write('.card-container {\n')
-                f.write('  display: grid;\n')
-                f.write('  grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));\n')
-                f.write('  gap: 20px;\n')
-                f.write('  margin-bottom: 20px;\n')
-                f.write('}\n')
-            
-            f.write('</style>\n')
+        layout = html_analysis.get('layout', {})
+        components = html_analysis.get('components', [])
+        
+        # 布局组件
+        has_sidebar = bool(layout.get('sidebar'))
+        layout_components = [name for name, key in (('Header', 'header'), ('Footer', 'footer'), ('Sidebar', 'sidebar'))
+                             if layout.get(key)]
+        
+        # 内容组件（卡片、表单和表格，按首次出现的顺序）
+        content_components = []
+        for component in components:
+            if 'type' in component and component['type'].lower() in ['card', 'form', 'table']:
+                component_name = component['type'].capitalize()
+                if component_name not in content_components:
+                    content_components.append(component_name)
+        
+        self._render_output(
+            file_path, 'HomeView.vue',
+            page_meta=page_meta,
+            has_header=bool(layout.get('header')),
+            has_footer=bool(layout.get('footer')),
+            has_sidebar=has_sidebar,
+            sidebar_position=layout['sidebar'].get('position', 'left') if has_sidebar else None,
+            layout_components=layout_components,
+            content_components=content_components,
+            has_cards=any(c.get('type') == 'card' for c in components),
+            has_table=any(c.get('type') == 'table' for c in components)
+        )
         
         logger.info("已创建 HomeView 组件")
     
@@ -673,43 +499,7 @@ class VueGenerator:
     def _create_form_view(self):
         """创建表单页面视图"""
         file_path = os.path.join(self.output_dir, 'src', 'views', 'FormView.vue')
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('<template>\n')
-            f.write('  <div class="form-page">\n')
-            f.write('    <h1>表单页面</h1>\n')
-            f.write('    <Form :formData="formData" @submit="handleSubmit" />\n')
-            f.write('  </div>\n')
-            f.write('</template>\n\n')
-            
-            f.write('<script>\n')
-            f.write('import Form from "../components/Form.vue";\n\n')
-            f.write('export default {\n')
-            f.write('  name: "FormView",\n')
-            f.write('  components: {\n')
-            f.write('    Form\n')
-            f.write('  },\n')
-            f.write('  data() {\n')
-            f.write('    return {\n')
-            f.write('      formData: {}\n')
-            f.write('    };\n')
-            f.write('  },\n')
-            f.write('  methods: {\n')
-            f.write('    handleSubmit(data) {\n')
-            f.write('      console.log("表单提交数据:", data);\n')
-            f.write('      // 处理表单提交\n')
-            f.write('    }\n')
-            f.write('  }\n')
-            f.write('};\n')
-            f.write('</script>\n\n')
-            
-            f.write('<style lang="scss">\n')
-            f.write('.form-page {\n')
-            f.write('  padding: 20px;\n')
-            f.write('  max-width: 800px;\n')
-            f.write('  margin: 0 auto;\n')
-            f.write('}\n')
-            f.write('</style>\n')
+        self._render_output(file_path, 'FormView.vue')
         
         logger.info("已创建 FormView 组件")
     
@@ -721,60 +511,10 @@ class VueGenerator:
             meta (dict): 页面元数据
         """
         file_path = os.path.join(self.output_dir, 'src', 'views', 'AboutView.vue')
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('<template>\n')
-            f.write('  <div class="about">\n')
-            f.write('    <h1>关于我们</h1>\n')
-            
-            # 使用meta描述
-            if meta.get('description'):
-                f.write(f'    <p>{meta["description"]}</p>\n')
-            else:
-                f.write('    <p>这是关于页面。</p>\n')
-            
-            f.write('  </div>\n')
-            f.write('</template>\n\n')
-            
-            f.write('<style lang="scss">\n')
-            f.write('.about {\n')
-            f.write('  padding: 20px;\n')
-            f.write('  max-width: 800px;\n')
-            f.write('  margin: 0 auto;\n')
-            f.write('}\n')
-            f.write('</style>\n')
+        self._render_output(file_path, 'AboutView.vue', meta=meta)
         
         logger.info("已创建 AboutView 组件")
     
-    def _add_content_sections(self, file, html_analysis):
-        """
-        向视图添加内容区域
-        
-        根据分析的组件添加内容区域，如卡片、表单等。
-        
-        参数:
-            file: 文件对象，用于写入内容
-            html_analysis (dict): HTML分析结果
-        """
-        # 添加主标题
-        file.write('        <h1>{{ title }}</h1>\n')
-        
-        # 添加卡片区域
-        if any(c.get('type') == 'card' for c in html_analysis.get('components', [])):
-            file.write('        <section class="card-container">\n')
-            file.write('          <Card v-for="card in cards" :key="card.id"\n')
-            file.write('                :title="card.title"\n')
-            file.write('                :content="card.content"\n')
-            file.write('                :image="card.image" />\n')
-            file.write('        </section>\n')
-        
-        # 添加表格区域
-        if any(c.get('type') == 'table' for c in html_analysis.get('components', [])):
-            file.write('        <section class="table-section">\n')
-            file.write('          <h2>数据表格</h2>\n')
-            file.write('          <Table :headers="tableData.headers" :items="tableData.rows" />\n')
-            file.write('        </section>\n')
-    
     def _generate_router(self):
         """生成Vue路由配置"""
         logger.info("生成路由配置")
@@ -782,40 +522,11 @@ class VueGenerator:
         router_dir = os.path.join(self.output_dir, 'src', 'router')
         router_path = os.path.join(router_dir, 'index.js')
         
-        with open(router_path, 'w', encoding='utf-8') as f:
-            f.write("import { createRouter, createWebHistory } from 'vue-router'\n")
-            f.write("import Home from '../views/Home.vue'\n\n")
-            
-            f.write("const routes = [\n")
-            f.write("  {\n")
-            f.write("    path: '/',\n")
-            f.write("    name: 'Home',\n")
-            f.write("    component: Home\n")
-            f.write("  },\n")
-            f.write("  {\n")
-            f.write("    path: '/about',\n")
-            f.write("    name: 'About',\n")
-            f.write("    // 路由级代码分割，生成分离的块\n")
-            f.write("    component: () => import('../views/About.vue')\n")
-            f.write("  }\n")
-            f.write("]\n\n")
-            
-            f.write("const router = createRouter({\n")
-            f.write("  history: createWebHistory(process.env.BASE_URL),\n")
-            f.write("  routes\n")
-            f.write("})\n\n")
-            
-            f.write("export default router\n")
+        self._render_output(router_path, 'router.js')
         
         # 创建一个简单的About视图
         about_path = os.path.join(self.output_dir, 'src', 'views', 'About.vue')
-        with open(about_path, 'w', encoding='utf-8') as f:
-            f.write("<template>\n")
-            f.write("  <div class=\"about\">\n")
-            f.write("    <h1>About Page</h1>\n")
-            f.write("    <p>This page was automatically generated by WebCloneAgent.</p>\n")
-            f.write("  </div>\n")
-            f.write("</template>\n")
+        self._render_output(about_path, 'About.vue')
     
     def _generate_store(self):
         """生成Vuex状态管理配置"""
@@ -824,23 +535,7 @@ class VueGenerator:
         store_dir = os.path.join(self.output_dir, 'src', 'store')
         store_path = os.path.join(store_dir, 'index.js')
         
-        with open(store_path, 'w', encoding='utf-8') as f:
-            f.write("import { createStore } from 'vuex'\n\n")
-            
-            f.write("export default createStore({\n")
-            f.write("  state: {\n")
-            f.write("    // 全局状态\n")
-            f.write("  },\n")
-            f.write("  mutations: {\n")
-            f.write("    // 修改状态的方法\n")
-            f.write("  },\n")
-            f.write("  actions: {\n")
-            f.write("    // 异步操作\n")
-            f.write("  },\n")
-            f.write("  modules: {\n")
-            f.write("    // 模块\n")
-            f.write("  }\n")
-            f.write("})\n")
+        self._render_output(store_path, 'store.js')
     
     def _generate_main_files(self, page_meta):
         """
@@ -853,51 +548,15 @@ class VueGenerator:
         
         # 创建main.js
         main_path = os.path.join(self.output_dir, 'src', 'main.js')
-        with open(main_path, 'w', encoding='utf-8') as f:
-            f.write("import { createApp } from 'vue'\n")
-            f.write("import App from './App.vue'\n")
-            f.write("import router from './router'\n")
-            f.write("import store from './store'\n")
-            f.write("import './assets/styles/main.scss'\n\n")
-            
-            f.write("createApp(App).use(store).use(router).mount('#app')\n")
+        self._render_output(main_path, 'main.js')
         
         # 创建App.vue
         app_path = os.path.join(self.output_dir, 'src', 'App.vue')
-        with open(app_path, 'w', encoding='utf-8') as f:
-            f.write("<template>\n")
-            f.write("  <router-view/>\n")
-            f.write("</template>\n\n")
-            
-            f.write("<style lang=\"scss\">\n")
-            f.write("// 全局样式\n")
-            f.write("body {\n")
-            f.write("  margin: 0;\n")
-            f.write("  font-family: Arial, sans-serif;\n")
-            f.write("}\n")
-            f.write("</style>\n")
+        self._render_output(app_path, 'App.vue')
         
         # 创建index.html
         index_path = os.path.join(self.output_dir, 'public', 'index.html')
-        title = page_meta.get('title', 'Vue App')
-        
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write("<!DOCTYPE html>\n")
-            f.write("<html lang=\"en\">\n")
-            f.write("<head>\n")
-            f.write("  <meta charset=\"utf-8\">\n")
-            f.write("  <meta http-equiv=\"X-UA-Compatible\" content=\"IE=edge\">\n")
-            f.write("  <meta name=\"viewport\" content=\"width=device-width,initial-scale=1.0\">\n")
-            f.write(f"  <title>{title}</title>\n")
-            f.write("</head>\n")
-            f.write("<body>\n")
-            f.write("  <noscript>\n")
-            f.write("    <strong>We're sorry but this app doesn't work properly without JavaScript enabled. Please enable it to continue.</strong>\n")
-            f.write("  </noscript>\n")
-            f.write("  <div id=\"app\"></div>\n")
-            f.write("  <!-- built files will be auto injected -->\n")
-            f.write("</body>\n")
-            f.write("</html>\n")
+        self._render_output(index_path, 'index.html', title=page_meta.get('title', 'Vue App'))
     
     def _generate_config_files(self):
         """生成Vue项目配置文件"""
@@ -905,60 +564,39 @@ class VueGenerator:
         
         # 创建package.json
         package_path = os.path.join(self.output_dir, 'package.json')
-        with open(package_path, 'w', encoding='utf-8') as f:
-            package_content = {
-                "name": "web-clone",
-                "version": "0.1.0",
-                "private": True,
-                "scripts": {
-                    "serve": "vue-cli-service serve",
-                    "build": "vue-cli-service build",
-                    "lint": "vue-cli-service lint"
-                },
-                "dependencies": {
-                    "core-js": "^3.8.3",
-                    "vue": "^3.2.13",
-                    "vue-router": "^4.0.3",
-                    "vuex": "^4.0.0"
-                },
-                "devDependencies": {
-                    "@vue/cli-plugin-babel": "~5.0.0",
-                    "@vue/cli-plugin-router": "~5.0.0",
-                    "@vue/cli-plugin-vuex": "~5.0.0",
-                    "@vue/cli-service": "~5.0.0",
-                    "sass": "^1.32.7",
-                    "sass-loader": "^12.0.0"
-                },
-                "browserslist": [
-                    "> 1%",
-                    "last 2 versions",
-                    "not dead",
-                    "not ie 11"
-                ]
-            }
-            
-            json.dump(package_content, f, indent=2)
+        package_content = {
+            "name": "web-clone",
+            "version": "0.1.0",
+            "private": True,
+            "scripts": {
+                "serve": "vue-cli-service serve",
+                "build": "vue-cli-service build",
+                "lint": "vue-cli-service lint"
+            },
+            "dependencies": {
+                "core-js": "^3.8.3",
+                "vue": "^3.2.13",
+                "vue-router": "^4.0.3",
+                "vuex": "^4.0.0"
+            },
+            "devDependencies": {
+                "@vue/cli-plugin-babel": "~5.0.0",
+                "@vue/cli-plugin-router": "~5.0.0",
+                "@vue/cli-plugin-vuex": "~5.0.0",
+                "@vue/cli-service": "~5.0.0",
+                "sass": "^1.32.7",
+                "sass-loader": "^12.0.0"
+            },
+            "browserslist": [
+                "> 1%",
+                "last 2 versions",
+                "not dead",
+                "not ie 11"
+            ]
+        }
+        
+        self._write_output(package_path, json.dumps(package_content, indent=2))
         
         # 创建README.md
         readme_path = os.path.join(self.output_dir, 'README.md')
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write("# Web Clone Vue Project\n\n")
-            f.write("This project was automatically generated by WebCloneAgent.\n\n")
-            
-            f.write("## Project setup\n")
-            f.write("```\n")
-            f.write("npm install\n")
-            f.write("```\n\n")
-            
-            f.write("### Compiles and hot-reloads for development\n")
-            f.write("```\n")
-            f.write("npm run serve\n")
-            f.write("```\n\n")
-            
-            f.write("### Compiles and minifies for production\n")
-            f.write("```\n")
-            f.write("npm run build\n")
-            f.write("```\n\n")
-            
-            f.write("### Customize configuration\n")
-            f.write("See [Configuration Reference](https://cli.vuejs.org/config/).\n") 
\ No newline at end of file
+        self._render_output(readme_path, 'README.md')
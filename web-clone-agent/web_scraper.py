@@ -16,6 +16,8 @@
 支持两种抓取模式:
 - 普通模式: 使用requests库抓取静态内容
 - Selenium模式: 可以执行JavaScript，抓取动态渲染的内容
+
+普通模式的HTTP请求可以录制为HAR归档，之后从归档回放而不访问网络（见 har.py）
 """
 
 import os
@@ -24,12 +26,14 @@ import logging
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from tqdm import tqdm  # 进度条库
 
+from tracing import span
+from counters import count_work
+from network_timing import TimingHTTPAdapter, describe
+
+# selenium和webdriver_manager只在使用Selenium模式时导入，见 _init_selenium
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -41,7 +45,13 @@ class WebScraper:
     支持普通抓取和使用Selenium的动态页面抓取。
     """
     
-    def __init__(self, use_selenium=False, wait_time=5, temp_dir="temp"):
+    # 模拟浏览器请求的请求头
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    }
+    
+    def __init__(self, use_selenium=False, wait_time=5, temp_dir="temp", keep_alive=False, timeout=30,
+                 recorder=None, archive=None):
         """
         初始化WebScraper
         
@@ -49,11 +59,31 @@ class WebScraper:
             use_selenium (bool): 是否使用Selenium进行动态网页爬取
             wait_time (int): 使用Selenium时等待页面加载的时间(秒)
             temp_dir (str): 临时文件保存目录
+            keep_alive (bool): close() 时是否保留HTTP连接池和浏览器，供后续页面复用
+                               （批量模式使用，最终由 shutdown() 释放）
+            timeout (float): HTTP请求超时时间(秒)
+            recorder (HarRecorder): 录制所有HTTP请求和响应（见 har.py），每个页面抓取完成后保存
+            archive (HarArchive): 从录制的归档回放，不访问网络
         """
         self.use_selenium = use_selenium  # 是否使用Selenium
         self.wait_time = wait_time        # Selenium等待时间
         self.temp_dir = temp_dir          # 临时文件目录
+        self.keep_alive = keep_alive      # 是否在多个页面之间复用连接和浏览器
+        self.timeout = timeout            # HTTP请求超时时间
         self.driver = None                # Selenium WebDriver
+        self.recorder = recorder          # HTTP录制器
+        self.archive = archive            # HTTP回放归档
+        
+        # HTTP会话：复用TCP/TLS连接，页面和它的CSS、JS通常来自同一主机
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+        # 记录每个新建连接的DNS、TCP连接和TLS握手耗时（见 network_timing.py）
+        self.session.mount('http://', TimingHTTPAdapter())
+        self.session.mount('https://', TimingHTTPAdapter())
+        
+        # 当前页面各请求的计时记录，页面抓取完成后放入结果的 'network'
+        self.network = []
+        self._fetch_started = time.perf_counter()
         
         # 创建临时目录(如果不存在)
         os.makedirs(temp_dir, exist_ok=True)
@@ -72,6 +102,11 @@ class WebScraper:
         try:
             logger.info("正在初始化Selenium WebDriver...")
             
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service
+            from selenium.webdriver.chrome.options import Options
+            from webdriver_manager.chrome import ChromeDriverManager
+            
             # 配置Chrome浏览器选项
             chrome_options = Options()
             chrome_options.add_argument("--headless")        # 无头模式(不显示浏览器窗口)
@@ -89,6 +124,42 @@ class WebScraper:
             logger.error(f"初始化Selenium WebDriver失败: {str(e)}")
             raise
     
+    def _http_get(self, url, **kwargs):
+        """
+        通过共享的HTTP会话发送GET请求（所有HTTP抓取都经过这里）
+        
+        配置了回放归档时从归档返回响应；配置了录制器时记录请求和响应。
+        每个请求（含重定向的每一跳）的计时记录追加到 self.network。
+        
+        参数:
+            url (str): 请求的URL
+            **kwargs: 传给 requests.Session.get 的其他参数
+            
+        返回:
+            requests.Response: 响应对象
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        count_work('http.requests')
+        with span('http.get', 'network', url=url, replay=self.archive is not None) as request_span:
+            started = time.perf_counter()
+            started_at = time.time()
+            if self.archive is not None:
+                response = self.archive.get(url)
+            else:
+                response = self.session.get(url, **kwargs)
+            timings = describe(response, started - self._fetch_started, time.perf_counter() - started)
+            self.network.extend(timings)
+            if self.recorder is not None:
+                self.recorder.record(response, started_at, timings)
+            request_span.set(status=response.status_code, bytes=len(response.content))
+            return response
+    
+    @staticmethod
+    def _decode(response):
+        """把响应内容解码为文本（统计解码的字节数，见 counters.py）"""
+        count_work('bytes.decoded', len(response.content))
+        return response.text
+    
     def fetch_url(self, url):
         """
         抓取指定URL的内容
@@ -107,16 +178,28 @@ class WebScraper:
                     'js_files': JS文件名列表,
                     'css_content': CSS内容字典,
                     'js_content': JS内容字典,
-                    'images': 图片URL列表
+                    'images': 图片URL列表,
+                    'network': 每个请求的计时记录列表（见 network_timing.describe）
                 }
         """
         logger.info(f"开始抓取URL: {url}")
+        self.network = []
+        self._fetch_started = time.perf_counter()
         
         # 根据配置选择抓取方法
-        if self.use_selenium:
-            return self._fetch_with_selenium(url)
-        else:
-            return self._fetch_with_requests(url)
+        with span('scrape.fetch', 'network', url=url, selenium=self.use_selenium) as fetch_span:
+            try:
+                if self.use_selenium:
+                    result = self._fetch_with_selenium(url)
+                else:
+                    result = self._fetch_with_requests(url)
+            finally:
+                # 抓取失败时也保存已录制的请求
+                if self.recorder is not None:
+                    self.recorder.save()
+            result['network'] = self.network
+            fetch_span.set(items=len(result['css_files']) + len(result['js_files']))
+            return result
     
     def _fetch_with_requests(self, url):
         """
@@ -131,18 +214,14 @@ class WebScraper:
             dict: 抓取结果字典
         """
         try:
-            # 设置请求头，模拟浏览器请求
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            }
-            
-            # 发送GET请求
-            response = requests.get(url, headers=headers, timeout=30)
+            # 发送GET请求（会话中已设置模拟浏览器的请求头）
+            response = self._http_get(url)
             response.raise_for_status()  # 如果返回4xx/5xx状态码，抛出异常
             
             # 获取页面内容并解析
-            html_content = response.text
-            soup = BeautifulSoup(html_content, 'html.parser')
+            html_content = self._decode(response)
+            with span('scrape.parse', 'html', bytes=len(response.content)):
+                soup = BeautifulSoup(html_content, 'html.parser')
             
             # 处理页面内容并返回结果
             return self._process_page(url, html_content, soup)
@@ -168,15 +247,16 @@ class WebScraper:
             if not self.driver:
                 self._init_selenium()
             
-            # 打开URL
-            self.driver.get(url)
-            
-            # 等待页面加载(让JavaScript有时间执行)
-            time.sleep(self.wait_time)
+            # 打开URL并等待页面加载(让JavaScript有时间执行)
+            count_work('browser.navigations')
+            with span('browser.render', 'network', url=url, wait=self.wait_time):
+                self.driver.get(url)
+                time.sleep(self.wait_time)
             
             # 获取渲染后的页面内容
             html_content = self.driver.page_source
-            soup = BeautifulSoup(html_content, 'html.parser')
+            with span('scrape.parse', 'html', bytes=len(html_content)):
+                soup = BeautifulSoup(html_content, 'html.parser')
             
             # 处理页面内容并返回结果
             return self._process_page(url, html_content, soup)
@@ -236,12 +316,11 @@ class WebScraper:
                 css_path = os.path.join(self.temp_dir, css_filename)
                 
                 try:
-                    # 下载CSS内容
-                    css_content = requests.get(css_url).text
-                    
-                    # 保存到文件
-                    with open(css_path, 'w', encoding='utf-8') as f:
-                        f.write(css_content)
+                    # 下载CSS内容并保存到文件
+                    with span('scrape.asset', 'network', kind='css', file=css_filename):
+                        css_content = self._decode(self._http_get(css_url))
+                        with open(css_path, 'w', encoding='utf-8') as f:
+                            f.write(css_content)
                     
                     # 添加到结果中
                     result['css_files'].append(css_filename)
@@ -264,12 +343,11 @@ class WebScraper:
                 js_path = os.path.join(self.temp_dir, js_filename)
                 
                 try:
-                    # 下载JS内容
-                    js_content = requests.get(js_url).text
-                    
-                    # 保存到文件
-                    with open(js_path, 'w', encoding='utf-8') as f:
-                        f.write(js_content)
+                    # 下载JS内容并保存到文件
+                    with span('scrape.asset', 'network', kind='js', file=js_filename):
+                        js_content = self._decode(self._http_get(js_url))
+                        with open(js_path, 'w', encoding='utf-8') as f:
+                            f.write(js_content)
                     
                     # 添加到结果中
                     result['js_files'].append(js_filename)
@@ -324,12 +402,23 @@ class WebScraper:
         """
         关闭资源
         
-        关闭Selenium WebDriver并释放资源
+        关闭Selenium WebDriver并释放资源；keep_alive 为 True 时保留，供下一个页面复用
+        """
+        if self.keep_alive:
+            return
+        self.shutdown()
+    
+    def shutdown(self):
+        """
+        释放全部资源（Selenium WebDriver和HTTP连接池），不受 keep_alive 影响
         """
-        if self.driver:
+        if getattr(self, 'driver', None):
             self.driver.quit()
             self.driver = None
             logger.info("已关闭Selenium WebDriver")
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
 
     def __del__(self):
         """
@@ -337,4 +426,4 @@ class WebScraper:
         
         确保在对象被销毁时关闭WebDriver
         """
-        self.close() 
\ No newline at end of file
+        self.shutdown() 
\ No newline at end of file